@@ -0,0 +1,71 @@
+"""
+Compares construction time and memory of dataset DataFrames built from untyped records
+with the typed conversion of ``ocdb.api.dataframe.make_dataframe``.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dataframe [--rows N]
+"""
+import argparse
+import random
+import time
+
+import pandas as pd
+
+from ocdb.api.dataframe import make_dataframe
+
+MISSING = -99.99
+
+
+def make_dataset(num_rows: int, seed: int = 0) -> dict:
+    """Create a synthetic SeaBASS-like dataset with *num_rows* records."""
+    rng = random.Random(seed)
+    stations = [f'ST{i:03d}' for i in range(50)]
+    records = []
+    for i in range(num_rows):
+        day = 1 + (i // 86400) % 28
+        seconds = i % 86400
+        records.append([
+            20170600 + day,
+            f'{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}',
+            round(rng.uniform(-60, 60), 4),
+            round(rng.uniform(-180, 180), 4),
+            rng.randint(0, 200),
+            MISSING if rng.random() < 0.05 else round(rng.uniform(0, 10), 4),
+            rng.choice(stations),
+        ])
+    return {
+        "metadata": {"missing": str(MISSING)},
+        "attributes": ["date", "time", "lat", "lon", "depth", "chl", "station"],
+        "records": records,
+    }
+
+
+def make_untyped_dataframe(ds: dict) -> pd.DataFrame:
+    """The former conversion: a DataFrame of list records with patched column names."""
+    df = pd.DataFrame(ds['records'])
+    df.columns = ds['attributes']
+    return df
+
+
+def measure(name: str, func, ds: dict):
+    t0 = time.perf_counter()
+    df = func(ds)
+    duration = time.perf_counter() - t0
+    memory = df.memory_usage(deep=True).sum()
+    print(f'{name:>8}: {duration:6.2f} s, {memory / 1024 / 1024:8.1f} MiB')
+    print('          ' + ', '.join(f'{column}={dtype}' for column, dtype in df.dtypes.items()))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='number of dataset records')
+    args = parser.parse_args(args)
+
+    ds = make_dataset(args.rows)
+    measure('untyped', make_untyped_dataframe, ds)
+    measure('typed', make_dataframe, ds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Measures bytes on the wire and end-to-end time of the OCDB client with and without
+gzip compression of JSON responses and SeaBASS uploads.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_gzip [--requests N] [--records N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+SEABASS_HEADER = """/begin_header
+/fields=date,time,lat,lon,depth,chl
+/units=yyyymmdd,hh:mm:ss,degrees,degrees,m,mg/m^3
+/delimiter=comma
+/missing=-999
+/end_header
+"""
+
+
+def make_dataset(num_records: int) -> dict:
+    return {
+        "id": "5d971154f9305e0001c6d700",
+        "attributes": ["date", "time", "lat", "lon", "depth", "chl"],
+        "records": [["20140723", "12:30:00", -19.9743 + i * 1e-4, 57.4493, i % 50, 0.0528 + i * 1e-5]
+                    for i in range(num_records)],
+    }
+
+
+def run(server: StandInServer, config: dict, func, num_requests: int):
+    api = OCDBApi(config_store=MemConfigStore(server_url=server.url, **config))
+    bytes_sent = server.bytes_sent
+    bytes_received = server.bytes_received
+    t0 = time.perf_counter()
+    for _ in range(num_requests):
+        func(api)
+    duration = time.perf_counter() - t0
+    api.close()
+    return ((server.bytes_sent - bytes_sent) / num_requests,
+            (server.bytes_received - bytes_received) / num_requests,
+            1000 * duration / num_requests)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='number of requests per run')
+    parser.add_argument('--records', type=int, default=5000, help='number of records per dataset and file')
+    args = parser.parse_args(args)
+
+    dataset = make_dataset(args.records)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        seabass_file = os.path.join(temp_dir, 'bench.sb')
+        with open(seabass_file, 'w') as fp:
+            fp.write(SEABASS_HEADER)
+            fp.writelines(','.join(map(str, record)) + '\n' for record in dataset['records'])
+
+        with StandInServer() as server:
+            server.route_json('GET', r'/datasets/plain', dataset)
+            server.route_json('GET', r'/datasets/gzip', dataset, compress=True)
+            server.route_json('POST', r'/store/upload/submission/validate', {'issues': [], 'status': 'OK'})
+
+            runs = (('get_dataset, identity', {}, lambda api: api.get_dataset('plain')),
+                    ('get_dataset, gzip', {}, lambda api: api.get_dataset('gzip')),
+                    ('validate, identity', {}, lambda api: api.validate_submission_file(seabass_file)),
+                    ('validate, gzip', {'compress-uploads': True},
+                     lambda api: api.validate_submission_file(seabass_file)))
+            for name, config, func in runs:
+                sent, received, millis = run(server, config, func, args.requests)
+                print(f'{name:>22}: {received:10.0f} bytes up, {sent:10.0f} bytes down, '
+                      f'{millis:7.2f} ms/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures the throughput of PBKDF2 password derivations by ocdb.api.utils:
+single derivations, memoized derivations and bulk derivations on a process pool.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_kdf [--passwords N] [--processes N]
+"""
+import argparse
+import time
+
+from ocdb.api import utils
+
+
+def run(name: str, func, num_derivations: int):
+    t0 = time.perf_counter()
+    func()
+    duration = time.perf_counter() - t0
+    print(f'{name:>20}: {num_derivations / duration:10.1f} derivations/s')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--passwords', type=int, default=64, help='number of passwords')
+    parser.add_argument('--processes', type=int, default=None, help='number of processes, defaults to CPUs')
+    args = parser.parse_args(args)
+
+    items = [(f'password{i}', f'salt{i}') for i in range(args.passwords)]
+
+    utils.clear_derivation_cache()
+    run('single', lambda: [utils.encrypt(txt, salt) for txt, salt in items], len(items))
+    run('single (memoized)', lambda: [utils.encrypt(txt, salt) for txt, salt in items], len(items))
+
+    utils.clear_derivation_cache()
+    run('bulk', lambda: utils.encrypt_many(items, max_workers=args.processes), len(items))
+    run('bulk (memoized)', lambda: utils.encrypt_many(items, max_workers=args.processes), len(items))
+
+
+if __name__ == '__main__':
+    main()
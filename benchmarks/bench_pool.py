@@ -0,0 +1,49 @@
+"""
+Compares request throughput of the OCDB client with and without persistent connections.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pool [--requests N]
+"""
+import argparse
+import time
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.transport import PooledTransport, UrllibTransport, Transport
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+DATASET = {
+    "id": "5d971154f9305e0001c6d700",
+    "attributes": ["date", "time", "lat", "lon", "depth", "chl"],
+    "records": [["20140723", "12:30:00", -19.9743, 57.4493, 0, 0.0528]] * 10,
+}
+
+
+def run(server: StandInServer, transport: Transport, num_requests: int) -> float:
+    api = OCDBApi(config_store=MemConfigStore(server_url=server.url), transport=transport)
+    t0 = time.perf_counter()
+    for _ in range(num_requests):
+        api.get_dataset(DATASET["id"])
+    duration = time.perf_counter() - t0
+    api.close()
+    return num_requests / duration
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='number of requests per run')
+    args = parser.parse_args(args)
+
+    with StandInServer() as server:
+        server.route_json('GET', r'/datasets/(?P<id>\w+)', DATASET)
+        for name, transport in (('urllib (no pooling)', UrllibTransport()),
+                                ('pooled', PooledTransport())):
+            connections = server.num_connections
+            rate = run(server, transport, args.requests)
+            print(f'{name:>20}: {rate:8.1f} requests/s, '
+                  f'{server.num_connections - connections} connection(s) opened')
+
+
+if __name__ == '__main__':
+    main()
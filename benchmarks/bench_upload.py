@@ -0,0 +1,124 @@
+"""
+Benchmark of the CPU time used by the OCDB client to upload a large documentation archive with
+upload_submission to a local stand-in OCDB server (benchmarks.standin), with the files of the form
+body sent by os.sendfile() ("zero-copy") and read through Python buffers ("streamed").
+
+Every upload runs in a fresh interpreter, whose CPU time (user and system) is measured around
+the upload alone, so that the time the server spends receiving the body is not counted.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_upload [--size MiB] [--repeat N] [--modes zero-copy,streamed] [--api sync|async]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+from benchmarks.standin import SyntheticOCDB
+from benchmarks.suite import _run_process, _write_upload_file
+from ocdb.api.api import JsonObj
+
+MODES = ('zero-copy', 'streamed')
+
+_BLOCK_SIZE = 1024 * 1024
+
+
+def run_child(args):
+    """Upload the documentation archive once and print the elapsed and CPU times as JSON."""
+    from ocdb.configstore import MemConfigStore
+
+    config_store = MemConfigStore(server_url=args.server_url,
+                                  **{'zero-copy-uploads': str(args.child == 'zero-copy').lower()})
+    dataset_file = os.path.join(args.work_dir, 'upload.sb')
+    doc_file = os.path.join(args.work_dir, 'docs.zip')
+    if args.api == 'async':
+        import asyncio
+        from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+
+        async def upload():
+            async with AsyncOCDBApi(config_store=config_store) as api:
+                await api.upload_submission('BENCH/SYNTH/synth01', dataset_file, 'bench', doc_files=doc_file)
+
+        def call():
+            asyncio.run(upload())
+    else:
+        from ocdb.api.OCDBApi import OCDBApi
+
+        def call():
+            api = OCDBApi(config_store=config_store)
+            api.upload_submission('BENCH/SYNTH/synth01', dataset_file, 'bench', doc_files=doc_file)
+            api.close()
+
+    t0, cpu0 = time.perf_counter(), time.process_time()
+    call()
+    print(json.dumps({'elapsed': time.perf_counter() - t0, 'cpu': time.process_time() - cpu0}))
+
+
+def run_mode(mode: str, ocdb: SyntheticOCDB, args, work_dir: str) -> JsonObj:
+    """Upload *args.repeat* times in mode *mode* and return the median elapsed and CPU times."""
+    command = [sys.executable, '-m', 'benchmarks.bench_upload', '--child', mode, '--server-url', ocdb.url,
+               '--work-dir', work_dir, '--api', args.api]
+    elapsed: List[float] = []
+    cpu: List[float] = []
+    for _ in range(args.repeat):
+        output, _ = _run_process(command)
+        result = json.loads(output.splitlines()[-1])
+        elapsed.append(result['elapsed'])
+        cpu.append(result['cpu'])
+    size = os.path.getsize(os.path.join(work_dir, 'docs.zip'))
+    elapsed_p50 = sorted(elapsed)[len(elapsed) // 2]
+    cpu_p50 = sorted(cpu)[len(cpu) // 2]
+    return {'elapsed_p50': elapsed_p50, 'cpu_p50': cpu_p50, 'mb_per_s': size / elapsed_p50 / 1e6,
+            'cpu_s_per_gib': cpu_p50 / (size / 1024 ** 3)}
+
+
+def _write_doc_file(file_path: str, size_mib: int):
+    """Write an incompressible file of *size_mib* MiB."""
+    block = os.urandom(_BLOCK_SIZE)
+    with open(file_path, 'wb') as fp:
+        for _ in range(size_mib):
+            fp.write(block)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2048, help='size of the documentation archive in MiB')
+    parser.add_argument('--repeat', type=int, default=3, help='number of uploads per mode')
+    parser.add_argument('--modes', default=','.join(MODES),
+                        help=f'comma-separated modes, default: all of {", ".join(MODES)}')
+    parser.add_argument('--api', choices=('sync', 'async'), default='sync', help='API used to upload')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--server-url', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args(args)
+
+    if args.child:
+        run_child(args)
+        return
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f'unknown modes: {", ".join(sorted(unknown))}')
+
+    results = {}
+    print(f'{"mode":>10} {"elapsed s":>10} {"MB/s":>8} {"CPU s":>8} {"CPU s/GiB":>10}')
+    with SyntheticOCDB(num_datasets=1, num_records=1) as ocdb, tempfile.TemporaryDirectory() as work_dir:
+        _write_upload_file(os.path.join(work_dir, 'upload.sb'), 0.1)
+        _write_doc_file(os.path.join(work_dir, 'docs.zip'), args.size)
+        for mode in modes:
+            stats = results[mode] = run_mode(mode, ocdb, args, work_dir)
+            print(f'{mode:>10} {stats["elapsed_p50"]:>10.2f} {stats["mb_per_s"]:>8.1f} {stats["cpu_p50"]:>8.2f} '
+                  f'{stats["cpu_s_per_gib"]:>10.3f}')
+
+    if 'zero-copy' in results and 'streamed' in results and results['streamed']['cpu_p50'] > 0:
+        change = 100 * (results['zero-copy']['cpu_p50'] / results['streamed']['cpu_p50'] - 1)
+        print(f'CPU time of zero-copy uploads compared with streamed uploads: {change:+.1f}%')
+
+
+if __name__ == '__main__':
+    main()
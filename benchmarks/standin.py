@@ -0,0 +1,154 @@
+"""
+A stand-in OCDB server serving synthetic SeaBASS datasets, used by the benchmark suite.
+
+Run from the repository root to serve it until interrupted:
+
+    python -m benchmarks.standin [--datasets N] [--records N] [--port N]
+"""
+import argparse
+import io
+import json
+import random
+import time
+import zipfile
+from typing import List
+
+from tests.server import StandInRequest, StandInServer
+
+ATTRIBUTES = ["date", "time", "lat", "lon", "depth", "chl", "station"]
+
+UNITS = ["yyyymmdd", "hh:mm:ss", "degrees", "degrees", "m", "mg/m^3", "none"]
+
+MISSING = -999
+
+
+def make_records(num_records: int, seed: int = 0) -> List[list]:
+    """Create *num_records* synthetic records of a SeaBASS dataset with the fields :data:`ATTRIBUTES`."""
+    rng = random.Random(seed)
+    stations = [f'ST{i:03d}' for i in range(50)]
+    records = []
+    for i in range(num_records):
+        seconds = i % 86400
+        records.append([
+            f'201706{1 + (i // 86400) % 28:02d}',
+            f'{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}',
+            round(rng.uniform(40, 45), 4),
+            round(rng.uniform(-70, -65), 4),
+            rng.randint(0, 200),
+            MISSING if rng.random() < 0.05 else round(rng.uniform(0, 10), 4),
+            rng.choice(stations),
+        ])
+    return records
+
+
+def make_seabass(records: List[list]) -> str:
+    """Return the text of a SeaBASS file holding *records*."""
+    header = ['/begin_header',
+              '/investigators=Synthetic',
+              '/affiliations=BENCH',
+              '/experiment=SYNTH',
+              '/cruise=synth01',
+              f'/fields={",".join(ATTRIBUTES)}',
+              f'/units={",".join(UNITS)}',
+              f'/missing={MISSING}',
+              '/delimiter=comma',
+              '/end_header']
+    return '\n'.join(header + [','.join(map(str, record)) for record in records]) + '\n'
+
+
+class SyntheticOCDB:
+    """
+    A :class:`StandInServer` implementing the OCDB API endpoints used by the benchmarks with
+    *num_datasets* datasets of *num_records* records each:
+
+    * ``GET /datasets`` finds datasets, honoring ``offset`` and ``count``
+    * ``GET /datasets/<id>`` gets a dataset
+    * ``POST /store/download`` downloads a zip archive of SeaBASS files
+    * ``POST /store/upload/submission`` and ``.../validate`` receive uploads of any size
+
+    All datasets share the same records, so that memory use of the server does not grow with *num_datasets*.
+    """
+
+    def __init__(self, num_datasets: int = 100, num_records: int = 1000, host: str = '127.0.0.1', port: int = 0):
+        self.dataset_ids = [f'{i:024x}' for i in range(1, num_datasets + 1)]
+        self._dataset_id_set = set(self.dataset_ids)
+        self.records = make_records(num_records)
+        self.seabass = make_seabass(self.records).encode('utf-8')
+        # The members of a dataset following "id" and "path", serialized once for all datasets
+        self._dataset_tail = json.dumps({"status": "PUBLISHED",
+                                         "metadata": {"missing": str(MISSING), "start_date": "20170601",
+                                                      "end_date": "20170628"},
+                                         "attributes": ATTRIBUTES, "records": self.records})[1:].encode('utf-8')
+        self.server = StandInServer(host, port)
+        self.server.route('GET', r'/datasets', self._find_datasets)
+        self.server.route('GET', r'/datasets/(?P<id>[0-9a-f]{24})', self._get_dataset)
+        self.server.route('POST', r'/store/download', self._download)
+        self.server.route_drain('POST', r'/store/upload/submission/validate', {'issues': [], 'status': 'OK'})
+        self.server.route_drain('POST', r'/store/upload/submission', {'status': 'OK', 'message': 'uploaded'})
+
+    @property
+    def url(self) -> str:
+        return self.server.url
+
+    def get_path(self, dataset_id: str) -> str:
+        return f'BENCH/SYNTH/synth01/dataset_{dataset_id[-6:]}.sb'
+
+    def start(self) -> 'SyntheticOCDB':
+        self.server.start()
+        return self
+
+    def stop(self):
+        self.server.stop()
+
+    def __enter__(self) -> 'SyntheticOCDB':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _find_datasets(self, request: StandInRequest):
+        offset = int(request.query.get('offset', 1)) - 1
+        count = int(request.query.get('count', 1000))
+        page = self.dataset_ids[offset:offset + count]
+        body = {"total_count": len(self.dataset_ids),
+                "datasets": [{"id": dataset_id, "path": self.get_path(dataset_id),
+                              "filename": self.get_path(dataset_id).split('/')[-1]} for dataset_id in page],
+                "locations": {dataset_id: json.dumps({"type": "MultiPoint",
+                                                      "coordinates": [[-68.0, 43.5], [-67.5, 44.0]]})
+                              for dataset_id in page}}
+        return 200, {'Content-Type': 'application/json'}, json.dumps(body).encode('utf-8')
+
+    def _get_dataset(self, request: StandInRequest):
+        dataset_id = request.params['id']
+        if dataset_id not in self._dataset_id_set:
+            return 404, {'Content-Type': 'application/json'}, b'{"message": "not found"}'
+        head = json.dumps({"id": dataset_id, "path": self.get_path(dataset_id)}).encode('utf-8')
+        return 200, {'Content-Type': 'application/json'}, head[:-1] + b', ' + self._dataset_tail
+
+    def _download(self, request: StandInRequest):
+        dataset_ids = request.json().get('id_list', [])
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zf:
+            for dataset_id in dataset_ids:
+                zf.writestr(self.get_path(dataset_id), self.seabass)
+        return 200, {'Content-Type': 'application/zip'}, buffer.getvalue()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datasets', type=int, default=100, help='number of datasets')
+    parser.add_argument('--records', type=int, default=1000, help='number of records per dataset')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on')
+    args = parser.parse_args(args)
+
+    with SyntheticOCDB(args.datasets, args.records, port=args.port) as ocdb:
+        print(f'Serving {args.datasets} datasets of {args.records} records at {ocdb.url}, press Ctrl+C to stop')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
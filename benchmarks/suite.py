@@ -0,0 +1,239 @@
+"""
+Reproducible benchmark suite of the OCDB client against a local stand-in OCDB server serving
+synthetic SeaBASS datasets (benchmarks.standin).
+
+Measures latency, throughput and peak RSS of get_dataset, find_datasets, upload_submission,
+download_datasets_by_ids and the startup of ocdb-cli. Every scenario runs in a fresh interpreter,
+so that its peak RSS is that of the client alone and scenarios do not warm up each other.
+Results are saved as JSON, which can be compared with the results of another version:
+
+    python -m benchmarks.suite --output before.json
+    git checkout <other version>
+    python -m benchmarks.suite --output after.json --compare before.json
+
+Run from the repository root:
+
+    python -m benchmarks.suite [--datasets N] [--records N] [--repeat N] [--upload-size MiB]
+                               [--scenarios NAME,...] [--output FILE] [--compare FILE]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List, Optional, Tuple
+
+from benchmarks.standin import ATTRIBUTES, SyntheticOCDB, make_records, make_seabass
+from ocdb.api.api import JsonObj
+
+SCENARIOS = ('cli_startup', 'get_dataset', 'get_dataset_pandas', 'find_datasets', 'upload_submission',
+             'download_datasets_by_ids')
+
+# Metrics compared by --compare, and whether a greater value is better
+COMPARED_METRICS = (('latency_p50', False), ('latency_p95', False), ('ops_per_s', True), ('mb_per_s', True),
+                    ('peak_rss_mib', False))
+
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_scenario(name: str, ocdb: SyntheticOCDB, args, work_dir: str) -> JsonObj:
+    """Run scenario *name* in a fresh interpreter and return its statistics."""
+    if name == 'cli_startup':
+        command = [sys.executable, '-m', 'ocdb.main', '--version']
+        latencies = []
+        peak_rss = None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            _, rss = _run_process(command)
+            latencies.append(time.perf_counter() - t0)
+            peak_rss = max(peak_rss or 0, rss) if rss is not None else None
+        return _summarize(latencies, 0, peak_rss)
+
+    command = [sys.executable, '-m', 'benchmarks.suite', '--child', name, '--server-url', ocdb.url,
+               '--work-dir', work_dir, '--datasets', str(args.datasets), '--repeat', str(args.repeat),
+               '--upload-size', str(args.upload_size)]
+    output, peak_rss = _run_process(command)
+    result = json.loads(output.splitlines()[-1])
+    return _summarize(result['latencies'], result['bytes'], peak_rss)
+
+
+def run_child(name: str, args):
+    """Run the client side of scenario *name* and print the latencies and bytes transferred as JSON."""
+    from ocdb.api.OCDBApi import OCDBApi
+    from ocdb.api.tracing import RequestEvent
+    from ocdb.configstore import MemConfigStore
+
+    api = OCDBApi(config_store=MemConfigStore(server_url=args.server_url))
+    num_bytes = 0
+
+    def count_bytes(event: RequestEvent):
+        nonlocal num_bytes
+        if event.kind == RequestEvent.END:
+            num_bytes += event.bytes_sent + event.bytes_received
+
+    api.request_tracer.add_hook(count_bytes)
+    dataset_ids = [f'{i:024x}' for i in range(1, args.datasets + 1)]
+    calls: List[Callable[[], object]]
+    if name in ('get_dataset', 'get_dataset_pandas'):
+        fmt = 'pandas' if name == 'get_dataset_pandas' else 'json'
+        if fmt == 'pandas':
+            import pandas  # noqa: F401, imported before timing
+        calls = [lambda i=i: api.get_dataset(dataset_ids[i % len(dataset_ids)], fmt=fmt)
+                 for i in range(args.repeat)]
+    elif name == 'find_datasets':
+        calls = [lambda: api.find_datasets(expr='cruise:synth01', count=len(dataset_ids))] * args.repeat
+    elif name == 'upload_submission':
+        dataset_file = os.path.join(args.work_dir, 'upload.sb')
+        _write_upload_file(dataset_file, args.upload_size)
+        calls = [lambda i=i: api.upload_submission('BENCH/SYNTH/synth01', dataset_file, f'bench-{i}')
+                 for i in range(args.repeat)]
+    elif name == 'download_datasets_by_ids':
+        output_dir = os.path.join(args.work_dir, 'download')
+        calls = [lambda: api.download_datasets_by_ids(dataset_ids, False, None, output_dir, keep_zip=False)] \
+            * args.repeat
+    else:
+        raise ValueError(f'unknown scenario "{name}"')
+
+    latencies = []
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - t0)
+    api.close()
+    print(json.dumps({'latencies': latencies, 'bytes': num_bytes}))
+
+
+def compare(results: JsonObj, baseline: JsonObj) -> List[str]:
+    """Return lines comparing the metrics of *results* with those of *baseline*."""
+    lines = [f'Compared with {baseline.get("version")} of {baseline.get("timestamp")}:']
+    for name, stats in results['results'].items():
+        base_stats = baseline.get('results', {}).get(name)
+        if base_stats is None:
+            continue
+        changes = []
+        for metric, greater_is_better in COMPARED_METRICS:
+            value, base_value = stats.get(metric), base_stats.get(metric)
+            if value is None or not base_value:
+                continue
+            change = 100 * (value - base_value) / base_value
+            worse = change < 0 if greater_is_better else change > 0
+            changes.append(f'{metric} {change:+.1f}%{" (worse)" if worse and abs(change) >= 10 else ""}')
+        lines.append(f'{name:>26}: {", ".join(changes)}')
+    return lines
+
+
+def _summarize(latencies: List[float], num_bytes: int, peak_rss: Optional[int]) -> JsonObj:
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'count': len(latencies),
+        'latency_mean': total / len(latencies),
+        'latency_p50': _percentile(ordered, 0.5),
+        'latency_p95': _percentile(ordered, 0.95),
+        'latency_max': ordered[-1],
+        'ops_per_s': len(latencies) / total if total > 0 else None,
+        'bytes': num_bytes,
+        'mb_per_s': num_bytes / total / 1e6 if total > 0 and num_bytes else None,
+        'peak_rss_mib': peak_rss / (1024 * 1024) if peak_rss is not None else None,
+    }
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _run_process(command: List[str]) -> Tuple[str, Optional[int]]:
+    """Run *command* and return its output and its peak RSS in bytes, None if it cannot be measured."""
+    process = subprocess.Popen(command, cwd=_ROOT_DIR, stdout=subprocess.PIPE, text=True)
+    output = process.stdout.read()
+    process.stdout.close()
+    if not hasattr(os, 'wait4'):
+        process.wait()
+        rss = None
+    else:
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        # ru_maxrss is given in bytes on macOS and in KiB elsewhere
+        rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    if process.returncode != 0:
+        raise RuntimeError(f'{" ".join(command)} failed with exit code {process.returncode}')
+    return output, rss
+
+
+def _write_upload_file(file_path: str, size_mib: float):
+    """Write a SeaBASS file of about *size_mib* MiB."""
+    records = make_seabass(make_records(10000)).split('\n/end_header\n', 1)[1]
+    size = int(size_mib * 1024 * 1024)
+    with open(file_path, 'w') as fp:
+        fp.write(make_seabass([]))
+        written = 0
+        while written < size:
+            fp.write(records)
+            written += len(records)
+
+
+def _format_row(name: str, stats: JsonObj) -> str:
+    def fmt(value, scale=1.0, digits=1):
+        return f'{value * scale:.{digits}f}' if value is not None else '-'
+
+    return (f'{name:>26} {stats["count"]:>6} {fmt(stats["latency_p50"], 1000, 2):>10} '
+            f'{fmt(stats["latency_p95"], 1000, 2):>10} {fmt(stats["ops_per_s"]):>9} '
+            f'{fmt(stats["mb_per_s"], 1, 2):>8} {fmt(stats["peak_rss_mib"]):>9}')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--datasets', type=int, default=100, help='number of datasets served')
+    parser.add_argument('--records', type=int, default=10000, help='number of records per dataset')
+    parser.add_argument('--repeat', type=int, default=20, help='number of calls per scenario')
+    parser.add_argument('--upload-size', type=float, default=20, help='size of the uploaded file in MiB')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'comma-separated scenarios, default: all of {", ".join(SCENARIOS)}')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='compare the results with those of an earlier --output')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--server-url', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args(args)
+
+    if args.child:
+        run_child(args.child, args)
+        return
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(sorted(unknown))}')
+
+    from ocdb.version import VERSION
+    results = {
+        'version': VERSION,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'datasets': args.datasets, 'records': args.records, 'repeat': args.repeat,
+                       'upload_size_mib': args.upload_size, 'fields': ATTRIBUTES},
+        'results': {},
+    }
+    print(f'{"scenario":>26} {"calls":>6} {"p50 ms":>10} {"p95 ms":>10} {"ops/s":>9} {"MB/s":>8} {"RSS MiB":>9}')
+    with SyntheticOCDB(args.datasets, args.records) as ocdb, tempfile.TemporaryDirectory() as work_dir:
+        for name in scenarios:
+            stats = run_scenario(name, ocdb, args, work_dir)
+            results['results'][name] = stats
+            print(_format_row(name, stats))
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+        print('\n'.join(compare(results, baseline)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,718 @@
+import asyncio
+import contextlib
+import fnmatch
+import http.client
+import json
+import os
+import time
+import urllib.parse
+import urllib.request
+import zipfile
+from typing import Optional, Sequence, List, Union, AsyncIterator, Awaitable, Callable, Iterable, Tuple, TypeVar, \
+    TYPE_CHECKING
+
+from . import utils
+from .compression import decode_content, make_decompressor
+from .jsonstream import JsonArrayParser
+from .query import DatasetQuery
+from .aiotransport import AsyncTransport, AsyncResponse, DEFAULT_MAX_CONNECTIONS
+from .api import Api, JsonObj
+from .retry import RequestExecutor
+from .export import get_export_format, write_dataframe
+from .tracing import TracedAsyncResponse
+from .transport import DEFAULT_IDLE_TIMEOUT
+from .mpf import MultiPartForm
+from .parallel import split_batches
+from .download import DownloadStats, PART_SUFFIX
+from .unzip import StreamingZipExtractor, UnsupportedZipStreamError
+from .OCDBApi import OCDBApiBase, OCDBApi, DEFAULT_MAX_WORKERS, FIDRAD_UPLOAD_MAX_FILES, \
+    DEFAULT_UPLOAD_MAX_FILES, DEFAULT_UPLOAD_MAX_BYTES, _ensure_sequence, _split_dataset_path, _zip_file_name, \
+    _merge_batch_results, _key_file_results, _check_submission_files, _merge_validation_results, _is_transient_error, \
+    _longest_literal, _RecordChunker, DEFAULT_DELETE_RETRIES, DELETE_RETRY_DELAY, _collect_sync_refs, _get_sync_ids, \
+    _apply_sync, _is_true, _get_fidrad_delete_path
+from ..configstore import ConfigStore
+from ..version import VERSION
+from ocdb.api.util import DATASET_TYPES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def new_async_api(config_store: ConfigStore = None, server_url: str = None,
+                  transport: AsyncTransport = None) -> 'AsyncOCDBApi':
+    """Factory that creates a new asynchronous API instance."""
+    return AsyncOCDBApi(config_store=config_store, server_url=server_url, transport=transport)
+
+
+class AsyncOCDBApi(OCDBApiBase, Api):
+    """
+    Asynchronous counterpart of OCDBApi. All remote methods are coroutines and may be awaited
+    concurrently in large numbers on a single event loop, e.g. using ``asyncio.gather()``.
+    Configuration and login cookies are shared with OCDBApi.
+    Unlike OCDBApi, datasets are not read from the local dataset cache.
+    """
+
+    def __init__(self,
+                 config_store: ConfigStore = None,
+                 server_url: str = None,
+                 transport: AsyncTransport = None):
+        self._transport = transport
+        super().__init__(config_store=config_store, server_url=server_url)
+
+    @property
+    def transport(self) -> AsyncTransport:
+        """
+        Get the transport used to send HTTP requests. Unless given to the constructor, at most
+        "pool-size" connections per host (default 100) are opened, kept alive for "pool-idle-timeout" seconds.
+        Files are uploaded with ``loop.sendfile()`` unless the "zero-copy-uploads" parameter is set to false.
+        """
+        if self._transport is None:
+            self._transport = AsyncTransport(
+                max_connections=int(self.get_config_param('pool-size', DEFAULT_MAX_CONNECTIONS)),
+                idle_timeout=float(self.get_config_param('pool-idle-timeout', DEFAULT_IDLE_TIMEOUT)),
+                zero_copy=_is_true(self.get_config_param('zero-copy-uploads', True))
+            )
+        return self._transport
+
+    async def close(self):
+        """Close all connections held by this API instance."""
+        if self._transport is not None:
+            await self._transport.close()
+        if self._dataset_mirror is not None:
+            self._dataset_mirror.close()
+            self._dataset_mirror = None
+
+    async def __aenter__(self) -> 'AsyncOCDBApi':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # Remote dataset access
+
+    async def fidrad_upload(self, cal_char_files: Union[str, Sequence[str]],
+                            disagree_publication: bool) -> JsonObj:
+        """Generate a submission by uploading Cal/Char files to the data store."""
+        form = MultiPartForm()
+        form.add_field('disagree_publication', str(disagree_publication))
+        for cal_char_file in _ensure_sequence(cal_char_files):
+            form.add_file('cal_char_files', os.path.basename(cal_char_file), cal_char_file, mime_type="text/plain")
+        return await self._post_form('/store/FidRadDB/upload/cal_char', form, form.method)
+
+    async def fidrad_upload_parallel(self, cal_char_files: Sequence[str], disagree_publication: bool,
+                                     max_workers: int = DEFAULT_MAX_WORKERS,
+                                     max_files: int = FIDRAD_UPLOAD_MAX_FILES,
+                                     max_bytes: Optional[int] = DEFAULT_UPLOAD_MAX_BYTES) -> JsonObj:
+        """Upload any number of Cal/Char files in batches sent by up to *max_workers* concurrent requests."""
+        batches = split_batches(_ensure_sequence(cal_char_files), max_files, max_bytes)
+        results = await _gather(lambda batch: self.fidrad_upload(batch, disagree_publication), batches, max_workers)
+        return _merge_batch_results(results)
+
+    async def fidrad_history_tail(self, num_lines: int) -> JsonObj:
+        """Get the tail of the FidRadDb history with the user defined number of lines."""
+        return await self._fetch_json(self._make_request(f'/store/FidRadDB/history/tail/{num_lines}', method="GET"))
+
+    async def fidrad_history_search(self, search_string: str, max_num_lines: int) -> JsonObj:
+        """Returns a grep-like but bottom-up search result from the FidRadDB history file."""
+        quoted_search = urllib.parse.quote(search_string)
+        request = self._make_request(f'/store/FidRadDB/history/search/{quoted_search}/{max_num_lines}', method="GET")
+        return await self._fetch_json(request)
+
+    async def fidrad_list_files(self, name_part: str) -> JsonObj:
+        """Lists the files available on the server."""
+        quoted_name_part = urllib.parse.quote(name_part)
+        return await self._fetch_json(self._make_request(f'/store/FidRadDB/list/files/{quoted_name_part}',
+                                                         method="GET"))
+
+    async def fidrad_delete_file(self, file_name: str) -> JsonObj:
+        """Deletes the requested file."""
+        return await self._fetch_json(self._make_request(_get_fidrad_delete_path(file_name), method="DELETE"))
+
+    async def fidrad_delete_files(self, pattern: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                                  max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """Delete all files whose names match the glob *pattern*, see OCDBApi.fidrad_delete_files()."""
+        files = await self.fidrad_list_files(_longest_literal(pattern) or '__ALL__')
+        if not isinstance(files, list):
+            raise ValueError(f'Cannot list files: {files}')
+        file_names = sorted(file_name for file_name in files if fnmatch.fnmatchcase(file_name, pattern))
+        return await _delete_items(self._make_bulk_delete(_get_fidrad_delete_path), file_names, max_workers,
+                                   max_retries, dry_run)
+
+    async def fidrad_download_file(self, file_name: str, output_dir: str) -> str:
+        """Download a FidRadDB Cal/Char file to *output_dir*."""
+        quoted_filename = urllib.parse.quote(file_name)
+        request = self._make_request(f'/store/FidRadDB/download/file/{quoted_filename}', method="GET")
+        output_dir = output_dir or '.'
+        if os.path.isfile(output_dir):
+            return f"Unable to write file to '{output_dir}' because output_dir is an existing file."
+        os.makedirs(output_dir, exist_ok=True)
+        out_file_path = os.path.join(output_dir, file_name)
+        stats = await self._fetch_file(request, out_file_path)
+        return f'File successfully written to {out_file_path} ({stats})'
+
+    async def upload_submission(self, path: str, dataset_files: Union[str, Sequence[str]],
+                                submission_id: str, doc_files: Optional[Union[str, Sequence[str]]] = None,
+                                publication_date: Optional[str] = None,
+                                allow_publication: Optional[bool] = False) -> JsonObj:
+        """Generate a submission by uploading database and files to the submission database."""
+        form = MultiPartForm()
+        form.add_field('path', path)
+        form.add_field('submissionid', submission_id)
+        form.add_field('publicationdate', str(publication_date))
+        form.add_field('allowpublication', str(allow_publication))
+        for dataset_file in _ensure_sequence(dataset_files):
+            form.add_file('datasetfiles', os.path.basename(dataset_file), dataset_file, mime_type="text/plain")
+        for doc_file in _ensure_sequence(doc_files):
+            form.add_file('docfiles', os.path.basename(doc_file), doc_file)
+        return await self._post_form('/store/upload/submission', form, form.method, compress=True)
+
+    async def upload_submission_parallel(self, path: str, dataset_files: Union[str, Sequence[str]],
+                                         submission_id: str, doc_files: Optional[Union[str, Sequence[str]]] = None,
+                                         publication_date: Optional[str] = None,
+                                         allow_publication: Optional[bool] = False,
+                                         max_workers: int = DEFAULT_MAX_WORKERS,
+                                         max_files: int = DEFAULT_UPLOAD_MAX_FILES,
+                                         max_bytes: Optional[int] = DEFAULT_UPLOAD_MAX_BYTES) -> JsonObj:
+        """
+        Upload a large submission using concurrent requests, see OCDBApi.upload_submission_parallel().
+        """
+        dataset_files = list(_ensure_sequence(dataset_files))
+        if not dataset_files:
+            raise ValueError('at least one dataset file must be given')
+        first_batch, *other_batches = split_batches(dataset_files, max_files, max_bytes)
+        first_result = await self.upload_submission(path, first_batch, submission_id,
+                                                    publication_date=publication_date,
+                                                    allow_publication=allow_publication)
+        files = [(file_name, 'MEASUREMENT') for batch in other_batches for file_name in batch]
+        files += [(file_name, 'DOCUMENT') for file_name in _ensure_sequence(doc_files)]
+        results = await _gather(lambda item: self.add_submission_file(submission_id, *item), files, max_workers)
+        return _merge_batch_results(_key_file_results(results), first_result)
+
+    async def download_datasets_by_ids(self, ids: List[str], download_docs: bool, out_fn: Optional[str],
+                                       output_dir: str = '.', keep_zip: bool = True) -> str:
+        """Download dataset files by dataset IDs and extract them into *output_dir* while downloading."""
+        data = json.dumps({'id_list': ids, 'docs': download_docs}).encode('utf-8')
+        request = self._make_request('/store/download', data=data, method="POST")
+        message, out_fn = _zip_file_name(out_fn)
+        stats = await self._download_zip(request, out_fn if keep_zip else None, output_dir)
+        return message + f'{ids} downloaded to {out_fn if keep_zip else output_dir}' \
+                         f' ({stats})'
+
+    async def delete_dataset(self, dataset_id: str):
+        """Delete a dataset."""
+        return await self._fetch(self._make_request(f'/datasets/{dataset_id}', method="DELETE"))
+
+    async def delete_datasets(self, dataset_ids: Sequence[str], max_workers: int = DEFAULT_MAX_WORKERS,
+                              max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """Delete many datasets concurrently, see OCDBApi.delete_datasets()."""
+        delete = self._make_bulk_delete(lambda dataset_id: f'/datasets/{dataset_id}')
+        return await _delete_items(delete, dataset_ids, max_workers, max_retries, dry_run)
+
+    async def delete_datasets_by_submission(self, submission_id: str):
+        """Remove all data from the search database linked to a submission."""
+        return await self._fetch_json(self._make_request(f'/datasets/submission/{submission_id}', method="DELETE"))
+
+    async def get_datasets_by_submission(self, submission_id: str):
+        """Get all data from the search database linked to a submission."""
+        return await self._fetch_json(self._make_request(f'/datasets/submission/{submission_id}', method="GET"))
+
+    async def get_dataset(self, dataset_id: str, fmt: str = 'json') -> Union[JsonObj, 'pd.DataFrame']:
+        """Get a dataset from the Search Database by dataset ID."""
+        js = await self._fetch_json(self._make_request(f'/datasets/{dataset_id}', method="GET"))
+        return OCDBApi._make_pandas_from_dataset(js) if fmt == 'pandas' else js
+
+    async def iter_dataset_records(self, dataset_id: str, fmt: str = 'json', chunk_size: Optional[int] = None) \
+            -> AsyncIterator[Union[list, List[list], 'pd.DataFrame']]:
+        """
+        Get the records of a dataset while the response is received, one by one or in chunks of *chunk_size*
+        records, as by OCDBApi.iter_dataset_records().
+        """
+        parser = JsonArrayParser('records')
+        chunker = _RecordChunker(parser.members, fmt, chunk_size)
+        response = await self._open(self._make_request(f'/datasets/{dataset_id}', method="GET"))
+        async with response:
+            async for records in _iter_parsed(parser, response):
+                for item in chunker.add(records):
+                    yield item
+        for item in chunker.flush():
+            yield item
+
+    async def get_datasets_many(self, dataset_ids: Sequence[str], fmt: str = 'json',
+                                max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = False) \
+            -> Union[List[Tuple[str, Optional[JsonObj], Optional[Exception]]], 'pd.DataFrame']:
+        """
+        Get many datasets by ID with up to *max_workers* requests in flight.
+
+        For fmt 'json', a list of tuples (dataset_id, dataset, error) is returned, in the order of
+        completion or, if *ordered* is True, in the order of *dataset_ids*.
+        For fmt 'pandas', a single DataFrame is returned as by OCDBApi.get_datasets_many().
+        """
+        results = await _gather(self.get_dataset, dataset_ids, max_workers, ordered=ordered or fmt == 'pandas')
+        if fmt != 'pandas':
+            return results
+
+        frames = []
+        errors = {}
+        for dataset_id, dataset, error in results:
+            if error is not None:
+                errors[dataset_id] = str(error)
+                continue
+            df = OCDBApi._make_pandas_from_dataset(dataset)
+            df.insert(0, 'dataset_id', dataset_id)
+            frames.append(df)
+        import pandas as pd
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['dataset_id'])
+        df.attrs['errors'] = errors
+        return df
+
+    async def get_dataset_by_name(self, dataset_path: str, fmt: str = 'json') -> Union[JsonObj, 'pd.DataFrame']:
+        """Get a dataset from the Search Database by its path affil/project/cruise/name."""
+        path_components = _split_dataset_path(dataset_path)
+        if len(path_components) < 4:
+            raise ValueError("Invalid dataset path, "
+                             f"must have format affil/project/cruise/name, but was {dataset_path}")
+        affil, project, cruise = path_components[0:3]
+        name = "/".join(path_components[3:])
+        js = await self._fetch_json(self._make_request(f'/datasets/{affil}/{project}/{cruise}/{name}', method="GET"))
+        return OCDBApi._make_pandas_from_dataset(js) if fmt == 'pandas' else js
+
+    async def export_dataset(self, dataset_id: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """Write a dataset given by dataset ID to a Parquet, Feather or CSV file."""
+        fmt = get_export_format(file_path, fmt)
+        df = await self.get_dataset(dataset_id, fmt='pandas')
+        return await asyncio.get_running_loop().run_in_executor(None, write_dataframe, df, file_path, fmt)
+
+    async def export_dataset_by_name(self, dataset_path: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """Write a dataset given by its path affil/project/cruise/name to a Parquet, Feather or CSV file."""
+        fmt = get_export_format(file_path, fmt)
+        df = await self.get_dataset_by_name(dataset_path, fmt='pandas')
+        return await asyncio.get_running_loop().run_in_executor(None, write_dataframe, df, file_path, fmt)
+
+    async def list_datasets_in_path(self, dataset_path: str) -> JsonObj:
+        """List datasets in path affil/project/cruise."""
+        try:
+            affil, project, cruise = _split_dataset_path(dataset_path)
+        except ValueError as e:
+            raise ValueError(f"Invalid dataset path, "
+                             f"must have format affil/project/cruise, but was {dataset_path}") from e
+        return await self._fetch_json(self._make_request(f'/datasets/{affil}/{project}/{cruise}', method="GET"))
+
+    async def find_datasets(self, local: bool = False, **kwargs) -> JsonObj:
+        """Search datasets by expression, or in the local dataset mirror if *local* is True."""
+        if local:
+            return self.dataset_mirror.find(**kwargs)
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        kwargs['geojson'] = True
+        params = urllib.parse.urlencode(kwargs)
+        return await self._fetch_json(self._make_request(f'/datasets?{params}', method="GET"))
+
+    async def query_datasets(self, query: DatasetQuery, local: bool = False, keep_unlocated: bool = False) -> JsonObj:
+        """Search datasets by a DatasetQuery as by OCDBApi.query_datasets()."""
+        result = await self.find_datasets(local=local, **query.to_params())
+        return result if local else query.filter(result, keep_unlocated=keep_unlocated)
+
+    async def sync_datasets(self, full: bool = False, page_size: int = 1000, max_workers: int = DEFAULT_MAX_WORKERS,
+                            **kwargs) -> JsonObj:
+        """Build or refresh the local dataset mirror as by OCDBApi.sync_datasets()."""
+        if page_size < 1:
+            raise ValueError('"page_size" must be a positive integer')
+        mirror = self.dataset_mirror
+        mirror.begin_sync(self.server_url)
+        refs = {}
+        locations = {}
+        offset = 1
+        while True:
+            result = await self.find_datasets(offset=offset, count=page_size, **kwargs)
+            num_datasets = _collect_sync_refs(result, refs, locations)
+            if num_datasets < page_size:
+                break
+            offset += num_datasets
+        fetched = await _gather(self._get_dataset_without_records, _get_sync_ids(mirror, refs, full), max_workers,
+                                ordered=False)
+        return _apply_sync(mirror, refs, locations, fetched, remove=not kwargs)
+
+    async def iter_found_datasets(self, **kwargs) -> AsyncIterator[JsonObj]:
+        """Search datasets by expression and yield the dataset references while the response is received."""
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        kwargs['geojson'] = True
+        params = urllib.parse.urlencode(kwargs)
+        parser = JsonArrayParser('datasets')
+        response = await self._open(self._make_request(f'/datasets?{params}', method="GET"))
+        async with response:
+            async for dataset_refs in _iter_parsed(parser, response):
+                for dataset_ref in dataset_refs:
+                    yield dataset_ref
+
+    async def iter_datasets(self, expr: str = None, page_size: int = 1000, max_prefetch: int = 2,
+                            **kwargs) -> AsyncIterator[JsonObj]:
+        """
+        Search datasets by expression and lazily yield the dataset references of all result pages.
+        While the caller processes a page, up to *max_prefetch* following pages are fetched in a background task.
+        """
+        if page_size < 1:
+            raise ValueError('"page_size" must be a positive integer')
+        if max_prefetch < 1:
+            raise ValueError('"max_prefetch" must be a positive integer')
+        kwargs.pop('count', None)
+        offset = kwargs.pop('offset', 1)
+        pages = asyncio.Queue(maxsize=max_prefetch)
+
+        async def fetch_pages():
+            nonlocal offset
+            try:
+                while True:
+                    result = await self.find_datasets(expr=expr, offset=offset, count=page_size, **kwargs)
+                    datasets = result.get('datasets') or []
+                    await pages.put((datasets, None))
+                    if len(datasets) < page_size:
+                        break
+                    offset += len(datasets)
+            except Exception as e:
+                await pages.put((None, e))
+            else:
+                await pages.put((None, None))
+
+        task = asyncio.ensure_future(fetch_pages())
+        try:
+            while True:
+                datasets, error = await pages.get()
+                if error is not None:
+                    raise error
+                if datasets is None:
+                    break
+                for dataset in datasets:
+                    yield dataset
+        finally:
+            task.cancel()
+
+    # Submission Management
+
+    async def get_submission(self, submission_id: str) -> JsonObj:
+        """Get a submission by the user defined ID."""
+        return await self._fetch_json(self._make_request(f'/store/upload/submission/{submission_id}', method="GET"))
+
+    async def get_submissions_for_user(self, user_name: Optional[str]) -> JsonObj:
+        """Get all submission for a user."""
+        path = f'/store/upload/user/{user_name}' if user_name else '/store/upload/user'
+        return await self._fetch_json(self._make_request(path, method="GET"))
+
+    async def update_submission_status(self, submission_id: str, status: str) -> JsonObj:
+        """Change the status of a submission."""
+        data = json.dumps({'status': status}).encode('utf-8')
+        request = self._make_request(f'/store/status/submission/{submission_id}', data=data, method="PUT")
+        request.add_header('Content-Type', 'application/json')
+        return await self._fetch_json(request)
+
+    async def delete_submissions(self, submission_ids: Sequence[str], max_workers: int = DEFAULT_MAX_WORKERS,
+                                 max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """Delete many submissions concurrently, see OCDBApi.delete_submissions()."""
+        delete = self._make_bulk_delete(lambda submission_id: f'/store/upload/submission/{submission_id}')
+        return await _delete_items(delete, submission_ids, max_workers, max_retries, dry_run)
+
+    async def delete_submission(self, submission_id: str) -> JsonObj:
+        """Delete a submission by the user defined ID."""
+        return await self._fetch_json(self._make_request(f'/store/upload/submission/{submission_id}',
+                                                         method="DELETE"))
+
+    async def download_submission_file(self, submission_id: str, index: int, out_fn: Optional[str],
+                                       output_dir: str = '.', keep_zip: bool = True) -> str:
+        """Download a Submission File and extract it into *output_dir* while downloading."""
+        request = self._make_request(f'/store/download/submissionfile/{submission_id}/{index}', method="GET")
+        message, out_fn = _zip_file_name(out_fn)
+        stats = await self._download_zip(request, out_fn if keep_zip else None, output_dir)
+        return message + f'{submission_id}/{index} downloaded to {out_fn if keep_zip else output_dir}' \
+                         f' ({stats})'
+
+    async def get_submission_file(self, submission_id: str, index: int) -> JsonObj:
+        """Get a submission file by submission ID and file index."""
+        return await self._fetch_json(self._make_request(f'/store/upload/submissionfile/{submission_id}/{index}',
+                                                         method="GET"))
+
+    async def delete_submission_file(self, **kwargs) -> JsonObj:
+        """Delete a submission File."""
+        params = urllib.parse.urlencode({k: v for k, v in kwargs.items() if v is not None})
+        return await self._fetch_json(self._make_request(f'/submission?{params}', method="GET"))
+
+    async def update_submission_file(self, submission_id: str, file_name: str, index: int) -> JsonObj:
+        """Upload a submission file by submission ID and index."""
+        form = MultiPartForm()
+        form.add_file('files', os.path.basename(file_name), file_name, mime_type="text/plain")
+        return await self._post_form(f'/store/upload/submissionfile/{submission_id}/{index}', form, "PUT")
+
+    async def add_submission_file(self, submission_id: str, file_name: str, typ: str) -> Union[JsonObj, str]:
+        """Add a submission file of type MEASUREMENT or DOCUMENT to a submission."""
+        if typ not in DATASET_TYPES:
+            return {"message": "Type must be MEASUREMENT or DOCUMENT"}
+        form = MultiPartForm()
+        form.add_file('files', os.path.basename(file_name), file_name, mime_type="text/plain")
+        return await self._post_form(f'/store/add/submissionfile/{submission_id}/{typ}', form, "POST")
+
+    async def validate_submission_file(self, file_name: str) -> JsonObj:
+        """Validate a dataset file."""
+        with open(file_name) as fp:
+            dataset_json = fp.read()
+        request = self._make_request('/store/upload/submission/validate', method="POST")
+        self._set_upload_body(request, json.dumps({'data': dataset_json}).encode('utf-8'))
+        return await self._fetch_json(request)
+
+    async def validate_submission_files(self, file_names: Sequence[str], local_only: bool = False,
+                                        max_processes: Optional[int] = None,
+                                        max_workers: int = DEFAULT_MAX_WORKERS) -> JsonObj:
+        """
+        Validate many dataset files, see OCDBApi.validate_submission_files().
+        The local checks run in a thread, so that they do not block the event loop.
+        """
+        file_names = list(file_names)
+        results, server_file_names = await asyncio.get_running_loop().run_in_executor(
+            None, _check_submission_files, file_names, local_only, max_processes)
+        results.update(_merge_validation_results(await _gather(self.validate_submission_file, server_file_names,
+                                                               max_workers)))
+        return {file_name: results[file_name] for file_name in file_names}
+
+    # User management
+
+    async def add_user(self, username: str, password: str, email: str, roles: Sequence[str], first_name: str = '',
+                       last_name: str = '', phone: str = '') -> JsonObj:
+        """Add a user to the OCDB database system."""
+        request = self._make_add_user_request(username, utils.encrypt(password), email, roles,
+                                              first_name=first_name, last_name=last_name, phone=phone)
+        return await self._fetch_json(request)
+
+    async def add_users(self, users: Sequence[JsonObj], max_workers: int = DEFAULT_MAX_WORKERS) \
+            -> List[Tuple[str, Optional[JsonObj], Optional[Exception]]]:
+        """
+        Add many users, see OCDBApi.add_users().
+        """
+        requests = self._make_add_user_requests(users)
+        results = await _gather(lambda item: self._fetch_json(item[1]), requests, max_workers)
+        return [(username, result, error) for (username, _), result, error in results]
+
+    async def delete_user(self, username: str) -> JsonObj:
+        """Delete a user."""
+        return await self._fetch_json(self._make_request(f'/users/{username}', method="DELETE"))
+
+    async def update_user(self, username: str, key: str, value: str) -> JsonObj:
+        """Update user info."""
+        if key == 'password':
+            return {
+                'message': 'Please use \'$ocdb-cli user pwd <user>\' instead of \'$ocdb-cli user update\' for'
+                           ' changing the password of a user.'
+            }
+        if not (key in ['first_name', 'last_name', 'email', 'phone', 'roles']):
+            return {
+                'message': f'Changing the field "{key}" of an user is not allowed.'
+            }
+        user = await self.get_user(username)
+        user[key] = value
+        data = json.dumps(user).encode('utf-8')
+        return await self._fetch_json(self._make_request(f'/users/{username}', data=data, method="PUT"))
+
+    async def change_user_login(self, username: str, password: str, new_password: str) -> JsonObj:
+        """Change the password of a user."""
+        password = utils.encrypt(password)
+        new_password = utils.encrypt(new_password)
+        data = json.dumps({'username': username, 'oldpassword': password, 'newpassword1': new_password,
+                           'newpassword2': new_password}).encode('utf-8')
+        return await self._fetch_json(self._make_request('/users/login', data=data, method="PUT"))
+
+    async def get_user(self, username: str) -> JsonObj:
+        """Get info for a user."""
+        return await self._fetch_json(self._make_request(f'/users/{username}', method="GET"))
+
+    async def whoami(self) -> JsonObj:
+        """Who am I."""
+        return await self._fetch_json(self._make_request('/users/login', method="GET"))
+
+    async def list_user(self) -> JsonObj:
+        """List user names."""
+        return await self._fetch_json(self._make_request('/users', method="GET"))
+
+    async def login_user(self, username: Optional[str], password: Optional[str]) -> JsonObj:
+        """Login to the OCDB database system."""
+        data = {'username': username, 'password': utils.encrypt(password), 'client_version': VERSION,
+                'client': 'cli'}
+        request = self._make_request('/users/login', data=json.dumps(data).encode('utf-8'), method="POST")
+        try:
+            response = await self._open(request)
+            async with response:
+                cookie = response.headers.get("Set-Cookie")
+                if cookie is not None:
+                    self._set_login_cookie(cookie)
+                return json.loads(decode_content(await response.read(), response.headers))
+        except Exception as e:
+            raise ValueError(str(e))
+
+    async def logout_user(self) -> JsonObj:
+        """Logout from the OCDB database system."""
+        request = self._make_request('/users/logout', method="GET")
+        self._set_login_cookie(None)
+        return await self._fetch_json(request)
+
+    # Implementation helpers
+
+    async def _open(self, request: urllib.request.Request, executor: Optional[RequestExecutor] = None) \
+            -> AsyncResponse:
+        executor = executor or self.request_executor
+        trace = self.request_tracer.start(request)
+        if trace is None:
+            return await executor.open_async(self.transport.open, request)
+        try:
+            response = await executor.open_async(self.transport.open, request)
+        except BaseException as e:
+            trace.error(e)
+            raise
+        trace.first_byte(response.status)
+        return TracedAsyncResponse(response, trace)
+
+    async def _fetch(self, request: urllib.request.Request, executor: Optional[RequestExecutor] = None) -> bytes:
+        response = await self._open(request, executor)
+        async with response:
+            return decode_content(await response.read(), response.headers)
+
+    async def _fetch_json(self, request: urllib.request.Request) -> JsonObj:
+        return json.loads(await self._fetch(request))
+
+    def _make_bulk_delete(self, get_path: Callable[[str], str]) -> Callable[[str], Awaitable]:
+        """Return a coroutine function sending a DELETE request without retries, see OCDBApi._make_bulk_delete()."""
+        executor = self.request_executor.without_retries()
+
+        async def delete(item: str):
+            await self._fetch(self._make_request(get_path(item), method="DELETE"), executor)
+
+        return delete
+
+    async def _get_dataset_without_records(self, dataset_id: str) -> JsonObj:
+        parser = JsonArrayParser('records')
+        response = await self._open(self._make_request(f'/datasets/{dataset_id}', method="GET"))
+        async with response:
+            async for _ in _iter_parsed(parser, response):
+                pass
+        return parser.members
+
+    async def _fetch_file(self, request: urllib.request.Request, file_path: Optional[str],
+                          on_data: Optional[Callable[[bytes], None]] = None) -> DownloadStats:
+        # Like download.download() without resuming: written to a ".part" file, renamed when complete
+        part_path = file_path + PART_SUFFIX if file_path else None
+        num_bytes = 0
+        t0 = time.perf_counter()
+        # The file is written as received, so never ask for a compressed body
+        request.add_header('Accept-Encoding', 'identity')
+        try:
+            response = await self._open(request)
+            async with response:
+                with (open(part_path, 'wb') if part_path else contextlib.nullcontext()) as out_file:
+                    async for chunk in response.iter_chunks():
+                        num_bytes += len(chunk)
+                        if out_file is not None:
+                            out_file.write(chunk)
+                        if on_data is not None:
+                            on_data(chunk)
+            if part_path:
+                os.replace(part_path, file_path)
+        except BaseException:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return DownloadStats(num_bytes, time.perf_counter() - t0, 0)
+
+    async def _download_zip(self, request: urllib.request.Request, out_fn: Optional[str], output_dir: str) \
+            -> DownloadStats:
+        os.makedirs(output_dir, exist_ok=True)
+        extractor = StreamingZipExtractor(output_dir)
+
+        def extract(chunk: bytes):
+            nonlocal extractor
+            if extractor is not None:
+                try:
+                    extractor.write(chunk)
+                except UnsupportedZipStreamError:
+                    if out_fn is None:
+                        raise
+                    extractor = None
+
+        try:
+            stats = await self._fetch_file(request, out_fn, on_data=extract)
+        except BaseException:
+            if extractor is not None:
+                extractor.abort()
+            raise
+        if extractor is not None:
+            extractor.close()
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, _extract_zip, out_fn, output_dir)
+        return stats
+
+    async def _post_form(self, path: str, form: MultiPartForm, method: str, compress: bool = False) -> JsonObj:
+        body = form.stream()
+        request = self._make_request(path, data=body, method=method)
+        request.add_header('Content-type', form.content_type)
+        if compress:
+            # Compressing may read large files, so do not block the event loop
+            body = await asyncio.get_running_loop().run_in_executor(None, self._set_upload_body, request, body)
+        else:
+            request.add_header('Content-length', f'{len(body)}')
+        with body:
+            return await self._fetch_json(request)
+
+
+async def _iter_parsed(parser: JsonArrayParser, response: AsyncResponse) -> AsyncIterator[List]:
+    """Feed the decompressed body of *response* to *parser* as it arrives and yield the lists of complete items."""
+    decompressor = make_decompressor(response.headers)
+    async for chunk in response.iter_chunks():
+        yield parser.feed(decompressor.decompress(chunk) if decompressor is not None else chunk)
+    if decompressor is not None and not decompressor.eof:
+        raise http.client.IncompleteRead(b'')
+    yield parser.close()
+
+
+async def _gather(func: Callable[[T], Awaitable[R]], items: Iterable[T], max_workers: int, ordered: bool = True) \
+        -> List[Tuple[T, Optional[R], Optional[Exception]]]:
+    """
+    Await *func* for all *items* with at most *max_workers* calls in flight.
+    Returns tuples (item, result, error) in the order of *items* or, if *ordered* is False, of completion.
+    """
+    if max_workers < 1:
+        raise ValueError('"max_workers" must be a positive integer')
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def call(item: T):
+        async with semaphore:
+            try:
+                return item, await func(item), None
+            except Exception as e:
+                return item, None, e
+
+    tasks = [asyncio.ensure_future(call(item)) for item in items]
+    if ordered:
+        return list(await asyncio.gather(*tasks))
+    return [await task for task in asyncio.as_completed(tasks)]
+
+
+async def _delete_items(delete: Callable[[str], Awaitable], items: Sequence[str], max_workers: int,
+                        max_retries: int, dry_run: bool) -> List[JsonObj]:
+    """Await *delete* for all *items* concurrently, retrying transient errors, and return a status table."""
+    if max_retries < 0:
+        raise ValueError('"max_retries" must not be negative')
+    items = list(items)
+    if dry_run:
+        return [{'item': item, 'status': 'DRY-RUN', 'attempts': 0} for item in items]
+
+    async def delete_item(item: str) -> JsonObj:
+        for attempt in range(1, max_retries + 2):
+            try:
+                await delete(item)
+                return {'item': item, 'status': 'DELETED', 'attempts': attempt}
+            except Exception as e:
+                if attempt > max_retries or not _is_transient_error(e):
+                    return {'item': item, 'status': 'FAILED', 'attempts': attempt, 'error': str(e)}
+            await asyncio.sleep(DELETE_RETRY_DELAY * 2 ** (attempt - 1))
+
+    return [row for _, row, _ in await _gather(delete_item, items, max_workers)]
+
+
+def _extract_zip(file_path: str, output_dir: str):
+    with zipfile.ZipFile(file_path) as zf:
+        zf.extractall(output_dir)
@@ -1,23 +1,40 @@
+import fnmatch
+import http.client
+import re
 import ssl
 import sys
+import time
 import pathlib
 import json
 import os
-import shutil
+import urllib.error
 import urllib.parse
 import urllib.request
-import zipfile
-from typing import Any, Optional, Sequence, List, Union
-
-import pandas as pd
+from typing import Any, Callable, Optional, Sequence, List, Union, Iterable, Iterator, Tuple, TYPE_CHECKING
 
 from . import utils
+from .export import get_export_format, write_dataframe
+from .compression import ACCEPT_ENCODING, COMPRESS_MIN_SIZE, decode_response, get_body_size, gzip_body
+from .cache import DatasetCache, DEFAULT_CACHE_MAX_SIZE, DEFAULT_CACHE_TTL
 from .api import Api, Config, JsonObj
 from .mpf import MultiPartForm
+from .parallel import prefetch, imap, split_batches
+from .jsonstream import JsonArrayParser, iter_chunks
+from .query import DatasetQuery
+from .download import download, DownloadStats
+from .unzip import StreamingZipExtractor, UnsupportedZipStreamError
+from .retry import RequestExecutor, DEFAULT_MAX_RETRIES, DEFAULT_RETRY_BACKOFF, RETRY_STATUS_CODES
+from .tracing import RequestTracer, TracedResponse
+from .transport import Transport, PooledTransport, DEFAULT_POOL_SIZE, DEFAULT_IDLE_TIMEOUT
 from ..configstore import ConfigStore, JsonConfigStore
 from ..version import NAME, VERSION, DESCRIPTION, API_VERSION_TAG
 from ocdb.api.util import DATASET_TYPES
 
+if TYPE_CHECKING:
+    # pandas and numpy are imported on first use, so that the CLI starts quickly
+    import pandas as pd
+    from .mirror import DatasetMirror
+
 USER_AGENT = f"{NAME} / {VERSION} {DESCRIPTION}"
 
 API_PATH_PREFIX = "/ocdb/api/" + API_VERSION_TAG
@@ -25,13 +42,46 @@ API_PATH_PREFIX = "/ocdb/api/" + API_VERSION_TAG
 USER_DIR = os.path.expanduser(os.path.join('~', '.ocdb'))
 DEFAULT_CONFIG_FILE_NAME = 'ocdb-client.json'
 DEFAULT_CONFIG_FILE = os.path.join(USER_DIR, DEFAULT_CONFIG_FILE_NAME)
+DEFAULT_CACHE_DIR = os.path.join(USER_DIR, 'cache')
+DEFAULT_MIRROR_FILE = os.path.join(USER_DIR, 'mirror.sqlite')
+
+DEFAULT_MAX_WORKERS = 8
+
+# Number of times a bulk delete retries an item after a server error or a dropped connection
+DEFAULT_DELETE_RETRIES = 2
+DELETE_RETRY_DELAY = 0.5
+
+# The server accepts at most this number of Cal/Char files per FidRadDB upload
+FIDRAD_UPLOAD_MAX_FILES = 15
+DEFAULT_UPLOAD_MAX_FILES = 100
+DEFAULT_UPLOAD_MAX_BYTES = 100 * 1024 * 1024
+
+_WARNING_KEY = 'Warning!'
 
-VALID_CONFIG_PARAM_NAMES = {'server_url', 'traceback', 'password-salt'}
+# Number of records per DataFrame yielded by iter_dataset_records(fmt='pandas')
+DEFAULT_RECORDS_CHUNK_SIZE = 10000
 
+# Number of bytes read from the network at a time when streaming responses
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def new_api(config_store: ConfigStore = None, server_url: str = None) -> Api:
+# Seconds during which a cached login cookie is used without checking the modification time of its file
+LOGIN_COOKIE_CHECK_INTERVAL = 1.0
+
+VALID_CONFIG_PARAM_NAMES = {'server_url', 'traceback', 'password-salt', 'pool-size', 'pool-idle-timeout',
+                            'cache', 'cache-dir', 'cache-max-size', 'cache-ttl', 'max-retries', 'retry-backoff',
+                            'rate-limit', 'rate-limit-burst', 'compress-uploads', 'mirror-file',
+                            'zero-copy-uploads'}
+
+
+def new_api(config_store: ConfigStore = None, server_url: str = None, transport: Transport = None) -> Api:
     """Factory that creates a new API instance."""
-    return OCDBApi(config_store=config_store, server_url=server_url)
+    return OCDBApi(config_store=config_store, server_url=server_url, transport=transport)
+
+
+def _is_true(value) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ('true', 'yes', 'on', '1')
+    return bool(value)
 
 
 def _ensure_sequence(obj) -> Sequence[str]:
@@ -49,7 +99,11 @@ class _DefaultConfigStore(JsonConfigStore):
         super().__init__(DEFAULT_CONFIG_FILE)
 
 
-class OCDBApi(Api):
+class OCDBApiBase:
+    """
+    Configuration access, URL building and login cookie handling shared by
+    the blocking OCDBApi and the asynchronous AsyncOCDBApi.
+    """
 
     def __init__(self,
                  config_store: ConfigStore = None,
@@ -66,6 +120,243 @@ class OCDBApi(Api):
             sys.tracebacklimit = int(traceback)
 
         self.verbose = False
+        self._request_executor = None
+        # Calls hooks on the start, first byte, end and error of every request
+        self.request_tracer = RequestTracer(API_PATH_PREFIX)
+        self._dataset_mirror = None
+
+        self.login_cookie_check_interval = LOGIN_COOKIE_CHECK_INTERVAL
+        # Number of stat() and read calls on the login cookie file, for instrumentation
+        self.num_login_cookie_file_accesses = 0
+        self._login_cookie = None
+        self._login_cookie_mtime = None
+        self._login_cookie_checked = None
+
+    # Local configuration access
+    def version(self):
+        from ocdb.version import VERSION
+
+        return {"ocdb-cli version": VERSION}
+
+    # Local configuration access
+    def info(self):
+        from ocdb.version import VERSION, DESCRIPTION, NAME, LICENSE_TEXT, DOCS_URL
+
+        return {"Name": NAME, "Version": VERSION, "API Version": API_VERSION_TAG, "Description": DESCRIPTION, "Docs": DOCS_URL, "License": LICENSE_TEXT}
+
+    @property
+    def config(self) -> Config:
+        """ Return a copy of the current API configuration. """
+        self._ensure_config_initialized()
+        return dict(self._config)
+
+    def get_config_param(self, name: str, default: Any = None) -> Optional[Any]:
+        """ Get the value of configuration parameter with given *name*. """
+        self._ensure_config_initialized()
+
+        return self._config.get(name, default)
+
+    def set_config_param(self, name: str, value: Optional[Any], write: bool = False):
+        """ Set the value of configuration parameter with given *name* to *value*. """
+        self._ensure_valid_config_name(name)
+        self._ensure_config_initialized()
+        self._config[name] = value
+        if write:
+            self._config_store.write(self._config)
+
+    @property
+    def server_url(self) -> Optional[str]:
+        """ Get the current value of the server URL. May be None, if not configured yet. """
+        return self.get_config_param('server_url', None)
+
+    @server_url.setter
+    def server_url(self, server_url: str):
+        """ Set the the server URL to *server_url*. """
+        if not server_url:
+            raise ValueError('"server_url" must be specified')
+        self.set_config_param('server_url', server_url)
+
+    @property
+    def request_executor(self) -> RequestExecutor:
+        """
+        Get the executor that retries failed requests and limits the request rate, configured by the
+        "max-retries", "retry-backoff", "rate-limit" (requests per second) and "rate-limit-burst" parameters.
+        """
+        if self._request_executor is None:
+            rate = self.get_config_param('rate-limit')
+            burst = self.get_config_param('rate-limit-burst')
+            self._request_executor = RequestExecutor(
+                max_retries=int(self.get_config_param('max-retries', DEFAULT_MAX_RETRIES)),
+                backoff=float(self.get_config_param('retry-backoff', DEFAULT_RETRY_BACKOFF)),
+                rate=float(rate) if rate else None,
+                burst=float(burst) if burst else None
+            )
+        return self._request_executor
+
+    @property
+    def dataset_mirror(self) -> 'DatasetMirror':
+        """Get the local dataset mirror used by find_datasets(local=True), stored in the "mirror-file" parameter."""
+        if self._dataset_mirror is None:
+            from .mirror import DatasetMirror
+            self._dataset_mirror = DatasetMirror(self.get_config_param('mirror-file', DEFAULT_MIRROR_FILE))
+        return self._dataset_mirror
+
+    @property
+    def request_metrics(self) -> JsonObj:
+        """Get the numbers of requests, retries and throttled requests, see RequestExecutor.metrics."""
+        return self.request_executor.metrics
+
+    def _make_request(self, path: str, method=None, data=None, headers=None) -> urllib.request.Request:
+        url = self._make_url(path)
+        if headers is None:
+            headers = {}
+
+        cookie = self._get_login_cookie()
+        if cookie is not None:
+            headers.update({"Cookie": cookie})
+
+        if self.verbose:
+            print('Connecting to', url)
+
+        request = urllib.request.Request(url, data=data, headers=headers, method=method)
+        request.add_header("User-Agent", USER_AGENT)
+        if not request.has_header("Accept-encoding"):
+            request.add_header("Accept-Encoding", ACCEPT_ENCODING)
+        return request
+
+    def _set_upload_body(self, request: urllib.request.Request, body):
+        """
+        Set *body*, bytes or a binary stream, as the data of *request* and return the data to be sent.
+        If the "compress-uploads" parameter is set, bodies of at least COMPRESS_MIN_SIZE bytes are
+        compressed with gzip, in which case a stream *body* is closed.
+        """
+        if _is_true(self.get_config_param('compress-uploads', False)) and get_body_size(body) >= COMPRESS_MIN_SIZE:
+            if isinstance(body, bytes):
+                body = gzip_body(body)
+            else:
+                with body:
+                    body = gzip_body(body)
+            request.add_header('Content-Encoding', 'gzip')
+        request.data = body
+        request.add_header('Content-length', f'{get_body_size(body)}')
+        return body
+
+    def _make_add_user_request(self, username: str, encrypted_password: str, email: str, roles: Sequence[str],
+                               first_name: str = '', last_name: str = '', phone: str = '') -> urllib.request.Request:
+        data = {
+            'name': username,
+            'first_name': first_name,
+            'last_name': last_name,
+            'password': encrypted_password,
+            'email': email,
+            'phone': phone,
+            'roles': roles
+        }
+        request = self._make_request(f'/users', data=json.dumps(data).encode('utf-8'), method="POST")
+        request.add_header('Content-Type', 'application/json')
+        return request
+
+    def _make_add_user_requests(self, users: Sequence[JsonObj]) -> List[Tuple[str, urllib.request.Request]]:
+        return [(user['username'], self._make_add_user_request(user['username'], utils.encrypt(user['password']),
+                                                               user['email'], user['roles'],
+                                                               first_name=user.get('first_name', ''),
+                                                               last_name=user.get('last_name', ''),
+                                                               phone=user.get('phone', '')))
+                for user in users]
+
+    def _make_url(self, path: str):
+        url = self.server_url
+        if not url:
+            raise ValueError('"server_url" is not configured')
+        if url.endswith('/'):
+            url = url[0: -1]
+        if not path.startswith('/'):
+            path = '/' + path
+        return url + API_PATH_PREFIX + path
+
+    @classmethod
+    def _ensure_valid_config_name(cls, name: str):
+        if name not in VALID_CONFIG_PARAM_NAMES:
+            raise ValueError(f'unknown configuration parameter "{name}"')
+
+    def _ensure_config_initialized(self):
+        if self._config is None:
+            config = self._config_store.read()
+            for name in config:
+                self._ensure_valid_config_name(name)
+            self._config = config
+
+    def _get_login_cookie(self) -> Optional[str]:
+        """
+        Return the login cookie, cached in this instance. The cookie file is checked for modifications
+        at most once per *login_cookie_check_interval* seconds and only read again if its mtime changed.
+        """
+        now = time.monotonic()
+        if self._login_cookie_checked is not None \
+                and now - self._login_cookie_checked < self.login_cookie_check_interval:
+            return self._login_cookie
+        self._login_cookie_checked = now
+        self.num_login_cookie_file_accesses += 1
+        try:
+            mtime = os.stat(os.path.join(USER_DIR, "login_info")).st_mtime_ns
+        except OSError:
+            self._login_cookie = self._login_cookie_mtime = None
+            return None
+        if mtime != self._login_cookie_mtime:
+            self.num_login_cookie_file_accesses += 1
+            self._login_cookie = OCDBApiBase.read_login_cookie()
+            self._login_cookie_mtime = mtime
+        return self._login_cookie
+
+    def _set_login_cookie(self, cookie: Optional[str]):
+        """Store the login cookie, or delete it if *cookie* is None, and update the cached cookie."""
+        if cookie is None:
+            OCDBApiBase.delete_login_cookie()
+        else:
+            OCDBApiBase.store_login_cookie(cookie)
+        self._login_cookie = cookie
+        self._login_cookie_mtime = None
+        if cookie is not None:
+            try:
+                self._login_cookie_mtime = os.stat(os.path.join(USER_DIR, "login_info")).st_mtime_ns
+            except OSError:
+                pass
+        self._login_cookie_checked = time.monotonic()
+
+    @staticmethod
+    def store_login_cookie(cookie: str):
+        login_info_file = os.path.join(USER_DIR, "login_info")
+        if os.path.isfile(login_info_file):
+            os.remove(login_info_file)
+
+        with open(login_info_file, "w") as out_file:
+            out_file.write(cookie)
+
+    @staticmethod
+    def read_login_cookie() -> Optional[str]:
+        login_info_file = os.path.join(USER_DIR, "login_info")
+        if os.path.isfile(login_info_file):
+            with open(login_info_file, "r") as in_file:
+                return in_file.read()
+
+        return None
+
+    @staticmethod
+    def delete_login_cookie():
+        login_info_file = os.path.join(USER_DIR, "login_info")
+        if os.path.isfile(login_info_file):
+            os.remove(login_info_file)
+
+
+class OCDBApi(OCDBApiBase, Api):
+
+    def __init__(self,
+                 config_store: ConfigStore = None,
+                 server_url: str = None,
+                 transport: Transport = None):
+        self._transport = transport
+        self._dataset_cache = None
+        super().__init__(config_store=config_store, server_url=server_url)
 
     # Remote dataset access
 
@@ -85,14 +376,33 @@ class OCDBApi(Api):
         for cal_char_file in cal_char_files:
             form.add_file(f'cal_char_files', os.path.basename(cal_char_file), cal_char_file, mime_type="text/plain")
 
-        data = bytes(form)
+        body = form.stream()
 
-        request = self._make_request('/store/FidRadDB/upload/cal_char', data=data, method=form.method)
+        request = self._make_request('/store/FidRadDB/upload/cal_char', data=body, method=form.method)
         request.add_header('Content-type', form.content_type)
-        request.add_header('Content-length', f'{len(data)}')
-        with urllib.request.urlopen(request) as response:
+        request.add_header('Content-length', f'{len(body)}')
+        with body, self._urlopen(request) as response:
             return json.load(response)
 
+    def fidrad_upload_parallel(self, cal_char_files: Sequence[str], disagree_publication: bool,
+                               max_workers: int = DEFAULT_MAX_WORKERS,
+                               max_files: int = FIDRAD_UPLOAD_MAX_FILES,
+                               max_bytes: Optional[int] = DEFAULT_UPLOAD_MAX_BYTES) -> JsonObj:
+        """
+        Upload any number of Cal/Char files in batches of at most *max_files* files and *max_bytes* bytes,
+        sent by up to *max_workers* concurrent requests.
+        :param cal_char_files: The Cal/Char files
+        :param disagree_publication: The user disagrees to publish the uploaded data
+        :param max_workers: The maximum number of concurrent requests
+        :param max_files: The maximum number of files per request
+        :param max_bytes: The maximum number of bytes per request, unless a single file is larger
+        :return: The merged results of all batches, files of failed requests have status "ERROR"
+        """
+        batches = split_batches(_ensure_sequence(cal_char_files), max_files, max_bytes)
+        results = imap(lambda batch: self.fidrad_upload(batch, disagree_publication), batches, max_workers,
+                       ordered=True)
+        return _merge_batch_results(results)
+
     def fidrad_history_tail(self, num_lines: int) -> JsonObj:
         """
         Get the tail of the FidRadDb history with the user defined number of lines
@@ -100,7 +410,7 @@ class OCDBApi(Api):
         :return: A JSON object representing the history tail
         """
         request = self._make_request(f'/store/FidRadDB/history/tail/{num_lines}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def fidrad_history_search(self, search_string: str, max_num_lines: int) -> JsonObj:
@@ -112,7 +422,7 @@ class OCDBApi(Api):
         """
         quoted_search = urllib.parse.quote(search_string)
         request = self._make_request(f'/store/FidRadDB/history/search/{quoted_search}/{max_num_lines}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def fidrad_list_files(self, name_part: str) -> JsonObj:
@@ -122,18 +432,34 @@ class OCDBApi(Api):
         """
         quoted_name_part = urllib.parse.quote(name_part)
         request = self._make_request(f'/store/FidRadDB/list/files/{quoted_name_part}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def fidrad_delete_file(self, file_name: str) -> JsonObj:
         """
         Deletes the requested file.
         """
-        quoted_filename = urllib.parse.quote(file_name)
-        request = self._make_request(f'/store/FidRadDB/delete/file/{quoted_filename}', method="DELETE")
-        with urllib.request.urlopen(request) as response:
+        request = self._make_request(_get_fidrad_delete_path(file_name), method="DELETE")
+        with self._urlopen(request) as response:
             return json.load(response)
 
+    def fidrad_delete_files(self, pattern: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                            max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """
+        Delete all files whose names match the glob *pattern*, e.g. "*_2019*.txt".
+        :param pattern: A glob pattern for the file names
+        :param max_workers: The maximum number of concurrent requests
+        :param max_retries: How often to retry a file after a server error or a dropped connection
+        :param dry_run: If True, only list the files that would be deleted
+        :return: A status table, see delete_datasets()
+        """
+        files = self.fidrad_list_files(_longest_literal(pattern) or '__ALL__')
+        if not isinstance(files, list):
+            raise ValueError(f'Cannot list files: {files}')
+        file_names = sorted(file_name for file_name in files if fnmatch.fnmatchcase(file_name, pattern))
+        return _delete_items(self._make_bulk_delete(_get_fidrad_delete_path), file_names, max_workers, max_retries,
+                             dry_run)
+
     def fidrad_download_file(self, file_name: str, output_dir: str) -> str:
         """
           Download a FidRadDB Cal/Char file with the user defined file_name to a user defined output directory.
@@ -158,15 +484,16 @@ class OCDBApi(Api):
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
-        with urllib.request.urlopen(request) as response:
-            out_file_path = os.path.join(output_dir, file_name)
-            try:
-                with open(out_file_path, 'wb') as f:
-                    shutil.copyfileobj(response, f)
-            except Exception as e:
-                message = f"Exception occurs while trying to write file to '{out_file_path}'. Exception: {repr(e)}"
-            else:
-                message += f'File successfully written to {out_file_path}'
+        out_file_path = os.path.join(output_dir, file_name)
+        try:
+            stats = download(self._urlopen, request, out_file_path)
+        except urllib.error.URLError:
+            # HTTP errors and failed connections are not errors of writing the file
+            raise
+        except Exception as e:
+            message = f"Exception occurs while trying to write file to '{out_file_path}'. Exception: {repr(e)}"
+        else:
+            message += f'File successfully written to {out_file_path} ({stats})'
         return message
 
     def upload_submission(self, path: str, dataset_files: Union[str, Sequence[str]],
@@ -199,45 +526,64 @@ class OCDBApi(Api):
         for doc_file in doc_files:
             form.add_file(f'docfiles', os.path.basename(doc_file), doc_file)
 
-        # print(str(form))
-        data = bytes(form)
-
-        request = self._make_request('/store/upload/submission', data=data, method=form.method)
+        request = self._make_request('/store/upload/submission', method=form.method)
         request.add_header('Content-type', form.content_type)
-        request.add_header('Content-length', f'{len(data)}')
-        with urllib.request.urlopen(request) as response:
+        body = self._set_upload_body(request, form.stream())
+        with body, self._urlopen(request) as response:
             return json.load(response)
 
-    def download_datasets_by_ids(self, ids: List[str], download_docs: bool, out_fn: Optional[str]) -> str:
+    def upload_submission_parallel(self, path: str, dataset_files: Union[str, Sequence[str]],
+                                   submission_id: str, doc_files: Optional[Union[str, Sequence[str]]] = None,
+                                   publication_date: Optional[str] = None,
+                                   allow_publication: Optional[bool] = False,
+                                   max_workers: int = DEFAULT_MAX_WORKERS,
+                                   max_files: int = DEFAULT_UPLOAD_MAX_FILES,
+                                   max_bytes: Optional[int] = DEFAULT_UPLOAD_MAX_BYTES) -> JsonObj:
+        """
+        Upload a large submission using concurrent requests. The submission is created by upload_submission()
+        with the first at most *max_files* dataset files of at most *max_bytes* bytes. All other dataset and doc
+        files are added by add_submission_file() using up to *max_workers* concurrent requests.
+        :param path: Path in the form affil/project/cruise
+        :param dataset_files: The dataset files
+        :param submission_id: The submission ID
+        :param doc_files: The doc files
+        :param publication_date: Date at which the data shall be published
+        :param allow_publication: Whether the submission may be published
+        :param max_workers: The maximum number of concurrent requests
+        :param max_files: The maximum number of files of the first request
+        :param max_bytes: The maximum number of bytes of the first request, unless a single file is larger
+        :return: The merged validation results of all files, files of failed requests have status "ERROR"
+        """
+        dataset_files = list(_ensure_sequence(dataset_files))
+        if not dataset_files:
+            raise ValueError('at least one dataset file must be given')
+        first_batch, *other_batches = split_batches(dataset_files, max_files, max_bytes)
+        first_result = self.upload_submission(path, first_batch, submission_id, publication_date=publication_date,
+                                              allow_publication=allow_publication)
+        files = [(file_name, 'MEASUREMENT') for batch in other_batches for file_name in batch]
+        files += [(file_name, 'DOCUMENT') for file_name in _ensure_sequence(doc_files)]
+        results = imap(lambda item: self.add_submission_file(submission_id, *item), files, max_workers, ordered=True)
+        return _merge_batch_results(_key_file_results(results), first_result)
+
+    def download_datasets_by_ids(self, ids: List[str], download_docs: bool, out_fn: Optional[str],
+                                 output_dir: str = '.', keep_zip: bool = True) -> str:
         """
-        Download dataset files by dataset IDs
+        Download dataset files by dataset IDs. The zip archive is extracted while it is downloaded.
         :param ids: A list of dataset IDs
         :param download_docs: Whether document files shall be downloaded as well
         :param out_fn: A filename for the resulting zip file.
-        :return: A message where the files have been stored
+        :param output_dir: The directory into which the files are extracted
+        :param keep_zip: Whether to write the zip file. If False, the archive is never stored on disk
+        :return: A message where the files have been stored and the download rate
         """
-
-        message = ""
-
         data = {'id_list': ids, 'docs': download_docs}
         data = json.dumps(data).encode('utf-8')
 
         request = self._make_request(f'/store/download', data=data, method="POST")
-
-        if not out_fn:
-            out_fn = 'download.zip'
-        else:
-            if pathlib.Path(out_fn).suffix != ".zip":
-                out_fn += ".zip"
-                message += "Output file must be zip. Added extension .zip"
-
-        with urllib.request.urlopen(request) as response, open(out_fn, 'wb') as out_file:
-            shutil.copyfileobj(response, out_file)
-            out_file.close()
-            with zipfile.ZipFile(out_fn) as zf:
-                zf.extractall()
-
-        message += f'{ids} downloaded to {out_fn}'
+        message, out_fn = _zip_file_name(out_fn)
+        stats = self._download_zip(request, out_fn if keep_zip else None, output_dir)
+        message += f'{ids} downloaded to {out_fn if keep_zip else output_dir}' \
+                   f' ({stats})'
         return message
 
     def add_dataset(self, dataset_file: str):
@@ -249,21 +595,36 @@ class OCDBApi(Api):
         with open(dataset_file) as fp:
             dataset_json = fp.read()
         request = self._make_request('/datasets', method="PUT", data=dataset_json.encode("utf-8"))
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return response.read()
 
     def update_dataset(self, dataset_file: str):
         with open(dataset_file) as fp:
             dataset_json = fp.read()
         request = self._make_request(f'/datasets', method="POST", data=dataset_json.encode("utf-8"))
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return response.read()
 
     def delete_dataset(self, dataset_id: str):
         request = self._make_request(f'/datasets/{dataset_id}', method="DELETE")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return response.read()
 
+    def delete_datasets(self, dataset_ids: Sequence[str], max_workers: int = DEFAULT_MAX_WORKERS,
+                        max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """
+        Delete many datasets using up to *max_workers* concurrent requests.
+        Items that fail with a server error or a dropped connection are retried up to *max_retries* times.
+        :param dataset_ids: IDs of the datasets
+        :param max_workers: The maximum number of concurrent requests
+        :param max_retries: How often to retry an item after a server error or a dropped connection
+        :param dry_run: If True, nothing is deleted, all items get the status "DRY-RUN"
+        :return: A status table, a list of dicts with the keys "item", "status" ("DELETED", "FAILED"
+                 or "DRY-RUN"), "attempts" and, for failed items, "error", in the order of *dataset_ids*
+        """
+        delete = self._make_bulk_delete(lambda dataset_id: f'/datasets/{dataset_id}')
+        return _delete_items(delete, dataset_ids, max_workers, max_retries, dry_run)
+
     def delete_datasets_by_submission(self, submission_id: str):
         """
         Remove all data from the search database linked to a submission.
@@ -271,7 +632,7 @@ class OCDBApi(Api):
         :return: A message from the server
         """
         request = self._make_request(f'/datasets/submission/{submission_id}', method="DELETE")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def get_datasets_by_submission(self, submission_id: str):
@@ -281,31 +642,88 @@ class OCDBApi(Api):
         :return: A message from the server
         """
         request = self._make_request(f'/datasets/submission/{submission_id}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     @staticmethod
-    def _make_pandas_from_dataset(ds: JsonObj) -> pd.DataFrame:
-        df = pd.DataFrame(ds['records'])
-        df.columns = ds['attributes']
-        return df
+    def _make_pandas_from_dataset(ds: JsonObj) -> 'pd.DataFrame':
+        from .dataframe import make_dataframe
+        return make_dataframe(ds)
 
-    def get_dataset(self, dataset_id: str, fmt: str = 'json') -> Union[JsonObj, pd.DataFrame]:
+    def get_dataset(self, dataset_id: str, fmt: str = 'json') -> Union[JsonObj, 'pd.DataFrame']:
         """
         Get a dataset from the Search Database by dataset ID.
         :param dataset_id: ID of teh dataset
         :param fmt: return format. Can be 'pandas' or 'json'
         :return:
         """
+        js = self._get_dataset_json(f'/datasets/{dataset_id}')
+        if fmt == 'pandas':
+            return OCDBApi._make_pandas_from_dataset(js)
+        else:
+            return js
+
+    def get_datasets_many(self, dataset_ids: Sequence[str], fmt: str = 'json',
+                          max_workers: int = DEFAULT_MAX_WORKERS, ordered: bool = False) \
+            -> Union[Iterator[Tuple[str, Optional[JsonObj], Optional[Exception]]], 'pd.DataFrame']:
+        """
+        Get many datasets from the Search Database by dataset ID, fetching up to *max_workers* datasets concurrently.
+
+        For fmt 'json', an iterator is returned that yields tuples (dataset_id, dataset, error) as the
+        datasets arrive, or in the order of *dataset_ids* if *ordered* is True. Either dataset or error is None.
+
+        For fmt 'pandas', a single DataFrame is returned that concatenates all datasets in the order of
+        *dataset_ids*, with an additional column "dataset_id". Errors are recorded per dataset ID in
+        the DataFrame's attrs['errors'].
+
+        :param dataset_ids: IDs of the datasets
+        :param fmt: return format. Can be 'pandas' or 'json'
+        :param max_workers: The maximum number of concurrent requests
+        :param ordered: Whether to yield the datasets in the order of *dataset_ids*
+        :return: An iterator of results or a DataFrame
+        """
+        if fmt != 'pandas':
+            return imap(self.get_dataset, dataset_ids, max_workers=max_workers, ordered=ordered)
+
+        frames = []
+        errors = {}
+        for dataset_id, dataset, error in imap(self.get_dataset, dataset_ids, max_workers=max_workers, ordered=True):
+            if error is not None:
+                errors[dataset_id] = str(error)
+                continue
+            df = OCDBApi._make_pandas_from_dataset(dataset)
+            df.insert(0, 'dataset_id', dataset_id)
+            frames.append(df)
+        import pandas as pd
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['dataset_id'])
+        df.attrs['errors'] = errors
+        return df
+
+    def iter_dataset_records(self, dataset_id: str, fmt: str = 'json', chunk_size: Optional[int] = None) \
+            -> Iterator[Union[list, List[list], 'pd.DataFrame']]:
+        """
+        Get the records of a dataset by dataset ID while the response is received, without holding
+        the complete dataset in memory. The dataset cache is not used.
+
+        For fmt 'json', the records are yielded one by one or, if *chunk_size* is given, in lists of up to
+        *chunk_size* records. For fmt 'pandas', DataFrames of up to *chunk_size* records are yielded,
+        converted as by get_dataset(fmt='pandas'). Since every chunk is converted on its own,
+        categorical columns of different chunks may have different categories.
+
+        :param dataset_id: ID of the dataset
+        :param fmt: return format. Can be 'pandas' or 'json'
+        :param chunk_size: The number of records per chunk, defaults to DEFAULT_RECORDS_CHUNK_SIZE for 'pandas'
+        :return: An iterator over records, lists of records or DataFrames
+        """
+        parser = JsonArrayParser('records')
+        chunker = _RecordChunker(parser.members, fmt, chunk_size)
         request = self._make_request(f'/datasets/{dataset_id}', method="GET")
-        with urllib.request.urlopen(request) as response:
-            js = json.load(response)
-            if fmt == 'pandas':
-                return OCDBApi._make_pandas_from_dataset(js)
-            else:
-                return js
+        with self._urlopen(request) as response:
+            for records in _iter_parsed(parser, response):
+                yield from chunker.add(records)
+        yield from chunker.flush()
 
-    def get_dataset_by_name(self, dataset_path: str, fmt: str) -> Union[JsonObj, pd.DataFrame]:
+    def get_dataset_by_name(self, dataset_path: str, fmt: str = 'json') -> Union[JsonObj, 'pd.DataFrame']:
         path_components = _split_dataset_path(dataset_path)
         if len(path_components) < 4:
             raise ValueError("Invalid dataset path, "
@@ -314,13 +732,33 @@ class OCDBApi(Api):
         project = path_components[1]
         cruise = path_components[2]
         name = "/".join(path_components[3:])
-        request = self._make_request(f'/datasets/{affil}/{project}/{cruise}/{name}', method="GET")
-        with urllib.request.urlopen(request) as response:
-            js = json.load(response)
-            if format == 'pandas':
-                return OCDBApi._make_pandas_from_dataset(js)
-            else:
-                return json.load(response)
+        js = self._get_dataset_json(f'/datasets/{affil}/{project}/{cruise}/{name}')
+        if fmt == 'pandas':
+            return OCDBApi._make_pandas_from_dataset(js)
+        else:
+            return js
+
+    def export_dataset(self, dataset_id: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """
+        Write a dataset from the Search Database given by dataset ID to a columnar file.
+        :param dataset_id: ID of the dataset
+        :param file_path: path of the output file
+        :param fmt: output format, 'parquet', 'feather' or 'csv'. If not given, derived from the file extension
+        :return: the output format
+        """
+        fmt = get_export_format(file_path, fmt)
+        return write_dataframe(self.get_dataset(dataset_id, fmt='pandas'), file_path, fmt)
+
+    def export_dataset_by_name(self, dataset_path: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """
+        Write a dataset from the Search Database given by its path affil/project/cruise/name to a columnar file.
+        :param dataset_path: path of the dataset
+        :param file_path: path of the output file
+        :param fmt: output format, 'parquet', 'feather' or 'csv'. If not given, derived from the file extension
+        :return: the output format
+        """
+        fmt = get_export_format(file_path, fmt)
+        return write_dataframe(self.get_dataset_by_name(dataset_path, fmt='pandas'), file_path, fmt)
 
     def list_datasets_in_path(self, dataset_path: str) -> JsonObj:
         try:
@@ -329,23 +767,122 @@ class OCDBApi(Api):
             raise ValueError(f"Invalid dataset path, "
                              f"must have format affil/project/cruise, but was {dataset_path}") from e
         request = self._make_request(f'/datasets/{affil}/{project}/{cruise}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
-    def find_datasets(self, **kwargs) -> JsonObj:
+    def find_datasets(self, local: bool = False, **kwargs) -> JsonObj:
         """
         Search datasets by expression.
 
+        :param local: Whether to answer the query from the local dataset mirror, see sync_datasets
         :param kwargs:
         :return: A JSON object containing a list of datasets found in the search database
         """
+        if local:
+            return self.dataset_mirror.find(**kwargs)
         kwargs = {k: v for k, v in kwargs.items() if v is not None}
         kwargs['geojson'] = True
         params = urllib.parse.urlencode(kwargs)
         request = self._make_request(f'/datasets?{params}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
+    def query_datasets(self, query: DatasetQuery, local: bool = False, keep_unlocated: bool = False) -> JsonObj:
+        """
+        Search datasets by a DatasetQuery.
+
+        The server, or the local dataset mirror if *local* is True, matches the bounding box of the query region.
+        The results of the server are then filtered by the GeoJSON locations of the datasets, so that only
+        datasets with positions within the query region, e.g. a polygon, are returned.
+
+        :param query: The query
+        :param local: Whether to answer the query from the local dataset mirror, see sync_datasets
+        :param keep_unlocated: Whether to keep datasets without a location when filtering
+        :return: A JSON object containing a list of datasets found in the search database
+        """
+        result = self.find_datasets(local=local, **query.to_params())
+        return result if local else query.filter(result, keep_unlocated=keep_unlocated)
+
+    def sync_datasets(self, full: bool = False, page_size: int = 1000, max_workers: int = DEFAULT_MAX_WORKERS,
+                      **kwargs) -> JsonObj:
+        """
+        Build or refresh the local dataset mirror, which answers find_datasets(local=True) offline.
+
+        The references of all datasets matching the query *kwargs*, or of all datasets if none is given, are
+        listed page by page with their GeoJSON locations. Datasets new to the mirror, or all datasets if *full*
+        is True, are fetched with up to *max_workers* concurrent requests to index their attributes and time
+        range; their records are discarded while received. Of known datasets, only the reference and the
+        bounding box are updated. Unless a query is given, datasets no longer found are removed.
+
+        :param full: Whether to fetch all datasets again
+        :param page_size: The number of datasets listed per request
+        :param max_workers: The maximum number of concurrent requests
+        :param kwargs: Query parameters as for find_datasets
+        :return: The numbers of added, updated and removed datasets, failures by dataset ID and the total number
+        """
+        if page_size < 1:
+            raise ValueError('"page_size" must be a positive integer')
+        mirror = self.dataset_mirror
+        mirror.begin_sync(self.server_url)
+        refs = {}
+        locations = {}
+        offset = 1
+        while True:
+            result = self.find_datasets(offset=offset, count=page_size, **kwargs)
+            num_datasets = _collect_sync_refs(result, refs, locations)
+            if num_datasets < page_size:
+                break
+            offset += num_datasets
+        fetched = imap(self._get_dataset_without_records, _get_sync_ids(mirror, refs, full), max_workers,
+                       ordered=False)
+        return _apply_sync(mirror, refs, locations, fetched, remove=not kwargs)
+
+    def iter_found_datasets(self, **kwargs) -> Iterator[JsonObj]:
+        """
+        Search datasets by expression like find_datasets, but yield the dataset references of the response
+        one by one while it is received, without holding the complete response in memory.
+
+        :param kwargs: Query parameters as for find_datasets
+        :return: An iterator over the dataset references found in the search database
+        """
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        kwargs['geojson'] = True
+        params = urllib.parse.urlencode(kwargs)
+        parser = JsonArrayParser('datasets')
+        request = self._make_request(f'/datasets?{params}', method="GET")
+        with self._urlopen(request) as response:
+            for dataset_refs in _iter_parsed(parser, response):
+                yield from dataset_refs
+
+    def iter_datasets(self, expr: str = None, page_size: int = 1000, max_prefetch: int = 2,
+                      **kwargs) -> Iterator[JsonObj]:
+        """
+        Search datasets by expression and lazily yield the dataset references of all result pages.
+        While the caller processes a page, up to *max_prefetch* following pages are fetched in the background.
+
+        :param expr: The query expression
+        :param page_size: The number of datasets requested per page
+        :param max_prefetch: The maximum number of pages fetched ahead
+        :param kwargs: Further query parameters as for find_datasets
+        :return: An iterator over the dataset references found in the search database
+        """
+        if page_size < 1:
+            raise ValueError('"page_size" must be a positive integer')
+        kwargs.pop('count', None)
+        first_offset = kwargs.pop('offset', 1)
+
+        def fetch_pages():
+            offset = first_offset
+            while True:
+                datasets = self.find_datasets(expr=expr, offset=offset, count=page_size, **kwargs).get('datasets') or []
+                yield datasets
+                if len(datasets) < page_size:
+                    return
+                offset += len(datasets)
+
+        for page in prefetch(fetch_pages(), max_prefetch):
+            yield from page
+
     def get_submission(self, submission_id: str) -> JsonObj:
         """
         Get a submission by the user defined ID
@@ -353,7 +890,7 @@ class OCDBApi(Api):
         :return: A JSON object representing the submission
         """
         request = self._make_request(f'/store/upload/submission/{submission_id}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def get_submissions_for_user(self, user_name: Optional[str]) -> JsonObj:
@@ -368,7 +905,7 @@ class OCDBApi(Api):
             path = f'/store/upload/user/{user_name}'
 
         request = self._make_request(path, method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def update_submission_status(self, submission_id: str, status: str) -> JsonObj:
@@ -389,9 +926,22 @@ class OCDBApi(Api):
         request = self._make_request(f'/store/status/submission/{submission_id}', data=data, method="PUT")
         request.add_header('Content-Type', 'application/json')
 
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
+    def delete_submissions(self, submission_ids: Sequence[str], max_workers: int = DEFAULT_MAX_WORKERS,
+                           max_retries: int = DEFAULT_DELETE_RETRIES, dry_run: bool = False) -> List[JsonObj]:
+        """
+        Delete many submissions using up to *max_workers* concurrent requests.
+        :param submission_ids: Submission IDs
+        :param max_workers: The maximum number of concurrent requests
+        :param max_retries: How often to retry an item after a server error or a dropped connection
+        :param dry_run: If True, only list the submissions that would be deleted
+        :return: A status table, see delete_datasets()
+        """
+        delete = self._make_bulk_delete(lambda submission_id: f'/store/upload/submission/{submission_id}')
+        return _delete_items(delete, submission_ids, max_workers, max_retries, dry_run)
+
     def delete_submission(self, submission_id: str) -> JsonObj:
         """
         Delete a submission by the user defined ID
@@ -400,38 +950,31 @@ class OCDBApi(Api):
         """
         request = self._make_request(f'/store/upload/submission/{submission_id}', method="DELETE")
 
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
-    def download_submission_file(self, submission_id: str, index: int, out_fn: Optional[str]) -> str:
+    def download_submission_file(self, submission_id: str, index: int, out_fn: Optional[str],
+                                 output_dir: str = '.', keep_zip: bool = True) -> str:
         """
-        Download a Submission File by user defined submission ID and the index of the file
+        Download a Submission File by user defined submission ID and the index of the file.
+        The zip archive is extracted while it is downloaded.
         :param submission_id: The submission ID
         :param index: The index of the file
         :param out_fn: An output file name
+        :param output_dir: The directory into which the files are extracted
+        :param keep_zip: Whether to write the zip file. If False, the archive is never stored on disk
         :return: A message
         """
         request = self._make_request(f'/store/download/submissionfile/{submission_id}/{index}', method="GET")
-        message = ""
-
-        if not out_fn:
-            out_fn = 'download.zip'
-        else:
-            if pathlib.Path(out_fn).suffix != ".zip":
-                out_fn += ".zip"
-                message += "Output file must be zip. Added extension .zip"
-
-        with urllib.request.urlopen(request) as response, open(out_fn, 'wb') as out_file:
-            shutil.copyfileobj(response, out_file)
-            out_file.close()
-            with zipfile.ZipFile(out_fn) as zf:
-                zf.extractall()
-        message += f'{submission_id}/{index} downloaded to {out_fn}'
+        message, out_fn = _zip_file_name(out_fn)
+        stats = self._download_zip(request, out_fn if keep_zip else None, output_dir)
+        message += f'{submission_id}/{index} downloaded to {out_fn if keep_zip else output_dir}' \
+                   f' ({stats})'
         return message
 
     def get_submission_file(self, submission_id: str, index: int) -> JsonObj:
         request = self._make_request(f'/store/upload/submissionfile/{submission_id}/{index}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def delete_submission_file(self, **kwargs) -> JsonObj:
@@ -443,7 +986,7 @@ class OCDBApi(Api):
         kwargs = {k: v for k, v in kwargs.items() if v is not None}
         params = urllib.parse.urlencode(kwargs)
         request = self._make_request(f'/submission?{params}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def update_submission_file(self, submission_id: str, file_name: str, index: int) -> JsonObj:
@@ -458,16 +1001,16 @@ class OCDBApi(Api):
 
         form.add_file(f'files', os.path.basename(file_name), file_name, mime_type="text/plain")
 
-        data = bytes(form)
+        body = form.stream()
 
         request = self._make_request(f'/store/upload/submissionfile/{submission_id}/{index}',
-                                     data=data,
+                                     data=body,
                                      method="PUT")
 
         request.add_header('Content-type', form.content_type)
-        request.add_header('Content-length', f'{len(data)}')
+        request.add_header('Content-length', f'{len(body)}')
 
-        with urllib.request.urlopen(request) as response:
+        with body, self._urlopen(request) as response:
             return json.load(response)
 
     def add_submission_file(self, submission_id: str, file_name: str, typ: str) -> Union[JsonObj, str]:
@@ -485,16 +1028,16 @@ class OCDBApi(Api):
 
         form.add_file(f'files', os.path.basename(file_name), file_name, mime_type="text/plain")
 
-        data = bytes(form)
+        body = form.stream()
 
         request = self._make_request(f'/store/add/submissionfile/{submission_id}/{typ}',
-                                     data=data,
+                                     data=body,
                                      method="POST")
 
         request.add_header('Content-type', form.content_type)
-        request.add_header('Content-length', f'{len(data)}')
+        request.add_header('Content-length', f'{len(body)}')
 
-        with urllib.request.urlopen(request) as response:
+        with body, self._urlopen(request) as response:
             return json.load(response)
 
     def validate_submission_file(self, file_name: str) -> JsonObj:
@@ -508,11 +1051,30 @@ class OCDBApi(Api):
 
         send = {'data': dataset_json}
 
-        request = self._make_request('/store/upload/submission/validate', method="POST",
-                                     data=json.dumps(send).encode('utf-8'))
-        with urllib.request.urlopen(request) as response:
+        request = self._make_request('/store/upload/submission/validate', method="POST")
+        self._set_upload_body(request, json.dumps(send).encode('utf-8'))
+        with self._urlopen(request) as response:
             return json.load(response)
 
+    def validate_submission_files(self, file_names: Sequence[str], local_only: bool = False,
+                                  max_processes: Optional[int] = None,
+                                  max_workers: int = DEFAULT_MAX_WORKERS) -> JsonObj:
+        """
+        Validate many dataset files. The files are first checked by a local SeaBASS parser using
+        a pool of *max_processes* processes. Only files that pass the local checks are sent to
+        the server for validation, using up to *max_workers* concurrent requests.
+        :param file_names: The dataset files to be validated
+        :param local_only: Whether to skip the server validation
+        :param max_processes: The maximum number of local processes, defaults to the number of CPUs
+        :param max_workers: The maximum number of concurrent requests
+        :return: A dict mapping the file names as given to validation reports
+        """
+        file_names = list(file_names)
+        results, server_file_names = _check_submission_files(file_names, local_only, max_processes)
+        results.update(_merge_validation_results(imap(self.validate_submission_file, server_file_names,
+                                                      max_workers, ordered=True)))
+        return {file_name: results[file_name] for file_name in file_names}
+
     def add_user(self, username: str, password: str, email: str, roles: Sequence[str], first_name: str = '',
                  last_name: str = '', phone: str = '') -> JsonObj:
         """
@@ -527,24 +1089,27 @@ class OCDBApi(Api):
         :return: A message from the server
         """
 
-        password = utils.encrypt(password)
-
-        data = {
-            'name': username,
-            'first_name': first_name,
-            'last_name': last_name,
-            'password': password,
-            'email': email,
-            'phone': phone,
-            'roles': roles
-        }
-        data = json.dumps(data).encode('utf-8')
+        request = self._make_add_user_request(username, utils.encrypt(password), email, roles,
+                                              first_name=first_name, last_name=last_name, phone=phone)
+        with self._urlopen(request) as response:
+            return json.load(response)
 
-        request = self._make_request(f'/users', data=data, method="POST")
-        request.add_header('Content-Type', 'application/json')
+    def add_users(self, users: Sequence[JsonObj], max_workers: int = DEFAULT_MAX_WORKERS) \
+            -> Iterator[Tuple[str, Optional[JsonObj], Optional[Exception]]]:
+        """
+        Add many users to the OCDB database system using up to *max_workers* concurrent requests.
+        :param users: The users, dicts with the keys "username", "password", "email", "roles" and optionally
+                      "first_name", "last_name" and "phone"
+        :param max_workers: The maximum number of concurrent requests
+        :return: An iterator that yields tuples (username, result, error) in the order of *users*
+        """
+        def add(item: Tuple[str, urllib.request.Request]) -> JsonObj:
+            with self._urlopen(item[1]) as response:
+                return json.load(response)
 
-        with urllib.request.urlopen(request) as response:
-            return json.load(response)
+        for (username, _), result, error in imap(add, self._make_add_user_requests(users),
+                                                 max_workers, ordered=True):
+            yield username, result, error
 
     def delete_user(self, username: str) -> JsonObj:
         """
@@ -553,7 +1118,7 @@ class OCDBApi(Api):
         :return: A message from  the server
         """
         request = self._make_request(f'/users/{username}', method="DELETE")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def update_user(self, username: str, key: str, value: str) -> JsonObj:
@@ -581,7 +1146,7 @@ class OCDBApi(Api):
 
         data = json.dumps(user).encode('utf-8')
         request = self._make_request(f'/users/{username}', data=data, method="PUT")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def change_user_login(self, username: str, password: str, new_password: str) -> JsonObj:
@@ -602,7 +1167,7 @@ class OCDBApi(Api):
                            'newpassword2': new_password}).encode('utf-8')
 
         request = self._make_request(f'/users/login', data=data, method="PUT")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def get_user(self, username: str) -> JsonObj:
@@ -612,7 +1177,7 @@ class OCDBApi(Api):
         :return: A JSON representation of the user
         """
         request = self._make_request(f'/users/{username}', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def whoami(self) -> JsonObj:
@@ -622,7 +1187,7 @@ class OCDBApi(Api):
         """
         request = self._make_request(f'/users/login', method="GET")
 
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def list_user(self) -> JsonObj:
@@ -631,7 +1196,7 @@ class OCDBApi(Api):
         :return: The user name list
         """
         request = self._make_request(f'/users', method="GET")
-        with urllib.request.urlopen(request) as response:
+        with self._urlopen(request) as response:
             return json.load(response)
 
     def login_user(self, username: Optional[str], password: Optional[str]) -> JsonObj:
@@ -649,11 +1214,11 @@ class OCDBApi(Api):
 
         request = self._make_request(f'/users/login', data=data, method="POST")
         try:
-            with urllib.request.urlopen(request) as response:
+            with self._urlopen(request) as response:
                 info = response.info()
                 if info.__contains__("Set-Cookie"):
                     cookie = info.__getitem__("Set-Cookie")
-                    OCDBApi.store_login_cookie(cookie)
+                    self._set_login_cookie(cookie)
 
                 return json.load(response)
         except Exception as e:
@@ -664,124 +1229,387 @@ class OCDBApi(Api):
         Logout from teh OCDB database system
         :return: A message from the server
         """
-        cookie = OCDBApi.read_login_cookie()
-        if cookie is None:
-            pass
-
         request = self._make_request(f'/users/logout', method="GET")
 
         # Should be a message in the headers, but I can't find it tb 2019-04-29
-        OCDBApi.delete_login_cookie()
-        with urllib.request.urlopen(request) as response:
+        self._set_login_cookie(None)
+        with self._urlopen(request) as response:
             return json.load(response)
 
-    # Local configuration access
-    def version(self):
-        from ocdb.version import VERSION
-
-        return {"ocdb-cli version": VERSION}
-
-    # Local configuration access
-    def info(self):
-        from ocdb.version import VERSION, DESCRIPTION, NAME, LICENSE_TEXT, DOCS_URL
-
-        return {"Name": NAME, "Version": VERSION, "API Version": API_VERSION_TAG, "Description": DESCRIPTION, "Docs": DOCS_URL, "License": LICENSE_TEXT}
-
     @property
-    def config(self) -> Config:
-        """ Return a copy of the current API configuration. """
-        self._ensure_config_initialized()
-        return dict(self._config)
-
-    def get_config_param(self, name: str, default: Any = None) -> Optional[Any]:
-        """ Get the value of configuration parameter with given *name*. """
-        self._ensure_config_initialized()
+    def transport(self) -> Transport:
+        """
+        Get the transport used to send HTTP requests. Unless given to the constructor, this is a
+        pool of persistent connections configured by the "pool-size" and "pool-idle-timeout" parameters.
+        Files are uploaded with ``os.sendfile()`` unless the "zero-copy-uploads" parameter is set to false.
+        """
+        if self._transport is None:
+            self._transport = PooledTransport(
+                pool_size=int(self.get_config_param('pool-size', DEFAULT_POOL_SIZE)),
+                idle_timeout=float(self.get_config_param('pool-idle-timeout', DEFAULT_IDLE_TIMEOUT)),
+                zero_copy=_is_true(self.get_config_param('zero-copy-uploads', True))
+            )
+        return self._transport
 
-        return self._config.get(name, default)
+    @property
+    def dataset_cache(self) -> Optional[DatasetCache]:
+        """
+        Get the local dataset cache, or None if caching is disabled. The cache is enabled by the "cache"
+        parameter and configured by "cache-dir", "cache-max-size" (MiB) and "cache-ttl" (seconds).
+        """
+        if self._dataset_cache is None and _is_true(self.get_config_param('cache', False)):
+            max_size = float(self.get_config_param('cache-max-size', DEFAULT_CACHE_MAX_SIZE))
+            self._dataset_cache = DatasetCache(self.get_config_param('cache-dir', DEFAULT_CACHE_DIR),
+                                               max_size=int(max_size * 1024 * 1024),
+                                               ttl=float(self.get_config_param('cache-ttl', DEFAULT_CACHE_TTL)))
+        return self._dataset_cache
+
+    def close(self):
+        """Close all connections held by this API instance."""
+        if self._transport is not None:
+            self._transport.close()
+        if self._dataset_mirror is not None:
+            self._dataset_mirror.close()
+            self._dataset_mirror = None
 
-    def set_config_param(self, name: str, value: Optional[Any], write: bool = False):
-        """ Set the value of configuration parameter with given *name* to *value*. """
-        self._ensure_valid_config_name(name)
-        self._ensure_config_initialized()
-        self._config[name] = value
-        if write:
-            self._config_store.write(self._config)
+    # Implementation helpers
 
-    @property
-    def server_url(self) -> Optional[str]:
-        """ Get the current value of the server URL. May be None, if not configured yet. """
-        return self.get_config_param('server_url', None)
+    def _download_zip(self, request: urllib.request.Request, out_fn: Optional[str], output_dir: str) \
+            -> DownloadStats:
+        """
+        Download a zip archive and extract it into *output_dir* while it is received.
+        The archive is written to *out_fn* unless it is None.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        extractor = StreamingZipExtractor(output_dir)
+
+        def extract(chunk: bytes):
+            nonlocal extractor
+            if extractor is not None:
+                try:
+                    extractor.write(chunk)
+                except UnsupportedZipStreamError:
+                    if out_fn is None:
+                        raise
+                    extractor = None
+
+        def restart():
+            nonlocal extractor
+            if extractor is not None:
+                extractor.abort()
+            extractor = StreamingZipExtractor(output_dir)
 
-    @server_url.setter
-    def server_url(self, server_url: str):
-        """ Set the the server URL to *server_url*. """
-        if not server_url:
-            raise ValueError('"server_url" must be specified')
-        self.set_config_param('server_url', server_url)
+        try:
+            stats = download(self._urlopen, request, out_fn, on_data=extract, on_restart=restart)
+        except BaseException:
+            if extractor is not None:
+                extractor.abort()
+            raise
+        if extractor is not None:
+            extractor.close()
+        else:
+            # The archive cannot be extracted while streaming, so extract the written zip file
+            import zipfile
+            with zipfile.ZipFile(out_fn) as zf:
+                zf.extractall(output_dir)
+        return stats
 
-    # Implementation helpers
+    def _get_dataset_without_records(self, dataset_id: str) -> JsonObj:
+        parser = JsonArrayParser('records')
+        request = self._make_request(f'/datasets/{dataset_id}', method="GET")
+        with self._urlopen(request) as response:
+            for _ in _iter_parsed(parser, response):
+                pass
+        return parser.members
+
+    def _urlopen(self, request: urllib.request.Request, executor: Optional[RequestExecutor] = None):
+        executor = executor or self.request_executor
+        trace = self.request_tracer.start(request)
+        if trace is None:
+            return decode_response(executor.open(self.transport.open, request))
+        try:
+            response = executor.open(self.transport.open, request)
+        except BaseException as e:
+            trace.error(e)
+            raise
+        trace.first_byte(response.status)
+        return decode_response(TracedResponse(response, trace))
+
+    def _make_bulk_delete(self, get_path: Callable[[str], str]) -> Callable[[str], None]:
+        """
+        Return a function sending a DELETE request to the path *get_path*(item). The request executor does not
+        retry these requests, as _delete_items() retries the items by itself.
+        """
+        executor = self.request_executor.without_retries()
 
-    def _make_request(self, path: str, method=None, data=None, headers=None) -> urllib.request.Request:
-        url = self._make_url(path)
-        if headers is None:
-            headers = {}
+        def delete(item: str):
+            with self._urlopen(self._make_request(get_path(item), method="DELETE"), executor) as response:
+                response.read()
 
-        cookie = OCDBApi.read_login_cookie()
-        if cookie is not None:
-            headers.update({"Cookie": cookie})
+        return delete
 
-        if self.verbose:
-            print('Connecting to', url)
+    def _get_dataset_json(self, path: str) -> JsonObj:
+        cache = self.dataset_cache
+        if cache is None:
+            request = self._make_request(path, method="GET")
+            with self._urlopen(request) as response:
+                return json.load(response)
 
-        request = urllib.request.Request(url, data=data, headers=headers, method=method)
-        request.add_header("User-Agent", USER_AGENT)
-        return request
+        key = self._make_url(path)
+        entry = cache.get(key)
+        if entry is not None and not entry.has_validators and entry.is_fresh(cache.ttl):
+            body = cache.read(entry)
+            if body is not None:
+                return json.loads(body)
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        request = self._make_request(path, method="GET", headers=headers)
+        try:
+            with self._urlopen(request) as response:
+                status = response.status
+                body = response.read()
+                info = response.info()
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            status = 304
+
+        if status == 304:
+            cached_body = cache.read(entry) if entry is not None else None
+            if cached_body is not None:
+                cache.revalidated(entry)
+                return json.loads(cached_body)
+            # The cached entry or its body has vanished, so fetch the dataset again without conditional headers.
+            cache.remove(key)
+            request = self._make_request(path, method="GET")
+            with self._urlopen(request) as response:
+                body = response.read()
+                info = response.info()
 
-    def _make_url(self, path: str):
-        url = self.server_url
-        if not url:
-            raise ValueError('"server_url" is not configured')
-        if url.endswith('/'):
-            url = url[0: -1]
-        if not path.startswith('/'):
-            path = '/' + path
-        return url + API_PATH_PREFIX + path
+        cache.put(key, body, etag=info.get('ETag'), last_modified=info.get('Last-Modified'))
+        return json.loads(body)
+
+
+def _merge_batch_results(results: Iterable[Tuple[Sequence[str], Optional[JsonObj], Optional[Exception]]],
+                         merged: Optional[JsonObj] = None) -> JsonObj:
+    """
+    Merge the results of uploads into a single dict. *results* yields tuples (file_paths, result, error).
+    Results are dicts mapping file names to validation reports, the warnings of FidRadDB uploads are concatenated.
+    """
+    merged = dict(merged or {})
+    warnings = list(merged.pop(_WARNING_KEY, []))
+    for file_paths, result, error in results:
+        if error is not None:
+            for file_path in file_paths:
+                merged[os.path.basename(file_path)] = {'status': 'ERROR',
+                                                       'issues': [{'type': 'ERROR', 'description': str(error)}]}
+        elif isinstance(result, dict):
+            result = dict(result)
+            warnings.extend(result.pop(_WARNING_KEY, []))
+            merged.update(result)
+        else:
+            for file_path in file_paths:
+                merged[os.path.basename(file_path)] = result
+    if warnings:
+        merged[_WARNING_KEY] = warnings
+    return merged
+
+
+def _key_file_results(results: Iterable[Tuple[Tuple[str, str], Optional[JsonObj], Optional[Exception]]]) \
+        -> Iterator[Tuple[Sequence[str], Optional[JsonObj], Optional[Exception]]]:
+    """
+    Turn the results of single-file uploads, yielded as tuples ((file_name, file_type), result, error),
+    into results for :func:`_merge_batch_results` keyed by the base names of the files.
+    """
+    for (file_name, _), result, error in results:
+        if error is None:
+            result = {os.path.basename(file_name): _get_validation_report(file_name, result)}
+        yield [file_name], result, error
+
+
+def _check_submission_files(file_names: Sequence[str], local_only: bool, max_processes: Optional[int]) \
+        -> Tuple[JsonObj, List[str]]:
+    """
+    Check *file_names* locally and return the reports keyed by the file names as given and the files that
+    still need server validation.
+    """
+    from .seabass import map_seabass_files
+    reports = dict(zip(file_names, map_seabass_files(file_names, max_processes)))
+    if local_only:
+        return reports, []
+    return ({file_name: report for file_name, report in reports.items() if report['status'] == 'ERROR'},
+            [file_name for file_name in reports if reports[file_name]['status'] != 'ERROR'])
+
+
+def _merge_validation_results(results: Iterable[Tuple[str, Optional[JsonObj], Optional[Exception]]]) -> JsonObj:
+    """
+    Merge the server validation results of single files, yielded as tuples (file_name, result, error),
+    into a dict keyed by the file names as given.
+    """
+    merged = {}
+    for file_name, result, error in results:
+        if error is not None:
+            merged[file_name] = {'status': 'ERROR', 'issues': [{'type': 'ERROR', 'description': str(error)}]}
+        else:
+            merged[file_name] = _get_validation_report(file_name, result)
+    return merged
+
+
+def _get_validation_report(file_name: str, result: Optional[JsonObj]) -> Optional[JsonObj]:
+    # The server may answer with a bare report or with reports keyed by file name
+    if isinstance(result, dict) and 'status' not in result and os.path.basename(file_name) in result:
+        return result[os.path.basename(file_name)]
+    return result
+
+
+def _collect_sync_refs(result: JsonObj, refs: JsonObj, locations: JsonObj) -> int:
+    """Add the dataset references and locations of a find_datasets *result* and return the number of references."""
+    datasets = result.get('datasets') or []
+    for ref in datasets:
+        refs[ref['id']] = ref
+    locations.update(result.get('locations') or {})
+    return len(datasets)
+
+
+def _get_sync_ids(mirror: 'DatasetMirror', refs: JsonObj, full: bool) -> List[str]:
+    """Return the IDs of the datasets that must be fetched to synchronize *mirror*."""
+    known = mirror.ids()
+    return [dataset_id for dataset_id in refs if full or dataset_id not in known]
+
+
+def _apply_sync(mirror: 'DatasetMirror', refs: JsonObj, locations: JsonObj,
+                fetched: Iterable[Tuple[str, Optional[JsonObj], Optional[Exception]]], remove: bool) -> JsonObj:
+    """Store the *fetched* datasets and the references *refs* in *mirror* and return a summary."""
+    known = mirror.ids()
+    added = 0
+    updated = 0
+    failed = {}
+    fetched_ids = set()
+    for dataset_id, dataset, error in fetched:
+        fetched_ids.add(dataset_id)
+        if error is not None:
+            failed[dataset_id] = str(error)
+            continue
+        mirror.put(refs[dataset_id], locations.get(dataset_id), dataset)
+        if dataset_id in known:
+            updated += 1
+        else:
+            added += 1
+    for dataset_id, ref in refs.items():
+        if dataset_id in known and dataset_id not in fetched_ids:
+            mirror.put(ref, locations.get(dataset_id))
+            updated += 1
+    removed = sorted(known - set(refs)) if remove else []
+    mirror.remove(removed)
+    mirror.end_sync()
+    return {'added': added, 'updated': updated, 'removed': len(removed), 'failed': failed, 'total': mirror.count()}
+
+
+def _iter_parsed(parser: JsonArrayParser, response) -> Iterator[List[Any]]:
+    """Read *response* in chunks, feed them to *parser* and yield the lists of complete items."""
+    while True:
+        data = response.read(STREAM_CHUNK_SIZE)
+        if not data:
+            break
+        yield parser.feed(data)
+    yield parser.close()
+
+
+class _RecordChunker:
+    """
+    Groups streamed dataset records into chunks of the format returned by iter_dataset_records().
+    *members* are the other members of the dataset parsed so far, which are needed to convert records
+    into DataFrames. If "attributes" or "metadata" follow the records, DataFrames are held back until the end.
+    """
+
+    def __init__(self, members: JsonObj, fmt: str, chunk_size: Optional[int]):
+        if chunk_size is None and fmt == 'pandas':
+            chunk_size = DEFAULT_RECORDS_CHUNK_SIZE
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError('"chunk_size" must be a positive integer')
+        self._members = members
+        self._fmt = fmt
+        self._chunk_size = chunk_size
+        self._records = []
+        self._chunks = []
+
+    def add(self, records: List[list]) -> List[Any]:
+        """Add *records* and return the chunks that are complete."""
+        if self._chunk_size is None:
+            return records
+        self._records.extend(records)
+        if len(self._records) < self._chunk_size:
+            return []
+        chunks = list(iter_chunks(self._records, self._chunk_size))
+        self._records = chunks.pop() if len(chunks[-1]) < self._chunk_size else []
+        return self._convert(chunks, final=False)
+
+    def flush(self) -> List[Any]:
+        """Return the remaining chunks."""
+        chunks = [self._records] if self._records else []
+        self._records = []
+        return self._convert(chunks, final=True)
+
+    def _convert(self, chunks: List[List[list]], final: bool) -> List[Any]:
+        if self._fmt != 'pandas':
+            return chunks
+        self._chunks.extend(chunks)
+        if not final and not ('attributes' in self._members and 'metadata' in self._members):
+            return []
+        from .dataframe import make_dataframe
+        chunks, self._chunks = self._chunks, []
+        return [make_dataframe(dict(self._members, records=chunk)) for chunk in chunks]
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Whether a request that failed with *error* may succeed if it is repeated."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code in RETRY_STATUS_CODES
+    return isinstance(error, (http.client.HTTPException, OSError))
+
+
+def _delete_items(delete, items: Sequence[str], max_workers: int, max_retries: int, dry_run: bool) -> List[JsonObj]:
+    """Call *delete* for all *items* concurrently, retrying transient errors, and return a status table."""
+    if max_retries < 0:
+        raise ValueError('"max_retries" must not be negative')
+    items = list(items)
+    if dry_run:
+        return [{'item': item, 'status': 'DRY-RUN', 'attempts': 0} for item in items]
+
+    def delete_item(item: str) -> JsonObj:
+        for attempt in range(1, max_retries + 2):
+            try:
+                delete(item)
+                return {'item': item, 'status': 'DELETED', 'attempts': attempt}
+            except Exception as e:
+                if attempt > max_retries or not _is_transient_error(e):
+                    return {'item': item, 'status': 'FAILED', 'attempts': attempt, 'error': str(e)}
+            time.sleep(DELETE_RETRY_DELAY * 2 ** (attempt - 1))
 
-    @classmethod
-    def _ensure_valid_config_name(cls, name: str):
-        if name not in VALID_CONFIG_PARAM_NAMES:
-            raise ValueError(f'unknown configuration parameter "{name}"')
+    return [row if error is None else {'item': item, 'status': 'FAILED', 'attempts': 1, 'error': str(error)}
+            for item, row, error in imap(delete_item, items, max_workers, ordered=True)]
 
-    def _ensure_config_initialized(self):
-        if self._config is None:
-            config = self._config_store.read()
-            for name in config:
-                self._ensure_valid_config_name(name)
-            self._config = config
 
-    @staticmethod
-    def store_login_cookie(cookie: str):
-        login_info_file = os.path.join(USER_DIR, "login_info")
-        if os.path.isfile(login_info_file):
-            os.remove(login_info_file)
+def _get_fidrad_delete_path(file_name: str) -> str:
+    return f'/store/FidRadDB/delete/file/{urllib.parse.quote(file_name)}'
 
-        with open(login_info_file, "w") as out_file:
-            out_file.write(cookie)
 
-    @staticmethod
-    def read_login_cookie() -> Optional[str]:
-        login_info_file = os.path.join(USER_DIR, "login_info")
-        if os.path.isfile(login_info_file):
-            with open(login_info_file, "r") as in_file:
-                return in_file.read()
+def _longest_literal(pattern: str) -> str:
+    """Return the longest part of the glob *pattern* without wildcards."""
+    return max(re.split(r'[*?]|\[[^\]]*\]', pattern), key=len)
 
-        return None
 
-    @staticmethod
-    def delete_login_cookie():
-        login_info_file = os.path.join(USER_DIR, "login_info")
-        if os.path.isfile(login_info_file):
-            os.remove(login_info_file)
+def _zip_file_name(out_fn: Optional[str]) -> Tuple[str, str]:
+    """Return a message and the name of the zip file to download to."""
+    if not out_fn:
+        return "", 'download.zip'
+    if pathlib.Path(out_fn).suffix != ".zip":
+        return "Output file must be zip. Added extension .zip", out_fn + ".zip"
+    return "", out_fn
 
 
 def _split_dataset_path(dataset_path: str) -> Sequence[str]:
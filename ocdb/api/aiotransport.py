@@ -0,0 +1,255 @@
+import asyncio
+import email.parser
+import http.client
+import io
+import ssl
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from .mpf import MultiPartFormReader
+from .transport import DEFAULT_IDLE_TIMEOUT
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+_CHUNK_SIZE = 64 * 1024
+
+_PoolKey = Tuple[str, str, int]
+
+
+class AsyncResponse:
+    """
+    An HTTP response received by the :class:`AsyncTransport`. The body must be consumed
+    with :meth:`read` or :meth:`iter_chunks` before the connection can be reused.
+    """
+
+    def __init__(self, url: str, status: int, reason: str, headers: http.client.HTTPMessage,
+                 reader: asyncio.StreamReader, on_done):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._reader = reader
+        self._on_done = on_done
+        self._chunked = 'chunked' in headers.get('Transfer-Encoding', '').lower()
+        length = headers.get('Content-Length')
+        self._remaining = int(length) if length is not None and not self._chunked else None
+        if status in (204, 304) or 100 <= status < 200:
+            self._remaining = 0
+        self._done = False
+
+    def info(self) -> http.client.HTTPMessage:
+        return self.headers
+
+    async def read(self) -> bytes:
+        """Read the complete body."""
+        chunks = []
+        async for chunk in self.iter_chunks():
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def iter_chunks(self, chunk_size: int = _CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Iterate over the body in chunks of at most *chunk_size* bytes."""
+        try:
+            if self._chunked:
+                async for chunk in self._iter_chunked():
+                    yield chunk
+            elif self._remaining is None:
+                while True:
+                    chunk = await self._reader.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            else:
+                while self._remaining > 0:
+                    chunk = await self._reader.read(min(chunk_size, self._remaining))
+                    if not chunk:
+                        raise http.client.IncompleteRead(b'', self._remaining)
+                    self._remaining -= len(chunk)
+                    yield chunk
+        except BaseException:
+            self.close()
+            raise
+        self._finish(reusable=self._chunked or self._remaining is not None)
+
+    async def _iter_chunked(self) -> AsyncIterator[bytes]:
+        while True:
+            size_line = await self._reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # skip trailers
+                while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            yield await self._reader.readexactly(size)
+            await self._reader.readexactly(2)
+
+    def close(self):
+        """Release the connection. It is closed unless the body has been read completely."""
+        self._finish(reusable=False)
+
+    def _finish(self, reusable: bool):
+        if not self._done:
+            self._done = True
+            self._on_done(reusable and self.headers.get('Connection', '').lower() != 'close')
+
+    async def __aenter__(self) -> 'AsyncResponse':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class AsyncTransport:
+    """
+    Sends HTTP/1.1 requests on an asyncio event loop using only the standard library.
+    For every host, at most *max_connections* connections are open at a time, which are kept
+    alive for at most *idle_timeout* seconds between requests. Any number of requests may be
+    awaited concurrently; they wait for a free connection. If *zero_copy* is True, the files of
+    multipart form bodies are sent with ``loop.sendfile()``, see :meth:`MultiPartFormReader.write`.
+    """
+
+    def __init__(self,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 zero_copy: bool = True):
+        if max_connections < 1:
+            raise ValueError('"max_connections" must be a positive integer')
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.zero_copy = zero_copy
+        self._ssl_context = ssl_context
+        self._idle: Dict[_PoolKey, deque] = {}
+        self._semaphores: Dict[_PoolKey, asyncio.Semaphore] = {}
+
+    async def open(self, request: urllib.request.Request) -> AsyncResponse:
+        """
+        Send *request* and return the response once its headers have been received.
+        HTTP errors are raised as ``urllib.error.HTTPError``.
+        """
+        url = urllib.parse.urlsplit(request.full_url)
+        if url.scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f'unsupported URL scheme "{url.scheme}"')
+        key = (url.scheme, url.hostname, url.port or (443 if url.scheme == 'https' else 80))
+        target = (url.path or '/') + ('?' + url.query if url.query else '')
+        head = self._make_head(request, target, url.netloc)
+        body = request.data
+
+        semaphore = self._semaphores.setdefault(key, asyncio.Semaphore(self.max_connections))
+        await semaphore.acquire()
+        try:
+            response = await self._send(key, request.full_url, head, body, semaphore)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        if response.status >= 400:
+            content = await response.read()
+            raise urllib.error.HTTPError(request.full_url, response.status, response.reason, response.headers,
+                                         io.BytesIO(content))
+        return response
+
+    async def close(self):
+        for connections in self._idle.values():
+            while connections:
+                _, writer, _ = connections.pop()
+                writer.close()
+        self._idle.clear()
+
+    @staticmethod
+    def _make_head(request: urllib.request.Request, target: str, netloc: str) -> bytes:
+        headers = dict(request.header_items())
+        headers.setdefault('Host', netloc)
+        if request.data is not None:
+            headers.setdefault('Content-type', 'application/x-www-form-urlencoded')
+            if isinstance(request.data, bytes):
+                headers['Content-length'] = str(len(request.data))
+        lines = [f'{request.get_method()} {target} HTTP/1.1']
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _send(self, key: _PoolKey, url: str, head: bytes, body, semaphore: asyncio.Semaphore) \
+            -> AsyncResponse:
+        reader, writer, reused = await self._acquire(key)
+        try:
+            return await self._exchange(key, url, reader, writer, head, body, semaphore)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if not reused or not (body is None or isinstance(body, bytes) or hasattr(body, 'seek')):
+                raise
+            # The server has closed an idle keep-alive connection, so retry once on a new one.
+            if hasattr(body, 'seek'):
+                body.seek(0)
+            reader, writer = await self._connect(key)
+            try:
+                return await self._exchange(key, url, reader, writer, head, body, semaphore)
+            except BaseException:
+                writer.close()
+                raise
+        except BaseException:
+            writer.close()
+            raise
+
+    async def _exchange(self, key: _PoolKey, url: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                        head: bytes, body, semaphore: asyncio.Semaphore) -> AsyncResponse:
+        writer.write(head)
+        if isinstance(body, bytes):
+            writer.write(body)
+        elif self.zero_copy and isinstance(body, MultiPartFormReader):
+            await body.write(writer)
+        elif body is not None:
+            while True:
+                chunk = body.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('connection closed by server')
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+        if not version.startswith('HTTP/'):
+            raise http.client.BadStatusLine(status_line)
+        header_lines = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            header_lines.append(line)
+        headers = email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(b''.join(header_lines))
+
+        def on_done(reusable: bool):
+            if reusable and version == 'HTTP/1.1':
+                self._idle.setdefault(key, deque()).append((reader, writer, time.monotonic()))
+            else:
+                writer.close()
+            semaphore.release()
+
+        return AsyncResponse(url, int(status), reason, headers, reader, on_done)
+
+    async def _acquire(self, key: _PoolKey) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        connections = self._idle.get(key)
+        now = time.monotonic()
+        while connections:
+            reader, writer, last_used = connections.pop()
+            if now - last_used <= self.idle_timeout and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await self._connect(key)
+        return reader, writer, False
+
+    async def _connect(self, key: _PoolKey) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        scheme, host, port = key
+        ssl_context = None
+        if scheme == 'https':
+            ssl_context = self._ssl_context or ssl.create_default_context()
+        try:
+            return await asyncio.open_connection(host, port, ssl=ssl_context, limit=_CHUNK_SIZE * 4)
+        except OSError as e:
+            raise urllib.error.URLError(e) from e
@@ -1,6 +1,10 @@
 from abc import ABCMeta, abstractmethod
-from typing import Dict, Any, Optional, Sequence, Union, List
-import pandas as pd
+from typing import Dict, Any, Optional, Sequence, Union, List, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # pandas is only imported when datasets are requested as DataFrames
+    import pandas as pd
+    from .query import DatasetQuery
 
 UNDEFINED = object()
 
@@ -18,6 +22,12 @@ class Api(metaclass=ABCMeta):
                       disagree_publication: bool) -> JsonObj:
         """Upload the given Cal/Char files and return a validation report for each file."""
 
+    @abstractmethod
+    def fidrad_upload_parallel(self, cal_char_files: Sequence[str], disagree_publication: bool,
+                               max_workers: int = 8, max_files: int = 15,
+                               max_bytes: Optional[int] = None) -> JsonObj:
+        """Upload any number of Cal/Char files in concurrent batches and return the merged reports."""
+
     @abstractmethod
     def fidrad_history_tail(self, num_lines: int) -> JsonObj:
         """Returns the tail of the FidRadDB history file with a user defined maximum number of lines."""
@@ -42,6 +52,13 @@ class Api(metaclass=ABCMeta):
         Deletes the requested file.
         """
 
+    @abstractmethod
+    def fidrad_delete_files(self, pattern: str, max_workers: int = 8, max_retries: int = 2,
+                            dry_run: bool = False) -> List[JsonObj]:
+        """
+        Deletes all files matching the glob pattern and returns a status table.
+        """
+
     def fidrad_download_file(self, file_name: str, output_dir: str) -> str:
         """
           Download a FidRadDB Cal/Char file with the user defined file_name to a user defined output directory.
@@ -56,10 +73,26 @@ class Api(metaclass=ABCMeta):
                           submission_id: str, publication_date: str, allow_publication: bool) -> JsonObj:
         """Upload the given dataset and doc files and return a validation report for each dataset file."""
 
+    @abstractmethod
+    def upload_submission_parallel(self, path: str, dataset_files: Union[str, Sequence[str]],
+                                   submission_id: str, doc_files: Optional[Union[str, Sequence[str]]] = None,
+                                   publication_date: Optional[str] = None, allow_publication: Optional[bool] = False,
+                                   max_workers: int = 8, max_files: int = 100,
+                                   max_bytes: Optional[int] = None) -> JsonObj:
+        """Upload a large submission using concurrent requests and return the merged validation reports."""
+
     @abstractmethod
     def validate_submission_file(self, file_name: str) -> JsonObj:
         """Validate the given dataset and return a validation report."""
 
+    @abstractmethod
+    def validate_submission_files(self, file_names: Sequence[str], local_only: bool = False,
+                                  max_processes: Optional[int] = None, max_workers: int = 8) -> JsonObj:
+        """
+        Check the given dataset files locally, validate the passing ones on the server and return the reports
+        keyed by the file names as given.
+        """
+
     @abstractmethod
     def delete_dataset(self, dataset_file: str):
         """Delete a dataset."""
@@ -68,6 +101,11 @@ class Api(metaclass=ABCMeta):
     def get_datasets_by_submission(self, submission_id: str):
         """Get datasets by submission ID"""
 
+    @abstractmethod
+    def delete_datasets(self, dataset_ids: Sequence[str], max_workers: int = 8, max_retries: int = 2,
+                        dry_run: bool = False) -> List[JsonObj]:
+        """Delete many datasets concurrently and return a status table"""
+
     @abstractmethod
     def delete_datasets_by_submission(self, submission_id: str):
         """Delete datasets by submission ID"""
@@ -76,17 +114,56 @@ class Api(metaclass=ABCMeta):
     def find_datasets(self,
                       expr: str = None,
                       offset: int = 1,
-                      count: int = 1000) -> JsonObj:
+                      count: int = 1000,
+                      local: bool = False) -> JsonObj:
         """Find datasets."""
 
     @abstractmethod
-    def get_dataset(self, dataset_id: str, fmt: str) -> Union[JsonObj, pd.DataFrame]:
+    def query_datasets(self, query: 'DatasetQuery', local: bool = False, keep_unlocated: bool = False) -> JsonObj:
+        """Find datasets by a DatasetQuery, filtered by their locations."""
+
+    @abstractmethod
+    def sync_datasets(self, full: bool = False, page_size: int = 1000, max_workers: int = 8, **kwargs) -> JsonObj:
+        """Build or refresh the local dataset mirror used by find_datasets(local=True)."""
+
+    @abstractmethod
+    def iter_datasets(self,
+                      expr: str = None,
+                      page_size: int = 1000,
+                      max_prefetch: int = 2,
+                      **kwargs) -> Iterator[JsonObj]:
+        """Iterate over the dataset references of all result pages of a search."""
+
+    @abstractmethod
+    def iter_found_datasets(self, **kwargs) -> Iterator[JsonObj]:
+        """Iterate over the dataset references of a search while the response is received."""
+
+    @abstractmethod
+    def get_dataset(self, dataset_id: str, fmt: str) -> Union[JsonObj, 'pd.DataFrame']:
         """Get dataset by ID."""
 
     @abstractmethod
-    def get_dataset_by_name(self, dataset_path: str, fmt: str) -> Union[JsonObj, pd.DataFrame]:
+    def iter_dataset_records(self, dataset_id: str, fmt: str = 'json', chunk_size: Optional[int] = None) \
+            -> Iterator[Union[list, List[list], 'pd.DataFrame']]:
+        """Iterate over the records of a dataset, one by one or in chunks, while the response is received."""
+
+    @abstractmethod
+    def get_datasets_many(self, dataset_ids: Sequence[str], fmt: str = 'json', max_workers: int = 8,
+                          ordered: bool = False) -> Union[Iterator, 'pd.DataFrame']:
+        """Get many datasets by ID concurrently."""
+
+    @abstractmethod
+    def get_dataset_by_name(self, dataset_path: str, fmt: str) -> Union[JsonObj, 'pd.DataFrame']:
         """Get dataset by path and name."""
 
+    @abstractmethod
+    def export_dataset(self, dataset_id: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """Write dataset given by ID to a Parquet, Feather or CSV file."""
+
+    @abstractmethod
+    def export_dataset_by_name(self, dataset_path: str, file_path: str, fmt: Optional[str] = None) -> str:
+        """Write dataset given by path and name to a Parquet, Feather or CSV file."""
+
     @abstractmethod
     def list_datasets_in_path(self, dataset_path: str) -> JsonObj:
         """List datasets in path."""
@@ -105,12 +182,18 @@ class Api(metaclass=ABCMeta):
     def get_submissions_for_user(self, user_name: Optional[str]) -> JsonObj:
         """Get submissions for user"""
 
+    @abstractmethod
+    def delete_submissions(self, submission_ids: Sequence[str], max_workers: int = 8, max_retries: int = 2,
+                           dry_run: bool = False) -> List[JsonObj]:
+        """Delete many submissions concurrently and return a status table"""
+
     @abstractmethod
     def delete_submission(self, submission_id: str) -> JsonObj:
         """Delete submission"""
 
     @abstractmethod
-    def download_submission_file(self, submission_id: str, index: int, out_fn: Optional[str]) -> JsonObj:
+    def download_submission_file(self, submission_id: str, index: int, out_fn: Optional[str],
+                                 output_dir: str = '.', keep_zip: bool = True) -> JsonObj:
         """Download submission file by submission id and index"""
 
     @abstractmethod
@@ -136,6 +219,10 @@ class Api(metaclass=ABCMeta):
                  roles: Sequence[str]) -> JsonObj:
         """Add a new user"""
 
+    @abstractmethod
+    def add_users(self, users: Sequence[JsonObj], max_workers: int = 8):
+        """Add many new users using concurrent requests"""
+
     @abstractmethod
     def delete_user(self, name: str) -> JsonObj:
         """Delete existing user"""
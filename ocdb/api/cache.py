@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from ..const import CONFIG_DIR_MODE
+
+DEFAULT_CACHE_MAX_SIZE = 1024  # MiB
+DEFAULT_CACHE_TTL = 24 * 60 * 60  # seconds
+
+_META_SUFFIX = '.meta'
+_BODY_SUFFIX = '.body'
+
+
+class CacheEntry:
+    """Metadata of a cached response body."""
+
+    def __init__(self, key: str, size: int, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 stored: float = None, accessed: float = None):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored if stored is not None else time.time()
+        self.accessed = accessed if accessed is not None else self.stored
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored <= ttl
+
+    def to_dict(self) -> Dict:
+        return dict(key=self.key, size=self.size, etag=self.etag, last_modified=self.last_modified,
+                    stored=self.stored, accessed=self.accessed)
+
+
+class DatasetCache:
+    """
+    A size-bounded on-disk cache of dataset responses. Entries are keyed by request URL.
+    Once the total size of all bodies exceeds *max_size* bytes, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_CACHE_MAX_SIZE * 1024 * 1024,
+                 ttl: float = DEFAULT_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, CacheEntry]] = None
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        """The total size of all cached bodies in bytes."""
+        with self._lock:
+            return sum(entry.size for entry in self._get_entries().values())
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            return self._get_entries().get(key)
+
+    def read(self, entry: CacheEntry) -> Optional[bytes]:
+        """Read the body of *entry* and mark the entry as recently used. Returns None if the body is gone."""
+        try:
+            with open(self._path(entry.key, _BODY_SUFFIX), 'rb') as fp:
+                body = fp.read()
+        except OSError:
+            self.remove(entry.key)
+            return None
+        with self._lock:
+            entry.accessed = time.time()
+            self._write_meta(entry)
+        return body
+
+    def put(self, key: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None) \
+            -> CacheEntry:
+        entry = CacheEntry(key, len(body), etag=etag, last_modified=last_modified)
+        with self._lock:
+            self._atomic_write(self._path(key, _BODY_SUFFIX), body)
+            self._write_meta(entry)
+            self._get_entries()[key] = entry
+            self._evict()
+        return entry
+
+    def revalidated(self, entry: CacheEntry):
+        """Mark *entry* as fresh after the server has confirmed that it is unchanged."""
+        with self._lock:
+            entry.stored = entry.accessed = time.time()
+            self._write_meta(entry)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._get_entries().pop(key, None)
+            for suffix in (_META_SUFFIX, _BODY_SUFFIX):
+                try:
+                    os.remove(self._path(key, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._get_entries()):
+                self.remove(key)
+
+    def _evict(self):
+        entries = self._get_entries()
+        size = sum(entry.size for entry in entries.values())
+        for entry in sorted(entries.values(), key=lambda e: e.accessed):
+            if size <= self.max_size:
+                break
+            self.remove(entry.key)
+            size -= entry.size
+
+    def _get_entries(self) -> Dict[str, CacheEntry]:
+        if self._entries is None:
+            entries = {}
+            if os.path.isdir(self.cache_dir):
+                for file_name in os.listdir(self.cache_dir):
+                    if not file_name.endswith(_META_SUFFIX):
+                        continue
+                    try:
+                        with open(os.path.join(self.cache_dir, file_name)) as fp:
+                            entry = CacheEntry(**json.load(fp))
+                    except (OSError, ValueError, TypeError):
+                        continue
+                    entries[entry.key] = entry
+            self._entries = entries
+        return self._entries
+
+    def _write_meta(self, entry: CacheEntry):
+        self._atomic_write(self._path(entry.key, _META_SUFFIX), json.dumps(entry.to_dict()).encode('utf-8'))
+
+    def _atomic_write(self, path: str, data: bytes):
+        os.makedirs(self.cache_dir, mode=CONFIG_DIR_MODE, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest() + suffix)
@@ -0,0 +1,184 @@
+import http.client
+import zlib
+from typing import BinaryIO, Optional, Union
+
+# Sent as "Accept-Encoding" with API requests
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# Compression level of gzip-compressed request bodies, zlib's default
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Request bodies smaller than this number of bytes are never compressed
+COMPRESS_MIN_SIZE = 1024
+
+# Compressed request bodies up to this number of bytes are held in memory, larger ones are spooled to disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+_CHUNK_SIZE = 64 * 1024
+
+_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'x-gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+Body = Union[bytes, BinaryIO]
+
+
+class _DeflateDecompressor:
+    """
+    Decompresses a "deflate" response body, which should be zlib-wrapped but is sent as raw
+    deflate data by some servers. Falls back to raw deflate if the data fails to decompress
+    before any output was produced. All other attributes are those of the zlib decompressor.
+    """
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+        self._pending = b''
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._pending is None:
+            return self._decompressor.decompress(data)
+        self._pending += data
+        try:
+            output = self._decompressor.decompress(data)
+        except zlib.error:
+            data, self._pending = self._pending, None
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decompressor.decompress(data)
+        if output or self._decompressor.eof:
+            self._pending = None
+        return output
+
+    def __getattr__(self, name: str):
+        return getattr(self._decompressor, name)
+
+
+class DecodedResponse:
+    """
+    Wraps a response whose body is compressed according to its "Content-Encoding" header
+    and decompresses the body while it is read. At most one chunk of the compressed body and
+    the requested number of decompressed bytes are held in memory.
+    All other attributes are those of the wrapped response.
+    """
+
+    def __init__(self, response, encoding: str):
+        self._response = response
+        self._decompressor = _new_decompressor(encoding)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is None or amt < 0:
+            while not self._eof:
+                self._buffer += self._decompress_chunk()
+            amt = len(self._buffer)
+        while len(self._buffer) < amt and not self._eof:
+            self._buffer += self._decompress_chunk()
+        data = bytes(self._buffer[:amt])
+        del self._buffer[:amt]
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def _decompress_chunk(self) -> bytes:
+        data = self._response.read(_CHUNK_SIZE)
+        if not data:
+            self._eof = True
+            if not self._decompressor.eof:
+                raise http.client.IncompleteRead(b'')
+            return b''
+        try:
+            return self._decompressor.decompress(data)
+        except zlib.error as e:
+            raise http.client.HTTPException(f'invalid compressed response body: {e}') from e
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+    def __enter__(self) -> 'DecodedResponse':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._response.close()
+
+
+def decode_response(response):
+    """
+    Return *response* wrapped by a :class:`DecodedResponse` if its body is compressed
+    with gzip or deflate, otherwise return *response* itself.
+    """
+    encoding = _get_content_encoding(response.headers)
+    return DecodedResponse(response, encoding) if encoding in _WBITS else response
+
+
+def make_decompressor(headers):
+    """
+    Return a ``zlib`` decompressor for a response body compressed according to the "Content-Encoding"
+    of *headers*, or None if the body is not compressed.
+    """
+    encoding = _get_content_encoding(headers)
+    return _new_decompressor(encoding) if encoding in _WBITS else None
+
+
+def decode_content(data: bytes, headers) -> bytes:
+    """Decompress the complete response body *data* according to the "Content-Encoding" of *headers*."""
+    encoding = _get_content_encoding(headers)
+    if encoding not in _WBITS or not data:
+        return data
+    try:
+        try:
+            return zlib.decompress(data, _WBITS[encoding])
+        except zlib.error:
+            if encoding != 'deflate':
+                raise
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+    except zlib.error as e:
+        raise http.client.HTTPException(f'invalid compressed response body: {e}') from e
+
+
+def gzip_body(body: Body, level: int = DEFAULT_COMPRESS_LEVEL) -> Body:
+    """
+    Compress the request *body* with gzip. A binary stream is compressed into a seekable
+    temporary file, so that the compressed size is known before the request is sent.
+    """
+    import gzip
+    if isinstance(body, (bytes, bytearray)):
+        # gzip.compress() accepts mtime only since Python 3.8
+        import io
+        out_bytes = io.BytesIO()
+        with gzip.GzipFile(fileobj=out_bytes, mode='wb', compresslevel=level, mtime=0) as gz:
+            gz.write(body)
+        return out_bytes.getvalue()
+    import shutil
+    import tempfile
+    out_file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        with gzip.GzipFile(fileobj=out_file, mode='wb', compresslevel=level, mtime=0) as gz:
+            shutil.copyfileobj(body, gz, _CHUNK_SIZE)
+        out_file.seek(0)
+    except BaseException:
+        out_file.close()
+        raise
+    return out_file
+
+
+def get_body_size(body: Body) -> int:
+    """Return the size of a request *body* in bytes."""
+    if isinstance(body, (bytes, bytearray)) or hasattr(body, '__len__'):
+        return len(body)
+    position = body.tell()
+    size = body.seek(0, 2)
+    body.seek(position)
+    return size - position
+
+
+def _new_decompressor(encoding: str):
+    return _DeflateDecompressor() if encoding == 'deflate' else zlib.decompressobj(_WBITS[encoding])
+
+
+def _get_content_encoding(headers) -> str:
+    return (headers.get('Content-Encoding') or 'identity').strip().lower() if headers is not None else 'identity'
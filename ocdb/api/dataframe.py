@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .api import JsonObj
+
+# String columns with at most this ratio of distinct values to rows become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+DATETIME_COLUMN = 'datetime'
+
+
+def make_dataframe(ds: JsonObj) -> pd.DataFrame:
+    """
+    Convert a dataset into a DataFrame with typed columns.
+
+    Numeric fields become float64, or int64 if all values are integers.
+    Values equal to the SeaBASS missing value ("/missing" header) become NaN.
+    Repeated strings become categoricals. If the dataset has a "date" field (yyyymmdd),
+    a datetime64 column "datetime" is added, which includes the "time" field (hh:mm:ss) if present.
+    """
+    attributes = ds.get('attributes') or []
+    records = ds.get('records') or []
+    if not attributes or not any(records):
+        return pd.DataFrame(columns=attributes or None)
+
+    table = np.array(records, dtype=object)
+    if table.ndim != 2 or table.shape[1] != len(attributes):
+        raise ValueError(f'dataset has {len(attributes)} attributes but records of different length')
+
+    missing = _get_missing_value(ds.get('metadata') or {})
+    columns: Dict[str, Any] = {}
+    for index, name in enumerate(attributes):
+        columns[name] = _make_column(table[:, index], missing)
+
+    if 'date' in columns:
+        times = table[:, attributes.index('time')] if 'time' in columns else None
+        columns[DATETIME_COLUMN] = _make_datetime(table[:, attributes.index('date')], times)
+
+    return pd.DataFrame(columns, copy=False)
+
+
+def _get_missing_value(metadata: Dict[str, Any]) -> Optional[float]:
+    missing = metadata.get('missing')
+    if missing is None:
+        return None
+    try:
+        return float(missing)
+    except (TypeError, ValueError):
+        return None
+
+
+def _make_column(array: np.ndarray, missing: Optional[float]):
+    kind = pd.api.types.infer_dtype(array, skipna=True)
+    if kind in ('integer', 'floating', 'mixed-integer-float', 'decimal'):
+        try:
+            numbers = array.astype(np.float64)
+        except (TypeError, ValueError):
+            numbers = pd.to_numeric(array, errors='coerce').astype(np.float64)
+        if missing is not None:
+            numbers[numbers == missing] = np.nan
+        if kind == 'integer' and not np.isnan(numbers).any():
+            return numbers.astype(np.int64)
+        return numbers
+
+    codes, categories = pd.factorize(array)
+    if len(categories) <= CATEGORY_MAX_UNIQUE_RATIO * len(array):
+        return pd.Categorical.from_codes(codes, categories=categories)
+    return array
+
+
+def _make_datetime(dates: np.ndarray, times: Optional[np.ndarray]) -> np.ndarray:
+    # Parse every distinct value only once, dates are yyyymmdd numbers or strings
+    codes, unique_dates = pd.factorize(dates, use_na_sentinel=False)
+    days = pd.to_numeric(pd.Series(unique_dates, dtype=object), errors='coerce')
+    result = pd.to_datetime(pd.DataFrame({'year': days // 10000, 'month': days // 100 % 100, 'day': days % 100}),
+                            errors='coerce').to_numpy()[codes]
+    if times is not None:
+        codes, unique_times = pd.factorize(times, use_na_sentinel=False)
+        result += pd.to_timedelta(pd.Series(unique_times, dtype=object).astype(str), errors='coerce').to_numpy()[codes]
+    return result
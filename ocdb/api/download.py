@@ -0,0 +1,268 @@
+import base64
+import hashlib
+import http.client
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Optional, Tuple
+
+DEFAULT_MAX_RESUMES = 5
+
+PART_SUFFIX = '.part'
+
+# Suffix of the file next to a ".part" file holding what is needed to resume it in a later call
+STATE_SUFFIX = '.json'
+
+_CHUNK_SIZE = 64 * 1024
+
+# Digest algorithm names used in "Digest" and "Repr-Digest" headers mapped to hashlib names
+_DIGEST_ALGORITHMS = {
+    'sha-512': 'sha512',
+    'sha-256': 'sha256',
+    'sha': 'sha1',
+    'md5': 'md5',
+}
+
+_CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(IOError):
+    """Raised if a download is incomplete or fails verification."""
+
+
+class DownloadStats:
+    """Statistics of a completed download."""
+
+    def __init__(self, num_bytes: int, duration: float, num_resumes: int):
+        self.num_bytes = num_bytes
+        self.duration = duration
+        self.num_resumes = num_resumes
+
+    @property
+    def rate(self) -> float:
+        """Transfer rate in bytes per second."""
+        return self.num_bytes / self.duration if self.duration > 0 else 0.0
+
+    def __str__(self) -> str:
+        text = f'{self.num_bytes} bytes in {self.duration:.2f} s, {self.rate / 1e6:.2f} MB/s'
+        if self.num_resumes:
+            text += f', resumed {self.num_resumes} time(s)'
+        return text
+
+
+def download(urlopen: Callable[[urllib.request.Request], http.client.HTTPResponse],
+             request: urllib.request.Request,
+             file_path: Optional[str] = None,
+             on_data: Optional[Callable[[bytes], None]] = None,
+             on_restart: Optional[Callable[[], None]] = None,
+             max_resumes: int = DEFAULT_MAX_RESUMES) -> DownloadStats:
+    """
+    Download the response body of *request* opened by *urlopen*.
+
+    The body is written to *file_path* + ".part", which is renamed to *file_path* once the
+    download is complete and verified. If *file_path* is None, the body is only passed to *on_data*.
+
+    If the connection drops and the server accepts byte ranges, the download is resumed
+    up to *max_resumes* times with a "Range" request, guarded by "If-Range" if the server sent an
+    ETag or Last-Modified header. If the server answers with the full body instead,
+    *on_restart* is called and the download starts from zero.
+
+    The received size is verified against Content-Length, the checksum against a
+    "Digest", "Repr-Digest" or "Content-MD5" header if present. On failure,
+    the ".part" file is removed and :class:`DownloadError` is raised.
+
+    If the download of *file_path* can be resumed, i.e. the server accepts byte ranges and has sent a
+    validator, the validator, size and checksum are saved next to the ".part" file. A ".part" file left
+    by a dropped connection or an interruption is then kept, and the next call resumes it from its end.
+    The bytes already received are passed to *on_data* again before the download continues.
+    """
+    part_path = file_path + PART_SUFFIX if file_path else None
+    state_path = part_path + STATE_SUFFIX if part_path else None
+    t0 = time.perf_counter()
+    offset = 0
+    num_bytes = 0
+    num_resumes = 0
+    total_size = None
+    validator = None
+    accepts_ranges = False
+    checksum: Optional[Tuple[str, bytes]] = None
+    hasher = None
+    state = _load_state(state_path, part_path) if part_path else None
+    if state is not None:
+        offset = os.path.getsize(part_path)
+        total_size, validator, checksum = state
+        accepts_ranges = True
+        hasher = hashlib.new(checksum[0]) if checksum else None
+        num_resumes += 1
+    elif state_path is not None:
+        _remove(state_path)
+    out_file = open(part_path, 'ab' if state is not None else 'wb') if part_path else None
+    try:
+        if offset > 0 and (hasher is not None or on_data is not None):
+            # Replay the bytes received by an earlier call
+            with open(part_path, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(_CHUNK_SIZE), b''):
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    if on_data is not None:
+                        on_data(chunk)
+        while True:
+            range_request = _copy_request(request)
+            # Ranges, Content-Length and checksums refer to the raw bytes, so never ask for a compressed body
+            range_request.add_header('Accept-Encoding', 'identity')
+            if offset > 0:
+                range_request.add_header('Range', f'bytes={offset}-')
+                if validator:
+                    range_request.add_header('If-Range', validator)
+            try:
+                with _interruptible(urlopen, range_request) as response:
+                    if offset > 0 and response.status == 206:
+                        start, total = _parse_content_range(response.headers.get('Content-Range'))
+                        if start != offset or (None not in (total, total_size) and total != total_size):
+                            raise DownloadError(f'unexpected Content-Range "{response.headers.get("Content-Range")}"')
+                    else:
+                        if offset > 0:
+                            # The server sent the complete body, e.g. because the resource has changed
+                            offset = 0
+                            if out_file is not None:
+                                out_file.seek(0)
+                                out_file.truncate()
+                            if on_restart is not None:
+                                on_restart()
+                        total_size = _get_content_length(response)
+                        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                        accepts_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+                        checksum = _get_checksum(response.headers)
+                        hasher = hashlib.new(checksum[0]) if checksum else None
+                        if state_path is not None:
+                            if accepts_ranges and validator:
+                                _save_state(state_path, total_size, validator, checksum)
+                            else:
+                                _remove(state_path)
+
+                    while True:
+                        chunk = _interruptible(response.read, _CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        if out_file is not None:
+                            out_file.write(chunk)
+                        if on_data is not None:
+                            on_data(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        offset += len(chunk)
+                        num_bytes += len(chunk)
+                    if total_size is not None and offset < total_size:
+                        raise _Interrupted() from http.client.IncompleteRead(b'', total_size - offset)
+                break
+            except _Interrupted as e:
+                if not accepts_ranges or num_resumes >= max_resumes:
+                    raise e.__cause__
+                num_resumes += 1
+
+        if total_size is not None and offset != total_size:
+            raise DownloadError(f'expected {total_size} bytes but received {offset}')
+        if checksum is not None and hasher.digest() != checksum[1]:
+            raise DownloadError(f'{checksum[0]} checksum mismatch')
+        if out_file is not None:
+            out_file.close()
+            os.replace(part_path, file_path)
+            _remove(state_path)
+    except BaseException as e:
+        if out_file is not None:
+            out_file.close()
+            # Keep what has been received if a later call can resume it
+            if isinstance(e, (DownloadError, urllib.error.HTTPError)) or not os.path.exists(state_path):
+                _remove(part_path)
+                _remove(state_path)
+        raise
+    return DownloadStats(num_bytes, time.perf_counter() - t0, num_resumes)
+
+
+class _Interrupted(Exception):
+    """Signals a dropped connection, the cause is the original error."""
+
+
+def _interruptible(func, *args):
+    try:
+        return func(*args)
+    except urllib.error.HTTPError:
+        raise
+    except (http.client.HTTPException, OSError) as e:
+        raise _Interrupted() from e
+
+
+def _load_state(state_path: str, part_path: str) -> Optional[Tuple[Optional[int], str, Optional[Tuple[str, bytes]]]]:
+    """Return the total size, validator and checksum saved for the ".part" file, or None if it cannot be resumed."""
+    if not os.path.exists(part_path):
+        return None
+    try:
+        with open(state_path) as fp:
+            state = json.load(fp)
+        checksum = state.get('checksum')
+        return (state.get('total_size'), state['validator'],
+                (checksum[0], base64.b64decode(checksum[1])) if checksum else None)
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+
+def _save_state(state_path: str, total_size: Optional[int], validator: str, checksum: Optional[Tuple[str, bytes]]):
+    state = {'total_size': total_size, 'validator': validator,
+             'checksum': [checksum[0], base64.b64encode(checksum[1]).decode('ascii')] if checksum else None}
+    with open(state_path, 'w') as fp:
+        json.dump(state, fp)
+
+
+def _remove(path: Optional[str]):
+    if path is not None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _copy_request(request: urllib.request.Request) -> urllib.request.Request:
+    return urllib.request.Request(request.full_url, data=request.data, headers=dict(request.header_items()),
+                                  method=request.get_method())
+
+
+def _get_content_length(response) -> Optional[int]:
+    length = response.headers.get('Content-Length')
+    if length is None or 'chunked' in response.headers.get('Transfer-Encoding', '').lower():
+        return None
+    try:
+        return int(length)
+    except ValueError:
+        return None
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    match = _CONTENT_RANGE_PATTERN.match(value or '')
+    if match is None:
+        return None, None
+    total = match.group(3)
+    return int(match.group(1)), None if total == '*' else int(total)
+
+
+def _get_checksum(headers) -> Optional[Tuple[str, bytes]]:
+    """Return the hashlib algorithm name and the digest of the complete body, if given by *headers*."""
+    digests = {}
+    for header in ('Repr-Digest', 'Digest'):
+        for item in (headers.get(header) or '').split(','):
+            name, sep, value = item.strip().partition('=')
+            algorithm = _DIGEST_ALGORITHMS.get(name.strip().lower())
+            if sep and algorithm and algorithm not in digests:
+                digests[algorithm] = value.strip().strip(':')
+    content_md5 = headers.get('Content-MD5')
+    if content_md5 and 'md5' not in digests:
+        digests['md5'] = content_md5.strip()
+    for algorithm in _DIGEST_ALGORITHMS.values():
+        if algorithm in digests:
+            try:
+                return algorithm, base64.b64decode(digests[algorithm], validate=True)
+            except ValueError:
+                continue
+    return None
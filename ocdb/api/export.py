@@ -0,0 +1,77 @@
+import os
+from typing import Optional, Sequence, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+EXPORT_FORMATS = ('parquet', 'feather', 'csv')
+
+_FORMAT_EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+    '.csv': 'csv',
+}
+
+
+def get_export_format(file_path: str, fmt: Optional[str] = None) -> str:
+    """Return the export format *fmt* or, if not given, the format guessed from the extension of *file_path*."""
+    if fmt is None:
+        fmt = _FORMAT_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+        if fmt is None:
+            raise ValueError(f'Cannot determine export format from file name "{file_path}", '
+                             f'must be one of {", ".join(EXPORT_FORMATS)}')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Invalid export format "{fmt}", must be one of {", ".join(EXPORT_FORMATS)}')
+    return fmt
+
+
+def write_dataframe(df: 'pd.DataFrame', file_path: str, fmt: Optional[str] = None) -> str:
+    """
+    Write the dataset DataFrame *df* to *file_path* in format *fmt*, "parquet", "feather" or "csv".
+    Feather files are written uncompressed, so that they can be memory-mapped without copying,
+    see :func:`read_feather`. Parquet and Feather require the optional package pyarrow.
+    The file is first written to a temporary file which then replaces *file_path*.
+    Returns the format used.
+    """
+    fmt = get_export_format(file_path, fmt)
+    temp_path = file_path + '.tmp'
+    try:
+        if fmt == 'csv':
+            df.to_csv(temp_path, index=False)
+        else:
+            pa = _import_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if fmt == 'parquet':
+                import pyarrow.parquet
+                pyarrow.parquet.write_table(table, temp_path)
+            else:
+                import pyarrow.feather
+                pyarrow.feather.write_feather(table, temp_path, compression='uncompressed')
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return fmt
+
+
+def read_feather(file_path: str, columns: Optional[Sequence[str]] = None):
+    """
+    Read a Feather file written by :func:`write_dataframe` as a ``pyarrow.Table``.
+    The file is memory-mapped, so the columns reference the file pages without being copied.
+    """
+    _import_pyarrow()
+    import pyarrow.feather
+    return pyarrow.feather.read_table(file_path, columns=columns, memory_map=True)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError('Exporting to Parquet or Feather requires the package "pyarrow", '
+                          'install it using "pip install pyarrow" or '
+                          '"conda install -c conda-forge pyarrow"') from e
+    return pyarrow
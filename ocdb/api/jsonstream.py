@@ -0,0 +1,165 @@
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
+
+_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Parser states
+_START = 'start'
+_FIRST_KEY = 'first key'
+_KEY = 'key'
+_COLON = 'colon'
+_VALUE = 'value'
+_AFTER_VALUE = 'after value'
+_FIRST_ITEM = 'first item'
+_ITEM = 'item'
+_AFTER_ITEM = 'after item'
+_END = 'end'
+
+
+class JsonArrayParser:
+    """
+    Incrementally parses a JSON object that is fed in chunks of bytes, e.g. as they arrive from the server,
+    and returns the items of its array member *key* as soon as they are complete.
+    All other members are collected in :attr:`members`, so that only the members, a single item and
+    the unparsed rest of the last chunk are held in memory.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.members: Dict[str, Any] = {}
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._state = _START
+        self._member_key = None
+        # An incomplete value is parsed again only once the buffer has grown to this size,
+        # so that large values are not parsed over and over again
+        self._min_size = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether the complete JSON object has been parsed."""
+        return self._state == _END
+
+    def feed(self, data: bytes) -> List[Any]:
+        """Parse the next chunk of *data* and return the items that have become complete."""
+        self._buffer += self._text_decoder.decode(data)
+        return self._parse(final=False)
+
+    def close(self) -> List[Any]:
+        """Parse the rest of the input and return the remaining items. Raises ValueError for an incomplete object."""
+        self._buffer += self._text_decoder.decode(b'', final=True)
+        items = self._parse(final=True)
+        if self._state != _END:
+            raise ValueError('incomplete JSON object')
+        return items
+
+    def iter_items(self, fp: BinaryIO, chunk_size: int = _CHUNK_SIZE) -> Iterator[Any]:
+        """Read the binary stream *fp* in chunks of *chunk_size* bytes and yield the items as they are complete."""
+        while True:
+            data = fp.read(chunk_size)
+            if not data:
+                break
+            yield from self.feed(data)
+        yield from self.close()
+
+    def _parse(self, final: bool) -> List[Any]:
+        items = []
+        text = self._buffer
+        pos = 0
+        while len(text) >= self._min_size or final:
+            pos = _WHITESPACE.match(text, pos).end()
+            if pos == len(text):
+                break
+            char = text[pos]
+            state = self._state
+            if state == _START:
+                self._expect(char, '{', pos)
+                pos += 1
+                self._state = _FIRST_KEY
+            elif state in (_FIRST_KEY, _KEY):
+                if char == '}' and state == _FIRST_KEY:
+                    pos += 1
+                    self._state = _END
+                    continue
+                self._expect(char, '"', pos)
+                result = self._decode(text, pos, final)
+                if result is None:
+                    break
+                self._member_key, pos = result
+                self._state = _COLON
+            elif state == _COLON:
+                self._expect(char, ':', pos)
+                pos += 1
+                self._state = _VALUE
+            elif state == _VALUE:
+                if self._member_key == self.key and char == '[':
+                    pos += 1
+                    self._state = _FIRST_ITEM
+                    continue
+                result = self._decode(text, pos, final)
+                if result is None:
+                    break
+                self.members[self._member_key], pos = result
+                self._state = _AFTER_VALUE
+            elif state == _AFTER_VALUE:
+                self._expect(char, ',}', pos)
+                pos += 1
+                self._state = _KEY if char == ',' else _END
+            elif state in (_FIRST_ITEM, _ITEM):
+                if char == ']' and state == _FIRST_ITEM:
+                    pos += 1
+                    self._state = _AFTER_VALUE
+                    continue
+                result = self._decode(text, pos, final)
+                if result is None:
+                    break
+                item, pos = result
+                items.append(item)
+                self._state = _AFTER_ITEM
+            elif state == _AFTER_ITEM:
+                self._expect(char, ',]', pos)
+                pos += 1
+                self._state = _ITEM if char == ',' else _AFTER_VALUE
+            else:
+                raise ValueError(f'extra data after JSON object at position {pos}')
+        self._buffer = text[pos:]
+        return items
+
+    def _decode(self, text: str, pos: int, final: bool):
+        """Decode the value at *pos* and return it with its end position, or None if it is not complete yet."""
+        try:
+            value, end = self._json_decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            value, end = None, None
+        # A number at the end of the buffer may continue in the next chunk
+        if end is None or (end == len(text) and not final):
+            self._min_size = 2 * (len(text) - pos)
+            return None
+        self._min_size = 0
+        return value, end
+
+    @staticmethod
+    def _expect(char: str, expected: str, pos: int):
+        if char not in expected:
+            raise ValueError(f'expected {" or ".join(map(repr, expected))} but found {char!r} at position {pos}')
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Yield lists of at most *chunk_size* consecutive *items*."""
+    if chunk_size < 1:
+        raise ValueError('"chunk_size" must be a positive integer')
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
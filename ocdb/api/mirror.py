@@ -0,0 +1,365 @@
+import calendar
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .api import JsonObj
+from ..const import CONFIG_DIR_MODE
+
+# Query parameters of find_datasets that are answered by the mirror
+LOCAL_QUERY_PARAMS = ('region', 'start_time', 'end_time', 'path', 'submission_id', 'user_id', 'status',
+                      'pgroup', 'pname', 'pmode', 'offset', 'count')
+
+BBox = Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS datasets (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    path TEXT,
+    submission_id TEXT,
+    user_id TEXT,
+    status TEXT,
+    start_time REAL,
+    end_time REAL,
+    ref TEXT NOT NULL,
+    synced REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS datasets_path ON datasets (path);
+CREATE INDEX IF NOT EXISTS datasets_submission_id ON datasets (submission_id);
+CREATE INDEX IF NOT EXISTS datasets_user_id ON datasets (user_id);
+CREATE INDEX IF NOT EXISTS datasets_start_time ON datasets (start_time);
+CREATE INDEX IF NOT EXISTS datasets_end_time ON datasets (end_time);
+CREATE TABLE IF NOT EXISTS dataset_params (
+    dataset INTEGER NOT NULL REFERENCES datasets (rowid) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dataset_params_value ON dataset_params (kind, value, dataset);
+CREATE INDEX IF NOT EXISTS dataset_params_dataset ON dataset_params (dataset);
+"""
+
+_RTREE_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS dataset_bbox USING rtree (id, min_lon, max_lon, min_lat, max_lat)"
+
+# Used if SQLite has been compiled without the R*Tree module
+_BBOX_TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dataset_bbox (
+    id INTEGER PRIMARY KEY,
+    min_lon REAL, max_lon REAL, min_lat REAL, max_lat REAL
+);
+CREATE INDEX IF NOT EXISTS dataset_bbox_lat ON dataset_bbox (min_lat, max_lat);
+"""
+
+_UNIT_SUFFIX = re.compile(r'\[[^\]]*\]$')
+
+
+class DatasetMirror:
+    """
+    A local SQLite index of dataset references and metadata, filled by ``OCDBApi.sync_datasets()``,
+    which answers attribute, time range and bounding box queries of ``find_datasets(local=True)`` offline.
+    Bounding boxes are indexed by an R-tree, those crossing the antimeridian as two boxes with the ids
+    ``rowid`` and ``-rowid``. The mirror may be used from several threads.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        if file_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), mode=CONFIG_DIR_MODE, exist_ok=True)
+        self._conn = sqlite3.connect(file_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute('PRAGMA foreign_keys = ON')
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.execute(_RTREE_SCHEMA)
+            except sqlite3.OperationalError:
+                self._conn.executescript(_BBOX_TABLE_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def server_url(self) -> Optional[str]:
+        """The URL of the server the mirror has been synchronized with."""
+        return self._get_info('server_url')
+
+    @property
+    def last_sync(self) -> Optional[float]:
+        """The time of the last completed synchronization in seconds since the epoch, or None."""
+        value = self._get_info('last_sync')
+        return float(value) if value is not None else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM datasets').fetchone()[0]
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute('SELECT id FROM datasets')}
+
+    def begin_sync(self, server_url: str):
+        """Prepare a synchronization with *server_url*, removing all entries of a different server."""
+        with self._lock, self._transaction():
+            if self._get_info('server_url') not in (None, server_url):
+                self._conn.execute('DELETE FROM dataset_bbox')
+                self._conn.execute('DELETE FROM datasets')
+                self._conn.execute("DELETE FROM mirror_info WHERE key = 'last_sync'")
+            self._set_info('server_url', server_url)
+
+    def end_sync(self):
+        """Record the completion of a synchronization."""
+        with self._lock:
+            self._set_info('last_sync', repr(time.time()))
+
+    def put(self, ref: JsonObj, location: Any = None, dataset: Optional[JsonObj] = None):
+        """
+        Add or replace the dataset reference *ref*, a search result of find_datasets, with its GeoJSON
+        *location*. If given, attributes and time range are taken from the *dataset* without its records.
+        Otherwise only the reference and bounding box of an existing entry are updated.
+        """
+        bbox = _get_geojson_bbox(location)
+        with self._lock, self._transaction():
+            row = self._conn.execute('SELECT rowid FROM datasets WHERE id = ?', (ref['id'],)).fetchone()
+            if dataset is None and row is not None:
+                self._conn.execute('UPDATE datasets SET path = ?, ref = ?, synced = ? WHERE rowid = ?',
+                                   (ref.get('path'), json.dumps(ref), time.time(), row[0]))
+                rowid = row[0]
+                if bbox is None:
+                    return
+            else:
+                dataset = dataset or {}
+                metadata = dataset.get('metadata') or {}
+                if bbox is None:
+                    bbox = _get_metadata_bbox(metadata)
+                start_time, end_time = _get_time_range(metadata)
+                if row is not None:
+                    self._delete_rows([row[0]])
+                cursor = self._conn.execute(
+                    'INSERT INTO datasets (id, path, submission_id, user_id, status, start_time, end_time, ref, '
+                    'synced) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (ref['id'], ref.get('path') or dataset.get('path'),
+                     _get_str(ref, dataset, 'submission_id'), _get_str(ref, dataset, 'user_id'),
+                     _get_str(ref, dataset, 'status'), start_time, end_time, json.dumps(ref), time.time()))
+                rowid = cursor.lastrowid
+                params = [(rowid, 'pname', name) for name in _get_names(dataset.get('attributes'))]
+                params.extend((rowid, 'pgroup', name)
+                              for name in _get_names(dataset.get('pgroup') or dataset.get('groups')))
+                self._conn.executemany('INSERT INTO dataset_params (dataset, kind, value) VALUES (?, ?, ?)', params)
+            self._conn.execute('DELETE FROM dataset_bbox WHERE id IN (?, ?)', (rowid, -rowid))
+            if bbox is not None:
+                min_lon, min_lat, max_lon, max_lat = bbox
+                self._conn.executemany('INSERT INTO dataset_bbox (id, min_lon, max_lon, min_lat, max_lat) '
+                                       'VALUES (?, ?, ?, ?, ?)',
+                                       [(box_id, west, east, min_lat, max_lat) for box_id, (west, east)
+                                        in zip((rowid, -rowid), _split_lon_range(min_lon, max_lon))])
+
+    def remove(self, dataset_ids: Iterable[str]):
+        with self._lock, self._transaction():
+            rowids = [row[0] for dataset_id in dataset_ids
+                      for row in self._conn.execute('SELECT rowid FROM datasets WHERE id = ?', (dataset_id,))]
+            self._delete_rows(rowids)
+
+    def find(self, **kwargs) -> JsonObj:
+        """
+        Find datasets like ``find_datasets()``, answering from the mirror. Supported are the query
+        parameters :data:`LOCAL_QUERY_PARAMS`. *path* may contain the wildcards "*" and "?".
+        *pname* and *pgroup* may be comma-separated lists, a dataset matches if it contains any of them.
+        Times are dates of the form "2016-07-01", a dataset matches if its time range overlaps.
+        """
+        query = {k: v for k, v in kwargs.items() if v is not None}
+        query.pop('geojson', None)
+        unsupported = sorted(set(query) - set(LOCAL_QUERY_PARAMS))
+        if unsupported:
+            raise ValueError(f'query parameter(s) {", ".join(unsupported)} cannot be answered locally, '
+                             f'supported are {", ".join(LOCAL_QUERY_PARAMS)}')
+        if self.last_sync is None:
+            raise ValueError('the local dataset mirror has not been synchronized yet')
+
+        conditions = []
+        args: List[Any] = []
+        for name in ('submission_id', 'user_id', 'status'):
+            if name in query:
+                conditions.append(f'd.{name} = ?')
+                args.append(str(query[name]))
+        if 'path' in query:
+            path = str(query['path'])
+            conditions.append('d.path GLOB ?' if any(c in path for c in '*?[') else 'd.path = ?')
+            args.append(path)
+        if 'start_time' in query:
+            conditions.append('d.end_time >= ?')
+            args.append(_parse_query_date(query['start_time'], 'start_time'))
+        if 'end_time' in query:
+            conditions.append('d.start_time < ?')
+            args.append(_parse_query_date(query['end_time'], 'end_time') + 24 * 60 * 60)
+
+        pmode = query.get('pmode', 'contains')
+        if pmode not in ('contains', 'do_not_filter'):
+            raise ValueError(f'pmode "{pmode}" cannot be answered locally')
+        if pmode == 'contains':
+            for kind in ('pname', 'pgroup'):
+                values = _get_names(query.get(kind))
+                if values:
+                    placeholders = ', '.join('?' * len(values))
+                    conditions.append(f'd.rowid IN (SELECT dataset FROM dataset_params '
+                                      f'WHERE kind = ? AND value IN ({placeholders}))')
+                    args.extend([kind, *values])
+
+        if 'region' in query:
+            west, south, east, north = _parse_region(query['region'])
+            lon_ranges = _split_lon_range(west, east)
+            spatial = ' OR '.join('(b.max_lon >= ? AND b.min_lon <= ?)' for _ in lon_ranges)
+            conditions.append(f'd.rowid IN (SELECT abs(b.id) FROM dataset_bbox b '
+                              f'WHERE b.max_lat >= ? AND b.min_lat <= ? AND ({spatial}))')
+            args.extend([south, north, *[value for lon_range in lon_ranges for value in lon_range]])
+
+        where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+        offset = max(int(query.get('offset', 1)) - 1, 0)
+        count = int(query.get('count', 1000))
+        with self._lock:
+            total_count = self._conn.execute(f'SELECT COUNT(*) FROM datasets d{where}', args).fetchone()[0]
+            rows = self._conn.execute(f'SELECT d.ref FROM datasets d{where} ORDER BY d.path, d.id LIMIT ? OFFSET ?',
+                                      [*args, count, offset]).fetchall()
+        datasets = [json.loads(row[0]) for row in rows]
+        return {'total_count': total_count, 'datasets': datasets, 'dataset_ids': [ds['id'] for ds in datasets],
+                'locations': {}, 'query': query}
+
+    def _delete_rows(self, rowids: Sequence[int]):
+        for rowid in rowids:
+            self._conn.execute('DELETE FROM dataset_bbox WHERE id IN (?, ?)', (rowid, -rowid))
+            self._conn.execute('DELETE FROM datasets WHERE rowid = ?', (rowid,))
+
+    def _get_info(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM mirror_info WHERE key = ?', (key,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _set_info(self, key: str, value: str):
+        self._conn.execute('INSERT OR REPLACE INTO mirror_info (key, value) VALUES (?, ?)', (key, value))
+
+    def _transaction(self):
+        return _Transaction(self._conn)
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute('BEGIN')
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._conn.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+
+
+def _get_str(ref: JsonObj, dataset: JsonObj, name: str) -> Optional[str]:
+    value = ref.get(name) or dataset.get(name)
+    return str(value) if value is not None else None
+
+
+def _get_names(value) -> List[str]:
+    """Return the lower-case names of a list or a comma-separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(name).strip().lower() for name in value if str(name).strip()]
+
+
+def _get_geojson_bbox(obj) -> Optional[BBox]:
+    """Return the bounding box of all coordinates of a GeoJSON object, which may also be given as JSON text."""
+    if isinstance(obj, str):
+        try:
+            obj = json.loads(obj)
+        except ValueError:
+            return None
+    if isinstance(obj, dict) and isinstance(obj.get('bbox'), list) and len(obj['bbox']) == 4:
+        return tuple(float(value) for value in obj['bbox'])
+    lons = []
+    lats = []
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(item.get(key) for key in ('coordinates', 'geometry', 'geometries', 'features')
+                         if item.get(key) is not None)
+        elif isinstance(item, list):
+            if len(item) >= 2 and all(isinstance(value, (int, float)) for value in item[:2]):
+                lons.append(float(item[0]))
+                lats.append(float(item[1]))
+            else:
+                stack.extend(item)
+    if not lons:
+        return None
+    return min(lons), min(lats), max(lons), max(lats)
+
+
+def _get_metadata_bbox(metadata: JsonObj) -> Optional[BBox]:
+    """Return the bounding box given by the SeaBASS headers "/west_longitude" etc."""
+    values = []
+    for key in ('west_longitude', 'south_latitude', 'east_longitude', 'north_latitude'):
+        value = _parse_float(metadata.get(key))
+        if value is None:
+            return None
+        values.append(value)
+    return tuple(values)
+
+
+def _get_time_range(metadata: JsonObj) -> Tuple[Optional[float], Optional[float]]:
+    """Return the time range given by the SeaBASS headers "/start_date", "/start_time" etc. as epoch seconds."""
+    start = _parse_datetime(metadata.get('start_date'), metadata.get('start_time'))
+    end = _parse_datetime(metadata.get('end_date'), metadata.get('end_time'))
+    return start if start is not None else end, end if end is not None else start
+
+
+def _parse_datetime(date, time_of_day) -> Optional[float]:
+    try:
+        date = datetime.datetime.strptime(str(date).strip(), '%Y%m%d')
+    except ValueError:
+        return None
+    seconds = 0
+    if time_of_day:
+        parts = _UNIT_SUFFIX.sub('', str(time_of_day).strip()).split(':')
+        if len(parts) == 3 and all(part.isdigit() for part in parts):
+            seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    return calendar.timegm(date.timetuple()) + seconds
+
+
+def _parse_query_date(value, name: str) -> float:
+    try:
+        date = datetime.datetime.strptime(str(value).strip()[:10], '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'"{name}" must be a date of the form 2016-07-01, got "{value}"') from None
+    return float(calendar.timegm(date.timetuple()))
+
+
+def _parse_region(value) -> Tuple[float, float, float, float]:
+    values = value.split(',') if isinstance(value, str) else list(value)
+    try:
+        west, south, east, north = (float(v) for v in values)
+    except (TypeError, ValueError):
+        raise ValueError(f'"region" must be of the form "<west>,<south>,<east>,<north>", got "{value}"') from None
+    return west, south, east, north
+
+
+def _split_lon_range(west: float, east: float) -> List[Tuple[float, float]]:
+    """Split a longitude range crossing the antimeridian, i.e. west > east, into two ranges."""
+    return [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+
+
+def _parse_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(_UNIT_SUFFIX.sub('', str(value).strip()))
+    except ValueError:
+        return None
@@ -1,10 +1,98 @@
 import io
 import mimetypes
+import os
+import socket
 import uuid
-from typing import BinaryIO, TextIO, Union
+from typing import BinaryIO, TextIO, Union, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
 
 _LINE_SEP = b'\r\n'
 
+_CHUNK_SIZE = 64 * 1024
+
+# Size of the slices of a memory-mapped file passed to a TLS socket at a time
+_MMAP_CHUNK_SIZE = 1024 * 1024
+
+
+class _FilePart:
+    """A file to be streamed into the form body, given by its path or by a binary file object."""
+
+    def __init__(self, file: Union[str, BinaryIO], size: int):
+        self.file = file
+        self.size = size
+        self._start = None if isinstance(file, str) else file.tell()
+
+    @property
+    def start(self) -> int:
+        """The position of the first byte to be sent in the file returned by :meth:`open`."""
+        return self._start or 0
+
+    def open(self) -> BinaryIO:
+        if isinstance(self.file, str):
+            return open(self.file, 'rb')
+        self.file.seek(self._start)
+        return _NonClosingReader(self.file)
+
+    def send(self, sock: socket.socket, offset: int = 0):
+        """
+        Send the file from *offset* on to the blocking socket *sock*. The file is passed to ``sock.sendfile()``
+        for plain sockets and memory-mapped for TLS sockets. Files without a descriptor, or any file if *sock*
+        does not support this, e.g. a mocked socket, are copied chunk-wise.
+        """
+        count = self.size - offset
+        if count <= 0:
+            return
+        with self.open() as fp:
+            start = self.start + offset
+            sent = _send_file(sock, fp, start, count)
+        if sent < count:
+            raise IOError(f'file {self.file!r} has been truncated while being uploaded')
+
+    async def write(self, writer: 'asyncio.StreamWriter', offset: int = 0):
+        """
+        Write the file from *offset* on to *writer* using ``loop.sendfile()``, which passes it to ``os.sendfile()``
+        for plain connections and copies it chunk-wise otherwise.
+        """
+        count = self.size - offset
+        if count <= 0:
+            return
+        import asyncio
+        with self.open() as fp:
+            await writer.drain()
+            sent = await asyncio.get_running_loop().sendfile(writer.transport, fp, self.start + offset, count)
+        if sent < count:
+            raise IOError(f'file {self.file!r} has been truncated while being uploaded')
+
+
+class _NonClosingReader:
+    """Reads from a caller-owned file object without closing it."""
+
+    def __init__(self, fp: BinaryIO):
+        self._fp = fp
+
+    def read(self, size: int = -1) -> bytes:
+        return self._fp.read(size)
+
+    def readinto(self, b) -> int:
+        return self._fp.readinto(b)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._fp.seek(offset, whence)
+
+    def fileno(self) -> int:
+        return self._fp.fileno()
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> '_NonClosingReader':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
 
 class MultiPartForm:
     """Accumulate the data to be used when posting a form."""
@@ -33,12 +121,19 @@ class MultiPartForm:
                  file_name: str,
                  file_obj: Union[TextIO, BinaryIO, str],
                  mime_type: str = None):
-        """Add a file to be uploaded."""
-        if hasattr(file_obj, "read"):
+        """
+        Add a file to be uploaded. Files given by path and seekable binary file objects
+        are not read before the form body is streamed.
+        """
+        if isinstance(file_obj, str):
+            body = _FilePart(file_obj, os.path.getsize(file_obj))
+        elif isinstance(file_obj, io.TextIOBase) or not _is_seekable(file_obj):
             body = file_obj.read()
         else:
-            with open(file_obj, "rb") as fp:
-                body = fp.read()
+            start = file_obj.tell()
+            size = file_obj.seek(0, io.SEEK_END) - start
+            file_obj.seek(start)
+            body = _FilePart(file_obj, size)
         if isinstance(body, str):
             body = body.encode("utf-8")
         if mime_type is None:
@@ -63,31 +158,205 @@ class MultiPartForm:
         line = f'Content-Type: {content_type}'
         return line.encode('utf-8') + _LINE_SEP
 
-    def __bytes__(self):
-        """Return a byte-string representing the form data,
-        including attached files.
-        """
-        buffer = io.BytesIO()
+    def _parts(self) -> List[Union[bytes, _FilePart]]:
+        """Return the form body as a sequence of byte strings and file parts."""
+        parts = []
 
         # Add the form fields
         for field_name, field_value in self._fields:
-            buffer.write(self._boundary_line())
-            buffer.write(self._content_disposition_line(name=field_name))
-            buffer.write(_LINE_SEP)
-            buffer.write(field_value.encode('utf-8'))
-            buffer.write(_LINE_SEP)
+            parts.append(b''.join([self._boundary_line(),
+                                   self._content_disposition_line(name=field_name),
+                                   _LINE_SEP,
+                                   field_value.encode('utf-8'),
+                                   _LINE_SEP]))
 
         for field_name, file_name, file_content_type, file_body in self._files:
-            buffer.write(self._boundary_line())
-            buffer.write(self._content_disposition_line(name=field_name, filename=file_name))
-            buffer.write(self._content_type_line(content_type=file_content_type))
-            buffer.write(_LINE_SEP)
-            buffer.write(file_body if isinstance(file_body, bytes) else file_body.encode("utf-8"))
-            buffer.write(_LINE_SEP)
+            parts.append(b''.join([self._boundary_line(),
+                                   self._content_disposition_line(name=field_name, filename=file_name),
+                                   self._content_type_line(content_type=file_content_type),
+                                   _LINE_SEP]))
+            parts.append(file_body)
+            parts.append(_LINE_SEP)
 
         # Write final boundary
-        buffer.write(self._boundary_line(final=True))
-        return buffer.getvalue()
+        parts.append(self._boundary_line(final=True))
+        return parts
+
+    @property
+    def content_length(self) -> int:
+        """The size of the form body in bytes, computed without reading any file."""
+        return sum(part.size if isinstance(part, _FilePart) else len(part) for part in self._parts())
+
+    def stream(self) -> 'MultiPartFormReader':
+        """Return a file-like reader that streams the form body with files read chunk-wise from disk."""
+        return MultiPartFormReader(self._parts())
+
+    def __bytes__(self):
+        """Return a byte-string representing the form data,
+        including attached files.
+        """
+        with self.stream() as reader:
+            return reader.read()
 
     def __str__(self):
         return bytes(self).decode("utf-8")
+
+
+class MultiPartFormReader(io.RawIOBase):
+    """
+    A read-only binary stream of a multipart form body. Only the file currently
+    being read is open, and at most the requested number of bytes is held in memory.
+    ``len()`` returns the total size of the body.
+    """
+
+    def __init__(self, parts: List[Union[bytes, _FilePart]]):
+        super().__init__()
+        self._parts = parts
+        self._length = sum(part.size if isinstance(part, _FilePart) else len(part) for part in parts)
+        self._index = 0
+        self._offset = 0
+        self._fp = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation('can only seek to the start of the form body')
+        self._close_file()
+        self._index = 0
+        self._offset = 0
+        return 0
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._length
+        chunks = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, _FilePart):
+                if self._fp is None:
+                    self._fp = part.open()
+                chunk = self._fp.read(min(size, _CHUNK_SIZE, part.size - self._offset))
+                if len(chunk) == 0 and self._offset < part.size:
+                    raise IOError(f'file {part.file!r} has been truncated while being uploaded')
+            else:
+                chunk = part[self._offset:self._offset + size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._offset += len(chunk)
+            if self._offset >= (part.size if isinstance(part, _FilePart) else len(part)):
+                self._close_file()
+                self._index += 1
+                self._offset = 0
+        return b''.join(chunks)
+
+    def send(self, sock: socket.socket):
+        """
+        Send the rest of the form body to the blocking socket *sock*. Only the boundary and header lines
+        are copied through Python buffers, files are sent with :meth:`_FilePart.send`.
+        """
+        self._close_file()
+        while self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, _FilePart):
+                part.send(sock, self._offset)
+            else:
+                sock.sendall(part[self._offset:])
+            self._index += 1
+            self._offset = 0
+
+    async def write(self, writer: 'asyncio.StreamWriter'):
+        """Write the rest of the form body to *writer*, files with :meth:`_FilePart.write`."""
+        self._close_file()
+        while self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, _FilePart):
+                await part.write(writer, self._offset)
+            else:
+                writer.write(part[self._offset:])
+            self._index += 1
+            self._offset = 0
+        await writer.drain()
+
+    def close(self):
+        self._close_file()
+        super().close()
+
+    def _close_file(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+def _is_seekable(file_obj) -> bool:
+    try:
+        return file_obj.seekable()
+    except AttributeError:
+        return False
+
+
+def _get_fileno(fp) -> Optional[int]:
+    try:
+        return fp.fileno()
+    except (AttributeError, OSError):
+        # io.UnsupportedOperation is an OSError, raised e.g. by io.BytesIO
+        return None
+
+
+def _send_file(sock: socket.socket, fp, start: int, count: int) -> int:
+    """
+    Send *count* bytes of *fp* from *start* on to *sock* and return the number sent. ``sock.sendfile()`` falls back
+    to copying by itself if ``os.sendfile()`` cannot be used, so its errors are raised, data may have been sent.
+    Sockets whose class lacks ``sendfile()``, e.g. mocks delegating unknown attributes to a real socket,
+    are sent the file chunk-wise through their ``sendall()``.
+    """
+    fileno = _get_fileno(fp)
+    if fileno is not None and hasattr(type(sock), 'sendfile'):
+        import ssl
+        if isinstance(sock, ssl.SSLSocket):
+            return _send_mapped(sock, fileno, start, count)
+        return sock.sendfile(fp, start, count)
+    fp.seek(start)
+    return _send_chunks(sock, fp, count)
+
+
+def _send_chunks(sock: socket.socket, fp, count: int) -> int:
+    """Send *count* bytes read from *fp* to *sock* through a single reused buffer and return the number sent."""
+    buffer = memoryview(bytearray(min(count, _CHUNK_SIZE)))
+    sent = 0
+    while sent < count:
+        n = fp.readinto(buffer[:min(len(buffer), count - sent)])
+        if not n:
+            break
+        sock.sendall(buffer[:n])
+        sent += n
+    return sent
+
+
+def _send_mapped(sock: socket.socket, fileno: int, start: int, count: int) -> int:
+    """Send *count* bytes of the file *fileno* from *start* on to *sock* from a memory map, return the number sent."""
+    count = max(0, min(count, os.fstat(fileno).st_size - start))
+    if count == 0:
+        return 0
+    import mmap
+    # The offset of a memory map must be a multiple of the allocation granularity
+    map_start = start - start % mmap.ALLOCATIONGRANULARITY
+    end = start + count - map_start
+    with mmap.mmap(fileno, end, access=mmap.ACCESS_READ, offset=map_start) as mapped, memoryview(mapped) as view:
+        for position in range(start - map_start, end, _MMAP_CHUNK_SIZE):
+            with view[position:min(position + _MMAP_CHUNK_SIZE, end)] as chunk:
+                sock.sendall(chunk)
+    return count
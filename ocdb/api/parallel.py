@@ -0,0 +1,125 @@
+import collections
+import concurrent.futures
+import os
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+_POLL_INTERVAL = 0.1
+
+
+def prefetch(iterable: Iterable[T], max_prefetch: int) -> Iterator[T]:
+    """
+    Iterate *iterable* in a background thread, keeping at most *max_prefetch* items
+    ready ahead of the consumer. Exceptions raised by *iterable* are re-raised
+    by the returned iterator. Closing the returned iterator stops the background thread.
+    """
+    if max_prefetch < 1:
+        raise ValueError('"max_prefetch" must be a positive integer')
+
+    items = queue.Queue(maxsize=max_prefetch)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((done, e))
+        else:
+            put((done, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def imap(func: Callable[[T], R], items: Iterable[T], max_workers: int, ordered: bool = False) \
+        -> Iterator[Tuple[T, Optional[R], Optional[Exception]]]:
+    """
+    Call *func* for each of *items* on a pool of *max_workers* threads and yield
+    tuples (item, result, error) as the calls complete, or in the order of *items* if *ordered* is True.
+    Either result or error is None. At most twice *max_workers* calls are pending at any time,
+    so *items* may be a lazy iterable.
+    """
+    if max_workers < 1:
+        raise ValueError('"max_workers" must be a positive integer')
+
+    items = iter(items)
+    pending = collections.OrderedDict()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(n: int):
+        for item in items:
+            pending[executor.submit(func, item)] = item
+            n -= 1
+            if n == 0:
+                break
+
+    def complete(future: concurrent.futures.Future):
+        item = pending.pop(future)
+        error = future.exception()
+        return item, None if error is not None else future.result(), error
+
+    try:
+        submit(2 * max_workers)
+        while pending:
+            if ordered:
+                done = [next(iter(pending))]
+                concurrent.futures.wait(done)
+            else:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield complete(future)
+            submit(len(done))
+    finally:
+        # Like shutdown(cancel_futures=True), which requires Python 3.9
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def split_batches(file_paths: Sequence[str], max_files: int, max_bytes: Optional[int] = None) -> List[List[str]]:
+    """
+    Split *file_paths* into consecutive batches of at most *max_files* files and, unless
+    a single file is larger, at most *max_bytes* bytes in total.
+    """
+    if max_files < 1:
+        raise ValueError('"max_files" must be a positive integer')
+    batches = []
+    batch = []
+    batch_size = 0
+    for file_path in file_paths:
+        size = os.path.getsize(file_path)
+        if batch and (len(batch) >= max_files or (max_bytes is not None and batch_size + size > max_bytes)):
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+        batch.append(file_path)
+        batch_size += size
+    if batch:
+        batches.append(batch)
+    return batches
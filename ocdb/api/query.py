@@ -0,0 +1,243 @@
+import datetime
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+from .api import JsonObj
+
+BBox = Tuple[float, float, float, float]  # west, south, east, north
+DateLike = Union[str, datetime.date]
+
+# Dataset attributes that find_datasets accepts as query parameters, all others are queried by expression
+ATTRIBUTE_PARAMS = ('path', 'submission_id', 'user_id', 'status')
+
+PARAM_MODES = ('contains', 'same_cruise', 'do_not_filter')
+
+# Characters with a meaning in the Lucene query syntax, apart from the wildcards "*" and "?"
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~:\\/])')
+
+
+class DatasetQuery:
+    """
+    A dataset search that compiles to the query parameters of find_datasets.
+
+    Queries are immutable, every method returns a new query, so that they can be composed::
+
+        query = (DatasetQuery()
+                 .within_polygon([(-70, 40), (-60, 40), (-65, 50)])
+                 .between('2017-01-01', '2017-12-31')
+                 .with_groups('Chl')
+                 .where(investigators='*Balch*'))
+        result = api.query_datasets(query)
+
+    The server matches the bounding box of a polygon. Use :meth:`filter` to keep only the datasets with positions
+    within the polygon itself.
+    """
+
+    def __init__(self):
+        self._expr: Optional[str] = None
+        self._terms: Dict[str, Any] = {}
+        self._bbox: Optional[BBox] = None
+        self._polygon: Optional[Tuple[Tuple[float, float], ...]] = None
+        self._start_time: Optional[str] = None
+        self._end_time: Optional[str] = None
+        self._groups: Tuple[str, ...] = ()
+        self._names: Tuple[str, ...] = ()
+        self._mode: Optional[str] = None
+        self._offset = 1
+        self._count = 1000
+
+    @property
+    def bbox(self) -> Optional[BBox]:
+        """The region matched by the server, the bounding box of the polygon if one is given."""
+        if self._polygon is None:
+            return self._bbox
+        lons = [lon for lon, _ in self._polygon]
+        lats = [lat for _, lat in self._polygon]
+        return min(lons), min(lats), max(lons), max(lats)
+
+    @property
+    def polygon(self) -> Optional[Tuple[Tuple[float, float], ...]]:
+        return self._polygon
+
+    def matching(self, expr: str) -> 'DatasetQuery':
+        """Match the Lucene expression *expr*, in addition to a previously given one."""
+        query = self._copy()
+        query._expr = expr if self._expr is None else f'({self._expr}) AND ({expr})'
+        return query
+
+    def where(self, **terms) -> 'DatasetQuery':
+        """
+        Match dataset attributes, e.g. ``where(cruise='SO235', investigators='*Astrid*')``.
+        The values may contain the wildcards "*" and "?", a sequence of values matches any of them.
+        """
+        query = self._copy()
+        query._terms = {**self._terms, **terms}
+        return query
+
+    def within(self, west: float, south: float, east: float, north: float) -> 'DatasetQuery':
+        """
+        Match datasets within a bounding box, replacing a previously given region.
+        A box whose west is greater than its east crosses the anti-meridian.
+        """
+        for name, value in (('south', south), ('north', north)):
+            if not -90 <= value <= 90:
+                raise ValueError(f'"{name}" must be a latitude between -90 and 90, got {value}')
+        if south > north:
+            raise ValueError(f'"south" must not be greater than "north", got {south} and {north}')
+        query = self._copy()
+        query._bbox = (float(west), float(south), float(east), float(north))
+        query._polygon = None
+        return query
+
+    def within_polygon(self, polygon: Union[Sequence[Sequence[float]], JsonObj]) -> 'DatasetQuery':
+        """
+        Match datasets within a polygon given by its (lon, lat) vertices or as GeoJSON Polygon, replacing a
+        previously given region. The polygon must not cross the anti-meridian.
+        """
+        if isinstance(polygon, dict):
+            if polygon.get('type') != 'Polygon':
+                raise ValueError(f'expected a GeoJSON Polygon, got {polygon.get("type")!r}')
+            polygon = polygon['coordinates'][0]
+        vertices = tuple((float(vertex[0]), float(vertex[1])) for vertex in polygon)
+        if len(vertices) > 1 and vertices[0] == vertices[-1]:
+            vertices = vertices[:-1]
+        if len(vertices) < 3:
+            raise ValueError('a polygon requires at least 3 vertices')
+        query = self._copy()
+        query._polygon = vertices
+        query._bbox = None
+        return query
+
+    def between(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> 'DatasetQuery':
+        """Match datasets with measurements between the dates *start* and *end*, given as date or "2016-07-01"."""
+        query = self._copy()
+        query._start_time = _format_date(start, 'start') if start is not None else None
+        query._end_time = _format_date(end, 'end') if end is not None else None
+        if query._start_time and query._end_time and query._start_time > query._end_time:
+            raise ValueError(f'"start" must not be after "end", got {query._start_time} and {query._end_time}')
+        return query
+
+    def with_groups(self, *groups: str) -> 'DatasetQuery':
+        """Match datasets with products of any of the product groups *groups*, e.g. "Chl" or "Kd"."""
+        query = self._copy()
+        query._groups = self._groups + groups
+        return query
+
+    def with_params(self, *names: str, mode: Optional[str] = None) -> 'DatasetQuery':
+        """
+        Match datasets with any of the parameters *names*.
+        *mode* is one of "contains", "same_cruise" and "do_not_filter".
+        """
+        if mode is not None and mode not in PARAM_MODES:
+            raise ValueError(f'"mode" must be one of {", ".join(PARAM_MODES)}, got "{mode}"')
+        query = self._copy()
+        query._names = self._names + names
+        query._mode = mode if mode is not None else self._mode
+        return query
+
+    def page(self, offset: int = 1, count: int = 1000) -> 'DatasetQuery':
+        """Select the results *offset* (starting at 1) to *offset* + *count* - 1."""
+        if offset < 1 or count < 1:
+            raise ValueError('"offset" and "count" must be positive integers')
+        query = self._copy()
+        query._offset = offset
+        query._count = count
+        return query
+
+    def to_params(self) -> Dict[str, Any]:
+        """Compile the query to keyword arguments of find_datasets."""
+        params = {}
+        clauses = [self._expr] if self._expr is not None else []
+        for name, value in self._terms.items():
+            if value is None:
+                continue
+            values = [value] if isinstance(value, (str, int, float)) else list(value)
+            if name in ATTRIBUTE_PARAMS and len(values) == 1:
+                params[name] = str(values[0])
+            else:
+                clauses.append(_format_clause(name, values))
+        if clauses:
+            params['expr'] = clauses[0] if len(clauses) == 1 else ' AND '.join(f'({clause})' for clause in clauses)
+        bbox = self.bbox
+        if bbox is not None:
+            params['region'] = ','.join(_format_float(value) for value in bbox)
+        if self._start_time is not None:
+            params['start_time'] = self._start_time
+        if self._end_time is not None:
+            params['end_time'] = self._end_time
+        if self._groups:
+            params['pgroup'] = ','.join(self._groups)
+        if self._names:
+            params['pname'] = ','.join(self._names)
+        if self._mode is not None:
+            params['pmode'] = self._mode
+        params['offset'] = self._offset
+        params['count'] = self._count
+        return params
+
+    def filter(self, result: JsonObj, keep_unlocated: bool = False) -> JsonObj:
+        """
+        Filter a result of find_datasets by the GeoJSON locations of the datasets, vectorized over all positions.
+        A dataset is kept if any of its positions lies within the bounding box and the polygon of the query.
+        Datasets without a location are only kept if *keep_unlocated* is True. Returns *result* itself if the
+        query has no region, or a copy whose "datasets" and "locations" hold only the matching datasets.
+        """
+        bbox = self.bbox
+        if bbox is None:
+            return result
+        from .spatial import match_locations
+        import numpy as np
+
+        datasets = result.get('datasets') or []
+        locations = result.get('locations') or {}
+        dataset_ids = [dataset['id'] for dataset in datasets]
+        polygon = np.array(self._polygon, dtype=np.float64) if self._polygon is not None else None
+        matched = match_locations(locations, dataset_ids, bbox=bbox, polygon=polygon,
+                                  keep_unlocated=keep_unlocated)
+        datasets = [dataset for dataset, keep in zip(datasets, matched.tolist()) if keep]
+        return {**result,
+                'datasets': datasets,
+                'locations': {dataset['id']: locations[dataset['id']] for dataset in datasets
+                              if dataset['id'] in locations}}
+
+    def _copy(self) -> 'DatasetQuery':
+        query = DatasetQuery.__new__(DatasetQuery)
+        query.__dict__.update(self.__dict__)
+        return query
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DatasetQuery) and self.__dict__ == other.__dict__
+
+    def __repr__(self) -> str:
+        return f'DatasetQuery({self.to_params()!r})'
+
+
+def _format_clause(name: str, values: Iterable[Any]) -> str:
+    terms = [_format_term(value) for value in values]
+    if not terms:
+        raise ValueError(f'no values given for "{name}"')
+    if len(terms) == 1:
+        return f'{name}:{terms[0]}'
+    return f'{name}:({" OR ".join(terms)})'
+
+
+def _format_term(value: Any) -> str:
+    text = _LUCENE_SPECIAL.sub(r'\\\1', str(value))
+    if any(char.isspace() for char in text):
+        return '"' + text + '"'
+    return text
+
+
+def _format_date(value: DateLike, name: str) -> str:
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    try:
+        return datetime.datetime.strptime(str(value).strip()[:10], '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f'"{name}" must be a date of the form 2016-07-01, got "{value}"') from None
+
+
+def _format_float(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
@@ -0,0 +1,176 @@
+import copy
+import email.utils
+import http.client
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_MAX_RETRY_DELAY = 30.0
+
+# Methods that can safely be repeated, see RFC 9110, section 9.2.2
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+# Responses with these status codes are retried
+RETRY_STATUS_CODES = frozenset((408, 429, 500, 502, 503, 504))
+
+R = TypeVar('R')
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter allowing *rate* requests per second on average
+    and bursts of up to *capacity* requests.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError('"rate" must be a positive number')
+        self.rate = rate
+        self.capacity = max(1.0, capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class RequestExecutor:
+    """
+    Sends requests through a transport, retrying transient failures and limiting the request rate.
+
+    Requests with idempotent methods are retried up to *max_retries* times after a dropped connection
+    or a response with one of the :data:`RETRY_STATUS_CODES`. Other requests are only retried after
+    "429 Too Many Requests", which the server sends before processing a request. The delay before a retry
+    is the "Retry-After" time given by the server or a random time up to *backoff* * 2 ** attempt seconds
+    ("full jitter"), limited to *max_delay* seconds. Requests whose body is a stream are never retried.
+
+    If *rate* is given, at most *rate* requests per second are sent on average, see :class:`TokenBucket`.
+    """
+
+    def __init__(self,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_RETRY_BACKOFF,
+                 max_delay: float = DEFAULT_MAX_RETRY_DELAY,
+                 rate: Optional[float] = None,
+                 burst: Optional[float] = None):
+        if max_retries < 0:
+            raise ValueError('"max_retries" must not be negative')
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.rate_limiter = TokenBucket(rate, burst) if rate else None
+        self._lock = threading.Lock()
+        self._metrics = dict(requests=0, retries=0, throttled=0, throttle_time=0.0, retry_time=0.0)
+
+    def without_retries(self) -> 'RequestExecutor':
+        """
+        Return an executor that never retries requests, e.g. for callers retrying by themselves,
+        but shares the rate limit and the metrics of this one.
+        """
+        executor = copy.copy(self)
+        executor.max_retries = 0
+        return executor
+
+    @property
+    def metrics(self) -> Dict[str, float]:
+        """
+        Counters of sent requests, retries, requests delayed by the rate limiter,
+        and the total time spent waiting for the rate limiter and before retries.
+        """
+        with self._lock:
+            return dict(self._metrics)
+
+    def open(self, open_func: Callable[[urllib.request.Request], R], request: urllib.request.Request) -> R:
+        """Send *request* using *open_func*, e.g. ``Transport.open``, and return the response."""
+        attempt = 0
+        while True:
+            delay = self._throttle()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                return open_func(request)
+            except (http.client.HTTPException, OSError) as e:
+                delay = self._get_retry_delay(request, e, attempt)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def open_async(self, open_func: Callable[[urllib.request.Request], Awaitable[R]],
+                         request: urllib.request.Request) -> R:
+        """Send *request* by awaiting *open_func*, e.g. ``AsyncTransport.open``, and return the response."""
+        import asyncio
+        attempt = 0
+        while True:
+            delay = self._throttle()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                return await open_func(request)
+            except (http.client.HTTPException, OSError) as e:
+                delay = self._get_retry_delay(request, e, attempt)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _throttle(self) -> float:
+        delay = self.rate_limiter.reserve() if self.rate_limiter is not None else 0.0
+        with self._lock:
+            self._metrics['requests'] += 1
+            if delay > 0:
+                self._metrics['throttled'] += 1
+                self._metrics['throttle_time'] += delay
+        return delay
+
+    def _get_retry_delay(self, request: urllib.request.Request, error: Exception, attempt: int) -> Optional[float]:
+        """Return the delay before the next attempt, or None if the request must not be retried."""
+        if attempt >= self.max_retries or not _is_repeatable(request):
+            return None
+        retry_after = None
+        if isinstance(error, urllib.error.HTTPError):
+            if error.code not in RETRY_STATUS_CODES:
+                return None
+            if error.code != 429 and request.get_method() not in IDEMPOTENT_METHODS:
+                return None
+            retry_after = _parse_retry_after(error.headers.get('Retry-After') if error.headers else None)
+            error.close()
+        elif request.get_method() not in IDEMPOTENT_METHODS:
+            return None
+        if retry_after is None:
+            retry_after = random.uniform(0, self.backoff * 2 ** attempt)
+        delay = min(retry_after, self.max_delay)
+        with self._lock:
+            self._metrics['retries'] += 1
+            self._metrics['retry_time'] += delay
+        return delay
+
+
+def _is_repeatable(request: urllib.request.Request) -> bool:
+    return request.data is None or isinstance(request.data, (bytes, bytearray))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a "Retry-After" header, given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
@@ -0,0 +1,237 @@
+import concurrent.futures
+import datetime
+import os
+import re
+from typing import Dict, List, Optional, Sequence, TextIO
+
+from .api import JsonObj
+
+# Maximum number of issues reported for the data rows of a single file
+MAX_DATA_ISSUES = 20
+
+# Header values that are never range-checked because they mark missing or out-of-range data
+_SPECIAL_VALUE_HEADERS = ('missing', 'below_detection_limit', 'above_detection_limit')
+
+_DELIMITERS = {
+    'comma': re.compile(r'\s*,\s*'),
+    'space': re.compile(r'\s+'),
+    'tab': re.compile(r'\t'),
+}
+_DEFAULT_DELIMITER = re.compile(r'\s*,\s*|\s+')
+
+_HEADER_RANGES = {
+    'north_latitude': (-90.0, 90.0),
+    'south_latitude': (-90.0, 90.0),
+    'east_longitude': (-180.0, 180.0),
+    'west_longitude': (-180.0, 180.0),
+}
+_FIELD_RANGES = {
+    'lat': (-90.0, 90.0),
+    'lon': (-180.0, 180.0),
+}
+
+_UNIT_SUFFIX = re.compile(r'\[[^\]]*\]$')
+
+
+def check_seabass_file(file_path: str) -> JsonObj:
+    """
+    Check the SeaBASS file *file_path* locally, without contacting the server.
+    The file is read line by line. Checked are the "/begin_header" ... "/end_header" block, the number of
+    "/fields" and "/units", the "/missing" value, the number of columns of each data row,
+    and the ranges of latitudes, longitudes, dates and times in the header and the data.
+    :param file_path: The SeaBASS file
+    :return: A validation report like the ones returned by the server,
+             with the status "OK", "WARNING" or "ERROR" and a list of issues
+    """
+    try:
+        with open(file_path, errors='replace') as fp:
+            return _SeaBassChecker().check(fp)
+    except OSError as e:
+        return _make_report([{'type': 'ERROR', 'description': f'Cannot read file: {e}'}])
+
+
+def check_seabass_files(file_paths: Sequence[str], max_workers: Optional[int] = None) -> Dict[str, JsonObj]:
+    """
+    Check the SeaBASS files *file_paths* locally using a pool of up to *max_workers* processes.
+    :param file_paths: The SeaBASS files
+    :param max_workers: The maximum number of processes, defaults to the number of CPUs
+    :return: A dict mapping file names to validation reports, see :func:`check_seabass_file`
+    """
+    file_paths = list(file_paths)
+    reports = map_seabass_files(file_paths, max_workers)
+    return {os.path.basename(file_path): report for file_path, report in zip(file_paths, reports)}
+
+
+def map_seabass_files(file_paths: Sequence[str], max_workers: Optional[int] = None) -> List[JsonObj]:
+    """Like :func:`check_seabass_files`, but return the reports in the order of *file_paths*."""
+    file_paths = list(file_paths)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1:
+        raise ValueError('"max_workers" must be a positive integer')
+    if max_workers == 1 or len(file_paths) <= 1:
+        return [check_seabass_file(file_path) for file_path in file_paths]
+    max_workers = min(max_workers, len(file_paths))
+    chunk_size = max(1, len(file_paths) // (4 * max_workers))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(check_seabass_file, file_paths, chunksize=chunk_size))
+
+
+def _make_report(issues: List[JsonObj]) -> JsonObj:
+    types = {issue['type'] for issue in issues}
+    status = 'ERROR' if 'ERROR' in types else 'WARNING' if 'WARNING' in types else 'OK'
+    return {'issues': issues, 'status': status}
+
+
+def _parse_float(value: str) -> Optional[float]:
+    try:
+        return float(_UNIT_SUFFIX.sub('', value.strip()))
+    except ValueError:
+        return None
+
+
+class _SeaBassChecker:
+    def __init__(self):
+        self.issues: List[JsonObj] = []
+        self.num_data_issues = 0
+
+    def error(self, description: str):
+        self.issues.append({'type': 'ERROR', 'description': description})
+
+    def warning(self, description: str):
+        self.issues.append({'type': 'WARNING', 'description': description})
+
+    def data_error(self, line_number: int, description: str):
+        self.num_data_issues += 1
+        if self.num_data_issues <= MAX_DATA_ISSUES:
+            self.error(f'Line {line_number}: {description}')
+
+    def check(self, fp: TextIO) -> JsonObj:
+        lines = enumerate(fp, start=1)
+        header = self._check_header(lines)
+        if header is not None:
+            self._check_data(lines, header)
+        if self.num_data_issues > MAX_DATA_ISSUES:
+            self.error(f'{self.num_data_issues - MAX_DATA_ISSUES} more issues in data rows')
+        return _make_report(self.issues)
+
+    def _check_header(self, lines) -> Optional[Dict[str, str]]:
+        header: Dict[str, str] = {}
+        begun = False
+        for line_number, line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if not begun:
+                if line.lower() != '/begin_header':
+                    self.error('File must start with "/begin_header"')
+                    return None
+                begun = True
+                continue
+            if line.startswith('!'):
+                continue
+            if line.lower() == '/end_header':
+                return self._check_header_values(header)
+            if not line.startswith('/') or '=' not in line:
+                self.error(f'Line {line_number}: invalid header line "{line}"')
+                continue
+            key, _, value = line[1:].partition('=')
+            header[key.strip().lower()] = value.strip()
+        if not begun:
+            self.error('File is empty')
+        else:
+            self.error('Header is not terminated by "/end_header"')
+        return None
+
+    def _check_header_values(self, header: Dict[str, str]) -> Optional[Dict[str, str]]:
+        for key in ('fields', 'units', 'missing'):
+            if not header.get(key):
+                self.error(f'Missing header "/{key}"')
+
+        for key in _SPECIAL_VALUE_HEADERS:
+            if header.get(key) and _parse_float(header[key]) is None:
+                self.error(f'Header "/{key}" must be numeric, got "{header[key]}"')
+
+        for key, (min_value, max_value) in _HEADER_RANGES.items():
+            if key in header:
+                value = _parse_float(header[key])
+                if value is None or not min_value <= value <= max_value:
+                    self.error(f'Header "/{key}" must be in the range {min_value} to {max_value}, got "{header[key]}"')
+
+        for key in ('start_date', 'end_date'):
+            if key in header and not _is_valid_date(header[key]):
+                self.error(f'Header "/{key}" must be a date of the form yyyymmdd, got "{header[key]}"')
+        for key in ('start_time', 'end_time'):
+            if key in header and not _is_valid_time(_UNIT_SUFFIX.sub('', header[key])):
+                self.error(f'Header "/{key}" must be a time of the form hh:mm:ss, got "{header[key]}"')
+
+        delimiter = header.get('delimiter')
+        if delimiter and delimiter.lower() not in _DELIMITERS:
+            self.error(f'Header "/delimiter" must be one of {", ".join(_DELIMITERS)}, got "{delimiter}"')
+
+        fields = header.get('fields')
+        units = header.get('units')
+        if fields and units:
+            num_fields = len(fields.split(','))
+            num_units = len(units.split(','))
+            if num_fields != num_units:
+                self.error(f'Number of fields ({num_fields}) does not match number of units ({num_units})')
+        return header if fields else None
+
+    def _check_data(self, lines, header: Dict[str, str]):
+        fields = [field.strip().lower() for field in header['fields'].split(',')]
+        num_fields = len(fields)
+        delimiter = _DELIMITERS.get(header.get('delimiter', '').lower(), _DEFAULT_DELIMITER)
+        special_values = {value for value in (_parse_float(header.get(key, '')) for key in _SPECIAL_VALUE_HEADERS)
+                          if value is not None}
+
+        ranges = [(index, field, _FIELD_RANGES[field]) for index, field in enumerate(fields) if field in _FIELD_RANGES]
+        date_index = fields.index('date') if 'date' in fields else None
+        time_index = fields.index('time') if 'time' in fields else None
+        num_rows = 0
+        for line_number, line in lines:
+            line = line.strip()
+            if not line or line.startswith('!'):
+                continue
+            num_rows += 1
+            values = delimiter.split(line)
+            if len(values) != num_fields:
+                self.data_error(line_number, f'expected {num_fields} values but found {len(values)}')
+                continue
+            for index, field, (min_value, max_value) in ranges:
+                value = _parse_float(values[index])
+                if value is None:
+                    self.data_error(line_number, f'value of "{field}" must be numeric, got "{values[index]}"')
+                elif value not in special_values and not min_value <= value <= max_value:
+                    self.data_error(line_number, f'value of "{field}" must be in the range '
+                                                 f'{min_value} to {max_value}, got "{values[index]}"')
+            if date_index is not None and not _is_valid_date(values[date_index]) \
+                    and _parse_float(values[date_index]) not in special_values:
+                self.data_error(line_number, f'value of "date" must be of the form yyyymmdd, '
+                                             f'got "{values[date_index]}"')
+            if time_index is not None and not _is_valid_time(values[time_index]) \
+                    and _parse_float(values[time_index]) not in special_values:
+                self.data_error(line_number, f'value of "time" must be of the form hh:mm:ss, '
+                                             f'got "{values[time_index]}"')
+        if num_rows == 0:
+            self.warning('File contains no data rows')
+
+
+def _is_valid_date(value: str) -> bool:
+    value = value.strip()
+    if len(value) != 8 or not value.isdigit():
+        return False
+    try:
+        datetime.date(int(value[:4]), int(value[4:6]), int(value[6:]))
+        return True
+    except ValueError:
+        return False
+
+
+def _is_valid_time(value: str) -> bool:
+    parts = value.strip().split(':')
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return False
+    hours, minutes, seconds = (int(part) for part in parts)
+    # SeaBASS allows leap seconds
+    return hours < 24 and minutes < 60 and seconds <= 60
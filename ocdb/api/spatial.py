@@ -0,0 +1,110 @@
+import json
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+BBox = Tuple[float, float, float, float]  # west, south, east, north
+
+_GEOMETRY_KEYS = ('coordinates', 'geometry', 'geometries', 'features')
+
+
+def get_positions(locations: Mapping[str, Any], dataset_ids: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Collect the positions of the GeoJSON *locations* of the datasets *dataset_ids*, which may also be given as
+    JSON text, in one array of shape (n, 2) holding longitude and latitude, and return it together with the index
+    into *dataset_ids* of the dataset each position belongs to.
+    """
+    positions: List[Sequence[float]] = []
+    counts = np.zeros(len(dataset_ids), dtype=np.int64)
+    for index, dataset_id in enumerate(dataset_ids):
+        location = locations.get(dataset_id)
+        if isinstance(location, str):
+            try:
+                location = json.loads(location)
+            except ValueError:
+                continue
+        if location is not None:
+            num_positions = len(positions)
+            _add_positions(location, positions)
+            counts[index] = len(positions) - num_positions
+    if not positions:
+        return np.zeros((0, 2)), np.zeros(0, dtype=np.int64)
+    try:
+        array = np.array(positions, dtype=np.float64)
+    except ValueError:
+        # Some positions have an altitude
+        array = np.array([position[:2] for position in positions], dtype=np.float64)
+    return array, np.repeat(np.arange(len(dataset_ids)), counts)
+
+
+def in_bbox(lons: np.ndarray, lats: np.ndarray, bbox: BBox) -> np.ndarray:
+    """Test which points lie within *bbox*. A box whose west is greater than its east crosses the anti-meridian."""
+    west, south, east, north = bbox
+    in_lat = (lats >= south) & (lats <= north)
+    if west <= east:
+        return in_lat & (lons >= west) & (lons <= east)
+    return in_lat & ((lons >= west) | (lons <= east))
+
+
+def in_polygon(lons: np.ndarray, lats: np.ndarray, ring: np.ndarray) -> np.ndarray:
+    """
+    Test which points lie within the polygon *ring* of shape (m, 2) using the even-odd rule.
+    Points are first tested against the bounding box of the ring, only the candidates against its edges.
+    """
+    inside = in_bbox(lons, lats, (ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max()))
+    candidates = np.flatnonzero(inside)
+    x = lons[candidates]
+    y = lats[candidates]
+    odd = np.zeros(len(candidates), dtype=bool)
+    x0, y0 = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    for xa, ya, xb, yb in zip(x0, y0, x1, y1):
+        if ya == yb:
+            continue
+        crosses = (ya > y) != (yb > y)
+        odd ^= crosses & (x < xa + (y - ya) * (xb - xa) / (yb - ya))
+    inside[candidates] = odd
+    return inside
+
+
+def match_locations(locations: Mapping[str, Any], dataset_ids: Sequence[str], bbox: Optional[BBox] = None,
+                    polygon: Optional[np.ndarray] = None, keep_unlocated: bool = False) -> np.ndarray:
+    """
+    Test which of the datasets *dataset_ids* have at least one position of their GeoJSON *locations* within
+    *bbox* and *polygon*. Datasets without a location match only if *keep_unlocated* is True.
+
+    :return: A boolean array of the length of *dataset_ids*
+    """
+    positions, owners = get_positions(locations, dataset_ids)
+    lons = positions[:, 0]
+    lats = positions[:, 1]
+    mask = np.ones(len(owners), dtype=bool)
+    if bbox is not None:
+        mask &= in_bbox(lons, lats, bbox)
+    if polygon is not None:
+        candidates = np.flatnonzero(mask)
+        mask[candidates] = in_polygon(lons[candidates], lats[candidates], polygon)
+    matched = np.zeros(len(dataset_ids), dtype=bool)
+    matched[owners[mask]] = True
+    if keep_unlocated:
+        matched |= np.bincount(owners, minlength=len(dataset_ids)) == 0
+    return matched
+
+
+def _add_positions(obj, positions: List[Sequence[float]]):
+    if isinstance(obj, dict):
+        for key in _GEOMETRY_KEYS:
+            value = obj.get(key)
+            if value is not None:
+                _add_positions(value, positions)
+    elif isinstance(obj, list) and obj:
+        first = obj[0]
+        if isinstance(first, (int, float)):
+            if len(obj) >= 2:
+                positions.append(obj)
+        elif isinstance(first, list) and first and isinstance(first[0], (int, float)):
+            # An array of positions, e.g. of a MultiPoint or a LineString
+            positions.extend(obj)
+        else:
+            for item in obj:
+                _add_positions(item, positions)
@@ -0,0 +1,417 @@
+import bisect
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+from .api import JsonObj
+
+# Endpoints of the OCDB API. Requests are reported by these templates rather than by their paths,
+# more specific templates must come first.
+ENDPOINTS = (
+    '/datasets',
+    '/datasets/submission/{submission_id}',
+    '/datasets/{affil}/{project}/{cruise}/{name}',
+    '/datasets/{affil}/{project}/{cruise}',
+    '/datasets/{dataset_id}',
+    '/store/download',
+    '/store/download/submissionfile/{submission_id}/{index}',
+    '/store/add/submissionfile/{submission_id}/{type}',
+    '/store/status/submission/{submission_id}',
+    '/store/upload/submission',
+    '/store/upload/submission/validate',
+    '/store/upload/submission/{submission_id}',
+    '/store/upload/submissionfile/{submission_id}/{index}',
+    '/store/FidRadDB/upload/cal_char',
+    '/store/FidRadDB/delete/file/{file_name}',
+    '/store/FidRadDB/download/file/{file_name}',
+    '/store/FidRadDB/history/search/{search}/{max_num_lines}',
+    '/store/FidRadDB/history/tail/{num_lines}',
+    '/store/FidRadDB/list/files/{name_part}',
+    '/submission',
+    '/users',
+    '/users/login',
+    '/users/logout',
+    '/users/{username}',
+)
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Formats in which RequestStats can be written
+STATS_FORMATS = ('text', 'jsonl', 'prometheus')
+
+_ENDPOINT_PATTERNS = [(re.compile('^' + re.sub(r'\\{\w+\\}', '[^/]+', re.escape(template)) + '/?$'), template)
+                      for template in ENDPOINTS]
+
+
+class RequestEvent:
+    """
+    An event in the life of a request, passed to the hooks of a :class:`RequestTracer`.
+
+    *kind* is one of :data:`START`, :data:`FIRST_BYTE` (the response headers have been received),
+    :data:`END` (the response body has been read or the response was closed) and :data:`ERROR`.
+    Byte counts are those of the request and response bodies as sent and received, i.e. compressed.
+    Times are in seconds since the request was started, *start_time* is the wall clock time of the start.
+    """
+
+    START = 'start'
+    FIRST_BYTE = 'first_byte'
+    END = 'end'
+    ERROR = 'error'
+
+    __slots__ = ('kind', 'method', 'path', 'url', 'status', 'bytes_sent', 'bytes_received', 'start_time',
+                 'elapsed', 'time_to_first_byte', 'error')
+
+    def __init__(self, kind: str, method: str, path: str, url: str, status: Optional[int], bytes_sent: int,
+                 bytes_received: int, start_time: float, elapsed: float, time_to_first_byte: Optional[float],
+                 error: Optional[BaseException] = None):
+        self.kind = kind
+        self.method = method
+        self.path = path
+        self.url = url
+        self.status = status
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.start_time = start_time
+        self.elapsed = elapsed
+        self.time_to_first_byte = time_to_first_byte
+        self.error = error
+
+    def to_dict(self) -> JsonObj:
+        """Return the event as JSON object, the error given by its message."""
+        obj = {name: getattr(self, name) for name in self.__slots__}
+        obj['error'] = str(self.error) if self.error is not None else None
+        return obj
+
+    def __repr__(self) -> str:
+        return f'RequestEvent({self.kind!r}, {self.method!r}, {self.path!r}, status={self.status!r})'
+
+
+RequestHook = Callable[[RequestEvent], None]
+
+
+class RequestTracer:
+    """
+    Calls hooks on the start, first byte, end and error of every request sent by an API instance.
+    Hooks are called in the thread or, for AsyncOCDBApi, on the event loop sending the request.
+    Without hooks, requests are not traced at all.
+    """
+
+    def __init__(self, path_prefix: str = ''):
+        self.path_prefix = path_prefix
+        self._hooks: Tuple[RequestHook, ...] = ()
+
+    @property
+    def hooks(self) -> Tuple[RequestHook, ...]:
+        return self._hooks
+
+    def add_hook(self, hook: RequestHook):
+        """Add *hook*, a callable that is passed every :class:`RequestEvent`."""
+        self._hooks = self._hooks + (hook,)
+
+    def remove_hook(self, hook: RequestHook):
+        self._hooks = tuple(h for h in self._hooks if h != hook)
+
+    def get_path_template(self, url: str) -> str:
+        """Return the endpoint template of *url*, e.g. "/datasets/{dataset_id}", or its path if it is unknown."""
+        path = urllib.parse.urlsplit(url).path
+        # The server URL may have a path of its own
+        index = path.find(self.path_prefix) if self.path_prefix else -1
+        if index >= 0:
+            path = path[index + len(self.path_prefix):]
+        for pattern, template in _ENDPOINT_PATTERNS:
+            if pattern.match(path):
+                return template
+        return path
+
+    def start(self, request: urllib.request.Request) -> Optional['RequestTrace']:
+        """Start tracing *request*. Returns None if there are no hooks."""
+        if not self._hooks:
+            return None
+        return RequestTrace(self._hooks, request.get_method(), self.get_path_template(request.full_url),
+                            request.full_url, _get_request_body_size(request))
+
+
+class RequestTrace:
+    """Tracks the timings and byte counts of a single request and calls the hooks."""
+
+    def __init__(self, hooks: Tuple[RequestHook, ...], method: str, path: str, url: str, bytes_sent: int):
+        self._hooks = hooks
+        self.method = method
+        self.path = path
+        self.url = url
+        self.status: Optional[int] = None
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.start_time = time.time()
+        self.time_to_first_byte: Optional[float] = None
+        self._t0 = time.perf_counter()
+        self._done = False
+        self._fire(RequestEvent.START)
+
+    def first_byte(self, status: int):
+        self.status = status
+        self.time_to_first_byte = time.perf_counter() - self._t0
+        self._fire(RequestEvent.FIRST_BYTE)
+
+    def received(self, num_bytes: int):
+        self.bytes_received += num_bytes
+
+    def end(self):
+        if not self._done:
+            self._done = True
+            self._fire(RequestEvent.END)
+
+    def error(self, error: BaseException):
+        if not self._done:
+            self._done = True
+            if isinstance(error, urllib.error.HTTPError):
+                self.status = error.code
+            self._fire(RequestEvent.ERROR, error)
+
+    def _fire(self, kind: str, error: Optional[BaseException] = None):
+        event = RequestEvent(kind, self.method, self.path, self.url, self.status, self.bytes_sent,
+                             self.bytes_received, self.start_time, time.perf_counter() - self._t0,
+                             self.time_to_first_byte, error)
+        for hook in self._hooks:
+            hook(event)
+
+
+class TracedResponse:
+    """
+    Wraps a response of the blocking transport, counts the bytes read from it and ends the trace when
+    the body has been read or the response is closed. All other attributes are those of the wrapped response.
+    """
+
+    def __init__(self, response, trace: RequestTrace):
+        self._response = response
+        self._trace = trace
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._call(self._response.read, amt)
+        self._trace.received(len(data))
+        if not data or amt is None or amt < 0:
+            self._trace.end()
+        return data
+
+    def readinto(self, b) -> int:
+        num_bytes = self._call(self._response.readinto, b)
+        self._trace.received(num_bytes)
+        if not num_bytes and len(b):
+            self._trace.end()
+        return num_bytes
+
+    def readline(self, limit: int = -1) -> bytes:
+        data = self._call(self._response.readline, limit)
+        self._trace.received(len(data))
+        if not data:
+            self._trace.end()
+        return data
+
+    def close(self):
+        self._response.close()
+        self._trace.end()
+
+    def _call(self, func, *args):
+        try:
+            return func(*args)
+        except BaseException as e:
+            self._trace.error(e)
+            raise
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+    def __enter__(self) -> 'TracedResponse':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TracedAsyncResponse:
+    """Like :class:`TracedResponse`, but wraps an ``AsyncResponse``."""
+
+    def __init__(self, response, trace: RequestTrace):
+        self._response = response
+        self._trace = trace
+
+    async def read(self) -> bytes:
+        chunks = []
+        async for chunk in self.iter_chunks():
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def iter_chunks(self, *args):
+        try:
+            async for chunk in self._response.iter_chunks(*args):
+                self._trace.received(len(chunk))
+                yield chunk
+        except BaseException as e:
+            self._trace.error(e)
+            raise
+        self._trace.end()
+
+    def close(self):
+        self._response.close()
+        self._trace.end()
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+    async def __aenter__(self) -> 'TracedAsyncResponse':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, event: RequestEvent):
+        self.count += 1
+        if event.kind == RequestEvent.ERROR or (event.status is not None and event.status >= 400):
+            self.errors += 1
+        self.bytes_sent += event.bytes_sent
+        self.bytes_received += event.bytes_received
+        self.latency_sum += event.elapsed
+        self.latency_max = max(self.latency_max, event.elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, event.elapsed)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate the quantile *q* as the upper bound of the bucket holding it, at most the maximum latency."""
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            total += count
+            if total >= rank:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+
+class RequestStats:
+    """
+    A hook collecting the number of requests, errors, bytes and a latency histogram per endpoint,
+    i.e. per method and path template. Requests that fail or receive an HTTP error status count as errors.
+
+    Add it to an API instance using ``api.request_tracer.add_hook(stats)``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, str], _EndpointStats] = {}
+
+    def __call__(self, event: RequestEvent):
+        if event.kind in (RequestEvent.END, RequestEvent.ERROR):
+            key = (event.method, event.path)
+            with self._lock:
+                stats = self._endpoints.get(key)
+                if stats is None:
+                    stats = self._endpoints[key] = _EndpointStats()
+                stats.add(event)
+
+    def to_json(self) -> List[JsonObj]:
+        """Return one JSON object per endpoint, the histogram given by cumulative counts per upper bound."""
+        rows = []
+        with self._lock:
+            for (method, path), stats in sorted(self._endpoints.items(), key=lambda item: item[0][::-1]):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), stats.buckets):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                rows.append(dict(method=method, path=path, count=stats.count, errors=stats.errors,
+                                 bytes_sent=stats.bytes_sent, bytes_received=stats.bytes_received,
+                                 latency_sum=stats.latency_sum, latency_max=stats.latency_max,
+                                 latency_p50=stats.quantile(0.5), latency_p90=stats.quantile(0.9),
+                                 latency_p99=stats.quantile(0.99), latency_buckets=buckets))
+        return rows
+
+    def write_json_lines(self, fp: TextIO):
+        """Write one JSON object per endpoint and line to *fp*, see :meth:`to_json`."""
+        for row in self.to_json():
+            fp.write(json.dumps(row) + '\n')
+
+    def write_prometheus(self, fp: TextIO, prefix: str = 'ocdb_client'):
+        """Write the statistics to *fp* in the Prometheus text exposition format."""
+        rows = self.to_json()
+        metrics = (('request_duration_seconds', 'histogram', 'Latency of requests to the OCDB server.'),
+                   ('request_errors_total', 'counter', 'Number of failed requests to the OCDB server.'),
+                   ('request_sent_bytes_total', 'counter', 'Number of request body bytes sent.'),
+                   ('response_received_bytes_total', 'counter', 'Number of response body bytes received.'))
+        for name, metric_type, description in metrics:
+            fp.write(f'# HELP {prefix}_{name} {description}\n')
+            fp.write(f'# TYPE {prefix}_{name} {metric_type}\n')
+            for row in rows:
+                labels = f'method="{row["method"]}",path="{_escape_label(row["path"])}"'
+                if metric_type == 'histogram':
+                    for bound, count in row['latency_buckets'].items():
+                        fp.write(f'{prefix}_{name}_bucket{{{labels},le="{bound}"}} {count}\n')
+                    fp.write(f'{prefix}_{name}_sum{{{labels}}} {row["latency_sum"]}\n')
+                    fp.write(f'{prefix}_{name}_count{{{labels}}} {row["count"]}\n')
+                else:
+                    value = {'request_errors_total': row['errors'],
+                             'request_sent_bytes_total': row['bytes_sent'],
+                             'response_received_bytes_total': row['bytes_received']}[name]
+                    fp.write(f'{prefix}_{name}{{{labels}}} {value}\n')
+
+    def write_text(self, fp: TextIO, width: int = 40):
+        """Write a table of the statistics and a latency histogram per endpoint to *fp*."""
+        rows = self.to_json()
+        if not rows:
+            fp.write('No requests sent.\n')
+            return
+        for row in rows:
+            fp.write(f'{row["method"]} {row["path"]}: {row["count"]} requests, {row["errors"]} errors, '
+                     f'{_format_bytes(row["bytes_sent"])} sent, {_format_bytes(row["bytes_received"])} received\n')
+            fp.write(f'  latency mean {_format_seconds(row["latency_sum"] / row["count"])}, '
+                     f'p50 {_format_seconds(row["latency_p50"])}, p90 {_format_seconds(row["latency_p90"])}, '
+                     f'p99 {_format_seconds(row["latency_p99"])}, max {_format_seconds(row["latency_max"])}\n')
+            counts = []
+            previous = 0
+            for cumulative in row['latency_buckets'].values():
+                counts.append(cumulative - previous)
+                previous = cumulative
+            first = next(i for i, count in enumerate(counts) if count)
+            last = max(i for i, count in enumerate(counts) if count)
+            for i in range(first, last + 1):
+                label = f'<= {_format_seconds(LATENCY_BUCKETS[i])}' if i < len(LATENCY_BUCKETS) \
+                    else f'>  {_format_seconds(LATENCY_BUCKETS[-1])}'
+                bar = '#' * round(width * counts[i] / row['count'])
+                fp.write(f'  {label:>10} {counts[i]:>7} {bar}\n')
+
+
+def _get_request_body_size(request: urllib.request.Request) -> int:
+    if isinstance(request.data, (bytes, bytearray)):
+        return len(request.data)
+    length = request.get_header('Content-length')
+    return int(length) if length else 0
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_seconds(seconds: float) -> str:
+    return f'{seconds * 1000:.0f} ms' if seconds < 1 else f'{seconds:.1f} s'
+
+
+def _format_bytes(num_bytes: int) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if num_bytes < 1024:
+            return f'{num_bytes:.0f} {unit}' if unit == 'B' else f'{num_bytes:.1f} {unit}'
+        num_bytes /= 1024
+    return f'{num_bytes:.1f} GiB'
@@ -0,0 +1,318 @@
+import http.client
+import io
+import socket
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABCMeta, abstractmethod
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from .mpf import MultiPartFormReader
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+_BLOCK_SIZE = 64 * 1024
+_MAX_REDIRECTS = 10
+_REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+_PoolKey = Tuple[str, str, Optional[int]]
+
+
+class Transport(metaclass=ABCMeta):
+    """
+    Sends a ``urllib.request.Request`` and returns a file-like HTTP response.
+    Responses must be usable as context managers and must provide ``info()``.
+    HTTP errors are raised as ``urllib.error.HTTPError``.
+    """
+
+    @abstractmethod
+    def open(self, request: urllib.request.Request):
+        """Send *request* and return the response."""
+
+    def close(self):
+        """Release all resources held by this transport."""
+
+
+class UrllibTransport(Transport):
+    """Opens a new connection for every request using ``urllib.request.urlopen``."""
+
+    def open(self, request: urllib.request.Request):
+        return urllib.request.urlopen(request)
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class _ConnectionPool:
+    """Keeps up to *pool_size* idle keep-alive connections to a single host."""
+
+    def __init__(self, key: _PoolKey, pool_size: int, idle_timeout: float,
+                 timeout: Optional[float], ssl_context: Optional[ssl.SSLContext]):
+        self._key = key
+        self._pool_size = pool_size
+        self._idle_timeout = idle_timeout
+        self._timeout = timeout
+        self._ssl_context = ssl_context
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return a connection and whether it has been used before."""
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if now - last_used <= self._idle_timeout:
+                    return conn, True
+                conn.close()
+        return self.new_connection(), False
+
+    def release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self._pool_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                conn.close()
+
+    def new_connection(self) -> http.client.HTTPConnection:
+        scheme, host, port = self._key
+        kwargs = dict(blocksize=_BLOCK_SIZE)
+        if self._timeout is not None:
+            kwargs['timeout'] = self._timeout
+        if scheme == 'https':
+            return _HTTPSConnection(host, port, context=self._ssl_context, **kwargs)
+        return _HTTPConnection(host, port, **kwargs)
+
+
+class PooledResponse:
+    """
+    Wraps a ``http.client.HTTPResponse``. Once closed, the underlying connection is
+    returned to its pool if the body has been read completely, otherwise it is closed.
+    """
+
+    def __init__(self, response: http.client.HTTPResponse, conn: http.client.HTTPConnection,
+                 pool: _ConnectionPool, url: str):
+        self._response = response
+        self._conn = conn
+        self._pool = pool
+        self.url = url
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._response.read(amt)
+
+    def readinto(self, b) -> int:
+        return self._response.readinto(b)
+
+    def readline(self, limit: int = -1) -> bytes:
+        return self._response.readline(limit)
+
+    def info(self) -> http.client.HTTPMessage:
+        return self._response.headers
+
+    @property
+    def headers(self) -> http.client.HTTPMessage:
+        return self._response.headers
+
+    @property
+    def status(self) -> int:
+        return self._response.status
+
+    @property
+    def reason(self) -> str:
+        return self._response.reason
+
+    def getcode(self) -> int:
+        return self._response.status
+
+    def geturl(self) -> str:
+        return self.url
+
+    def getheader(self, name: str, default=None):
+        return self._response.getheader(name, default)
+
+    def close(self):
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        reusable = self._response.isclosed() and not self._response.will_close
+        self._response.close()
+        if reusable:
+            self._pool.release(conn)
+        else:
+            conn.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._conn is None
+
+    def __enter__(self) -> 'PooledResponse':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+class PooledTransport(Transport):
+    """
+    Sends requests over persistent ``http.client`` connections. For every host, up to
+    *pool_size* idle connections are kept alive for at most *idle_timeout* seconds.
+    Requests to hosts that must be reached through a proxy are delegated to ``urllib``.
+    If *zero_copy* is True, the files of multipart form bodies are sent with ``os.sendfile()``,
+    or from memory maps over TLS, see :meth:`MultiPartFormReader.send`.
+    The transport is thread-safe.
+    """
+
+    def __init__(self,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 timeout: Optional[float] = None,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 zero_copy: bool = True):
+        if pool_size < 1:
+            raise ValueError('"pool_size" must be a positive integer')
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.zero_copy = zero_copy
+        self.timeout = timeout
+        self._ssl_context = ssl_context
+        self._pools: Dict[_PoolKey, _ConnectionPool] = {}
+        self._lock = threading.Lock()
+        self._proxies = urllib.request.getproxies()
+
+    def open(self, request: urllib.request.Request):
+        url = request.full_url
+        method = request.get_method()
+        body = request.data
+        headers = dict(request.header_items())
+        if body is not None and 'Content-type' not in headers:
+            headers['Content-type'] = 'application/x-www-form-urlencoded'
+
+        for _ in range(_MAX_REDIRECTS + 1):
+            split_url = urllib.parse.urlsplit(url)
+            if self._use_proxy(split_url):
+                return urllib.request.urlopen(request)
+            response = self._send(split_url, method, body, headers)
+            if response.status not in _REDIRECT_CODES or not response.getheader('Location'):
+                break
+            response.read()
+            response.close()
+            url = urllib.parse.urljoin(url, response.getheader('Location'))
+            if response.status in (301, 302, 303) and method not in ('GET', 'HEAD'):
+                method = 'GET'
+                body = None
+                headers = {k: v for k, v in headers.items() if k not in ('Content-type', 'Content-length')}
+        else:
+            response.close()
+            raise urllib.error.HTTPError(url, response.status, 'too many redirects', response.headers, None)
+
+        response.url = url
+        if response.status >= 400:
+            with response:
+                fp = io.BytesIO(response.read())
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, fp)
+        return response
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def _use_proxy(self, split_url: urllib.parse.SplitResult) -> bool:
+        return bool(self._proxies.get(split_url.scheme)) and not urllib.request.proxy_bypass(split_url.hostname)
+
+    def _get_pool(self, key: _PoolKey) -> _ConnectionPool:
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                ssl_context = self._ssl_context
+                if key[0] == 'https' and ssl_context is None:
+                    ssl_context = ssl.create_default_context()
+                pool = _ConnectionPool(key, self.pool_size, self.idle_timeout, self.timeout, ssl_context)
+                self._pools[key] = pool
+            return pool
+
+    def _send(self, split_url: urllib.parse.SplitResult, method: str, body, headers: Dict[str, str]) \
+            -> PooledResponse:
+        if split_url.scheme not in ('http', 'https'):
+            raise urllib.error.URLError(f'unsupported URL scheme "{split_url.scheme}"')
+        pool = self._get_pool((split_url.scheme, split_url.hostname, split_url.port))
+        path = split_url.path or '/'
+        if split_url.query:
+            path += '?' + split_url.query
+
+        conn, reused = pool.acquire()
+        try:
+            response = self._request(conn, method, path, body, headers, self.zero_copy)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not reused or not _can_resend(body):
+                raise
+            # The server has closed an idle keep-alive connection, so retry once on a new one.
+            if hasattr(body, 'seek'):
+                body.seek(0)
+            conn = pool.new_connection()
+            response = self._request(conn, method, path, body, headers, self.zero_copy)
+        return PooledResponse(response, conn, pool, split_url.geturl())
+
+    @staticmethod
+    def _request(conn: http.client.HTTPConnection, method: str, path: str, body, headers: Dict[str, str],
+                 zero_copy: bool = False) -> http.client.HTTPResponse:
+        try:
+            if zero_copy and isinstance(body, MultiPartFormReader):
+                _send_form(conn, method, path, body, headers)
+            else:
+                conn.request(method, path, body=body, headers=headers)
+            return conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            raise
+        except OSError as e:
+            conn.close()
+            raise urllib.error.URLError(e) from e
+        except BaseException:
+            conn.close()
+            raise
+
+
+def _send_form(conn: http.client.HTTPConnection, method: str, path: str, body: MultiPartFormReader,
+               headers: Dict[str, str]):
+    """Send the request head like ``conn.request()`` does, then let *body* send itself to the socket."""
+    names = {name.lower() for name in headers}
+    conn.putrequest(method, path, skip_host='host' in names, skip_accept_encoding='accept-encoding' in names)
+    for name, value in headers.items():
+        conn.putheader(name, value)
+    if 'content-length' not in names:
+        conn.putheader('Content-Length', str(len(body)))
+    conn.endheaders()
+    body.send(conn.sock)
+
+
+def _can_resend(body) -> bool:
+    return body is None or isinstance(body, bytes) or (hasattr(body, 'seekable') and body.seekable())
@@ -0,0 +1,245 @@
+import os
+import struct
+import zipfile
+import zlib
+from typing import List, Optional
+
+_LOCAL_FILE_HEADER = b'PK\x03\x04'
+_DATA_DESCRIPTOR = b'PK\x07\x08'
+_ARCHIVE_END_SIGNATURES = (b'PK\x01\x02', b'PK\x05\x06', b'PK\x06\x06', b'PK\x06\x07')
+
+_LOCAL_FILE_HEADER_STRUCT = struct.Struct('<4sHHHHHIIIHH')
+
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_ZIP64_EXTRA_ID = 0x0001
+_ZIP64_LIMIT = 0xFFFFFFFF
+
+_HEADER, _DATA, _DESCRIPTOR, _END = range(4)
+
+
+class UnsupportedZipStreamError(zipfile.BadZipFile):
+    """Raised if a zip archive uses features that prevent extracting it while streaming."""
+
+
+class StreamingZipExtractor:
+    """
+    Extracts a zip archive into *output_dir* while it is being received.
+
+    The archive is passed chunk-wise to :meth:`write`, member files are written as their data
+    arrives, so that only the current member's pending bytes are held in memory.
+    Members are read from their local headers, the central directory at the end of the
+    archive is not needed. Stored and deflated members are supported, but not encrypted members
+    or stored members of unknown size. Like ``zipfile.ZipFile.extractall()``, absolute paths and
+    ".." components in member names are ignored.
+    """
+
+    def __init__(self, output_dir: str = '.'):
+        self.output_dir = output_dir
+        self.extracted: List[str] = []
+        self._buffer = bytearray()
+        self._state = _HEADER
+        self._name = None
+        self._flags = 0
+        self._zip64 = False
+        self._method = 0
+        self._crc = 0
+        self._expected_crc = 0
+        self._remaining: Optional[int] = None
+        self._compressed_size = 0
+        self._size = 0
+        self._decompressor = None
+        self._fp = None
+
+    def write(self, data: bytes):
+        """Extract the next chunk *data* of the archive."""
+        if self._state == _END:
+            return
+        self._buffer += data
+        try:
+            while self._step():
+                pass
+        except BaseException:
+            self._close_file()
+            raise
+
+    def close(self):
+        """Finish extraction. Raises ``zipfile.BadZipFile`` if the archive is incomplete."""
+        self._close_file()
+        if self._state != _END:
+            raise zipfile.BadZipFile('zip archive is truncated')
+
+    def abort(self):
+        """Stop extraction. Files extracted so far are kept."""
+        self._close_file()
+        self._state = _END
+
+    def __enter__(self) -> 'StreamingZipExtractor':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_file()
+
+    def _step(self) -> bool:
+        if self._state == _HEADER:
+            return self._read_header()
+        if self._state == _DATA:
+            return self._read_data()
+        if self._state == _DESCRIPTOR:
+            return self._read_descriptor()
+        self._buffer.clear()
+        return False
+
+    def _read_header(self) -> bool:
+        if len(self._buffer) < 4:
+            return False
+        signature = bytes(self._buffer[:4])
+        if signature in _ARCHIVE_END_SIGNATURES:
+            self._state = _END
+            return True
+        if signature != _LOCAL_FILE_HEADER:
+            raise zipfile.BadZipFile(f'bad local file header signature {signature!r}')
+        if len(self._buffer) < _LOCAL_FILE_HEADER_STRUCT.size:
+            return False
+        _, _, flags, method, _, _, crc, compressed_size, size, name_length, extra_length = \
+            _LOCAL_FILE_HEADER_STRUCT.unpack_from(self._buffer)
+        header_size = _LOCAL_FILE_HEADER_STRUCT.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+        raw_name = bytes(self._buffer[_LOCAL_FILE_HEADER_STRUCT.size:_LOCAL_FILE_HEADER_STRUCT.size + name_length])
+        extra = bytes(self._buffer[_LOCAL_FILE_HEADER_STRUCT.size + name_length:header_size])
+        del self._buffer[:header_size]
+
+        name = raw_name.decode('utf-8' if flags & _FLAG_UTF8 else 'cp437')
+        if flags & _FLAG_ENCRYPTED:
+            raise UnsupportedZipStreamError(f'zip member {name!r} is encrypted')
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise UnsupportedZipStreamError(f'zip member {name!r} uses unsupported compression method {method}')
+        if flags & _FLAG_DATA_DESCRIPTOR:
+            if method == zipfile.ZIP_STORED:
+                raise UnsupportedZipStreamError(f'size of stored zip member {name!r} is unknown')
+            self._remaining = None
+        else:
+            if compressed_size == _ZIP64_LIMIT or size == _ZIP64_LIMIT:
+                size, compressed_size = _parse_zip64_sizes(extra, size, compressed_size)
+            self._remaining = compressed_size
+
+        self._name = name
+        self._flags = flags
+        self._zip64 = _find_extra_field(extra, _ZIP64_EXTRA_ID) is not None
+        self._method = method
+        self._expected_crc = crc
+        self._crc = 0
+        self._compressed_size = 0
+        self._size = 0
+        self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if method == zipfile.ZIP_DEFLATED else None
+        self._open_file()
+        self._state = _DATA
+        return True
+
+    def _read_data(self) -> bool:
+        if not self._buffer and self._remaining != 0:
+            return False
+        if self._remaining is not None:
+            chunk = bytes(self._buffer[:self._remaining])
+            del self._buffer[:len(chunk)]
+            self._remaining -= len(chunk)
+        else:
+            chunk = bytes(self._buffer)
+            self._buffer.clear()
+        self._compressed_size += len(chunk)
+
+        if self._decompressor is not None:
+            data = self._decompressor.decompress(chunk)
+            if self._decompressor.eof:
+                # Return bytes following the deflate stream to the buffer
+                unused = self._decompressor.unused_data
+                if unused:
+                    self._buffer[:0] = unused
+                    self._compressed_size -= len(unused)
+                    if self._remaining is not None:
+                        self._remaining += len(unused)
+            finished = self._decompressor.eof
+        else:
+            data = chunk
+            finished = self._remaining == 0
+        self._write_file(data)
+
+        if finished:
+            if self._remaining not in (None, 0):
+                raise zipfile.BadZipFile(f'zip member {self._name!r} has trailing data')
+            self._state = _DESCRIPTOR if self._flags & _FLAG_DATA_DESCRIPTOR else self._finish_member()
+        elif self._remaining == 0:
+            raise zipfile.BadZipFile(f'deflate stream of zip member {self._name!r} is truncated')
+        return True
+
+    def _read_descriptor(self) -> bool:
+        # The descriptor has an optional signature and 8 byte sizes if the member has a zip64 extra field
+        if len(self._buffer) < 4:
+            return False
+        offset = 4 if self._buffer[:4] == _DATA_DESCRIPTOR else 0
+        length = offset + (20 if self._zip64 else 12)
+        if len(self._buffer) < length:
+            return False
+        crc, compressed_size, size = struct.unpack_from('<IQQ' if self._zip64 else '<III', self._buffer, offset)
+        if (compressed_size, size) != (self._compressed_size, self._size):
+            raise zipfile.BadZipFile(f'bad data descriptor of zip member {self._name!r}')
+        del self._buffer[:length]
+        self._expected_crc = crc
+        self._state = self._finish_member()
+        return True
+
+    def _finish_member(self) -> int:
+        self._close_file()
+        if self._crc != self._expected_crc:
+            raise zipfile.BadZipFile(f'bad CRC-32 for zip member {self._name!r}')
+        return _HEADER
+
+    def _open_file(self):
+        parts = [part for part in self._name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+        path = os.path.join(self.output_dir, *parts)
+        if self._name.endswith('/') or not parts:
+            os.makedirs(path, exist_ok=True)
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fp = open(path, 'wb')
+        self.extracted.append(path)
+
+    def _write_file(self, data: bytes):
+        if data:
+            self._crc = zlib.crc32(data, self._crc)
+            self._size += len(data)
+            if self._fp is not None:
+                self._fp.write(data)
+
+    def _close_file(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+
+def _find_extra_field(extra: bytes, header_id: int) -> Optional[bytes]:
+    offset = 0
+    while offset + 4 <= len(extra):
+        field_id, length = struct.unpack_from('<HH', extra, offset)
+        if field_id == header_id:
+            return extra[offset + 4:offset + 4 + length]
+        offset += 4 + length
+    return None
+
+
+def _parse_zip64_sizes(extra: bytes, size: int, compressed_size: int):
+    field = _find_extra_field(extra, _ZIP64_EXTRA_ID)
+    if field is None:
+        raise zipfile.BadZipFile('missing zip64 extra field')
+    values = iter(struct.unpack_from(f'<{len(field) // 8}Q', field))
+    if size == _ZIP64_LIMIT:
+        size = next(values)
+    if compressed_size == _ZIP64_LIMIT:
+        compressed_size = next(values)
+    return size, compressed_size
@@ -1,16 +1,114 @@
-from typing import Optional, Union
+import collections
+import hashlib
+import hmac
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple, Union
 
+PBKDF2_ITERATIONS = 100000
 
-def encrypt(txt: str, salt: Optional[Union[str, bytes]] = None) -> str:
-    import hashlib
+# Maximum number of PBKDF2 results memoized per process
+DERIVATION_CACHE_SIZE = 1024
 
+Salt = Optional[Union[str, bytes]]
+
+_derivation_cache = collections.OrderedDict()
+_derivation_cache_lock = threading.Lock()
+
+# Secret of this process keying the memoized derivations, so that the keys are useless outside of it
+_derivation_key_secret = os.urandom(32)
+
+
+def encrypt(txt: str, salt: Salt = None) -> str:
+    """
+    Return the SHA-512 hex digest of *txt* or, if *salt* is given, its PBKDF2-HMAC-SHA512 derivation.
+    PBKDF2 derivations are memoized per process, see :func:`encrypt_many`.
+    """
     if salt is None:
         # noinspection InsecureHash
         h = hashlib.sha512(txt.encode('utf-8'))
         return h.hexdigest()
-    else:
-        if isinstance(salt, str):
-            salt = salt.encode('utf-8')
 
-        h = hashlib.pbkdf2_hmac('sha512', txt.encode('utf-8'), salt, 100000)
-        return h.hex()
+    salt = _encode_salt(salt)
+    key = _derivation_key(txt, salt)
+    derived = _get_derivation(key)
+    if derived is None:
+        derived = _pbkdf2(txt, salt)
+        _put_derivation(key, derived)
+    return derived
+
+
+def encrypt_many(items: Sequence[Tuple[str, Salt]], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Encrypt many (txt, salt) *items*, see :func:`encrypt`.
+    PBKDF2 derivations that are not memoized yet are computed on a pool of up to *max_workers* processes,
+    defaults to the number of CPUs.
+
+    Derivations are memoized by an HMAC-SHA256 of text and salt keyed by a random secret of the process,
+    so neither is held in plain form and the memo keys cannot be brute-forced elsewhere.
+    """
+    results: List[Optional[str]] = [None] * len(items)
+    pending = collections.OrderedDict()
+    for index, (txt, salt) in enumerate(items):
+        if salt is None:
+            results[index] = encrypt(txt)
+            continue
+        salt = _encode_salt(salt)
+        key = _derivation_key(txt, salt)
+        results[index] = _get_derivation(key)
+        if results[index] is None:
+            pending.setdefault(key, (txt, salt, []))[2].append(index)
+
+    if pending:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError('"max_workers" must be a positive integer')
+        args = list(pending.values())
+        if max_workers == 1 or len(args) == 1:
+            derivations = [_pbkdf2(txt, salt) for txt, salt, _ in args]
+        else:
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_workers, len(args))) as executor:
+                derivations = list(executor.map(_pbkdf2, [txt for txt, _, _ in args], [salt for _, salt, _ in args]))
+        for key, (_, _, indexes), derived in zip(pending, args, derivations):
+            _put_derivation(key, derived)
+            for index in indexes:
+                results[index] = derived
+    return results
+
+
+def clear_derivation_cache():
+    """Forget all memoized PBKDF2 derivations."""
+    with _derivation_cache_lock:
+        _derivation_cache.clear()
+
+
+def _encode_salt(salt: Union[str, bytes]) -> bytes:
+    return salt.encode('utf-8') if isinstance(salt, str) else salt
+
+
+def _pbkdf2(txt: str, salt: bytes) -> str:
+    return hashlib.pbkdf2_hmac('sha512', txt.encode('utf-8'), salt, PBKDF2_ITERATIONS).hex()
+
+
+def _derivation_key(txt: str, salt: bytes) -> bytes:
+    # Length-prefix the text, so that different (txt, salt) splits of the same bytes get different keys
+    data = txt.encode('utf-8')
+    return hmac.new(_derivation_key_secret, len(data).to_bytes(8, 'little') + data + salt, 'sha256').digest()
+
+
+def _get_derivation(key: bytes) -> Optional[str]:
+    with _derivation_cache_lock:
+        derived = _derivation_cache.get(key)
+        if derived is not None:
+            _derivation_cache.move_to_end(key)
+        return derived
+
+
+def _put_derivation(key: bytes, derived: str):
+    with _derivation_cache_lock:
+        _derivation_cache[key] = derived
+        _derivation_cache.move_to_end(key)
+        while len(_derivation_cache) > DERIVATION_CACHE_SIZE:
+            _derivation_cache.popitem(last=False)
@@ -1,10 +1,19 @@
+import contextlib
+import io
 import json
-from typing import Sequence, List, Optional
+import os
+import shlex
+import sys
+import threading
+from typing import Dict, Sequence, List, Optional, Iterator, Tuple
 
 import click
 
 from ocdb.api import JsonObj, OCDBApi
 from ocdb.api.util import DATASET_TYPES
+from ocdb.api.export import EXPORT_FORMATS
+from ocdb.api.parallel import imap
+from ocdb.api.tracing import RequestStats, STATS_FORMATS
 from .version import VERSION, LICENSE_TEXT
 
 
@@ -12,6 +21,36 @@ def _dump_json(obj: JsonObj):
     print(json.dumps(obj, indent=2))
 
 
+def _parse_queries(query: Sequence[str]) -> Dict[str, str]:
+    kwargs = {}
+    for q in query:
+        buffer = q.split('=')
+        if len(buffer) != 2:
+            raise click.ClickException("Please use syntax --query field1=value1 --query field2=value2")
+        kwargs[buffer[0]] = buffer[1]
+    return kwargs
+
+
+def _bulk_delete_options(func):
+    func = click.option('--dry-run', is_flag=True, help="Only list what would be deleted")(func)
+    func = click.option('--retries', metavar='<n>', type=click.IntRange(min=0), default=2, show_default=True,
+                        help="Retry items failing with a server error or a dropped connection up to <n> times")(func)
+    func = click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), default=8, show_default=True,
+                        help="Delete using <n> concurrent requests")(func)
+    return func
+
+
+def _read_ids(file) -> List[str]:
+    """Read one ID per line, ignoring empty lines and lines starting with "#"."""
+    return [line.strip() for line in file if line.strip() and not line.startswith('#')]
+
+
+def _dump_delete_results(ctx, rows: List[JsonObj]):
+    _dump_json(rows)
+    if any(row['status'] == 'FAILED' for row in rows):
+        ctx.exit(1)
+
+
 @click.command()
 @click.argument('name', required=False)
 @click.argument('value', required=False)
@@ -36,7 +75,7 @@ def conf(ctx, name, value):
 
 def _check_args(ctx, param, value):
     max_num_args = 15
-    if len(value) > max_num_args:
+    if len(value) > max_num_args and not ctx.params.get('parallel'):
         raise click.BadParameter(f"A maximum of {max_num_args} files per upload are allowed.")
     return value
 
@@ -45,20 +84,27 @@ def _check_args(ctx, param, value):
 @click.argument('cal-char-files', metavar='<cal-char-file> ...', required=True, nargs=-1, callback=_check_args)
 @click.option('--disagree-publication', '-dp', 'disagree_publication', metavar='<disagree-publication>', is_flag=True,
               help="Specify that you disagree to publish the data")
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), is_eager=True,
+              help="Upload any number of files in batches of 15 files using <n> concurrent requests")
 @click.help_option("--help", "-h")
 @click.pass_context
-def fidrad_upload_cal_char(ctx, cal_char_files: Sequence[str], disagree_publication: bool):
+def fidrad_upload_cal_char(ctx, cal_char_files: Sequence[str], disagree_publication: bool, parallel: Optional[int]):
     """ \b
     Upload fidraddb cal/char files.
     You need to be a logged-in user with assigned role "fidrad" or an admin.
     \b
-    Please choose max 15 FidRadDB cal/char files.
+    Please choose max 15 FidRadDB cal/char files, unless --parallel is given.
     The filenames must follow the syntax:
        CP_[class or serial number]_[file type]_[calibrationDate].txt
     """
     api: OCDBApi = ctx.obj
-    results = api.fidrad_upload(cal_char_files=cal_char_files,
-                                disagree_publication=disagree_publication)
+    if parallel:
+        results = api.fidrad_upload_parallel(cal_char_files=cal_char_files,
+                                             disagree_publication=disagree_publication,
+                                             max_workers=parallel)
+    else:
+        results = api.fidrad_upload(cal_char_files=cal_char_files,
+                                    disagree_publication=disagree_publication)
     warn_key = "Warning!"
     warn_lines = None
     if warn_key in results:
@@ -167,19 +213,29 @@ def fidrad_list_files(ctx, name_part: str):
 
 
 @click.command(name="delete")
-@click.argument('file-name', required=True)
+@click.argument('file-name', required=False)
+@click.option('--pattern', metavar='<pattern>', help="Delete all files matching the glob <pattern>, e.g. '*_2019*'")
+@_bulk_delete_options
 @click.help_option("--help", "-h")
 @click.pass_context
-def fidrad_delete_file(ctx, file_name: str):
+def fidrad_delete_file(ctx, file_name: Optional[str], pattern: Optional[str], parallel: int, retries: int,
+                       dry_run: bool):
     """ \b
     Will delete the file with the user defined name on the server.
     You need to be a logged-in user or an admin.
       -> A logged-in user can only delete own files.
       -> An admin can delete any files.
+    With --pattern, all matching files are deleted concurrently.
 
     :param file_name: The name of the file to be deleted
     """
     api: OCDBApi = ctx.obj
+    if (file_name is None) == (pattern is None):
+        raise click.ClickException("Please give either a <file-name> or a --pattern.")
+    if pattern is not None:
+        _dump_delete_results(ctx, api.fidrad_delete_files(pattern, max_workers=parallel, max_retries=retries,
+                                                          dry_run=dry_run))
+        return
     result = api.fidrad_delete_file(file_name)
     _dump_json(result)
 
@@ -219,15 +275,25 @@ def fidrad_download_file(ctx, file_name: str, output_dir: str):
               help="set date for publication")
 @click.option('--allow-publication', '-ap', 'allow_publication', metavar='<allow-publication>', is_flag=True,
               help="Specify that you agree to publish the data")
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1),
+              help="Upload the files using <n> concurrent requests. The submission is created with the first "
+                   "100 dataset files, the other files are added one by one.")
 @click.help_option("--help", "-h")
 @click.pass_context
 def upload_submission(ctx, path: str, dataset_files: Sequence[str], doc_files: Sequence[str],
-                      submission_id: str, publication_date: str, allow_publication: bool):
+                      submission_id: str, publication_date: str, allow_publication: bool, parallel: Optional[int]):
     """ Upload submission files."""
-    validation_results = ctx.obj.upload_submission(path=path, dataset_files=dataset_files,
-                                                   doc_files=doc_files, submission_id=submission_id,
-                                                   publication_date=publication_date,
-                                                   allow_publication=allow_publication)
+    if parallel:
+        validation_results = ctx.obj.upload_submission_parallel(path=path, dataset_files=dataset_files,
+                                                                doc_files=doc_files, submission_id=submission_id,
+                                                                publication_date=publication_date,
+                                                                allow_publication=allow_publication,
+                                                                max_workers=parallel)
+    else:
+        validation_results = ctx.obj.upload_submission(path=path, dataset_files=dataset_files,
+                                                       doc_files=doc_files, submission_id=submission_id,
+                                                       publication_date=publication_date,
+                                                       allow_publication=allow_publication)
     _dump_json(validation_results)
 
 
@@ -235,15 +301,21 @@ def upload_submission(ctx, path: str, dataset_files: Sequence[str], doc_files: S
 @click.option('--dataset-id', '-id', help='Specify dataset IDs', multiple=True)
 @click.option('--download-docs', '-docs', metavar='<docs>', help='Get docs, too', is_flag=True)
 @click.option('--out-file', '-o', metavar='<out-file>', help='Specify name for the outfile (zip)')
+@click.option('--output-dir', metavar='<output-dir>', default='.', show_default=True,
+              help='Directory into which the files are extracted')
+@click.option('--keep-zip/--no-keep-zip', default=True, show_default=True,
+              help='Whether to keep the zip file. Without it, files are only extracted while downloading.')
 @click.help_option("--help", "-h")
 @click.pass_context
-def download_datasets(ctx, dataset_id: List[str], download_docs: bool, out_file: str):
+def download_datasets(ctx, dataset_id: List[str], download_docs: bool, out_file: str, output_dir: str,
+                      keep_zip: bool):
     """Download dataset files --dataset-id <id> [--dataset-id <id> ...] --download-docs [--out-file <out-file>]."""
 
     if not dataset_id:
         raise click.ClickException("Please give at least one dataset-id.")
 
-    result = ctx.obj.download_datasets_by_ids(dataset_id, download_docs, out_file)
+    result = ctx.obj.download_datasets_by_ids(dataset_id, download_docs, out_file, output_dir=output_dir,
+                                              keep_zip=keep_zip)
     print(result)
 
 
@@ -252,17 +324,44 @@ def download_datasets(ctx, dataset_id: List[str], download_docs: bool, out_file:
               help='Dataset ID.')
 @click.option('--path', '-p', 'dataset_path', metavar='<path>',
               help='Dataset path of the form affil/project/cruise/name.')
+@click.option('--format', '-f', 'fmt', type=click.Choice(['json', *EXPORT_FORMATS]), default='json',
+              help='Output format. Parquet, Feather and CSV are written to a file, JSON is printed.')
+@click.option('--out-file', '-o', metavar='<out-file>',
+              help='Output file for formats other than JSON. Defaults to the dataset ID or name with '
+                   'the format\'s extension.')
+@click.option('--stream', is_flag=True,
+              help="Print the records of the dataset with given <id> one per line while they are received")
 @click.help_option("--help", "-h")
 @click.pass_context
-def get_dataset(ctx, dataset_id: str, dataset_path: str):
+def get_dataset(ctx, dataset_id: str, dataset_path: str, fmt: str, out_file: Optional[str], stream: bool):
     """Get dataset with given <id> or <path>."""
     if (not dataset_id and not dataset_path) or (dataset_id and dataset_path):
         raise click.ClickException("Either <id> or <path> must be given.")
-    if dataset_id:
-        dataset = ctx.obj.get_dataset(dataset_id)
-    else:
-        dataset = ctx.obj.get_dataset_by_name(dataset_path)
-    _dump_json(dataset)
+    if stream:
+        if not dataset_id or fmt != 'json':
+            raise click.ClickException("--stream requires <id> and the JSON format.")
+        for record in ctx.obj.iter_dataset_records(dataset_id):
+            print(json.dumps(record))
+        return
+    if fmt == 'json':
+        if dataset_id:
+            dataset = ctx.obj.get_dataset(dataset_id)
+        else:
+            dataset = ctx.obj.get_dataset_by_name(dataset_path)
+        _dump_json(dataset)
+        return
+
+    if not out_file:
+        base_name = dataset_id or os.path.splitext(dataset_path.rstrip('/').split('/')[-1])[0]
+        out_file = f'{base_name}.{fmt}'
+    try:
+        if dataset_id:
+            ctx.obj.export_dataset(dataset_id, out_file, fmt=fmt)
+        else:
+            ctx.obj.export_dataset_by_name(dataset_path, out_file, fmt=fmt)
+    except ImportError as e:
+        raise click.ClickException(str(e))
+    print(f'Dataset written to {out_file}')
 
 
 @click.command(name='find')
@@ -274,29 +373,57 @@ def get_dataset(ctx, dataset_id: str, dataset_path: str):
 @click.option('--offset', metavar='<offset>', type=int, default=1,
               help="Results offset. Offset of first result is 1.")
 @click.option('--count', metavar='<count>', type=int, default=1000,
-              help="Maximum number of results.")
+              help="Maximum number of results. With --all, the number of results fetched per request.")
+@click.option('--all', 'all_pages', is_flag=True,
+              help="Fetch all results page by page and print one dataset reference per line.")
+@click.option('--local', is_flag=True,
+              help="Answer the --query from the local dataset mirror, see 'ocdb-cli ds sync'. Besides the "
+                   "attributes, region, start_time and end_time may be queried.")
 @click.help_option("--help", "-h")
 @click.pass_context
-def find_datasets(ctx, expr, offset, count, query):
+def find_datasets(ctx, expr, offset, count, query, all_pages, local):
     """Find datasets using query expression <expr>."""
 
     if not expr and not query:
         raise click.ClickException("Please give either an search keyword or expression --expr or a --query.")
 
-    kwargs = {'expr': expr, 'offset': offset, 'count': count}
+    kwargs = {'expr': expr, 'offset': offset, 'count': count, **_parse_queries(query)}
 
-    for q in query:
-        buffer = q.split('=')
-        if len(buffer) == 2:
-            buffer = q.split('=')
-            kwargs[buffer[0]] = buffer[1]
-        else:
-            raise click.ClickException("Please use syntax --query field1=value1 --query field2=value2")
+    if local:
+        try:
+            _dump_json(ctx.obj.find_datasets(local=True, **kwargs))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        return
+
+    if all_pages:
+        kwargs['page_size'] = kwargs.pop('count')
+        for dataset_ref in ctx.obj.iter_datasets(**kwargs):
+            print(json.dumps(dataset_ref))
+        return
 
     dataset_refs = ctx.obj.find_datasets(**kwargs)
     _dump_json(dataset_refs)
 
 
+@click.command(name='sync')
+@click.option('--query', metavar='<query>', type=str, multiple=True,
+              help='Only synchronize datasets with the given attribute --query <attribute>=<value>. '
+                   'Without a query, datasets removed from the server are also removed locally.')
+@click.option('--full', is_flag=True,
+              help="Fetch the metadata of all datasets again, not only of new ones")
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), default=8, show_default=True,
+              help="Fetch metadata using <n> concurrent requests")
+@click.help_option("--help", "-h")
+@click.pass_context
+def sync_datasets(ctx, query, full: bool, parallel: int):
+    """Build or refresh the local dataset mirror used by 'ds find --local'."""
+    result = ctx.obj.sync_datasets(full=full, max_workers=parallel, **_parse_queries(query))
+    _dump_json(result)
+    if result['failed']:
+        ctx.exit(1)
+
+
 @click.command(name="list")
 @click.argument('path', metavar='<path>')
 @click.help_option("--help", "-h")
@@ -313,23 +440,50 @@ def list_datasets(ctx, path):
 
 # noinspection PyShadowingBuiltins
 @click.command(name="del")
-@click.argument('id', metavar='<id>')
+@click.argument('id', metavar='<id>', required=False)
+@click.option('--from-file', metavar='<file>', type=click.File(),
+              help="Delete all datasets whose IDs are listed in <file>, one per line. Use - for stdin")
+@_bulk_delete_options
 @click.help_option("--help", "-h")
 @click.pass_context
-def delete_dataset(ctx, id):
-    """Delete dataset given by <id>."""
+def delete_dataset(ctx, id, from_file, parallel: int, retries: int, dry_run: bool):
+    """Delete dataset given by <id> or all datasets given by --from-file."""
+    if from_file is not None:
+        _dump_delete_results(ctx, ctx.obj.delete_datasets(_read_ids(from_file), max_workers=parallel,
+                                                          max_retries=retries, dry_run=dry_run))
+        return
     if not id:
         raise click.ClickException("Please give an <id>.")
     ctx.obj.delete_dataset(id)
 
 
 @click.command(name="val")
-@click.argument('file', metavar='<file name>', required=True)
+@click.argument('files', metavar='<file name>', nargs=-1, required=True)
+@click.option('--local', 'local_only', is_flag=True,
+              help="Only check the files locally, do not send them to the server")
+@click.option('--processes', metavar='<n>', type=click.IntRange(min=1),
+              help="Check the files locally using <n> processes, defaults to the number of CPUs")
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), default=8, show_default=True,
+              help="Validate the files on the server using <n> concurrent requests")
 @click.help_option("--help", "-h")
 @click.pass_context
-def validate_submission_file(ctx, file):
-    """Validate submission <file> before upload."""
-    validation_result = ctx.obj.validate_submission_file(file)
+def validate_submission_file(ctx, files, local_only, processes, parallel):
+    """
+    Validate submission <file name>s before upload.
+
+    The files are first checked locally. Only files passing the local checks are validated by the server.
+    The reports of many files are keyed by the file names as given.
+    """
+    if len(files) == 1:
+        # The report of a single file is not keyed, and is the answer of the server if the file passes locally
+        validation_result = ctx.obj.validate_submission_files(files, local_only=True, max_processes=processes)
+        validation_result = validation_result[files[0]]
+        if not local_only and validation_result['status'] != 'ERROR':
+            validation_result = ctx.obj.validate_submission_file(files[0])
+        _dump_json(validation_result)
+        return
+    validation_result = ctx.obj.validate_submission_files(files, local_only=local_only, max_processes=processes,
+                                                          max_workers=parallel)
     _dump_json(validation_result)
 
 
@@ -374,11 +528,20 @@ def get_submissions_for_user(ctx, user_name: Optional[str]):
 
 
 @click.command(name="delete")
-@click.argument('submission-id', metavar='<submission-id>', required=True)
+@click.argument('submission-id', metavar='<submission-id>', required=False)
+@click.option('--from-file', metavar='<file>', type=click.File(),
+              help="Delete all submissions whose IDs are listed in <file>, one per line. Use - for stdin")
+@_bulk_delete_options
 @click.help_option("--help", "-h")
 @click.pass_context
-def delete_submission(ctx, submission_id: str):
-    """Delete submission <submission_id>."""
+def delete_submission(ctx, submission_id: Optional[str], from_file, parallel: int, retries: int, dry_run: bool):
+    """Delete submission <submission_id> or all submissions given by --from-file."""
+    if from_file is not None:
+        _dump_delete_results(ctx, ctx.obj.delete_submissions(_read_ids(from_file), max_workers=parallel,
+                                                             max_retries=retries, dry_run=dry_run))
+        return
+    if not submission_id:
+        raise click.ClickException("Please give a <submission-id>.")
     result = ctx.obj.delete_submission(submission_id)
     _dump_json(result)
 
@@ -398,11 +561,16 @@ def update_submission_status(ctx, submission_id: str, status: str):
 @click.option('--submission-id', '-s', metavar='<submission-id>', help='Specify submission ID', required=True)
 @click.option('--index', '-i', metavar='<index>', help='Specify submission file index', required=True)
 @click.option('--out-file', '-o', metavar='<out-file>', help='Specify name for the outfile (zip)')
+@click.option('--output-dir', metavar='<output-dir>', default='.', show_default=True,
+              help='Directory into which the files are extracted')
+@click.option('--keep-zip/--no-keep-zip', default=True, show_default=True,
+              help='Whether to keep the zip file. Without it, files are only extracted while downloading.')
 @click.help_option("--help", "-h")
 @click.pass_context
-def download_submission_file(ctx, submission_id: str, index: int, out_file: str):
+def download_submission_file(ctx, submission_id: str, index: int, out_file: str, output_dir: str, keep_zip: bool):
     """Get submission file --submission-id <submission-id> --index <index> [--out-file <name>.zip]."""
-    result = ctx.obj.download_submission_file(submission_id, index, out_file)
+    result = ctx.obj.download_submission_file(submission_id, index, out_file, output_dir=output_dir,
+                                              keep_zip=keep_zip)
     print(result)
 
 
@@ -458,9 +626,16 @@ def show_license():
 @click.option('--server', 'server_url', metavar='<url>', envvar='OCDB_SERVER_URL', help='OCDB Server URL.')
 @click.option('--verbose', '-v', metavar='<verbose>', is_flag=True, help='OCDB client verbose reporting',
               required=False)
+@click.option('--stats', is_flag=True,
+              help='Print the number of requests, errors, bytes and a latency histogram per endpoint to stderr '
+                   'at the end of the run.')
+@click.option('--stats-format', type=click.Choice(STATS_FORMATS), default='text', show_default=True,
+              help='Format of the request statistics: a table, JSON lines or Prometheus text.')
+@click.option('--stats-file', metavar='<file>', type=click.Path(dir_okay=False, writable=True),
+              help='Write the request statistics to <file> instead of stderr, implies --stats.')
 @click.help_option("--help", "-h")
 @click.pass_context
-def cli(ctx, server_url: str, verbose: bool):
+def cli(ctx, server_url: str, verbose: bool, stats: bool, stats_format: str, stats_file: Optional[str]):
     """
     EUMETSAT Ocean Color In-Situ Database Client.
     """
@@ -470,6 +645,21 @@ def cli(ctx, server_url: str, verbose: bool):
     if verbose is not None:
         ctx.obj.verbose = verbose
 
+    if stats or stats_file:
+        request_stats = RequestStats()
+        ctx.obj.request_tracer.add_hook(request_stats)
+        ctx.call_on_close(lambda: _write_stats(request_stats, stats_format, stats_file))
+
+
+def _write_stats(request_stats: RequestStats, stats_format: str, stats_file: Optional[str]):
+    with (open(stats_file, 'w') if stats_file else contextlib.nullcontext(sys.stderr)) as fp:
+        if stats_format == 'jsonl':
+            request_stats.write_json_lines(fp)
+        elif stats_format == 'prometheus':
+            request_stats.write_prometheus(fp)
+        else:
+            request_stats.write_text(fp)
+
 
 @click.command(name="add")
 @click.option('--username', '-u', metavar='<username>', help='Username', required=True)
@@ -497,6 +687,30 @@ def add_user(ctx, username: str, password: str, first_name: str, last_name: str,
     _dump_json(result)
 
 
+@click.command(name="add-many")
+@click.argument('users-file', metavar='<users-file>', type=click.File())
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), default=8, show_default=True,
+              help="Add the users using <n> concurrent requests")
+@click.help_option("--help", "-h")
+@click.pass_context
+def add_users(ctx, users_file, parallel: int):
+    """
+        Add many users
+
+        <users-file> is a JSON file containing a list of users, each with the keys "username", "password",
+        "email", "roles" and optionally "first_name", "last_name" and "phone".
+
+        Example:
+
+        ocdb-cli user add-many users.json --parallel 4
+    """
+    users = json.load(users_file)
+    results = {}
+    for username, result, error in ctx.obj.add_users(users, max_workers=parallel):
+        results[username] = result if error is None else {'error': str(error)}
+    _dump_json(results)
+
+
 @click.command(name="update")
 @click.option('--username', '-u', metavar='<username>', help='Username', required=True)
 @click.option('--key', '-k',
@@ -631,6 +845,119 @@ def sbm():
     """
 
 
+class _ThreadOutput(io.TextIOBase):
+    """Replaces sys.stdout, so that text written by the current thread can be captured."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    @contextlib.contextmanager
+    def capture(self) -> Iterator[io.StringIO]:
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+def _read_batch_commands(file) -> Iterator[Tuple[int, List[str]]]:
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('['):
+            args = json.loads(line)
+            if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+                raise click.ClickException(f'Line {line_number}: JSON commands must be lists of strings')
+        else:
+            args = shlex.split(line)
+        yield line_number, args
+
+
+def _run_batch_command(ctx, output: _ThreadOutput, args: List[str]) -> JsonObj:
+    result = {'exit_code': 0}
+    with output.capture() as buffer:
+        try:
+            if args and args[0] == 'batch':
+                raise click.UsageError('batch commands cannot be nested')
+            name, command, command_args = cli.resolve_command(ctx, args)
+            with command.make_context(name, command_args, parent=ctx) as command_ctx:
+                command.invoke(command_ctx)
+        except click.exceptions.Exit as e:
+            result['exit_code'] = e.exit_code
+        except click.ClickException as e:
+            result['exit_code'] = e.exit_code
+            result['error'] = e.format_message()
+        except click.Abort:
+            result['exit_code'] = 1
+            result['error'] = 'Aborted'
+        except Exception as e:
+            result['exit_code'] = 1
+            result['error'] = str(e) or type(e).__name__
+    text = buffer.getvalue()
+    if text:
+        try:
+            result['output'] = json.loads(text)
+        except ValueError:
+            result['output'] = text
+    return result
+
+
+@click.command(name="batch")
+@click.argument('file', metavar='<file>', type=click.File())
+@click.option('--parallel', metavar='<n>', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Run up to <n> commands concurrently")
+@click.help_option("--help", "-h")
+@click.pass_context
+def batch(ctx, file, parallel: int):
+    """
+    Run many commands in a single process.
+
+    <file> contains one command per line, without the leading "ocdb-cli", either as a shell-quoted command line
+    or as a JSON list of arguments. Use "-" to read commands from standard input.
+    All commands share the same API instance and connection pool. For each command, a JSON object
+    with the line number, the arguments, the exit code and the parsed output or the error is written
+    as a single line, in the order of the commands.
+
+    Example:
+
+    printf 'ds del 5d971154f9305e0001c6d700\\nds del 5d971154f9305e0001c6d701\\n' | ocdb-cli batch - --parallel 4
+    """
+    parent_ctx = ctx.parent or ctx
+    output = _ThreadOutput(sys.stdout)
+    stdout, sys.stdout = sys.stdout, output
+    num_failed = 0
+    try:
+        results = imap(lambda item: _run_batch_command(parent_ctx, output, item[1]), _read_batch_commands(file),
+                       parallel, ordered=True)
+        for (line_number, args), result, error in results:
+            if error is not None:
+                raise error
+            num_failed += result['exit_code'] != 0
+            stdout.write(json.dumps(dict(line=line_number, args=args, **result)) + '\n')
+            stdout.flush()
+    finally:
+        sys.stdout = stdout
+    if num_failed:
+        ctx.exit(1)
+
+
 @click.group()
 @click.help_option("--help", "-h")
 def sbmfile():
@@ -656,6 +983,7 @@ def user():
 
 
 cli.add_command(conf)
+cli.add_command(batch)
 cli.add_command(ds)
 cli.add_command(fidRadDB)
 cli.add_command(sbm)
@@ -671,6 +999,7 @@ cli.add_command(login_user)
 cli.add_command(logout_user)
 
 ds.add_command(find_datasets)
+ds.add_command(sync_datasets)
 ds.add_command(download_datasets)
 ds.add_command(get_dataset)
 ds.add_command(delete_dataset)
@@ -697,6 +1026,7 @@ sbmfile.add_command(add_submission_file)
 sbmfile.add_command(validate_submission_file)
 
 user.add_command(add_user)
+user.add_command(add_users)
 user.add_command(update_user)
 user.add_command(change_login)
 user.add_command(get_user)
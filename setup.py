@@ -32,7 +32,11 @@ requirements = [
     'httpretty'
 ]
 
-packages = find_packages(exclude=["tests", "tests.*"])
+extras = {
+    'arrow': ['pyarrow'],
+}
+
+packages = find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"])
 
 NAME = None
 VERSION = None
@@ -47,7 +51,9 @@ setup(
     license='MIT',
     author='Brockmann Consult GmbH',
     packages=packages,
+    python_requires='>=3.7',
     install_requires=requirements,
+    extras_require=extras,
     entry_points={
         'console_scripts': [
             'ocdb-cli = ocdb.main:main'
@@ -7,6 +7,7 @@ from urllib.error import HTTPError
 
 import httpretty
 
+from ocdb.api import utils
 from ocdb.api.OCDBApi import OCDBApi, USER_DIR, new_api
 from ocdb.configstore import MemConfigStore
 from tests.helpers import ClientTest, TEST_URL, TEST_API_VERSION
@@ -160,6 +161,27 @@ class DatasetsApiTest(ApiTest):
         self.assertIsInstance(response, dict)
         self.assertEqual(expected_response, response)
 
+    def test_iter_datasets(self):
+        requested_offsets = []
+
+        def find(request, uri, response_headers):
+            offset = int(request.querystring['offset'][0])
+            count = int(request.querystring['count'][0])
+            requested_offsets.append(offset)
+            ids = range(offset, min(offset + count, 8))
+            body = {"total_count": 7, "datasets": [{"id": str(i), "path": "BIGELOW/BALCH/gnats"} for i in ids]}
+            return [200, response_headers, json.dumps(body)]
+
+        httpretty.register_uri(httpretty.GET, TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/datasets", body=find)
+
+        dataset_refs = list(self.api.iter_datasets(expr="metadata.cruise:gnats", page_size=3))
+        self.assertEqual([str(i) for i in range(1, 8)], [dataset_ref["id"] for dataset_ref in dataset_refs])
+        self.assertEqual([1, 4, 7], requested_offsets)
+        self.assertEqual(["metadata.cruise:gnats"], httpretty.last_request().querystring['expr'])
+
+        with self.assertRaises(ValueError):
+            next(self.api.iter_datasets(expr="metadata.cruise:gnats", page_size=0))
+
     def test_validate_dataset(self):
         httpretty.register_uri(httpretty.POST,
                                TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/store/upload/submission/validate",
@@ -213,7 +235,34 @@ class DatasetsApiTest(ApiTest):
         with self.assertRaises(HTTPError):
             self.api.get_dataset(dataset_id="246")
 
-    @unittest.skip('Not implemented')
+    def test_get_datasets_many(self):
+        for dataset_id in ("1", "2", "3"):
+            dataset = {"id": dataset_id, "attributes": ["lat", "chl"], "records": [[43.76, int(dataset_id)]]}
+            httpretty.register_uri(httpretty.GET,
+                                   TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/datasets/" + dataset_id,
+                                   status=200,
+                                   body=json.dumps(dataset).encode("utf-8"))
+        httpretty.register_uri(httpretty.GET,
+                               TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/datasets/4",
+                               status=404)
+
+        results = list(self.api.get_datasets_many(["1", "2", "3", "4"], max_workers=2, ordered=True))
+        self.assertEqual(["1", "2", "3", "4"], [dataset_id for dataset_id, _, _ in results])
+        self.assertEqual([[[43.76, 1]], [[43.76, 2]], [[43.76, 3]]],
+                         [dataset["records"] for _, dataset, _ in results[:3]])
+        self.assertEqual([None, None, None], [error for _, _, error in results[:3]])
+        self.assertIsNone(results[3][1])
+        self.assertIsInstance(results[3][2], HTTPError)
+
+        results = self.api.get_datasets_many(["1", "2", "3"], max_workers=3)
+        self.assertEqual({"1", "2", "3"}, {dataset_id for dataset_id, _, _ in results})
+
+        df = self.api.get_datasets_many(["1", "4", "3"], fmt="pandas", max_workers=2)
+        self.assertEqual(["dataset_id", "lat", "chl"], list(df.columns))
+        self.assertEqual(["1", "3"], list(df["dataset_id"]))
+        self.assertEqual([1, 3], list(df["chl"]))
+        self.assertEqual(["4"], list(df.attrs["errors"]))
+
     def test_get_dataset_by_name(self):
         expected_response = {
             "id": "245",
@@ -441,6 +490,58 @@ class ApiUserTest(ApiTest):
         res = self.api.get_config_param('password-salt')
         self.assertIsNone(res)
 
+    def test_users_add(self):
+        users = [{"username": f"user{i}", "password": f"pw{i}", "email": f"user{i}@ocdb", "roles": ["submit"]}
+                 for i in range(3)]
+        url = TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/users"
+        httpretty.register_uri(httpretty.POST, url, status=200,
+                               body=lambda request, uri, headers: (200, headers, request.body))
+
+        results = list(self.api.add_users(users, max_workers=2))
+
+        self.assertEqual(["user0", "user1", "user2"], [username for username, _, _ in results])
+        self.assertEqual([None] * 3, [error for _, _, error in results])
+        self.assertEqual({"name": "user1", "first_name": "", "last_name": "", "password": utils.encrypt("pw1"),
+                          "email": "user1@ocdb", "phone": "", "roles": ["submit"]}, results[1][1])
+
+    def test_login_cookie_is_cached(self):
+        url = TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/users"
+        httpretty.register_uri(httpretty.GET, url, status=200, body=json.dumps(["helge"]).encode("utf-8"))
+        httpretty.register_uri(httpretty.POST, url + "/login", status=200, body=json.dumps({}).encode("utf-8"),
+                               adding_headers={"Set-Cookie": "session=c"})
+        httpretty.register_uri(httpretty.GET, url + "/logout", status=200, body=json.dumps({}).encode("utf-8"))
+        login_info_file = os.path.join(USER_DIR, "login_info")
+        OCDBApi.store_login_cookie("session=a")
+        self.addCleanup(OCDBApi.delete_login_cookie)
+        self.api.login_cookie_check_interval = 3600
+
+        for _ in range(100):
+            self.api.list_user()
+        self.assertEqual("session=a", httpretty.last_request().headers["Cookie"])
+        # One stat() and one read
+        self.assertEqual(2, self.api.num_login_cookie_file_accesses)
+
+        # Changes by other processes are detected by the file's mtime after the check interval
+        OCDBApi.store_login_cookie("session=b")
+        os.utime(login_info_file, ns=(0, os.stat(login_info_file).st_mtime_ns + 10 ** 9))
+        self.api.list_user()
+        self.assertEqual("session=a", httpretty.last_request().headers["Cookie"])
+        self.api.login_cookie_check_interval = 0
+        self.api.list_user()
+        self.api.list_user()
+        self.assertEqual("session=b", httpretty.last_request().headers["Cookie"])
+        self.assertEqual(5, self.api.num_login_cookie_file_accesses)
+
+        # Login and logout of this instance update the cached cookie without reading the file
+        self.api.login_cookie_check_interval = 3600
+        self.api.login_user("helge", "passwd")
+        self.api.list_user()
+        self.assertEqual("session=c", httpretty.last_request().headers["Cookie"])
+        self.api.logout_user()
+        self.api.list_user()
+        self.assertNotIn("Cookie", httpretty.last_request().headers)
+        self.assertEqual(5, self.api.num_login_cookie_file_accesses)
+
     def test_change_user_login(self):
         url = TEST_URL + "/ocdb/api/" + TEST_API_VERSION + "/users/login"
         httpretty.register_uri(httpretty.PUT,
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from urllib.error import HTTPError
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.aiotransport import AsyncTransport
+from ocdb.configstore import MemConfigStore
+from tests.helpers import ClientTest
+from tests.server import StandInServer
+
+
+class AsyncOCDBApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.server.route_json('GET', r'/datasets/(?P<id>\w+)', {"id": "245", "records": [[1, 2]]})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _run(self, coro_func, transport: AsyncTransport = None):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(server_url=self.server.url),
+                                    transport=transport) as api:
+                return await coro_func(api)
+
+        return asyncio.run(main())
+
+    def test_get_dataset(self):
+        result = self._run(lambda api: api.get_dataset("245"))
+        self.assertEqual({"id": "245", "records": [[1, 2]]}, result)
+
+    def test_connection_is_reused(self):
+        async def get_all(api):
+            for _ in range(10):
+                await api.get_dataset("245")
+
+        self._run(get_all)
+        self.assertEqual(10, self.server.num_requests)
+        self.assertEqual(1, self.server.num_connections)
+
+    def test_concurrent_requests_are_bounded(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def slow(request):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return 200, {}, json.dumps({"id": request.params['id']}).encode('utf-8')
+
+        self.server.route('GET', r'/datasets/slow/(?P<id>\w+)', slow)
+
+        async def get_all(api):
+            return await asyncio.gather(*[api.get_dataset(f"slow/{i}") for i in range(40)])
+
+        results = self._run(get_all, transport=AsyncTransport(max_connections=4))
+        self.assertEqual([{"id": str(i)} for i in range(40)], results)
+        self.assertLessEqual(in_flight[1], 4)
+        self.assertLessEqual(self.server.num_connections, 4)
+
+    def test_get_datasets_many(self):
+        async def get_many(api):
+            return await api.get_datasets_many(["1", "2", "3"], ordered=True)
+
+        results = self._run(get_many)
+        self.assertEqual(["1", "2", "3"], [dataset_id for dataset_id, _, _ in results])
+        self.assertTrue(all(error is None for _, _, error in results))
+
+    def test_iter_datasets(self):
+        def find(request):
+            offset, count = int(request.query['offset']), int(request.query['count'])
+            refs = [{"id": str(i)} for i in range(offset, min(offset + count, 8))]
+            return 200, {}, json.dumps({"total_count": 7, "datasets": refs}).encode('utf-8')
+
+        self.server.route('GET', r'/datasets', find)
+
+        async def collect(api):
+            return [ref["id"] async for ref in api.iter_datasets(expr="cruise:gnats", page_size=3)]
+
+        self.assertEqual([str(i) for i in range(1, 8)], self._run(collect))
+
+    def test_http_error(self):
+        async def get_submission(api):
+            with self.assertRaises(HTTPError) as cm:
+                await api.get_submission("unknown")
+            await api.get_dataset("245")
+            return cm.exception
+
+        error = self._run(get_submission)
+        self.assertEqual(404, error.code)
+        self.assertEqual({"message": "not found"}, json.load(error))
+        self.assertEqual(1, self.server.num_connections)
+
+    def test_streamed_upload(self):
+        received = []
+
+        def upload(request):
+            received.append((request.headers['Content-Length'], request.body))
+            return 200, {}, b'{"chl-s170604w.sub": {"issues": [], "status": "OK"}}'
+
+        self.server.route('POST', r'/store/upload/submission', upload)
+        dataset_file = ClientTest.get_input_path("chl", "chl-s170604w.sub")
+        result = self._run(lambda api: api.upload_submission("BIGELOW/BALCH/gnats", dataset_file, "sbm1"))
+        self.assertEqual({"chl-s170604w.sub": {"issues": [], "status": "OK"}}, result)
+
+        content_length, body = received[0]
+        self.assertEqual(str(len(body)), content_length)
+        with open(dataset_file, "rb") as fp:
+            self.assertIn(fp.read(), body)
+
+    def test_zero_copy_upload(self):
+        received = []
+
+        def upload(request):
+            received.append(request.body)
+            return 200, {}, b'{"status": "OK"}'
+
+        self.server.route('POST', r'/store/upload/submission', upload)
+        dataset_file = ClientTest.get_input_path("chl", "chl-s170604w.sub")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            doc_file = os.path.join(temp_dir, "docs.zip")
+            with open(doc_file, "wb") as fp:
+                fp.write(os.urandom(3 * 1024 * 1024 + 17))
+            for zero_copy in (True, False):
+                self._run(lambda api: api.upload_submission("BIGELOW/BALCH/gnats", dataset_file, "sbm1",
+                                                            doc_files=doc_file),
+                          transport=AsyncTransport(zero_copy=zero_copy))
+            with open(doc_file, "rb") as fp:
+                content = fp.read()
+        self.assertEqual(2, len(received))
+        for body in received:
+            self.assertIn(content, body)
@@ -0,0 +1,96 @@
+import asyncio
+import collections
+import json
+import threading
+import unittest
+from unittest import mock
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+
+class BulkDeleteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.config = {'server_url': self.server.url}
+        self.api = OCDBApi(config_store=MemConfigStore(**self.config))
+        self.lock = threading.Lock()
+        self.deleted = []
+        self.requests = collections.Counter()
+        self.failures = {'flaky': 1, 'broken': 10}
+        self.server.route('DELETE', r'/datasets/(?P<id>\w+)', self._delete)
+        self.server.route('DELETE', r'/store/upload/submission/(?P<id>\w+)', self._delete)
+        self.server.route('DELETE', r'/store/FidRadDB/delete/file/(?P<id>[\w.]+)', self._delete)
+        patcher = mock.patch('ocdb.api.OCDBApi.DELETE_RETRY_DELAY', 0.001)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+
+    def _delete(self, request):
+        item = request.params['id']
+        with self.lock:
+            self.requests[item] += 1
+            if item == 'missing':
+                return 404, {}, b'{"message": "not found"}'
+            if self.failures.get(item, 0) > 0:
+                self.failures[item] -= 1
+                return 503, {}, b'{"message": "unavailable"}'
+            self.deleted.append(item)
+        return 200, {}, b'{}'
+
+    def test_delete_datasets(self):
+        rows = self.api.delete_datasets(['a1', 'flaky', 'missing', 'broken', 'a2'], max_workers=3, max_retries=2)
+
+        self.assertEqual(['a1', 'flaky', 'missing', 'broken', 'a2'], [row['item'] for row in rows])
+        self.assertEqual(['DELETED', 'DELETED', 'FAILED', 'FAILED', 'DELETED'], [row['status'] for row in rows])
+        # Client errors are not retried
+        self.assertEqual([1, 2, 1, 3, 1], [row['attempts'] for row in rows])
+        self.assertIn('404', rows[2]['error'])
+        self.assertIn('503', rows[3]['error'])
+        self.assertEqual(['a1', 'a2', 'flaky'], sorted(self.deleted))
+        # Only the bulk delete retries, not the request executor as well
+        self.assertEqual({'a1': 1, 'flaky': 2, 'missing': 1, 'broken': 3, 'a2': 1}, self.requests)
+        self.assertEqual(0, self.api.request_metrics['retries'])
+
+    def test_dry_run(self):
+        rows = self.api.delete_submissions(['s1', 's2'], dry_run=True)
+        self.assertEqual([{'item': 's1', 'status': 'DRY-RUN', 'attempts': 0},
+                          {'item': 's2', 'status': 'DRY-RUN', 'attempts': 0}], rows)
+        self.assertEqual(0, self.server.num_requests)
+
+    def test_fidrad_delete_files(self):
+        name_parts = []
+
+        def list_files(request):
+            name_parts.append(request.params['part'])
+            return 200, {}, json.dumps(['a_2019_1.txt', 'b_2019_2.txt', 'a_2019.cal', 'c_2020.txt']).encode('utf-8')
+
+        self.server.route('GET', r'/store/FidRadDB/list/files/(?P<part>\w+)', list_files)
+
+        rows = self.api.fidrad_delete_files('*_2019*.txt', max_workers=2)
+
+        self.assertEqual(['_2019'], name_parts)
+        self.assertEqual([('a_2019_1.txt', 'DELETED'), ('b_2019_2.txt', 'DELETED')],
+                         [(row['item'], row['status']) for row in rows])
+        self.assertEqual(['a_2019_1.txt', 'b_2019_2.txt'], sorted(self.deleted))
+
+    def test_async_delete_datasets(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                with mock.patch('ocdb.api.AsyncOCDBApi.DELETE_RETRY_DELAY', 0.001):
+                    return await api.delete_datasets(['a1', 'flaky', 'missing'], max_workers=2)
+
+        rows = asyncio.run(main())
+        self.assertEqual([('a1', 'DELETED', 1), ('flaky', 'DELETED', 2), ('missing', 'FAILED', 1)],
+                         [(row['item'], row['status'], row['attempts']) for row in rows])
+        self.assertEqual({'a1': 1, 'flaky': 2, 'missing': 1}, self.requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.cache import DatasetCache
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+
+class DatasetCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_put_get_read(self):
+        cache = DatasetCache(self.cache_dir)
+        self.assertIsNone(cache.get('http://test/datasets/1'))
+        cache.put('http://test/datasets/1', b'{"id": "1"}', etag='"abc"')
+
+        entry = cache.get('http://test/datasets/1')
+        self.assertEqual('"abc"', entry.etag)
+        self.assertTrue(entry.has_validators)
+        self.assertEqual(b'{"id": "1"}', cache.read(entry))
+
+        # entries persist across instances
+        entry = DatasetCache(self.cache_dir).get('http://test/datasets/1')
+        self.assertEqual(11, entry.size)
+        self.assertEqual('"abc"', entry.etag)
+
+    def test_ttl(self):
+        cache = DatasetCache(self.cache_dir, ttl=60)
+        entry = cache.put('http://test/datasets/1', b'{}')
+        self.assertFalse(entry.has_validators)
+        self.assertTrue(entry.is_fresh(cache.ttl))
+        entry.stored -= 120
+        self.assertFalse(entry.is_fresh(cache.ttl))
+        cache.revalidated(entry)
+        self.assertTrue(entry.is_fresh(cache.ttl))
+
+    def test_lru_eviction(self):
+        cache = DatasetCache(self.cache_dir, max_size=25)
+        cache.put('a', b'0123456789')
+        cache.put('b', b'0123456789')
+        time.sleep(0.01)
+        cache.read(cache.get('a'))
+        cache.put('c', b'0123456789')
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(20, cache.size)
+        self.assertEqual(4, len(os.listdir(self.cache_dir)))
+
+        cache.clear()
+        self.assertEqual(0, cache.size)
+        self.assertEqual([], os.listdir(self.cache_dir))
+
+
+class CachedGetDatasetTest(unittest.TestCase):
+    DATASET = {"id": "1", "attributes": ["lat", "lon"], "records": [[43.7621, -66.4551]]}
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = StandInServer().start()
+        self.status = []
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.cache_dir)
+
+    def _new_api(self, **config) -> OCDBApi:
+        config_store = MemConfigStore(server_url=self.server.url, cache='true', **{'cache-dir': self.cache_dir},
+                                      **config)
+        return OCDBApi(config_store=config_store)
+
+    def _get_dataset(self, request, headers):
+        status = 304 if request.headers.get('If-None-Match') == '"v1"' else 200
+        self.status.append(status)
+        return status, headers, json.dumps(self.DATASET).encode('utf-8') if status == 200 else b''
+
+    def test_revalidates_with_etag(self):
+        self.server.route('GET', r'/datasets/1', lambda request: self._get_dataset(request, {'ETag': '"v1"'}))
+        api = self._new_api()
+        for _ in range(3):
+            self.assertEqual(self.DATASET, api.get_dataset("1"))
+        self.assertEqual([200, 304, 304], self.status)
+        self.assertEqual(list(self.DATASET["attributes"]), list(api.get_dataset("1", fmt="pandas").columns))
+
+        # a new process reuses the cached dataset
+        self.assertEqual(self.DATASET, self._new_api().get_dataset("1"))
+        self.assertEqual(304, self.status[-1])
+
+    def test_ttl_without_validators(self):
+        self.server.route('GET', r'/datasets/1', lambda request: self._get_dataset(request, {}))
+        api = self._new_api(**{'cache-ttl': '3600'})
+        for _ in range(3):
+            self.assertEqual(self.DATASET, api.get_dataset("1"))
+        self.assertEqual([200], self.status)
+
+        api = self._new_api(**{'cache-ttl': '0'})
+        time.sleep(0.01)
+        api.get_dataset("1")
+        self.assertEqual([200, 200], self.status)
+
+    def test_get_dataset_by_name(self):
+        self.server.route('GET', r'/datasets/BIGELOW/BALCH/gnats/chl/chl-s170604w.sub',
+                          lambda request: self._get_dataset(request, {'ETag': '"v1"'}))
+        api = self._new_api()
+        for _ in range(2):
+            self.assertEqual(self.DATASET, api.get_dataset_by_name("BIGELOW/BALCH/gnats/chl/chl-s170604w.sub"))
+        self.assertEqual([200, 304], self.status)
+
+    def test_not_modified_without_cache_entry(self):
+        # The entry may be evicted while the request is sent, so the server answers 304 to a conditional request
+        def get_dataset(request):
+            status = 304 if not self.status else 200
+            self.status.append(status)
+            return status, {'ETag': '"v1"'}, json.dumps(self.DATASET).encode('utf-8') if status == 200 else b''
+
+        self.server.route('GET', r'/datasets/1', get_dataset)
+        self.assertEqual(self.DATASET, self._new_api().get_dataset("1"))
+        self.assertEqual([304, 200], self.status)
+
+    def test_disabled_by_default(self):
+        api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+        self.assertIsNone(api.dataset_cache)
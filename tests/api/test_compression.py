@@ -0,0 +1,162 @@
+import asyncio
+import gzip
+import http.client
+import io
+import json
+import os
+import tempfile
+import unittest
+import zlib
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.compression import DecodedResponse, decode_content, decode_response, get_body_size, gzip_body, \
+    make_decompressor
+from ocdb.configstore import MemConfigStore
+from tests.helpers import ClientTest
+from tests.server import StandInServer
+
+DATASET = {"id": "245", "attributes": ["lat", "lon", "chl"], "records": [[-19.9743, 57.4493, 0.0528]] * 500}
+
+
+class _FakeResponse(io.BytesIO):
+    def __init__(self, data: bytes, headers=None):
+        super().__init__(data)
+        self.headers = headers or {}
+        self.status = 200
+
+
+class DecodedResponseTest(unittest.TestCase):
+
+    def test_read_in_chunks(self):
+        data = os.urandom(10000) + bytes(200000)
+        for encoding, compressed in (('gzip', gzip.compress(data)), ('deflate', zlib.compress(data))):
+            response = decode_response(_FakeResponse(compressed, {'Content-Encoding': encoding}))
+            self.assertIsInstance(response, DecodedResponse)
+            self.assertEqual(200, response.status)
+            chunks = []
+            while True:
+                chunk = response.read(3000)
+                if not chunk:
+                    break
+                self.assertLessEqual(len(chunk), 3000)
+                chunks.append(chunk)
+            self.assertEqual(data, b''.join(chunks))
+
+    def test_raw_deflate(self):
+        data = os.urandom(10000) + bytes(200000)
+        compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        compressed = compressor.compress(data) + compressor.flush()
+        headers = {'Content-Encoding': 'deflate'}
+        response = decode_response(_FakeResponse(compressed, headers))
+        self.assertEqual(data, b''.join(iter(lambda: response.read(3000), b'')))
+        decompressor = make_decompressor(headers)
+        chunks = [decompressor.decompress(compressed[i:i + 1]) for i in range(len(compressed))]
+        self.assertTrue(decompressor.eof)
+        self.assertEqual(data, b''.join(chunks))
+        self.assertEqual(data, decode_content(compressed, headers))
+
+    def test_json_load(self):
+        response = decode_response(_FakeResponse(gzip.compress(json.dumps(DATASET).encode('utf-8')),
+                                                 {'Content-Encoding': 'GZIP'}))
+        with response:
+            self.assertEqual(DATASET, json.load(response))
+        self.assertTrue(response.closed)
+
+    def test_identity_is_not_wrapped(self):
+        response = _FakeResponse(b'{}', {'Content-Type': 'application/json'})
+        self.assertIs(response, decode_response(response))
+        self.assertEqual(b'abc', decode_content(b'abc', {}))
+
+    def test_truncated_body(self):
+        compressed = gzip.compress(json.dumps(DATASET).encode('utf-8'))
+        response = decode_response(_FakeResponse(compressed[:len(compressed) // 2], {'Content-Encoding': 'gzip'}))
+        with self.assertRaises(http.client.IncompleteRead):
+            response.read()
+        with self.assertRaises(http.client.HTTPException):
+            decode_content(b'not gzip', {'Content-Encoding': 'gzip'})
+
+    def test_gzip_body(self):
+        data = b'20170604,11:30:00,43.7674,-69.7686,0.449\n' * 1000
+        self.assertEqual(data, gzip.decompress(gzip_body(data)))
+        with gzip_body(io.BytesIO(data)) as body:
+            self.assertTrue(body.seekable())
+            size = get_body_size(body)
+            compressed = body.read()
+        self.assertEqual(len(compressed), size)
+        self.assertLess(size, len(data) // 10)
+        self.assertEqual(data, gzip.decompress(compressed))
+
+
+class CompressionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.server.route_json('GET', r'/datasets/(?P<id>\w+)', DATASET, compress=True)
+        self.config = {'server_url': self.server.url}
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def test_responses_are_decompressed(self):
+        api = OCDBApi(config_store=MemConfigStore(**self.config))
+        self.assertEqual(DATASET, api.get_dataset('245'))
+        api.close()
+        self.assertLess(self.server.bytes_sent, len(json.dumps(DATASET)) // 10)
+
+    def test_async_responses_are_decompressed(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                return await api.get_dataset('245')
+
+        self.assertEqual(DATASET, asyncio.run(main()))
+        self.assertLess(self.server.bytes_sent, len(json.dumps(DATASET)) // 10)
+
+    def test_downloads_are_not_compressed(self):
+        accept_encodings = []
+
+        def handle(request):
+            accept_encodings.append(request.headers.get('Accept-Encoding'))
+            return 200, {}, b'Cal/Char data'
+
+        self.server.route('GET', r'/store/FidRadDB/download/file/(?P<name>.+)', handle)
+        api = OCDBApi(config_store=MemConfigStore(**self.config))
+        api.fidrad_download_file('CP_RAMSES.txt', self.temp_dir.name)
+        api.close()
+        self.assertEqual(['identity'], accept_encodings)
+
+    def test_uploads_are_compressed(self):
+        received = []
+
+        def handle(request):
+            received.append((request.headers.get('Content-Encoding'), request.body))
+            return 200, {}, b'{"issues": [], "status": "OK"}'
+
+        self.server.route('POST', r'/store/upload/submission(/validate)?', handle)
+        dataset_file = ClientTest.get_input_path("chl", "chl-s170604w.sub")
+        with open(dataset_file) as fp:
+            dataset_text = fp.read()
+
+        for compress in (False, True):
+            api = OCDBApi(config_store=MemConfigStore(**self.config, **{'compress-uploads': compress}))
+            api.validate_submission_file(dataset_file)
+            api.upload_submission('BIGELOW/BALCH/gnats', dataset_file, 'sbm1')
+            api.close()
+        self.assertEqual([None, None, 'gzip', 'gzip'], [encoding for encoding, _ in received])
+        self.assertEqual({'data': dataset_text}, json.loads(received[2][1]))
+        self.assertEqual(len(received[1][1]), len(received[3][1]))
+        self.assertIn(dataset_text.encode('utf-8'), received[3][1])
+
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config, **{'compress-uploads': True})) as api:
+                await api.upload_submission('BIGELOW/BALCH/gnats', dataset_file, 'sbm1')
+
+        asyncio.run(main())
+        self.assertEqual('gzip', received[4][0])
+        self.assertIn(dataset_text.encode('utf-8'), received[4][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
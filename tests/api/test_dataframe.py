@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ocdb.api.dataframe import make_dataframe
+
+
+class MakeDataFrameTest(unittest.TestCase):
+
+    def test_typed_columns(self):
+        ds = {
+            "metadata": {"missing": "-99.99"},
+            "attributes": ["date", "time", "lat", "depth", "chl", "station", "id"],
+            "records": [
+                [20170604, "12:30:00", 43.76, 5, 0.51, "A", "x1"],
+                [20170604, "13:00:00", 43.77, 10, -99.99, "A", "x2"],
+                [20170605, "08:15:30", 43.78, 15, 0.73, "B", "x3"],
+                [20170605, "09:00:00", -99.99, 20, 0.82, "A", "x4"],
+            ]
+        }
+        df = make_dataframe(ds)
+        self.assertEqual(["date", "time", "lat", "depth", "chl", "station", "id", "datetime"], list(df.columns))
+        self.assertEqual(np.int64, df["date"].dtype)
+        self.assertEqual(np.float64, df["lat"].dtype)
+        self.assertEqual(np.int64, df["depth"].dtype)
+        self.assertEqual(np.float64, df["chl"].dtype)
+        self.assertIsInstance(df["station"].dtype, pd.CategoricalDtype)
+        self.assertNotIsInstance(df["id"].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["datetime"]))
+
+        self.assertTrue(np.isnan(df["chl"][1]))
+        self.assertTrue(np.isnan(df["lat"][3]))
+        self.assertEqual(pd.Timestamp("2017-06-05 08:15:30"), df["datetime"][2])
+
+    def test_missing_value_makes_int_column_float(self):
+        ds = {"metadata": {"missing": "-999"}, "attributes": ["depth"], "records": [[5], [-999], [None], [15]]}
+        df = make_dataframe(ds)
+        self.assertEqual(np.float64, df["depth"].dtype)
+        self.assertEqual(2, df["depth"].isna().sum())
+
+    def test_string_dates_without_time(self):
+        ds = {"attributes": ["date", "chl"], "records": [["20140723", 0.05], ["bad", 0.06]]}
+        df = make_dataframe(ds)
+        self.assertEqual(pd.Timestamp("2014-07-23"), df["datetime"][0])
+        self.assertTrue(pd.isna(df["datetime"][1]))
+
+    def test_empty(self):
+        self.assertEqual(0, len(make_dataframe({"metadata": {}, "records": [[]]})))
+        self.assertEqual(["a", "b"], list(make_dataframe({"attributes": ["a", "b"], "records": []}).columns))
+
+    def test_inconsistent_records(self):
+        with self.assertRaises(ValueError):
+            make_dataframe({"attributes": ["a", "b"], "records": [[1, 2, 3]]})
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import http.client
+import os
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.download import download, DownloadError, PART_SUFFIX, STATE_SUFFIX
+from ocdb.api.transport import PooledTransport
+from ocdb.configstore import MemConfigStore
+from tests.api.test_unzip import make_zip
+from tests.server import StandInServer, API_PATH_PREFIX
+
+DATA = os.urandom(1000000)
+
+
+def sha256_digest(data: bytes) -> str:
+    return 'sha-256=' + base64.b64encode(hashlib.sha256(data).digest()).decode('ascii')
+
+
+class ResumableDownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = StandInServer().start()
+        self.api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_resume_after_dropped_connections(self):
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                headers={'ETag': '"v1"', 'Digest': sha256_digest(DATA)},
+                                cut_after=[100000, 500000])
+        message = self.api.fidrad_download_file('cal.txt', self.temp_dir.name)
+        self.assertRegex(message, r'^File successfully written to .*cal.txt '
+                                  r'\(1000000 bytes in .*, resumed 2 time\(s\)\)$')
+        with open(self._path('cal.txt'), 'rb') as fp:
+            self.assertEqual(DATA, fp.read())
+        self.assertEqual(['cal.txt'], os.listdir(self.temp_dir.name))
+        self.assertEqual(3, self.server.num_requests)
+
+    def test_no_range_support(self):
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                accept_ranges=False, cut_after=[100000])
+        message = self.api.fidrad_download_file('cal.txt', self.temp_dir.name)
+        self.assertIn("Exception occurs while trying to write file to", message)
+        self.assertIn("IncompleteRead", message)
+        self.assertEqual([], os.listdir(self.temp_dir.name))
+
+    def test_resume_in_next_call(self):
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                headers={'ETag': '"v1"', 'Digest': sha256_digest(DATA)}, cut_after=[300000])
+        request = urllib.request.Request(self.server.url + API_PATH_PREFIX + '/store/FidRadDB/download/file/cal.txt')
+        file_path = self._path('cal.txt')
+        with self.assertRaises(http.client.IncompleteRead):
+            download(PooledTransport().open, request, file_path, max_resumes=0)
+        self.assertEqual(300000, os.path.getsize(file_path + PART_SUFFIX))
+        self.assertTrue(os.path.exists(file_path + PART_SUFFIX + STATE_SUFFIX))
+
+        received = []
+        stats = download(PooledTransport().open, request, file_path, on_data=received.append)
+        self.assertEqual(700000, stats.num_bytes)
+        self.assertEqual(1, stats.num_resumes)
+        # The bytes of the first call are passed to on_data again
+        self.assertEqual(DATA, b''.join(received))
+        with open(file_path, 'rb') as fp:
+            self.assertEqual(DATA, fp.read())
+        self.assertEqual(['cal.txt'], os.listdir(self.temp_dir.name))
+        self.assertEqual(2, self.server.num_requests)
+
+    def test_http_error(self):
+        self.server.route('GET', r'/store/FidRadDB/download/file/cal.txt', lambda request: (404, {}, b''))
+        with self.assertRaises(urllib.error.HTTPError):
+            self.api.fidrad_download_file('cal.txt', self.temp_dir.name)
+        self.assertEqual([], os.listdir(self.temp_dir.name))
+
+    def test_too_many_resumes(self):
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                cut_after=range(1000, 10000, 1000))
+        request = urllib.request.Request(self.server.url + API_PATH_PREFIX + '/store/FidRadDB/download/file/cal.txt')
+        with self.assertRaises(Exception):
+            download(PooledTransport().open, request, self._path('cal.txt'), max_resumes=3)
+        self.assertEqual([], os.listdir(self.temp_dir.name))
+
+    def test_checksum_mismatch(self):
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                headers={'Digest': sha256_digest(b'other')}, cut_after=[100000])
+        request = urllib.request.Request(self.server.url + API_PATH_PREFIX + '/store/FidRadDB/download/file/cal.txt')
+        with self.assertRaises(DownloadError) as cm:
+            download(PooledTransport().open, request, self._path('cal.txt'))
+        self.assertEqual('sha256 checksum mismatch', f'{cm.exception}')
+        self.assertEqual([], os.listdir(self.temp_dir.name))
+
+    def test_restart_if_changed(self):
+        headers = {'ETag': '"v1"', 'Content-MD5': base64.b64encode(hashlib.md5(DATA).digest()).decode('ascii')}
+        self.server.route_bytes('GET', r'/store/FidRadDB/download/file/cal.txt', DATA,
+                                headers=headers, cut_after=[300000])
+        transport = PooledTransport()
+        restarts = []
+
+        def urlopen(request):
+            if request.get_header('Range'):
+                headers['ETag'] = '"v2"'
+            return transport.open(request)
+
+        request = urllib.request.Request(self.server.url + API_PATH_PREFIX + '/store/FidRadDB/download/file/cal.txt')
+        stats = download(urlopen, request, self._path('cal.txt'), on_restart=lambda: restarts.append(True))
+        self.assertEqual([True], restarts)
+        self.assertEqual(1, stats.num_resumes)
+        self.assertEqual(1300000, stats.num_bytes)
+        with open(self._path('cal.txt'), 'rb') as fp:
+            self.assertEqual(DATA, fp.read())
+
+    def test_resume_zip_download(self):
+        archive = make_zip()
+        self.server.route_bytes('POST', r'/store/download', archive, headers={'ETag': '"zip"'},
+                                cut_after=[len(archive) // 3, len(archive) // 2])
+        out_file = self._path('datasets.zip')
+        output_dir = self._path('out')
+        message = self.api.download_datasets_by_ids(["1"], False, out_file, output_dir=output_dir)
+        self.assertIn('resumed 2 time(s)', message)
+        with open(out_file, 'rb') as fp:
+            self.assertEqual(archive, fp.read())
+        self.assertTrue(os.path.isfile(os.path.join(output_dir, 'docs', 'readme.txt')))
+        self.assertEqual(['datasets.zip', 'out'], sorted(os.listdir(self.temp_dir.name)))
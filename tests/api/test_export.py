@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ocdb.api.dataframe import make_dataframe
+from ocdb.api.export import get_export_format, write_dataframe, read_feather
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+DATASET = {
+    "metadata": {"missing": "-99.99"},
+    "attributes": ["date", "time", "lat", "chl", "station"],
+    "records": [
+        [20170604, "12:30:00", 43.76, 0.51, "A"],
+        [20170604, "13:00:00", 43.77, -99.99, "A"],
+        [20170605, "08:15:30", 43.78, 0.73, "A"],
+    ]
+}
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.df = make_dataframe(DATASET)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def test_get_export_format(self):
+        self.assertEqual('parquet', get_export_format('ds.parquet'))
+        self.assertEqual('feather', get_export_format('ds.arrow'))
+        self.assertEqual('csv', get_export_format('ds.txt', 'csv'))
+        with self.assertRaises(ValueError):
+            get_export_format('ds.txt')
+        with self.assertRaises(ValueError):
+            get_export_format('ds.csv', 'xlsx')
+
+    def test_csv(self):
+        path = self._path('ds.csv')
+        self.assertEqual('csv', write_dataframe(self.df, path))
+        df = pd.read_csv(path)
+        self.assertEqual(list(self.df.columns), list(df.columns))
+        self.assertTrue(pd.isna(df['chl'][1]))
+        self.assertEqual(['ds.csv'], os.listdir(self.temp_dir.name))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        path = self._path('ds.parquet')
+        write_dataframe(self.df, path)
+        df = pd.read_parquet(path, columns=['chl', 'datetime'])
+        self.assertEqual(['chl', 'datetime'], list(df.columns))
+        self.assertEqual(pd.Timestamp("2017-06-05 08:15:30"), df['datetime'][2])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_feather_memory_mapped(self):
+        path = self._path('ds.feather')
+        write_dataframe(self.df, path)
+        table = read_feather(path, columns=['lat', 'station'])
+        self.assertEqual(['lat', 'station'], table.column_names)
+        self.assertEqual([43.76, 43.77, 43.78], table.column('lat').to_pylist())
+
+        # Zero-copy: the column data is not copied into memory allocated by pyarrow
+        df = pd.DataFrame({'chl': [0.5] * 100000})
+        write_dataframe(df, path)
+        allocated = pyarrow.total_allocated_bytes()
+        table = read_feather(path)
+        self.assertEqual(100000, table.num_rows)
+        self.assertLess(pyarrow.total_allocated_bytes() - allocated, 8 * 1024)
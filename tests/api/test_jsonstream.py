@@ -0,0 +1,115 @@
+import asyncio
+import json
+import unittest
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.jsonstream import JsonArrayParser, iter_chunks
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+DATASET = {
+    "id": "245",
+    "metadata": {"missing": "-999", "fields": "date,time,lat,chl"},
+    "attributes": ["date", "time", "lat", "chl"],
+    "records": [["20140723", "12:30:00", -19.9743 + i, 0.0528 if i % 3 else -999] for i in range(25)],
+    "path": "BIGELOW/BALCH/gnats",
+}
+
+
+def _parse_in_chunks(text: str, key: str, chunk_size: int):
+    parser = JsonArrayParser(key)
+    data = text.encode('utf-8')
+    items = []
+    for i in range(0, len(data), chunk_size):
+        items.extend(parser.feed(data[i:i + chunk_size]))
+    items.extend(parser.close())
+    return items, parser.members
+
+
+class JsonArrayParserTest(unittest.TestCase):
+
+    def test_any_chunk_size(self):
+        text = json.dumps({"name": "Ünïcode ☃", "records": [[1, 2.5e-3, "a,]b", None, True], {"x": [1]}, 12345],
+                           "n": 10, "after": {"nested": [[1]]}}, ensure_ascii=False)
+        for chunk_size in (1, 2, 3, 7, 64, 10000):
+            items, members = _parse_in_chunks(text, 'records', chunk_size)
+            self.assertEqual([[1, 2.5e-3, "a,]b", None, True], {"x": [1]}, 12345], items)
+            self.assertEqual({"name": "Ünïcode ☃", "n": 10, "after": {"nested": [[1]]}}, members)
+
+    def test_items_are_returned_as_soon_as_complete(self):
+        parser = JsonArrayParser('records')
+        self.assertEqual([[1, 2]], parser.feed(b'{"id": "1", "records": [[1, 2], [3, '))
+        self.assertEqual({"id": "1"}, parser.members)
+        self.assertEqual([[3, 4]], parser.feed(b'4], [5, 6'))
+        # A number at the end of the input may still continue
+        self.assertEqual([[5, 6]], parser.feed(b']  , 7'))
+        self.assertEqual([78], parser.feed(b'8]}'))
+        self.assertTrue(parser.done)
+        self.assertEqual([], parser.close())
+
+    def test_whitespace_and_empty_array(self):
+        items, members = _parse_in_chunks(' {\n "records" : [ ] ,\n "a" : 1 }\n', 'records', 2)
+        self.assertEqual([], items)
+        self.assertEqual({"a": 1}, members)
+        self.assertEqual(([], {}), _parse_in_chunks('{}', 'records', 1))
+
+    def test_invalid_json(self):
+        for text in ('[1, 2]', '{"records": [1 2]}', '{"records": [1]', '{"records": [1]} x', '{"a": tru}'):
+            with self.assertRaises(ValueError, msg=text):
+                _parse_in_chunks(text, 'records', 3)
+
+    def test_iter_chunks(self):
+        self.assertEqual([[0, 1, 2], [3, 4]], list(iter_chunks(range(5), 3)))
+        with self.assertRaises(ValueError):
+            list(iter_chunks(range(5), 0))
+
+
+class StreamingApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.server.route_json('GET', r'/datasets/245', DATASET, compress=True)
+        self.server.route_json('GET', r'/datasets', {"total_count": 3, "datasets": [{"id": "1"}, {"id": "2"},
+                                                                                    {"id": "3"}]})
+        self.api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+
+    def test_iter_dataset_records(self):
+        self.assertEqual(DATASET['records'], list(self.api.iter_dataset_records('245')))
+        chunks = list(self.api.iter_dataset_records('245', chunk_size=10))
+        self.assertEqual([10, 10, 5], [len(chunk) for chunk in chunks])
+        self.assertEqual(DATASET['records'], [record for chunk in chunks for record in chunk])
+
+    def test_iter_dataset_records_pandas(self):
+        import pandas as pd
+        frames = list(self.api.iter_dataset_records('245', fmt='pandas', chunk_size=10))
+        self.assertEqual([10, 10, 5], [len(df) for df in frames])
+        expected = self.api.get_dataset('245', fmt='pandas')
+        actual = pd.concat(frames, ignore_index=True)
+        for column in ('lat', 'chl', 'datetime'):
+            pd.testing.assert_series_equal(expected[column], actual[column])
+        self.assertTrue(actual['chl'].isna().any())
+
+    def test_iter_found_datasets(self):
+        self.assertEqual([{"id": "1"}, {"id": "2"}, {"id": "3"}], list(self.api.iter_found_datasets(expr='chl')))
+
+    def test_async(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(server_url=self.server.url)) as api:
+                records = [record async for record in api.iter_dataset_records('245')]
+                chunks = [chunk async for chunk in api.iter_dataset_records('245', chunk_size=20)]
+                refs = [ref async for ref in api.iter_found_datasets(expr='chl')]
+                return records, chunks, refs
+
+        records, chunks, refs = asyncio.run(main())
+        self.assertEqual(DATASET['records'], records)
+        self.assertEqual([20, 5], [len(chunk) for chunk in chunks])
+        self.assertEqual(3, len(refs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.mirror import DatasetMirror
+from ocdb.cli import cli
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+
+def _make_dataset(dataset_id: str, path: str, attributes, start_date: str, end_date: str, lat: float, lon: float):
+    return {
+        "id": dataset_id,
+        "path": path,
+        "submission_id": f"sbm-{path.split('/')[0]}",
+        "user_id": "scott",
+        "status": "PUBLISHED",
+        "metadata": {"start_date": start_date, "end_date": end_date, "start_time": "10:00:00[GMT]",
+                     "end_time": "12:00:00[GMT]", "north_latitude": f"{lat + 1}[DEG]",
+                     "south_latitude": f"{lat - 1}[DEG]", "east_longitude": f"{lon + 1}[DEG]",
+                     "west_longitude": f"{lon - 1}[DEG]"},
+        "attributes": attributes,
+        "records": [[1.0] * len(attributes)] * 3,
+    }
+
+
+DATASETS = [
+    _make_dataset("ds1", "BIGELOW/BALCH/gnats/ds1.txt", ["lat", "lon", "Chl"], "20170604", "20170605", 43.5, -68.0),
+    _make_dataset("ds2", "BIGELOW/BALCH/gnats/ds2.txt", ["lat", "lon", "aph"], "20180101", "20180101", -10.0, 50.0),
+    _make_dataset("ds3", "AWI/SO/SO235/ds3.txt", ["lat", "lon", "chl", "aph"], "20190301", "20190310", 60.0, 179.5),
+]
+
+
+class DatasetMirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.datasets = list(DATASETS)
+        self.num_fetched = 0
+        self.failing = set()
+        self.server.route('GET', r'/datasets', self._find)
+        self.server.route('GET', r'/datasets/(?P<id>\w+)', self._get)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config = {'server_url': self.server.url, 'mirror-file': os.path.join(self.temp_dir.name, 'mirror.db')}
+        self.api = OCDBApi(config_store=MemConfigStore(**self.config))
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def _find(self, request):
+        offset = int(request.query.get('offset', 1)) - 1
+        count = int(request.query.get('count', 1000))
+        page = self.datasets[offset:offset + count]
+        # The GeoJSON location of ds3 is given as text and is smaller than the bbox of its metadata
+        locations = {ds["id"]: json.dumps({"type": "MultiPoint", "coordinates": [[179.9, 59.0], [179.1, 61.0]]})
+                     for ds in page if ds["id"] == "ds3"}
+        body = {"total_count": len(self.datasets), "locations": locations,
+                "datasets": [{"id": ds["id"], "path": ds["path"], "filename": ds["path"].split('/')[-1]}
+                             for ds in page]}
+        return 200, {}, json.dumps(body).encode('utf-8')
+
+    def _get(self, request):
+        self.num_fetched += 1
+        if request.params["id"] in self.failing:
+            return 500, {}, b'{"message": "oops"}'
+        dataset = next((ds for ds in self.datasets if ds["id"] == request.params["id"]), None)
+        if dataset is None:
+            return 404, {}, b'{"message": "not found"}'
+        return 200, {}, json.dumps(dataset).encode('utf-8')
+
+    def _find_ids(self, **kwargs):
+        return [ds["id"] for ds in self.api.find_datasets(local=True, **kwargs)["datasets"]]
+
+    def test_sync_and_find(self):
+        result = self.api.sync_datasets(page_size=2)
+        self.assertEqual({'added': 3, 'updated': 0, 'removed': 0, 'failed': {}, 'total': 3}, result)
+        self.assertEqual(3, self.num_fetched)
+
+        self.assertEqual(["ds3", "ds1", "ds2"], self._find_ids())
+        self.assertEqual(["ds1", "ds2"], self._find_ids(path="BIGELOW/*"))
+        self.assertEqual(["ds3"], self._find_ids(submission_id="sbm-AWI"))
+        self.assertEqual(["ds3", "ds1"], self._find_ids(pname="chl"))
+        self.assertEqual(["ds3", "ds1", "ds2"], self._find_ids(pname="chl,aph"))
+        self.assertEqual(["ds3", "ds1", "ds2"], self._find_ids(pname="chl", pmode="do_not_filter"))
+        self.assertEqual(["ds1"], self._find_ids(start_time="2017-06-05", end_time="2017-12-31"))
+        self.assertEqual(["ds2"], self._find_ids(start_time="2018-01-01", end_time="2018-01-01"))
+        self.assertEqual(["ds1"], self._find_ids(region="-70,40,-60,50"))
+        self.assertEqual([], self._find_ids(region="-60,40,-50,50"))
+        # The GeoJSON location is preferred to the metadata
+        self.assertEqual([], self._find_ids(region="178,55,179,65"))
+        self.assertEqual(["ds3"], self._find_ids(region="170,55,-170,65"))
+
+        result = self.api.find_datasets(local=True, offset=2, count=1)
+        self.assertEqual(3, result["total_count"])
+        self.assertEqual(["ds1"], result["dataset_ids"])
+
+    def test_bbox_crossing_antimeridian(self):
+        self.datasets = [_make_dataset("ds5", "NASA/X/Y/ds5.txt", ["chl"], "20200101", "20200102", 0.0, 0.0)]
+        self.datasets[0]["metadata"].update(west_longitude="170[DEG]", east_longitude="-170[DEG]")
+        self.assertEqual(1, self.api.sync_datasets()['added'])
+
+        self.assertEqual(["ds5"], self._find_ids(region="175,-5,180,5"))
+        self.assertEqual(["ds5"], self._find_ids(region="-180,-5,-175,5"))
+        self.assertEqual(["ds5"], self._find_ids(region="179,-5,-179,5"))
+        self.assertEqual([], self._find_ids(region="-160,-5,160,5"))
+        self.assertEqual(1, self.api.find_datasets(local=True, region="160,-5,-160,5")["total_count"])
+
+        self.datasets = []
+        self.assertEqual(1, self.api.sync_datasets()['removed'])
+        self.assertEqual([], self._find_ids(region="175,-5,180,5"))
+
+    def test_incremental_sync(self):
+        self.api.sync_datasets()
+        self.datasets = [dict(DATASETS[0], path="BIGELOW/BALCH/gnats/moved.txt"), DATASETS[2],
+                         _make_dataset("ds4", "NASA/X/Y/ds4.txt", ["chl"], "20200101", "20200102", 0.0, 0.0)]
+        self.num_fetched = 0
+
+        result = self.api.sync_datasets()
+        self.assertEqual({'added': 1, 'updated': 2, 'removed': 1, 'failed': {}, 'total': 3}, result)
+        self.assertEqual(1, self.num_fetched)
+        self.assertEqual(["ds1"], self._find_ids(path="BIGELOW/BALCH/gnats/moved.txt"))
+
+        result = self.api.sync_datasets(full=True)
+        self.assertEqual({'added': 0, 'updated': 3, 'removed': 0, 'failed': {}, 'total': 3}, result)
+        self.assertEqual(4, self.num_fetched)
+
+    def test_failed_datasets_are_reported(self):
+        self.failing = {"ds2"}
+        self.api.set_config_param('max-retries', 0)
+        result = self.api.sync_datasets()
+        self.assertEqual(['ds2'], list(result['failed']))
+        self.assertEqual(2, result['total'])
+
+        # Failed datasets are fetched again by the next synchronization
+        self.failing = set()
+        self.num_fetched = 0
+        self.assertEqual(1, self.api.sync_datasets()['added'])
+        self.assertEqual(1, self.num_fetched)
+
+    def test_find_errors(self):
+        with self.assertRaises(ValueError):
+            self._find_ids(region="1,2,3,4")
+        self.api.sync_datasets()
+        with self.assertRaises(ValueError):
+            self._find_ids(expr="chl")
+        with self.assertRaises(ValueError):
+            self._find_ids(start_time="06/04/2017")
+        with self.assertRaises(ValueError):
+            self._find_ids(pmode="same_cruise")
+
+    def test_other_server_clears_mirror(self):
+        self.api.sync_datasets()
+        mirror = DatasetMirror(self.config['mirror-file'])
+        try:
+            self.assertEqual(3, mirror.count())
+            mirror.begin_sync('http://other.server')
+            self.assertEqual(0, mirror.count())
+            self.assertIsNone(mirror.last_sync)
+        finally:
+            mirror.close()
+
+    def test_cli(self):
+        # Other tests leave OCDB_SERVER_URL in the environment, which the CLI would apply to the API
+        runner = CliRunner(env={'OCDB_SERVER_URL': self.server.url})
+        result = runner.invoke(cli, ["ds", "find", "--local", "--query", "pname=chl"], obj=self.api)
+        self.assertEqual("Error: the local dataset mirror has not been synchronized yet\n", result.output)
+        self.assertEqual(1, result.exit_code)
+
+        result = runner.invoke(cli, ["ds", "sync", "--parallel", "2"], obj=self.api)
+        self.assertEqual({'added': 3, 'updated': 0, 'removed': 0, 'failed': {}, 'total': 3}, json.loads(result.output))
+        self.assertEqual(0, result.exit_code)
+
+        result = runner.invoke(cli, ["ds", "find", "--local", "--query", "pname=chl"], obj=self.api)
+        self.assertEqual(["ds3", "ds1"], json.loads(result.output)["dataset_ids"])
+        self.assertEqual(0, result.exit_code)
+
+    def test_async(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                result = await api.sync_datasets(page_size=2)
+                found = await api.find_datasets(local=True, pname="aph")
+                return result, found
+
+        result, found = asyncio.run(main())
+        self.assertEqual(3, result['added'])
+        self.assertEqual(["ds3", "ds2"], found["dataset_ids"])
+
+
+if __name__ == '__main__':
+    unittest.main()
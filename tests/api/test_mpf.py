@@ -1,6 +1,11 @@
+import io
+import os
+import socket
+import tempfile
+import threading
 import unittest
 
-from ocdb.api.mpf import MultiPartForm
+from ocdb.api.mpf import MultiPartForm, _send_mapped
 from tests.helpers import ClientTest
 
 
@@ -33,3 +38,132 @@ class MultiPartFormTest(unittest.TestCase):
 
         self.assertTrue(text_form.startswith("--bibo\r\n"))
         self.assertTrue(text_form.endswith("--bibo--\r\n"))
+
+    def test_stream(self):
+        form = MultiPartForm(boundary="bibo")
+        form.add_field("path", "BIGELOW/BALCH/gnats")
+        form.add_file("datasetFiles", "chl-s170604w.sub", ClientTest.get_input_path("chl", "chl-s170604w.sub"))
+        with open(ClientTest.get_input_path("chl", "chl-s170710w.sub"), "rb") as fp:
+            form.add_file("datasetFiles", "chl-s170710w.sub", fp)
+            form.add_file("docFiles", "readme.txt", io.BytesIO(b"readme"))
+
+            expected = bytes(form)
+            self.assertEqual(len(expected), form.content_length)
+
+            with form.stream() as reader:
+                self.assertEqual(len(expected), len(reader))
+                chunks = list(iter(lambda: reader.read(100), b""))
+                self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+                self.assertEqual(expected, b"".join(chunks))
+
+                reader.seek(0)
+                self.assertEqual(expected, reader.read())
+                self.assertEqual(b"", reader.read())
+
+
+class _MockSocket:
+    """A socket without sendfile() which accepts *limit* bytes and then times out once."""
+
+    def __init__(self, limit: int = None):
+        self.limit = limit
+        self.received = bytearray()
+
+    def sendall(self, data):
+        if self.limit is not None and len(self.received) + len(data) > self.limit:
+            self.received += data[:self.limit - len(self.received)]
+            self.limit = None
+            raise socket.timeout('timed out')
+        self.received += data
+
+
+class _SendfileSocket(_MockSocket):
+    def sendfile(self, file, offset=0, count=None):
+        file.seek(offset)
+        data = file.read(count)
+        self.sendall(data)
+        return len(data)
+
+
+class SendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sock, self.peer = socket.socketpair()
+        self.received = []
+        self.thread = threading.Thread(target=self._receive)
+        self.thread.start()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'doc.bin')
+        with open(self.file_path, 'wb') as fp:
+            fp.write(bytes(range(256)) * 1000)
+
+    def tearDown(self):
+        self.sock.close()
+        self.thread.join()
+        self.peer.close()
+        self.temp_dir.cleanup()
+
+    def _receive(self):
+        while True:
+            chunk = self.peer.recv(65536)
+            if not chunk:
+                break
+            self.received.append(chunk)
+
+    def _get_received(self) -> bytes:
+        self.sock.shutdown(socket.SHUT_WR)
+        self.thread.join()
+        return b''.join(self.received)
+
+    def test_send(self):
+        form = MultiPartForm(boundary="bibo")
+        form.add_field("path", "BIGELOW/BALCH/gnats")
+        form.add_file("docFiles", "doc.bin", self.file_path)
+        with open(self.file_path, "rb") as fp:
+            fp.seek(1000)
+            form.add_file("docFiles", "tail.bin", fp)
+            form.add_file("docFiles", "readme.txt", io.BytesIO(b"readme"))
+            expected = bytes(form)
+
+            with form.stream() as reader:
+                # The form is sent from the current position
+                head = reader.read(10)
+                reader.send(self.sock)
+                self.assertEqual(b"", reader.read())
+            self.assertEqual(expected, head + self._get_received())
+            # The position of a caller's file object is restored when the form is streamed again
+            self.assertEqual(expected, bytes(form))
+
+    def test_send_truncated(self):
+        form = MultiPartForm()
+        form.add_file("docFiles", "doc.bin", self.file_path)
+        with open(self.file_path, 'r+b') as fp:
+            fp.truncate(100)
+        with form.stream() as reader, self.assertRaises(IOError):
+            reader.send(self.sock)
+
+    def test_send_without_sendfile(self):
+        form = MultiPartForm(boundary="bibo")
+        form.add_file("docFiles", "doc.bin", self.file_path)
+        sock = _MockSocket()
+        with form.stream() as reader:
+            reader.send(sock)
+        self.assertEqual(bytes(form), bytes(sock.received))
+
+    def test_send_interrupted(self):
+        form = MultiPartForm(boundary="bibo")
+        form.add_file("docFiles", "doc.bin", self.file_path)
+        expected = bytes(form)
+        # The socket times out after 100 bytes of the file have been sent
+        limit = expected.index(bytes(range(256))) + 100
+        sock = _SendfileSocket(limit=limit)
+        with form.stream() as reader, self.assertRaises(socket.timeout):
+            reader.send(sock)
+        self.assertEqual(expected[:limit], bytes(sock.received))
+
+    def test_send_mapped(self):
+        with open(self.file_path, 'rb') as fp:
+            content = fp.read()
+            self.assertEqual(100000, _send_mapped(self.sock, fp.fileno(), 70000, 100000))
+            self.assertEqual(0, _send_mapped(self.sock, fp.fileno(), len(content), 10))
+            self.assertEqual(256, _send_mapped(self.sock, fp.fileno(), len(content) - 256, 1000))
+        self.assertEqual(content[70000:170000] + content[-256:], self._get_received())
@@ -0,0 +1,81 @@
+import time
+import unittest
+
+from ocdb.api.parallel import prefetch, imap
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def test_yields_all_items(self):
+        self.assertEqual(list(range(10)), list(prefetch(iter(range(10)), 2)))
+
+    def test_bounded_lookahead(self):
+        produced = []
+
+        def items():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        it = prefetch(items(), 2)
+        self.assertEqual(0, next(it))
+        time.sleep(0.3)
+        # one item handed out, two queued and one blocked in put()
+        self.assertLessEqual(len(produced), 4)
+        it.close()
+
+    def test_reraises_errors(self):
+        def items():
+            yield 1
+            raise ValueError("page 2 failed")
+
+        it = prefetch(items(), 2)
+        self.assertEqual(1, next(it))
+        with self.assertRaises(ValueError) as cm:
+            next(it)
+        self.assertEqual("page 2 failed", f"{cm.exception}")
+
+    def test_invalid_max_prefetch(self):
+        with self.assertRaises(ValueError):
+            next(prefetch(iter(range(10)), 0))
+
+
+class IMapTest(unittest.TestCase):
+
+    @staticmethod
+    def _invert(x):
+        if x == 0:
+            raise ZeroDivisionError("division by zero")
+        time.sleep(0.01 * (5 - x))
+        return 1 / x
+
+    def test_ordered(self):
+        results = list(imap(self._invert, range(5), max_workers=3, ordered=True))
+        self.assertEqual([0, 1, 2, 3, 4], [item for item, _, _ in results])
+        self.assertEqual([None, 1.0, 0.5], [result for _, result, _ in results[:3]])
+        self.assertIsInstance(results[0][2], ZeroDivisionError)
+        self.assertEqual([None] * 4, [error for _, _, error in results[1:]])
+
+    def test_unordered(self):
+        results = list(imap(self._invert, iter(range(1, 5)), max_workers=4))
+        self.assertEqual({1: 1.0, 2: 0.5, 3: 1 / 3, 4: 0.25}, {item: result for item, result, _ in results})
+
+    def test_close_cancels_queued_calls(self):
+        calls = []
+
+        def func(x):
+            calls.append(x)
+            if x > 0:
+                time.sleep(0.1)
+            return x
+
+        it = imap(func, range(10), max_workers=2, ordered=True)
+        self.assertEqual((0, 0, None), next(it))
+        it.close()
+        # Items 0 to 3 had been submitted, item 3 was still queued when the iterator was closed
+        self.assertNotIn(3, calls)
+        self.assertLessEqual(set(calls), {0, 1, 2})
+
+    def test_invalid_max_workers(self):
+        with self.assertRaises(ValueError):
+            next(imap(self._invert, range(5), max_workers=0))
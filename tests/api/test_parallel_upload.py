@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.parallel import split_batches
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+
+def _file_names(request) -> list:
+    return re.findall(r'filename="([^"]+)"', request.body.decode('utf-8'))
+
+
+def _report(file_names) -> bytes:
+    return json.dumps({name: {'issues': [], 'status': 'OK'} for name in file_names}).encode('utf-8')
+
+
+class ParallelUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.server = StandInServer().start()
+        self.api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+        self.lock = threading.Lock()
+        self.requests = []
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def _make_files(self, prefix: str, count: int, size: int = 100) -> list:
+        file_paths = []
+        for i in range(count):
+            file_path = os.path.join(self.temp_dir.name, f'{prefix}{i:02d}.txt')
+            with open(file_path, 'w') as fp:
+                fp.write('x' * size)
+            file_paths.append(file_path)
+        return file_paths
+
+    def _record(self, path: str, request):
+        with self.lock:
+            self.requests.append((path, _file_names(request)))
+
+    def test_split_batches(self):
+        file_paths = self._make_files('f', 5, size=100)
+        self.assertEqual([file_paths[0:2], file_paths[2:4], file_paths[4:]], split_batches(file_paths, 2))
+        self.assertEqual([file_paths[0:3], file_paths[3:]], split_batches(file_paths, 10, max_bytes=300))
+        self.assertEqual([[path] for path in file_paths], split_batches(file_paths, 10, max_bytes=50))
+        self.assertEqual([], split_batches([], 2))
+        with self.assertRaises(ValueError):
+            split_batches(file_paths, 0)
+
+    def test_upload_submission_parallel(self):
+        def upload(request):
+            self._record('upload', request)
+            return 200, {}, _report(_file_names(request))
+
+        def add(request):
+            self._record(request.params['typ'], request)
+            if _file_names(request) == ['d03.txt']:
+                return 500, {}, b'{"message": "internal error"}'
+            return 200, {}, _report(_file_names(request))
+
+        self.server.route('POST', r'/store/upload/submission', upload)
+        self.server.route('POST', r'/store/add/submissionfile/sbm1/(?P<typ>\w+)', add)
+        dataset_files = self._make_files('d', 5)
+        doc_files = self._make_files('doc', 2)
+
+        result = self.api.upload_submission_parallel("BIGELOW/BALCH/gnats", dataset_files, "sbm1",
+                                                     doc_files=doc_files, max_workers=3, max_files=2)
+        self.assertEqual(('upload', ['d00.txt', 'd01.txt']), self.requests[0])
+        self.assertEqual([('DOCUMENT', ['doc00.txt']), ('DOCUMENT', ['doc01.txt']),
+                          ('MEASUREMENT', ['d02.txt']), ('MEASUREMENT', ['d03.txt']), ('MEASUREMENT', ['d04.txt'])],
+                         sorted(self.requests[1:]))
+        self.assertEqual(['d00.txt', 'd01.txt', 'd02.txt', 'd03.txt', 'd04.txt', 'doc00.txt', 'doc01.txt'],
+                         list(result))
+        self.assertEqual('ERROR', result['d03.txt']['status'])
+        self.assertIn('500', result['d03.txt']['issues'][0]['description'])
+        self.assertEqual('OK', result['doc01.txt']['status'])
+
+    def test_upload_submission_parallel_bare_reports(self):
+        def add(request):
+            if _file_names(request) == ['d02.txt']:
+                return 200, {}, b'{"message": "file added"}'
+            return 200, {}, b'{"issues": [{"type": "WARNING", "description": "odd"}], "status": "WARNING"}'
+
+        self.server.route('POST', r'/store/upload/submission', lambda request: (200, {}, _report(_file_names(request))))
+        self.server.route('POST', r'/store/add/submissionfile/sbm1/(?P<typ>\w+)', add)
+        dataset_files = self._make_files('d', 4)
+
+        result = self.api.upload_submission_parallel("BIGELOW/BALCH/gnats", dataset_files, "sbm1", max_files=2)
+        self.assertEqual(['d00.txt', 'd01.txt', 'd02.txt', 'd03.txt'], list(result))
+        self.assertEqual({'status': 'OK', 'issues': []}, result['d00.txt'])
+        self.assertEqual({'message': 'file added'}, result['d02.txt'])
+        self.assertEqual('WARNING', result['d03.txt']['status'])
+
+    def test_fidrad_upload_parallel(self):
+        def upload(request):
+            self._record('fidrad', request)
+            names = _file_names(request)
+            response = {name: 'OK' for name in names}
+            response['Warning!'] = [f'{len(names)} files']
+            return 200, {}, json.dumps(response).encode('utf-8')
+
+        self.server.route('POST', r'/store/FidRadDB/upload/cal_char', upload)
+        cal_char_files = self._make_files('CP_', 40)
+
+        result = self.api.fidrad_upload_parallel(cal_char_files, False, max_workers=2)
+        self.assertEqual(3, len(self.requests))
+        self.assertEqual([15, 15, 10], sorted((len(names) for _, names in self.requests), reverse=True))
+        self.assertEqual(41, len(result))
+        self.assertEqual(['15 files', '15 files', '10 files'], result['Warning!'])
@@ -0,0 +1,164 @@
+import asyncio
+import datetime
+import json
+import unittest
+
+import numpy as np
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.query import DatasetQuery
+from ocdb.api.spatial import get_positions, in_bbox, in_polygon, match_locations
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+TRIANGLE = [(-70, 40), (-60, 40), (-65, 50)]
+
+LOCATIONS = {
+    # Within the triangle
+    "ds1": {"type": "MultiPoint", "coordinates": [[-65.0, 45.0], [-64.0, 46.0]]},
+    # Within its bounding box, but not within the triangle
+    "ds2": {"type": "Point", "coordinates": [-69.0, 49.0]},
+    # A single position within the triangle, given as text
+    "ds3": json.dumps({"type": "LineString", "coordinates": [[0.0, 0.0], [-62.0, 41.0, 5.0]]}),
+    # Outside
+    "ds4": {"type": "FeatureCollection",
+            "features": [{"type": "Feature", "geometry": {"type": "Point", "coordinates": [10.0, 10.0]}}]},
+}
+
+
+class DatasetQueryTest(unittest.TestCase):
+
+    def test_to_params(self):
+        query = (DatasetQuery()
+                 .within(-70, 40, -60, 50)
+                 .between(datetime.date(2017, 1, 1), '2017-12-31T10:00:00')
+                 .with_groups('Chl', 'Kd')
+                 .with_params('chl_a', mode='contains')
+                 .where(path='BIGELOW/*', investigators='*Balch*', cruise=['SO235', 'gnats 2'])
+                 .page(11, 10))
+        self.assertEqual({'path': 'BIGELOW/*',
+                          'expr': '(investigators:*Balch*) AND (cruise:(SO235 OR "gnats 2"))',
+                          'region': '-70,40,-60,50',
+                          'start_time': '2017-01-01',
+                          'end_time': '2017-12-31',
+                          'pgroup': 'Chl,Kd',
+                          'pname': 'chl_a',
+                          'pmode': 'contains',
+                          'offset': 11,
+                          'count': 10}, query.to_params())
+
+    def test_queries_are_immutable(self):
+        query = DatasetQuery().matching('investigators:*Astrid*')
+        narrowed = query.within_polygon(TRIANGLE + [TRIANGLE[0]])
+        self.assertEqual({'expr': 'investigators:*Astrid*', 'offset': 1, 'count': 1000}, query.to_params())
+        self.assertEqual((-70, 40, -60, 50), narrowed.bbox)
+        self.assertEqual(3, len(narrowed.polygon))
+        self.assertEqual('(investigators:*Astrid*) AND (path:(AWI\\/SO\\/* OR AWI\\/PS\\/*))',
+                         narrowed.where(path=['AWI/SO/*', 'AWI/PS/*']).to_params()['expr'])
+        self.assertEqual('AWI/SO/*', narrowed.where(path=['AWI/SO/*']).to_params()['path'])
+        self.assertNotEqual(query, narrowed)
+        self.assertEqual(narrowed, query.within_polygon({"type": "Polygon", "coordinates": [TRIANGLE]}))
+
+    def test_invalid_queries(self):
+        with self.assertRaises(ValueError):
+            DatasetQuery().within(0, 50, 10, 40)
+        with self.assertRaises(ValueError):
+            DatasetQuery().within(0, -100, 10, 40)
+        with self.assertRaises(ValueError):
+            DatasetQuery().within_polygon([(0, 0), (1, 1)])
+        with self.assertRaises(ValueError):
+            DatasetQuery().between('01/06/2017')
+        with self.assertRaises(ValueError):
+            DatasetQuery().between('2018-01-01', '2017-01-01')
+        with self.assertRaises(ValueError):
+            DatasetQuery().with_params('chl', mode='exact')
+        with self.assertRaises(ValueError):
+            DatasetQuery().page(0)
+
+    def test_filter(self):
+        result = {"total_count": 5, "locations": LOCATIONS,
+                  "datasets": [{"id": dataset_id} for dataset_id in ("ds1", "ds2", "ds3", "ds4", "ds5")]}
+        self.assertIs(result, DatasetQuery().filter(result))
+
+        def filter_ids(query, **kwargs):
+            return [dataset["id"] for dataset in query.filter(result, **kwargs)["datasets"]]
+
+        self.assertEqual(["ds1", "ds2", "ds3"], filter_ids(DatasetQuery().within(-70, 40, -60, 50)))
+        self.assertEqual(["ds1", "ds3"], filter_ids(DatasetQuery().within_polygon(TRIANGLE)))
+        self.assertEqual(["ds1", "ds3", "ds5"], filter_ids(DatasetQuery().within_polygon(TRIANGLE),
+                                                           keep_unlocated=True))
+        self.assertEqual(["ds4"], filter_ids(DatasetQuery().within(5, 5, -170, 15)))
+        self.assertEqual(["ds1"], list(DatasetQuery().within(-66, 44, -64, 46).filter(result)["locations"]))
+
+
+class SpatialTest(unittest.TestCase):
+
+    def test_get_positions(self):
+        positions, owners = get_positions(LOCATIONS, ["ds4", "ds5", "ds3", "ds1"])
+        self.assertEqual([[10.0, 10.0], [0.0, 0.0], [-62.0, 41.0], [-65.0, 45.0], [-64.0, 46.0]], positions.tolist())
+        self.assertEqual([0, 2, 2, 3, 3], owners.tolist())
+
+        positions, owners = get_positions({}, ["ds1"])
+        self.assertEqual((0, 2), positions.shape)
+        self.assertEqual(0, len(owners))
+
+    def test_in_polygon_matches_in_bbox(self):
+        rng = np.random.default_rng(42)
+        lons = rng.uniform(-180, 180, 10000)
+        lats = rng.uniform(-90, 90, 10000)
+        square = np.array([(-10, -20), (30, -20), (30, 40), (-10, 40)], dtype=np.float64)
+        np.testing.assert_array_equal(in_bbox(lons, lats, (-10, -20, 30, 40)), in_polygon(lons, lats, square))
+
+    def test_in_polygon_concave(self):
+        # A "U" shape open to the north
+        ring = np.array([(0, 0), (3, 0), (3, 3), (2, 3), (2, 1), (1, 1), (1, 3), (0, 3)], dtype=np.float64)
+        lons = np.array([0.5, 1.5, 1.5, 2.5, 4.0])
+        lats = np.array([2.0, 2.0, 0.5, 2.0, 2.0])
+        self.assertEqual([True, False, True, True, False], in_polygon(lons, lats, ring).tolist())
+
+    def test_match_locations(self):
+        matched = match_locations(LOCATIONS, ["ds1", "ds2", "ds3", "ds4"], bbox=(-70, 40, -60, 50),
+                                  polygon=np.array(TRIANGLE, dtype=np.float64))
+        self.assertEqual([True, False, True, False], matched.tolist())
+
+
+class QueryDatasetsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.queries = []
+        self.server.route('GET', r'/datasets', self._find)
+        self.config = {'server_url': self.server.url}
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _find(self, request):
+        self.queries.append(request.query)
+        body = {"total_count": 4, "locations": LOCATIONS,
+                "datasets": [{"id": dataset_id, "path": f"A/B/C/{dataset_id}.txt"} for dataset_id in LOCATIONS]}
+        return 200, {}, json.dumps(body).encode('utf-8')
+
+    def test_query_datasets(self):
+        query = DatasetQuery().within_polygon(TRIANGLE).with_groups('Chl')
+        api = OCDBApi(config_store=MemConfigStore(**self.config))
+        result = api.query_datasets(query)
+        api.close()
+        self.assertEqual(["ds1", "ds3"], [dataset["id"] for dataset in result["datasets"]])
+        self.assertEqual(1, len(self.queries))
+        self.assertEqual('-70,40,-60,50', self.queries[0]['region'])
+        self.assertEqual('Chl', self.queries[0]['pgroup'])
+
+    def test_async_query_datasets(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                return await api.query_datasets(DatasetQuery().within(-70, 40, -60, 50).page(1, 10))
+
+        result = asyncio.run(main())
+        self.assertEqual(["ds1", "ds2", "ds3"], [dataset["id"] for dataset in result["datasets"]])
+        self.assertEqual('10', self.queries[0]['count'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from urllib.error import HTTPError
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.retry import RequestExecutor, TokenBucket, _parse_retry_after
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+DATASET = {"id": "245", "records": [[1, 2]]}
+
+
+class FlakyServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.config = {'server_url': self.server.url, 'retry-backoff': 0.001}
+        self.api = OCDBApi(config_store=MemConfigStore(**self.config))
+        self.lock = threading.Lock()
+        self.num_calls = 0
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+
+    def _route_flaky(self, method: str, path: str, failures, body=DATASET):
+        """Answer with the (status, headers) of *failures* first, then with *body*."""
+        failures = list(failures)
+
+        def handle(request):
+            with self.lock:
+                self.num_calls += 1
+                failure = failures.pop(0) if failures else None
+            if failure == 'reset':
+                request.handler.close_connection = True
+                return None
+            if failure is not None:
+                status, headers = failure
+                return status, headers, b'{"message": "try again"}'
+            return 200, {}, json.dumps(body).encode('utf-8')
+
+        self.server.route(method, path, handle)
+
+    def test_idempotent_requests_are_retried(self):
+        # The transport repeats requests over reused connections closed by the server, so reset a new one
+        self._route_flaky('GET', r'/datasets/245', ['reset', (503, {}), (502, {})])
+        self.assertEqual(DATASET, self.api.get_dataset('245'))
+        self.assertEqual(4, self.num_calls)
+        metrics = self.api.request_metrics
+        self.assertEqual(3, metrics['retries'])
+        self.assertEqual(4, metrics['requests'])
+
+    def test_retries_are_limited(self):
+        self._route_flaky('GET', r'/datasets/245', [(503, {})] * 10)
+        with self.assertRaises(HTTPError) as cm:
+            self.api.get_dataset('245')
+        self.assertEqual(503, cm.exception.code)
+        self.assertEqual(4, self.num_calls)
+
+    def test_client_errors_are_not_retried(self):
+        self._route_flaky('GET', r'/datasets/245', [(404, {})])
+        with self.assertRaises(HTTPError):
+            self.api.get_dataset('245')
+        self.assertEqual(1, self.num_calls)
+        self.assertEqual(0, self.api.request_metrics['retries'])
+
+    def test_post_is_only_retried_after_429(self):
+        self._route_flaky('POST', r'/store/upload/submission/validate', [(503, {}), (429, {})], body={})
+        with self.assertRaises(HTTPError):
+            self.api.validate_submission_file('tests/res/input/chl/chl-s170604w.sub')
+        self.assertEqual(1, self.num_calls)
+
+        self.assertEqual({}, self.api.validate_submission_file('tests/res/input/chl/chl-s170604w.sub'))
+        self.assertEqual(3, self.num_calls)
+
+    def test_retry_after_is_honored(self):
+        self._route_flaky('GET', r'/datasets/245', [(503, {'Retry-After': '1'})])
+        self.api.request_executor.max_delay = 0.05
+        self.assertEqual(DATASET, self.api.get_dataset('245'))
+        # The delay is the Retry-After time capped by max_delay, not a random backoff of at most 1 ms
+        self.assertAlmostEqual(0.05, self.api.request_metrics['retry_time'])
+
+    def test_rate_limit(self):
+        self.server.route_json('GET', r'/datasets/245', DATASET)
+        api = OCDBApi(config_store=MemConfigStore(**self.config, **{'rate-limit': 50, 'rate-limit-burst': 2}))
+        t0 = time.perf_counter()
+        for _ in range(10):
+            api.get_dataset('245')
+        duration = time.perf_counter() - t0
+        api.close()
+        # Two requests are sent immediately, the others at 50 requests per second
+        self.assertGreaterEqual(duration, 8 / 50 * 0.9)
+        self.assertEqual(8, api.request_metrics['throttled'])
+
+    def test_async_requests_are_retried(self):
+        self._route_flaky('GET', r'/datasets/245', ['reset', (503, {})])
+
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                return await api.get_dataset('245'), api.request_metrics
+
+        dataset, metrics = asyncio.run(main())
+        self.assertEqual(DATASET, dataset)
+        self.assertEqual(2, metrics['retries'])
+
+
+class RetryUtilsTest(unittest.TestCase):
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(0.0, bucket.reserve())
+        self.assertEqual(0.0, bucket.reserve())
+        self.assertAlmostEqual(0.1, bucket.reserve(), places=2)
+        self.assertAlmostEqual(0.2, bucket.reserve(), places=2)
+
+    def test_without_retries(self):
+        executor = RequestExecutor(max_retries=3, rate=10)
+        no_retries = executor.without_retries()
+        self.assertEqual((3, 0), (executor.max_retries, no_retries.max_retries))
+        self.assertIs(executor.rate_limiter, no_retries.rate_limiter)
+        no_retries.open(lambda request: None, None)
+        self.assertEqual(1, executor.metrics['requests'])
+
+    def test_parse_retry_after(self):
+        self.assertEqual(120.0, _parse_retry_after('120'))
+        self.assertEqual(0.0, _parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'))
+        self.assertIsNone(_parse_retry_after('soon'))
+        self.assertIsNone(_parse_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
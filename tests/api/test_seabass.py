@@ -0,0 +1,167 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.seabass import check_seabass_file, check_seabass_files, MAX_DATA_ISSUES
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+_HEADER = """/begin_header
+/north_latitude=43.7674[DEG]
+/south_latitude=43.5685[DEG]
+/east_longitude=-66.2817[DEG]
+/west_longitude=-69.7686[DEG]
+/start_date=20170604
+/end_date=20170604
+/start_time=11:30:00[GMT]
+/end_time=16:09:00[GMT]
+/fields=date,time,lat,lon,chl
+/units=yyyymmdd,hh:mm:ss,degrees,degrees,mg/m^3
+/delimiter=comma
+/missing=-99.99
+! a comment
+/end_header
+"""
+
+_DATA = """20170604,11:30:00,43.7674,-69.7686,0.449
+20170604,16:09:00,43.5685,-66.2817,-99.99
+"""
+
+
+def _get_input_path(*names) -> str:
+    return os.path.join(os.path.dirname(__file__), '..', 'res', 'input', *names)
+
+
+class SeaBassCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write(self, text: str, name: str = 'test.sb') -> str:
+        file_path = os.path.join(self.temp_dir.name, name)
+        with open(file_path, 'w') as fp:
+            fp.write(text)
+        return file_path
+
+    def _descriptions(self, text: str) -> list:
+        report = check_seabass_file(self._write(text))
+        return [issue['description'] for issue in report['issues']]
+
+    def test_valid_file(self):
+        self.assertEqual({'issues': [], 'status': 'OK'}, check_seabass_file(self._write(_HEADER + _DATA)))
+        self.assertEqual({'issues': [], 'status': 'OK'},
+                         check_seabass_file(_get_input_path('chl', 'chl-s170604w.sub')))
+
+    def test_header_block(self):
+        self.assertEqual(['File must start with "/begin_header"'], self._descriptions('/fields=a\n'))
+        self.assertEqual(['Header is not terminated by "/end_header"'], self._descriptions(_HEADER[:-12]))
+        self.assertEqual(['File is empty'], self._descriptions(''))
+        self.assertEqual(['Line 7: invalid header line "fields"'],
+                         self._descriptions(_HEADER.replace('/end_date', 'fields\n/end_date') + _DATA))
+
+    def test_header_values(self):
+        text = _HEADER.replace('/units=yyyymmdd,', '/units=').replace('43.7674[DEG]', '93.7674[DEG]') \
+            .replace('/missing=-99.99', '/missing=NA').replace('/start_date=20170604', '/start_date=20170631')
+        self.assertEqual(['Header "/missing" must be numeric, got "NA"',
+                          'Header "/north_latitude" must be in the range -90.0 to 90.0, got "93.7674[DEG]"',
+                          'Header "/start_date" must be a date of the form yyyymmdd, got "20170631"',
+                          'Number of fields (5) does not match number of units (4)'],
+                         self._descriptions(text + _DATA))
+        self.assertEqual(['Missing header "/fields"'],
+                         self._descriptions(_HEADER.replace('/fields=date,time,lat,lon,chl\n', '') + _DATA))
+
+    def test_data_rows(self):
+        data = ('20170604,11:30:00,43.7674,-69.7686\n'
+                '20170604,11:30:00,43.7674,-190.0,0.4\n'
+                '20170631,25:30:00,-99.99,-69.7686,0.4\n'
+                '\n'
+                '! comment\n'
+                '-99.99,-99.99,x,-69.7686,0.4\n')
+        self.assertEqual(['Line 16: expected 5 values but found 4',
+                          'Line 17: value of "lon" must be in the range -180.0 to 180.0, got "-190.0"',
+                          'Line 18: value of "date" must be of the form yyyymmdd, got "20170631"',
+                          'Line 18: value of "time" must be of the form hh:mm:ss, got "25:30:00"',
+                          'Line 21: value of "lat" must be numeric, got "x"'],
+                         self._descriptions(_HEADER + data))
+
+    def test_tab_delimiter(self):
+        text = _HEADER.replace('/delimiter=comma', '/delimiter=tab') + _DATA.replace(',', '\t')
+        self.assertEqual([], self._descriptions(text))
+        self.assertEqual(['Line 16: expected 5 values but found 1', 'Line 17: expected 5 values but found 1'],
+                         self._descriptions(_HEADER.replace('/delimiter=comma', '/delimiter=tab') + _DATA))
+
+    def test_issues_are_limited(self):
+        descriptions = self._descriptions(_HEADER + '1,2\n' * (MAX_DATA_ISSUES + 5))
+        self.assertEqual(MAX_DATA_ISSUES + 1, len(descriptions))
+        self.assertEqual('5 more issues in data rows', descriptions[-1])
+
+    def test_no_data_is_warning(self):
+        report = check_seabass_file(self._write(_HEADER))
+        self.assertEqual({'issues': [{'type': 'WARNING', 'description': 'File contains no data rows'}],
+                          'status': 'WARNING'}, report)
+
+    def test_check_files_in_processes(self):
+        file_paths = [self._write(_HEADER + _DATA, f'good{i}.sb') for i in range(6)]
+        file_paths.append(self._write('bad', 'bad.sb'))
+        reports = check_seabass_files(file_paths, max_workers=2)
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths], list(reports))
+        self.assertEqual(['OK'] * 6 + ['ERROR'], [report['status'] for report in reports.values()])
+
+
+class ValidateSubmissionFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        self.temp_dir.cleanup()
+
+    def test_only_passing_files_are_sent(self):
+        validated = []
+
+        def validate(request):
+            data = json.loads(request.body)['data']
+            validated.append(data)
+            return 200, {}, json.dumps({'issues': [{'type': 'WARNING', 'description': 'server'}],
+                                        'status': 'WARNING'}).encode('utf-8')
+
+        self.server.route('POST', r'/store/upload/submission/validate', validate)
+        good_path = os.path.join(self.temp_dir.name, 'good.sb')
+        bad_path = os.path.join(self.temp_dir.name, 'bad.sb')
+        with open(good_path, 'w') as fp:
+            fp.write(_HEADER + _DATA)
+        with open(bad_path, 'w') as fp:
+            fp.write('not seabass')
+
+        result = self.api.validate_submission_files([bad_path, good_path], max_processes=1)
+
+        self.assertEqual([_HEADER + _DATA], validated)
+        self.assertEqual([bad_path, good_path], list(result))
+        self.assertEqual('ERROR', result[bad_path]['status'])
+        self.assertEqual({'issues': [{'type': 'WARNING', 'description': 'server'}], 'status': 'WARNING'},
+                         result[good_path])
+
+        result = self.api.validate_submission_files([bad_path, good_path], local_only=True, max_processes=1)
+        self.assertEqual(1, len(validated))
+        self.assertEqual({'issues': [], 'status': 'OK'}, result[good_path])
+
+        # Files of the same name in different directories do not overwrite each other
+        other_path = os.path.join(self.temp_dir.name, 'other', 'good.sb')
+        os.mkdir(os.path.dirname(other_path))
+        with open(other_path, 'w') as fp:
+            fp.write('not seabass')
+        result = self.api.validate_submission_files([good_path, other_path], local_only=True, max_processes=1)
+        self.assertEqual(['OK', 'ERROR'], [result[good_path]['status'], result[other_path]['status']])
+
+
+if __name__ == '__main__':
+    unittest.main()
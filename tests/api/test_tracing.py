@@ -0,0 +1,170 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+import urllib.error
+
+from click.testing import CliRunner
+
+from ocdb.api.AsyncOCDBApi import AsyncOCDBApi
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.tracing import RequestEvent, RequestStats, RequestTracer
+from ocdb.cli import cli
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+DATASET = {"id": "245", "attributes": ["lat", "lon", "chl"], "records": [[-19.9743, 57.4493, 0.0528]] * 500}
+
+
+def _make_event(path: str, elapsed: float, status: int = 200, kind: str = RequestEvent.END):
+    return RequestEvent(kind, 'GET', path, 'http://ocdb' + path, status, 10, 100, 0.0, elapsed, elapsed / 2)
+
+
+class RequestTracerTest(unittest.TestCase):
+
+    def test_get_path_template(self):
+        tracer = RequestTracer('/ocdb/api/latest')
+        self.assertEqual('/datasets/{dataset_id}',
+                         tracer.get_path_template('http://ocdb/ocdb/api/latest/datasets/5d971154f9305e0001c6d700'))
+        self.assertEqual('/datasets', tracer.get_path_template('http://ocdb/ocdb/api/latest/datasets?count=10'))
+        self.assertEqual('/datasets/{affil}/{project}/{cruise}',
+                         tracer.get_path_template('https://host/base/ocdb/api/latest/datasets/AWI/SO/SO235'))
+        self.assertEqual('/users/login', tracer.get_path_template('http://ocdb/ocdb/api/latest/users/login'))
+        self.assertEqual('/users/{username}', tracer.get_path_template('http://ocdb/ocdb/api/latest/users/scott'))
+        self.assertEqual('/store/upload/submission/validate',
+                         tracer.get_path_template('http://ocdb/ocdb/api/latest/store/upload/submission/validate'))
+        self.assertEqual('/unknown/1', tracer.get_path_template('http://ocdb/ocdb/api/latest/unknown/1'))
+
+    def test_no_hooks(self):
+        tracer = RequestTracer()
+        events = []
+        tracer.add_hook(events.append)
+        tracer.remove_hook(events.append)
+        self.assertEqual((), tracer.hooks)
+
+
+class RequestStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = RequestStats()
+        for elapsed in (0.003, 0.004, 0.02, 0.3):
+            self.stats(_make_event('/datasets/{dataset_id}', elapsed))
+        self.stats(_make_event('/datasets/{dataset_id}', 0.001, status=404, kind=RequestEvent.ERROR))
+        self.stats(_make_event('/users/login', 0.002, kind=RequestEvent.START))
+
+    def test_to_json(self):
+        rows = self.stats.to_json()
+        self.assertEqual(1, len(rows))
+        row = rows[0]
+        self.assertEqual(('GET', '/datasets/{dataset_id}', 5, 1, 50, 500),
+                         (row['method'], row['path'], row['count'], row['errors'], row['bytes_sent'],
+                          row['bytes_received']))
+        self.assertAlmostEqual(0.328, row['latency_sum'])
+        self.assertEqual(0.3, row['latency_max'])
+        self.assertEqual(0.005, row['latency_p50'])
+        self.assertEqual(0.3, row['latency_p99'])
+        self.assertEqual(3, row['latency_buckets']['0.005'])
+        self.assertEqual(4, row['latency_buckets']['0.025'])
+        self.assertEqual(5, row['latency_buckets']['+Inf'])
+
+        fp = io.StringIO()
+        self.stats.write_json_lines(fp)
+        self.assertEqual(rows, [json.loads(line) for line in fp.getvalue().splitlines()])
+
+    def test_write_prometheus(self):
+        fp = io.StringIO()
+        self.stats.write_prometheus(fp)
+        lines = fp.getvalue().splitlines()
+        self.assertIn('# TYPE ocdb_client_request_duration_seconds histogram', lines)
+        self.assertIn('ocdb_client_request_duration_seconds_bucket{method="GET",path="/datasets/{dataset_id}",'
+                      'le="0.01"} 3', lines)
+        self.assertIn('ocdb_client_request_duration_seconds_count{method="GET",path="/datasets/{dataset_id}"} 5',
+                      lines)
+        self.assertIn('ocdb_client_request_errors_total{method="GET",path="/datasets/{dataset_id}"} 1', lines)
+        self.assertIn('ocdb_client_response_received_bytes_total{method="GET",path="/datasets/{dataset_id}"} 500',
+                      lines)
+
+    def test_write_text(self):
+        fp = io.StringIO()
+        self.stats.write_text(fp, width=10)
+        self.assertEqual('GET /datasets/{dataset_id}: 5 requests, 1 errors, 50 B sent, 500 B received\n'
+                         '  latency mean 66 ms, p50 5 ms, p90 300 ms, p99 300 ms, max 300 ms\n'
+                         '     <= 5 ms       3 ######\n'
+                         '    <= 10 ms       0 \n'
+                         '    <= 25 ms       1 ##\n'
+                         '    <= 50 ms       0 \n'
+                         '   <= 100 ms       0 \n'
+                         '   <= 250 ms       0 \n'
+                         '   <= 500 ms       1 ##\n',
+                         fp.getvalue())
+
+        fp = io.StringIO()
+        RequestStats().write_text(fp)
+        self.assertEqual('No requests sent.\n', fp.getvalue())
+
+
+class TracingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.server.route_json('GET', r'/datasets/(?P<id>\w+)', DATASET, compress=True)
+        self.config = {'server_url': self.server.url}
+        self.events = []
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_events(self):
+        api = OCDBApi(config_store=MemConfigStore(**self.config))
+        api.request_tracer.add_hook(self.events.append)
+        self.assertEqual(DATASET, api.get_dataset('245'))
+        with self.assertRaises(urllib.error.HTTPError):
+            api.get_dataset_by_name('AWI/SO/SO235/missing.txt')
+        api.close()
+
+        self.assertEqual([RequestEvent.START, RequestEvent.FIRST_BYTE, RequestEvent.END,
+                          RequestEvent.START, RequestEvent.ERROR], [event.kind for event in self.events])
+        end = self.events[2]
+        self.assertEqual(('GET', '/datasets/{dataset_id}', 200, 0), (end.method, end.path, end.status, end.bytes_sent))
+        # The compressed body is counted
+        self.assertGreater(end.bytes_received, 0)
+        self.assertLess(end.bytes_received, len(json.dumps(DATASET)) // 10)
+        self.assertLessEqual(end.time_to_first_byte, end.elapsed)
+        error = self.events[-1]
+        self.assertEqual(('/datasets/{affil}/{project}/{cruise}/{name}', 404),
+                         (error.path, error.status))
+        self.assertIsInstance(error.error, urllib.error.HTTPError)
+        self.assertEqual('HTTP Error 404: Not Found', error.to_dict()['error'])
+
+    def test_async_events(self):
+        async def main():
+            async with AsyncOCDBApi(config_store=MemConfigStore(**self.config)) as api:
+                api.request_tracer.add_hook(self.events.append)
+                await api.get_dataset('245')
+                await api.get_dataset('246')
+
+        asyncio.run(main())
+        self.assertEqual([RequestEvent.START, RequestEvent.FIRST_BYTE, RequestEvent.END] * 2,
+                         [event.kind for event in self.events])
+        self.assertEqual(self.events[2].bytes_received, self.events[5].bytes_received)
+        self.assertGreater(self.events[2].bytes_received, 0)
+
+    def test_cli_stats(self):
+        api = OCDBApi(config_store=MemConfigStore(**self.config))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            stats_file = os.path.join(temp_dir, 'stats.jsonl')
+            runner = CliRunner(env={'OCDB_SERVER_URL': self.server.url})
+            result = runner.invoke(cli, ['--stats-file', stats_file, '--stats-format', 'jsonl',
+                                         'ds', 'get', '--id', '245'], obj=api)
+            self.assertEqual(0, result.exit_code, result.output)
+            with open(stats_file) as fp:
+                rows = [json.loads(line) for line in fp]
+        api.close()
+        self.assertEqual([('GET', '/datasets/{dataset_id}', 1, 0)],
+                         [(row['method'], row['path'], row['count'], row['errors']) for row in rows])
+
+
+if __name__ == '__main__':
+    unittest.main()
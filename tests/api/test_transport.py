@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+from urllib.error import HTTPError
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.transport import PooledTransport, UrllibTransport
+from ocdb.configstore import MemConfigStore
+from tests.helpers import ClientTest
+from tests.server import StandInServer
+
+
+class PooledTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer().start()
+        self.server.route_json('GET', r'/datasets/(?P<id>\w+)', {"id": "245", "records": [[1, 2]]})
+        self.server.route('GET', r'/redirect', lambda request: (302, {'Location': request.path[:-9] + '/datasets/1'},
+                                                                b''))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _new_api(self, transport) -> OCDBApi:
+        return OCDBApi(config_store=MemConfigStore(server_url=self.server.url), transport=transport)
+
+    def test_connection_is_reused(self):
+        api = self._new_api(PooledTransport())
+        for _ in range(10):
+            self.assertEqual({"id": "245", "records": [[1, 2]]}, api.get_dataset("245"))
+        api.close()
+        self.assertEqual(10, self.server.num_requests)
+        self.assertEqual(1, self.server.num_connections)
+
+    def test_urllib_transport_connects_per_request(self):
+        api = self._new_api(UrllibTransport())
+        for _ in range(3):
+            api.get_dataset("245")
+        self.assertEqual(3, self.server.num_connections)
+
+    def test_http_error(self):
+        api = self._new_api(PooledTransport())
+        with self.assertRaises(HTTPError) as cm:
+            api.get_submission("unknown")
+        self.assertEqual(404, cm.exception.code)
+        self.assertEqual({"message": "not found"}, json.load(cm.exception))
+
+        # The connection is still usable after an error
+        api.get_dataset("245")
+        self.assertEqual(1, self.server.num_connections)
+
+    def test_partially_read_response_closes_connection(self):
+        transport = PooledTransport()
+        request = urllib.request.Request(self.server.url + '/ocdb/api/latest/datasets/1')
+        with transport.open(request) as response:
+            response.read(3)
+        with transport.open(request) as response:
+            response.read()
+        self.assertEqual(2, self.server.num_connections)
+
+    def test_idle_timeout(self):
+        transport = PooledTransport(idle_timeout=0)
+        request = urllib.request.Request(self.server.url + '/ocdb/api/latest/datasets/1')
+        for _ in range(2):
+            with transport.open(request) as response:
+                response.read()
+        self.assertEqual(2, self.server.num_connections)
+
+    def test_redirect(self):
+        transport = PooledTransport()
+        request = urllib.request.Request(self.server.url + '/ocdb/api/latest/redirect')
+        with transport.open(request) as response:
+            self.assertEqual(200, response.status)
+            self.assertEqual({"id": "245", "records": [[1, 2]]}, json.load(response))
+            self.assertTrue(response.geturl().endswith('/datasets/1'))
+
+    def test_streamed_upload(self):
+        received = []
+
+        def upload(request):
+            received.append((request.headers['Content-Length'], request.body))
+            return 200, {}, b'{"chl-s170604w.sub": {"issues": [], "status": "OK"}}'
+
+        self.server.route('POST', r'/store/upload/submission', upload)
+        api = self._new_api(PooledTransport())
+        dataset_file = ClientTest.get_input_path("chl", "chl-s170604w.sub")
+        result = api.upload_submission("BIGELOW/BALCH/gnats", dataset_file, "sbm1", doc_files=dataset_file)
+        self.assertEqual({"chl-s170604w.sub": {"issues": [], "status": "OK"}}, result)
+
+        content_length, body = received[0]
+        self.assertEqual(str(len(body)), content_length)
+        with open(dataset_file, "rb") as fp:
+            self.assertEqual(2, body.count(fp.read()))
+
+    def test_zero_copy_upload(self):
+        received = []
+
+        def upload(request):
+            received.append(request.body)
+            return 200, {}, b'{"status": "OK"}'
+
+        self.server.route('POST', r'/store/upload/submission', upload)
+        dataset_file = ClientTest.get_input_path("chl", "chl-s170604w.sub")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            doc_file = os.path.join(temp_dir, "docs.zip")
+            with open(doc_file, "wb") as fp:
+                fp.write(os.urandom(3 * 1024 * 1024 + 17))
+            for zero_copy in (True, False):
+                api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url,
+                                                          **{'zero-copy-uploads': str(zero_copy)}))
+                self.assertEqual(zero_copy, api.transport.zero_copy)
+                api.upload_submission("BIGELOW/BALCH/gnats", dataset_file, "sbm1", doc_files=doc_file)
+                api.close()
+            with open(doc_file, "rb") as fp:
+                content = fp.read()
+        self.assertEqual(2, len(received))
+        for body in received:
+            self.assertIn(content, body)
+
+    def test_pool_size_from_config(self):
+        api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url, **{'pool-size': 3}))
+        self.assertIsInstance(api.transport, PooledTransport)
+        self.assertEqual(3, api.transport.pool_size)
+
+        with self.assertRaises(ValueError):
+            PooledTransport(pool_size=0)
@@ -0,0 +1,139 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+from ocdb.api.OCDBApi import OCDBApi
+from ocdb.api.unzip import StreamingZipExtractor, UnsupportedZipStreamError
+from ocdb.configstore import MemConfigStore
+from tests.server import StandInServer
+
+FILES = {
+    'chl/chl-s170604w.sub': b'/begin_header\n/missing=-999\n/end_header\n' * 500,
+    'docs/readme.txt': os.urandom(100000),
+    '../outside.txt': b'x',
+    'empty.txt': b'',
+}
+
+
+class _UnseekableWriter(io.RawIOBase):
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data += b
+        return len(b)
+
+
+def make_zip(compression=zipfile.ZIP_DEFLATED, seekable=True, force_zip64=False) -> bytes:
+    fp = io.BytesIO() if seekable else _UnseekableWriter()
+    with zipfile.ZipFile(fp, 'w', compression) as zf:
+        zf.mkdir('subdir')
+        for name, data in FILES.items():
+            with zf.open(name, 'w', force_zip64=force_zip64) as member:
+                member.write(data)
+    return fp.getvalue() if seekable else bytes(fp.data)
+
+
+class StreamingZipExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _extract(self, data: bytes, chunk_size: int = 1000) -> StreamingZipExtractor:
+        with StreamingZipExtractor(self.output_dir) as extractor:
+            for i in range(0, len(data), chunk_size):
+                extractor.write(data[i:i + chunk_size])
+        return extractor
+
+    def _assert_extracted(self):
+        for name, data in FILES.items():
+            with open(os.path.join(self.output_dir, name.replace('../', '')), 'rb') as fp:
+                self.assertEqual(data, fp.read())
+        self.assertTrue(os.path.isdir(os.path.join(self.output_dir, 'subdir')))
+
+    def test_deflated(self):
+        extractor = self._extract(make_zip())
+        self.assertEqual(4, len(extractor.extracted))
+        self._assert_extracted()
+
+    def test_stored(self):
+        self._extract(make_zip(zipfile.ZIP_STORED), chunk_size=7)
+        self._assert_extracted()
+
+    def test_data_descriptor(self):
+        self._extract(make_zip(seekable=False))
+        self._assert_extracted()
+
+    def test_zip64(self):
+        self._extract(make_zip(seekable=False, force_zip64=True), chunk_size=4096)
+        self._assert_extracted()
+
+    def test_stored_with_data_descriptor_is_unsupported(self):
+        with self.assertRaises(UnsupportedZipStreamError):
+            self._extract(make_zip(zipfile.ZIP_STORED, seekable=False))
+
+    def test_truncated(self):
+        data = make_zip()
+        with self.assertRaises(zipfile.BadZipFile):
+            self._extract(data[:len(data) // 2])
+
+    def test_corrupt(self):
+        data = bytearray(make_zip(zipfile.ZIP_STORED))
+        data[100] ^= 0xFF
+        with self.assertRaises(zipfile.BadZipFile):
+            self._extract(bytes(data))
+
+
+class DownloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        self.server = StandInServer().start()
+        self.api = OCDBApi(config_store=MemConfigStore(server_url=self.server.url))
+
+    def tearDown(self):
+        self.api.close()
+        self.server.stop()
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def test_download_datasets_by_ids(self):
+        archive = make_zip()
+        self.server.route('POST', r'/store/download', lambda request: (200, {}, archive))
+
+        message = self.api.download_datasets_by_ids(["1", "2"], False, None, output_dir='out')
+        self.assertRegex(message, r"^\['1', '2'\] downloaded to download.zip \(\d+ bytes in .+ s, .+ MB/s\)$")
+        with open('download.zip', 'rb') as fp:
+            self.assertEqual(archive, fp.read())
+        self.assertTrue(os.path.isfile('out/docs/readme.txt'))
+
+    def test_download_submission_file_without_zip(self):
+        self.server.route('GET', r'/store/download/submissionfile/sbm1/0', lambda request: (200, {}, make_zip()))
+
+        message = self.api.download_submission_file("sbm1", 0, "sbm", output_dir='out', keep_zip=False)
+        self.assertTrue(message.startswith("Output file must be zip. Added extension .zip"
+                                           "sbm1/0 downloaded to out ("))
+        self.assertEqual(['out'], os.listdir('.'))
+        self.assertTrue(os.path.isfile('out/chl/chl-s170604w.sub'))
+
+    def test_unsupported_archive_is_extracted_from_zip(self):
+        archive = make_zip(zipfile.ZIP_STORED, seekable=False)
+        self.server.route('POST', r'/store/download', lambda request: (200, {}, archive))
+
+        self.api.download_datasets_by_ids(["1"], False, None, output_dir='out')
+        self.assertTrue(os.path.isfile('out/docs/readme.txt'))
+
+        with self.assertRaises(UnsupportedZipStreamError):
+            self.api.download_datasets_by_ids(["1"], False, None, output_dir='out', keep_zip=False)
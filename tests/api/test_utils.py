@@ -1,14 +1,59 @@
+import hashlib
 import unittest
 
 from ocdb.api import utils
 
 
 class TestUtils(unittest.TestCase):
+    def setUp(self):
+        utils.clear_derivation_cache()
+
+    def tearDown(self):
+        utils.clear_derivation_cache()
+
     def test_encrypt(self):
         res = utils.encrypt('password')
         self.assertEqual('b109f3bbbc244eb82441917ed06d618b9008dd09b3befd1b5e07394c706a8b'
                          'b980b1d7785e5976ec049b46df5f1326af5a2ea6d103fd07c95385ffab0cacbc86', res)
 
+    def test_encrypt_salted_is_memoized(self):
+        res = utils.encrypt('password', 'salt')
+        self.assertEqual('f5d17022c96af46c0a1dc49a58bbe654a28e98104883e4af4de974cda2c74122'
+                         'dd082f4105a93fc80692ca4eb1a784cfeda81bfaa33f5192cc9143d818bd7581', res)
+        self.assertEqual(res, utils.encrypt('password', b'salt'))
+        self.assertEqual(1, len(utils._derivation_cache))
+        # Neither password nor salt are stored
+        key, = utils._derivation_cache
+        self.assertNotIn(b'password', key)
+        self.assertNotIn(b'salt', key)
+
+        # The key is keyed by a secret of the process, so it cannot be brute-forced with a plain hash
+        data = b'password'
+        self.assertNotEqual(hashlib.sha256(len(data).to_bytes(8, 'little') + data + b'salt').digest(), key)
+
+        self.assertNotEqual(res, utils.encrypt('passwordsalt', ''))
+        self.assertNotEqual(res, utils.encrypt('passwor', 'dsalt'))
+
+    def test_derivation_cache_is_bounded(self):
+        size = utils.DERIVATION_CACHE_SIZE
+        utils.DERIVATION_CACHE_SIZE = 2
+        try:
+            for password in ('a', 'b', 'c'):
+                utils._put_derivation(utils._derivation_key(password, b''), password)
+            self.assertIsNone(utils._get_derivation(utils._derivation_key('a', b'')))
+            self.assertEqual('c', utils._get_derivation(utils._derivation_key('c', b'')))
+        finally:
+            utils.DERIVATION_CACHE_SIZE = size
+
+    def test_encrypt_many(self):
+        items = [('pw1', 'salt'), ('pw2', None), ('pw3', 'salt'), ('pw1', b'salt')]
+        expected = [utils._pbkdf2('pw1', b'salt'), utils.encrypt('pw2'), utils._pbkdf2('pw3', b'salt'),
+                    utils._pbkdf2('pw1', b'salt')]
+        self.assertEqual(expected, utils.encrypt_many(items, max_workers=2))
+        self.assertEqual(2, len(utils._derivation_cache))
+        self.assertEqual(expected[2], utils.encrypt('pw3', 'salt'))
+        self.assertEqual([], utils.encrypt_many([]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,222 @@
+import gzip
+import http.server
+import json
+import re
+import threading
+import urllib.parse
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ocdb.version import API_VERSION_TAG
+
+API_PATH_PREFIX = "/ocdb/api/" + API_VERSION_TAG
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+_DRAIN_CHUNK_SIZE = 1024 * 1024
+
+
+class StandInRequest:
+    """A request received by the :class:`StandInServer`."""
+
+    def __init__(self, handler: http.server.BaseHTTPRequestHandler, match, body: bytes):
+        url = urllib.parse.urlsplit(handler.path)
+        self.handler = handler
+        self.method = handler.command
+        self.path = url.path
+        self.query = dict(urllib.parse.parse_qsl(url.query))
+        self.headers = handler.headers
+        self.params = match.groupdict()
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class StandInServer:
+    """
+    A local HTTP/1.1 server running in a background thread that answers requests
+    to registered routes. Used to test and benchmark the client against real sockets.
+
+    A route handler receives a :class:`StandInRequest` and returns a tuple
+    (status, headers, body). It may also return None after having written the
+    response to ``request.handler.wfile`` itself.
+
+    Request bodies sent with "Content-Encoding: gzip" are decompressed before they are passed
+    to the handler. ``bytes_received`` and ``bytes_sent`` count the request and response body
+    bytes as they were transferred, not including responses written by handlers themselves.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self._routes: List[Tuple[str, re.Pattern, Callable, bool]] = []
+        self._lock = threading.Lock()
+        self.num_connections = 0
+        self.num_requests = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._httpd = http.server.ThreadingHTTPServer((host, port), self._make_handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def route(self, method: str, path: str, handler: Callable[[StandInRequest], Optional[Response]],
+              read_body: bool = True):
+        """
+        Register *handler* for requests with *method* to *path*.
+        *path* is a regular expression relative to the OCDB API path prefix.
+        If *read_body* is False, the request body is not read before *handler* is called,
+        which must read it from ``request.handler.rfile`` itself.
+        """
+        self._routes.append((method, re.compile(API_PATH_PREFIX + path + '$'), handler, read_body))
+
+    def route_drain(self, method: str, path: str, obj):
+        """
+        Register a route that reads and discards the request body in chunks, so that bodies of any size
+        can be received, and answers with the JSON representation of *obj*.
+        """
+        body = json.dumps(obj).encode('utf-8')
+
+        def handle(request: StandInRequest):
+            remaining = int(request.headers.get('Content-Length', 0))
+            while remaining > 0:
+                chunk = request.handler.rfile.read(min(remaining, _DRAIN_CHUNK_SIZE))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                self._count('bytes_received', len(chunk))
+            return 200, {'Content-Type': 'application/json'}, body
+
+        self.route(method, path, handle, read_body=False)
+
+    def route_json(self, method: str, path: str, obj, compress: bool = False):
+        """
+        Register a route that always answers with the JSON representation of *obj*.
+        If *compress* is True, the body is compressed with gzip for requests accepting it.
+        """
+        body = json.dumps(obj).encode('utf-8')
+        gzip_body = gzip.compress(body)
+
+        def handle(request: StandInRequest):
+            if compress and 'gzip' in request.headers.get('Accept-Encoding', ''):
+                return 200, {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}, gzip_body
+            return 200, {'Content-Type': 'application/json'}, body
+
+        self.route(method, path, handle)
+
+    def route_bytes(self, method: str, path: str, data: bytes, headers: Dict[str, str] = None,
+                    accept_ranges: bool = True, cut_after: Sequence[int] = ()):
+        """
+        Register a route that answers with *data* and *headers*. If *accept_ranges* is True,
+        "Range: bytes=<start>-" requests are answered with the remaining bytes unless an "If-Range"
+        header does not match the "ETag" header.
+        The connection is dropped once after the body has been sent up to each offset in *cut_after*.
+        """
+        headers = headers if headers is not None else {}
+        cuts = sorted(cut_after)
+
+        def handle(request: StandInRequest):
+            start = 0
+            range_header = request.headers.get('Range')
+            if_range = request.headers.get('If-Range')
+            if accept_ranges and range_header and (if_range is None or if_range == headers.get('ETag')):
+                start = int(re.fullmatch(r'bytes=(\d+)-', range_header).group(1))
+            handler = request.handler
+            handler.send_response(206 if start else 200)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            if accept_ranges:
+                handler.send_header('Accept-Ranges', 'bytes')
+            if start:
+                handler.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+            handler.send_header('Content-Length', str(len(data) - start))
+            handler.end_headers()
+            end = len(data)
+            with self._lock:
+                pending = [cut for cut in cuts if start < cut < len(data)]
+                if pending:
+                    end = pending[0]
+                    cuts.remove(end)
+                    handler.close_connection = True
+            handler.wfile.write(data[start:end])
+            handler.wfile.flush()
+
+        self.route(method, path, handle)
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _count(self, name: str, value: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def _dispatch(self, handler: http.server.BaseHTTPRequestHandler):
+        self._count('num_requests')
+        path = urllib.parse.urlsplit(handler.path).path
+        for method, pattern, route_handler, read_body in self._routes:
+            match = pattern.match(path)
+            if method == handler.command and match:
+                response = route_handler(StandInRequest(handler, match, self._read_body(handler) if read_body
+                                                        else None))
+                break
+        else:
+            self._read_body(handler)
+            response = 404, {'Content-Type': 'application/json'}, b'{"message": "not found"}'
+        if response is None:
+            return
+        status, headers, body = response
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        if 'Content-Length' not in headers:
+            handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        if handler.command != 'HEAD':
+            handler.wfile.write(body)
+            self._count('bytes_sent', len(body))
+
+    def _read_body(self, handler: http.server.BaseHTTPRequestHandler) -> bytes:
+        length = int(handler.headers.get('Content-Length', 0))
+        body = handler.rfile.read(length) if length else b''
+        self._count('bytes_received', len(body))
+        if handler.headers.get('Content-Encoding', '').lower() == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def _make_handler_class(self):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server._count('num_connections')
+
+            def do_GET(self):
+                server._dispatch(self)
+
+            do_POST = do_PUT = do_DELETE = do_HEAD = do_GET
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
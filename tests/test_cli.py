@@ -1,5 +1,6 @@
 import json
 import os
+import tempfile
 import unittest
 from abc import ABCMeta
 from typing import List, Dict
@@ -70,6 +71,21 @@ class CliDatasetTest(CliTest):
                          result.output)
         self.assertEqual(0, result.exit_code)
 
+    def test_sbmfile_validate_many(self):
+        httpretty.register_uri(httpretty.POST,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/store/upload/submission/validate",
+                               status=200,
+                               body=json.dumps({'issues': [], 'status': 'OK'}).encode("utf-8"))
+        dataset_files = [self.get_input_path("chl", "chl-s170604w.sub"), self.get_input_path("chl", "chl-s170710w.sub")]
+        result = self.invoke_cli(["sbmfile", "val", "--processes", "1"] + dataset_files)
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual({dataset_file: {'issues': [], 'status': 'OK'} for dataset_file in dataset_files},
+                         json.loads(result.output))
+
+        result = self.invoke_cli(["sbmfile", "val", "--local", dataset_files[0]])
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertEqual({'issues': [], 'status': 'OK'}, json.loads(result.output))
+
     def test_ds_del(self):
         httpretty.register_uri(httpretty.DELETE,
                                f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/a298f4576e2",
@@ -78,6 +94,46 @@ class CliDatasetTest(CliTest):
         self.assertEqual("", result.output)
         self.assertEqual(0, result.exit_code)
 
+    def test_ds_del_from_file(self):
+        result = CliRunner().invoke(cli, ["ds", "del", "--from-file", "-", "--dry-run"],
+                                    input="a298f4576e2\n\n# comment\na298f4576e3\n", obj=self.api)
+        self.assertEqual([{"item": "a298f4576e2", "status": "DRY-RUN", "attempts": 0},
+                          {"item": "a298f4576e3", "status": "DRY-RUN", "attempts": 0}], json.loads(result.output))
+        self.assertEqual(0, result.exit_code)
+
+        httpretty.register_uri(httpretty.DELETE,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/a298f4576e2",
+                               status=404)
+        result = CliRunner().invoke(cli, ["ds", "del", "--from-file", "-"], input="a298f4576e2\n", obj=self.api)
+        self.assertEqual("FAILED", json.loads(result.output)[0]["status"])
+        self.assertEqual(1, result.exit_code)
+
+    def test_batch(self):
+        for dataset_id in ("a298f4576e2", "a298f4576e3"):
+            httpretty.register_uri(httpretty.DELETE,
+                                   f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/{dataset_id}",
+                                   status=200)
+        httpretty.register_uri(httpretty.GET,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/a298f4576e4",
+                               status=200, body=json.dumps({"id": "a298f4576e4"}).encode("utf-8"))
+        commands = ('# delete two datasets\n'
+                    'ds del a298f4576e2\n'
+                    '["ds", "del", "a298f4576e3"]\n'
+                    '\n'
+                    'ds get --id "a298f4576e4"\n'
+                    'ds frobnicate\n')
+
+        result = CliRunner().invoke(cli, ["batch", "-", "--parallel", "2"], input=commands, obj=self.api)
+
+        self.assertEqual([{"line": 2, "args": ["ds", "del", "a298f4576e2"], "exit_code": 0},
+                          {"line": 3, "args": ["ds", "del", "a298f4576e3"], "exit_code": 0},
+                          {"line": 5, "args": ["ds", "get", "--id", "a298f4576e4"], "exit_code": 0,
+                           "output": {"id": "a298f4576e4"}},
+                          {"line": 6, "args": ["ds", "frobnicate"], "exit_code": 2,
+                           "error": "No such command 'frobnicate'."}],
+                         [json.loads(line) for line in result.output.splitlines()])
+        self.assertEqual(1, result.exit_code)
+
     def test_ds_get(self):
         expected_response = {
             "metadata": dict(fields="a,b,c", units="m/s,m/s,m/s"),
@@ -119,6 +175,50 @@ class CliDatasetTest(CliTest):
         self.assertEqual("Error: Either <id> or <path> must be given.\n", result.output)
         self.assertEqual(1, result.exit_code)
 
+    def test_ds_get_stream(self):
+        dataset = {"metadata": {"missing": "-999"}, "records": [[43.1, 0.5], [43.2, -999]], "attributes": ["lat", "chl"]}
+        httpretty.register_uri(httpretty.GET,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/34986752749",
+                               status=200,
+                               body=json.dumps(dataset).encode("utf-8"))
+        result = self.invoke_cli(["ds", "get", "--id", "34986752749", "--stream"])
+        self.assertEqual("[43.1, 0.5]\n[43.2, -999]\n", result.output)
+        self.assertEqual(0, result.exit_code)
+
+        result = self.invoke_cli(["ds", "get", "--path", "a/b/c/d", "--stream"])
+        self.assertEqual("Error: --stream requires <id> and the JSON format.\n", result.output)
+        self.assertEqual(1, result.exit_code)
+
+    def test_ds_get_csv(self):
+        dataset = {"metadata": {"missing": "-999"}, "attributes": ["lat", "chl"],
+                   "records": [[43.1, 0.5], [43.2, -999]]}
+        httpretty.register_uri(httpretty.GET,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets/34986752749",
+                               status=200,
+                               body=json.dumps(dataset).encode("utf-8"))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            out_file = os.path.join(temp_dir, "ds.csv")
+            result = self.invoke_cli(["ds", "get", "--id", "34986752749", "--format", "csv", "-o", out_file])
+            self.assertEqual(f"Dataset written to {out_file}\n", result.output)
+            self.assertEqual(0, result.exit_code)
+            with open(out_file) as fp:
+                self.assertEqual("lat,chl\n43.1,0.5\n43.2,\n", fp.read())
+
+    def test_fidrad_upload_parallel(self):
+        httpretty.register_uri(httpretty.POST,
+                               f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/store/FidRadDB/upload/cal_char",
+                               status=200,
+                               body=json.dumps({"Warning!": ["checked"]}).encode("utf-8"))
+        cal_char_file = self.get_input_path("chl", "chl-s170604w.sub")
+
+        result = self.invoke_cli(["fidraddb", "upload"] + [cal_char_file] * 16)
+        self.assertIn("A maximum of 15 files per upload are allowed.", result.output)
+        self.assertEqual(2, result.exit_code)
+
+        result = self.invoke_cli(["fidraddb", "upload", "--parallel", "2"] + [cal_char_file] * 16)
+        self.assertEqual("{}\n\nWarning!\n\"\"\"\"\"\"\"\"\nchecked\nchecked\n", result.output)
+        self.assertEqual(0, result.exit_code)
+
     def test_ds_list(self):
         expected_response = {
             "totalCount": 2,
@@ -189,6 +289,21 @@ class CliDatasetTest(CliTest):
                          result.output)
         self.assertEqual(0, result.exit_code)
 
+    def test_ds_find_all(self):
+        def find(request, uri, response_headers):
+            offset = int(request.querystring['offset'][0])
+            ids = range(offset, min(offset + 2, 4))
+            body = {"datasets": [{"id": str(i), "path": "BIGELOW/BALCH/gnats"} for i in ids]}
+            return [200, response_headers, json.dumps(body)]
+
+        httpretty.register_uri(httpretty.GET, f"{TEST_URL}/ocdb/api/{TEST_API_VERSION}/datasets", body=find)
+        result = self.invoke_cli(["ds", "find", "--expr=metadata.cruise:gnats", "--count", "2", "--all"])
+        self.assertEqual('{"id": "1", "path": "BIGELOW/BALCH/gnats"}\n'
+                         '{"id": "2", "path": "BIGELOW/BALCH/gnats"}\n'
+                         '{"id": "3", "path": "BIGELOW/BALCH/gnats"}\n',
+                         result.output)
+        self.assertEqual(0, result.exit_code)
+
 
 class CliConfigTest(CliTest):
 
@@ -0,0 +1,43 @@
+import os
+import re
+import subprocess
+import sys
+import unittest
+
+# Budget for the cumulative import time of ocdb.main in milliseconds, override by OCDB_IMPORT_TIME_BUDGET
+IMPORT_TIME_BUDGET = float(os.environ.get('OCDB_IMPORT_TIME_BUDGET', '400'))
+
+# Modules that must only be imported when needed, e.g. for get_dataset(fmt='pandas')
+LAZY_MODULES = ('pandas', 'numpy', 'pyarrow')
+
+_IMPORT_TIME_PATTERN = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)')
+
+
+def _import_times(module: str) -> dict:
+    """Import *module* in a fresh interpreter and return the cumulative import times in ms by module name."""
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=root_dir, capture_output=True, text=True, check=True)
+    times = {}
+    for match in _IMPORT_TIME_PATTERN.finditer(result.stderr):
+        times[match.group(4)] = int(match.group(2)) / 1000
+    return times
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_heavy_modules_are_lazy(self):
+        times = _import_times('ocdb.main')
+        self.assertIn('ocdb.main', times)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_import_time_budget(self):
+        # Take the best of three runs to reduce noise, the first run may also compile bytecode
+        import_time = min(_import_times('ocdb.main')['ocdb.main'] for _ in range(3))
+        self.assertLess(import_time, IMPORT_TIME_BUDGET,
+                        f'importing ocdb.main took {import_time:.0f} ms, budget is {IMPORT_TIME_BUDGET:.0f} ms')
+
+
+if __name__ == '__main__':
+    unittest.main()